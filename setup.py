@@ -26,5 +26,5 @@ setup(
         "Programming Language :: Python :: 3.9",
         "Topic :: Scientific/Engineering",
     ],
-    install_requires=["stdlib_utils>=0.5.2"],
+    install_requires=["stdlib_utils>=0.5.2", "numpy>=1.21"],
 )
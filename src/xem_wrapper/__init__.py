@@ -7,19 +7,74 @@ https://pins.opalkelly.com/downloads
 
 For all Opal Kelly boards, words are 32-bits wide.
 """
+from . import backpressure
+from . import batch_decoding
+from . import channel_statistics
+from . import continuity
+from . import decimation
+from . import demux
+from . import fifo_telemetry
 from . import front_panel
+from . import group
+from . import latency
+from . import locking
 from . import main
+from . import pipe_in
+from . import polling
+from . import recording
+from . import ring_buffer
+from . import scripting
+from . import spill
+from . import status
+from . import time_alignment
+from . import triggers
+from .backpressure import BACKPRESSURE_POLICIES
+from .backpressure import BACKPRESSURE_POLICY_BLOCK
+from .backpressure import BACKPRESSURE_POLICY_DROP_NEWEST
+from .backpressure import BACKPRESSURE_POLICY_DROP_OLDEST
+from .backpressure import BACKPRESSURE_POLICY_SPILL
+from .backpressure import BackpressureCounters
+from .backpressure import BackpressureQueue
+from .backpressure import FifoReader
+from .batch_decoding import BatchDecoder
+from .channel_statistics import ChannelStatisticsSnapshot
+from .channel_statistics import RunningChannelStatistics
 from .constants import BLOCK_SIZE
+from .constants import CHANNELS_PER_DATA_FRAME
 from .constants import DATA_FRAME_SIZE_WORDS
 from .constants import DATA_FRAMES_PER_ROUND_ROBIN
 from .constants import HEADER_MAGIC_NUMBER
+from .constants import MAX_BLOCK_SIZE
+from .constants import NUM_CHANNELS
+from .constants import PIPE_IN_FIFO
 from .constants import PIPE_OUT_FIFO
+from .constants import ROUND_ROBIN_SIZE_WORDS
 from .constants import TRIGGER_IN_SPI
 from .constants import WIRE_IN_NUM_SAMPLES
 from .constants import WIRE_IN_RESET_MODE
 from .constants import WIRE_OUT_IS_PLL_LOCKED
 from .constants import WIRE_OUT_IS_SPI_RUNNING
 from .constants import WIRE_OUT_NUM_WORDS_FIFO
+from .constants import WIRE_OUT_NUM_WORDS_FREE_PIPE_IN
+from .continuity import CONTINUITY_EVENT_DISCONTINUITY
+from .continuity import CONTINUITY_EVENT_DROPPED
+from .continuity import CONTINUITY_EVENT_DUPLICATED
+from .continuity import ContinuityEvent
+from .continuity import SAMPLE_IDX_MODULUS
+from .continuity import SampleIndexContinuityMonitor
+from .decimation import DECIMATION_MODE_ENVELOPE
+from .decimation import DECIMATION_MODE_MEAN
+from .decimation import DECIMATION_MODE_STRIDE
+from .decimation import DECIMATION_MODES
+from .decimation import StreamingDecimator
+from .demux import build_round_robins
+from .demux import ChannelDemultiplexer
+from .demux import DATA_FRAME_DTYPE
+from .demux import demux_frames
+from .demux import demux_round_robins
+from .demux import find_first_incorrect_header
+from .demux import get_round_robin_view
+from .demux import ROUND_ROBIN_SIZE_BYTES
 from .exceptions import FPSimulatorInvalidFIFOValueError
 from .exceptions import OkHardwareCommunicationError
 from .exceptions import OkHardwareDataAlignmentError
@@ -42,50 +97,133 @@ from .exceptions import OkHardwareInvalidResetProfileError
 from .exceptions import OkHardwareTimeoutError
 from .exceptions import OkHardwareTransferError
 from .exceptions import OkHardwareUnsupportedFeatureError
+from .exceptions import OpalKellyAcquisitionNotArmedError
 from .exceptions import OpalKellyBoardAlreadyInitializedError
 from .exceptions import OpalKellyBoardNotInitializedError
 from .exceptions import OpalKellyDataBlockNot32BytesError
+from .exceptions import OpalKellyFifoTimeoutError
 from .exceptions import OpalKellyFileNotFoundError
 from .exceptions import OpalKellyFrontPanelNotSupportedError
+from .exceptions import OpalKellyHardwareError
 from .exceptions import OpalKellyHeaderNotEightBytesError
 from .exceptions import OpalKellyIDGreaterThan32BytesError
+from .exceptions import OpalKellyIncompleteRoundRobinError
 from .exceptions import OpalKellyIncorrectHeaderError
+from .exceptions import OpalKellyInvalidBlockSizeError
+from .exceptions import OpalKellyMaxReadSizeTooSmallError
 from .exceptions import OpalKellyNoDeviceFoundError
+from .exceptions import OpalKellyNotEnoughTimingPointsError
+from .exceptions import OpalKellyPipeInDataNotBlockAlignedError
+from .exceptions import OpalKellyPipeInFreeSpaceTimeoutError
+from .exceptions import OpalKellyRecordingFormatError
+from .exceptions import OpalKellyReplayError
 from .exceptions import OpalKellySampleIdxNotFourBytesError
+from .exceptions import OpalKellyScriptError
+from .exceptions import OpalKellyScriptValueOutOfRangeError
+from .exceptions import OpalKellySequenceNotRegisteredError
 from .exceptions import OpalKellySpiAlreadyStartedError
 from .exceptions import OpalKellySpiAlreadyStoppedError
 from .exceptions import OpalKellyWordNotTwoBytesError
 from .exceptions import parse_hardware_return_code
+from .fifo_telemetry import FifoTelemetry
+from .fifo_telemetry import FifoTelemetrySnapshot
+from .front_panel import clear_calibrated_block_sizes
 from .front_panel import FrontPanel
 from .front_panel import FrontPanelBase
 from .front_panel import FrontPanelSimulator
+from .front_panel import get_calibrated_block_size
 from .front_panel import validate_simulated_fifo_reads
+from .group import FrontPanelGroup
+from .group import MergedRoundRobins
+from .group import SampleIndexStreamMerger
+from .latency import get_latency_bucket_upper_bound_ns
+from .latency import LATENCY_HISTOGRAM_NUM_BUCKETS
+from .latency import LatencyRecorder
+from .latency import MethodLatencyStatistics
+from .latency import OTHER_ERROR_NAME
+from .locking import EndpointLockingXem
+from .locking import LOCK_GROUP_DEVICE
+from .locking import LOCK_GROUP_PIPE
+from .locking import LOCK_GROUP_TRIGGERS
+from .locking import LOCK_GROUP_WIRE_INS
+from .locking import LOCK_GROUP_WIRE_OUTS
 from .main import activate_trigger_in
+from .main import align_max_read_num_bytes
+from .main import benchmark_block_sizes
 from .main import build_header_magic_number_bytes
 from .main import check_file_exists
 from .main import check_header
 from .main import convert_sample_idx
 from .main import convert_wire_value
 from .main import convert_word
+from .main import create_lua_script_engine
+from .main import FifoRead
 from .main import get_device_id
+from .main import get_num_bytes_of_round_robins
 from .main import get_num_words_fifo
+from .main import get_num_words_free_pipe_in
+from .main import get_read_alignment_num_bytes
 from .main import get_serial_number
 from .main import initialize_board
 from .main import is_pll_locked
+from .main import is_short_transfer
 from .main import is_spi_running
+from .main import is_triggered
+from .main import load_script
 from .main import open_board
 from .main import read_from_fifo
+from .main import read_from_fifo_into
+from .main import read_from_fifo_into_with_status
+from .main import read_from_fifo_with_status
+from .main import read_register
+from .main import read_registers
 from .main import read_wire_out
+from .main import read_wire_outs
 from .main import reset_fifos
+from .main import run_script_function
 from .main import set_device_id
 from .main import set_num_samples
 from .main import set_run_mode
 from .main import set_wire_in
 from .main import start_acquisition
 from .main import stop_acquisition
+from .main import update_trigger_outs
+from .main import validate_block_size
 from .main import validate_device_id
+from .main import validate_pipe_in_num_bytes
+from .main import write_register
+from .main import write_registers
+from .main import write_to_pipe_in
+from .ok_wrapper import FrontPanelDevices
 from .ok_wrapper import okCFrontPanel
-from .ok_wrapper import okTDeviceInfo, FrontPanelDevices
+from .ok_wrapper import okCScriptEngine
+from .ok_wrapper import okCScriptValue
+from .ok_wrapper import okCScriptValues
+from .ok_wrapper import okTDeviceInfo
+from .pipe_in import PipeInStreamWriter
+from .polling import FifoPollingScheduler
+from .recording import read_recording
+from .recording import RecordedCall
+from .recording import RECORDING_DATA_FILE_SUFFIX
+from .recording import RecordingXem
+from .recording import ReplayXem
+from .recording import UnsupportedValue
+from .ring_buffer import SharedMemoryRingBuffer
+from .ring_buffer import SharedMemoryRingBufferReader
+from .scripting import build_start_acquisition_sequence
+from .scripting import ControlSequence
+from .scripting import convert_to_script_argument
+from .scripting import LUA_DEVICE_NAME
+from .scripting import SEQUENCE_STEP_ACTIVATE_TRIGGER_IN
+from .scripting import SEQUENCE_STEP_SET_WIRE_IN
+from .scripting import SEQUENCE_STEP_WRITE_REGISTER
+from .scripting import SequenceStep
+from .scripting import UINT32_MODULUS
+from .spill import MemoryMappedSpillFile
+from .status import BoardStatus
+from .status import StatusPoller
+from .time_alignment import SampleClockAligner
+from .triggers import TriggerOutWaiter
 
 __all__ = [
     "convert_sample_idx",
@@ -166,5 +304,143 @@ __all__ = [
     "DATA_FRAMES_PER_ROUND_ROBIN",
     "activate_trigger_in",
     "convert_wire_value",
-    "okTDeviceInfo", "FrontPanelDevices"
+    "okTDeviceInfo",
+    "FrontPanelDevices",
+    "ROUND_ROBIN_SIZE_WORDS",
+    "polling",
+    "FifoPollingScheduler",
+    "MAX_BLOCK_SIZE",
+    "OpalKellyInvalidBlockSizeError",
+    "validate_block_size",
+    "get_read_alignment_num_bytes",
+    "benchmark_block_sizes",
+    "get_calibrated_block_size",
+    "clear_calibrated_block_sizes",
+    "OpalKellyMaxReadSizeTooSmallError",
+    "align_max_read_num_bytes",
+    "is_short_transfer",
+    "read_from_fifo_into",
+    "ring_buffer",
+    "SharedMemoryRingBuffer",
+    "SharedMemoryRingBufferReader",
+    "CHANNELS_PER_DATA_FRAME",
+    "NUM_CHANNELS",
+    "OpalKellyIncompleteRoundRobinError",
+    "demux",
+    "ChannelDemultiplexer",
+    "DATA_FRAME_DTYPE",
+    "demux_round_robins",
+    "get_round_robin_view",
+    "ROUND_ROBIN_SIZE_BYTES",
+    "build_round_robins",
+    "continuity",
+    "SampleIndexContinuityMonitor",
+    "ContinuityEvent",
+    "CONTINUITY_EVENT_DROPPED",
+    "CONTINUITY_EVENT_DUPLICATED",
+    "CONTINUITY_EVENT_DISCONTINUITY",
+    "SAMPLE_IDX_MODULUS",
+    "demux_frames",
+    "decimation",
+    "StreamingDecimator",
+    "DECIMATION_MODE_STRIDE",
+    "DECIMATION_MODE_MEAN",
+    "DECIMATION_MODE_ENVELOPE",
+    "DECIMATION_MODES",
+    "channel_statistics",
+    "RunningChannelStatistics",
+    "ChannelStatisticsSnapshot",
+    "time_alignment",
+    "SampleClockAligner",
+    "OpalKellyNotEnoughTimingPointsError",
+    "group",
+    "FrontPanelGroup",
+    "SampleIndexStreamMerger",
+    "MergedRoundRobins",
+    "update_trigger_outs",
+    "is_triggered",
+    "triggers",
+    "TriggerOutWaiter",
+    "read_register",
+    "write_register",
+    "read_registers",
+    "write_registers",
+    "PIPE_IN_FIFO",
+    "WIRE_OUT_NUM_WORDS_FREE_PIPE_IN",
+    "OpalKellyPipeInDataNotBlockAlignedError",
+    "OpalKellyPipeInFreeSpaceTimeoutError",
+    "validate_pipe_in_num_bytes",
+    "write_to_pipe_in",
+    "get_num_words_free_pipe_in",
+    "pipe_in",
+    "PipeInStreamWriter",
+    "OpalKellyScriptError",
+    "OpalKellySequenceNotRegisteredError",
+    "create_lua_script_engine",
+    "load_script",
+    "run_script_function",
+    "scripting",
+    "ControlSequence",
+    "SequenceStep",
+    "build_start_acquisition_sequence",
+    "LUA_DEVICE_NAME",
+    "SEQUENCE_STEP_SET_WIRE_IN",
+    "SEQUENCE_STEP_ACTIVATE_TRIGGER_IN",
+    "SEQUENCE_STEP_WRITE_REGISTER",
+    "okCScriptEngine",
+    "okCScriptValue",
+    "okCScriptValues",
+    "latency",
+    "LatencyRecorder",
+    "MethodLatencyStatistics",
+    "LATENCY_HISTOGRAM_NUM_BUCKETS",
+    "OTHER_ERROR_NAME",
+    "OpalKellyHardwareError",
+    "get_latency_bucket_upper_bound_ns",
+    "fifo_telemetry",
+    "FifoTelemetry",
+    "FifoTelemetrySnapshot",
+    "recording",
+    "RecordingXem",
+    "ReplayXem",
+    "RecordedCall",
+    "read_recording",
+    "RECORDING_DATA_FILE_SUFFIX",
+    "UnsupportedValue",
+    "OpalKellyRecordingFormatError",
+    "OpalKellyReplayError",
+    "read_wire_outs",
+    "status",
+    "StatusPoller",
+    "BoardStatus",
+    "locking",
+    "EndpointLockingXem",
+    "LOCK_GROUP_WIRE_INS",
+    "LOCK_GROUP_WIRE_OUTS",
+    "LOCK_GROUP_TRIGGERS",
+    "LOCK_GROUP_DEVICE",
+    "LOCK_GROUP_PIPE",
+    "batch_decoding",
+    "BatchDecoder",
+    "find_first_incorrect_header",
+    "backpressure",
+    "BackpressureQueue",
+    "BackpressureCounters",
+    "FifoReader",
+    "BACKPRESSURE_POLICY_BLOCK",
+    "BACKPRESSURE_POLICY_DROP_OLDEST",
+    "BACKPRESSURE_POLICY_DROP_NEWEST",
+    "BACKPRESSURE_POLICY_SPILL",
+    "BACKPRESSURE_POLICIES",
+    "spill",
+    "MemoryMappedSpillFile",
+    "OpalKellyFifoTimeoutError",
+    "FifoRead",
+    "read_from_fifo_with_status",
+    "read_from_fifo_into_with_status",
+    "get_num_bytes_of_round_robins",
+    "OpalKellyAcquisitionNotArmedError",
+    "convert_to_script_argument",
+    "UINT32_MODULUS",
+    "OpalKellyScriptValueOutOfRangeError",
 ]
@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""A byte-bounded queue between the FIFO reader and slower consumers."""
+from collections import deque
+import queue
+import threading
+import time
+from typing import Deque
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from .front_panel import FrontPanelBase
+from .polling import FifoPollingScheduler
+from .spill import MemoryMappedSpillFile
+
+BACKPRESSURE_POLICY_BLOCK = "block"
+BACKPRESSURE_POLICY_DROP_OLDEST = "drop_oldest"
+BACKPRESSURE_POLICY_DROP_NEWEST = "drop_newest"
+BACKPRESSURE_POLICY_SPILL = "spill"
+BACKPRESSURE_POLICIES = (
+    BACKPRESSURE_POLICY_BLOCK,
+    BACKPRESSURE_POLICY_DROP_OLDEST,
+    BACKPRESSURE_POLICY_DROP_NEWEST,
+    BACKPRESSURE_POLICY_SPILL,
+)
+
+
+class BackpressureCounters(NamedTuple):
+    """The counters of a BackpressureQueue at one moment.
+
+    Attributes:
+        num_chunks_put: the number of chunks offered to the queue
+        num_bytes_put: the number of bytes offered to the queue
+        num_chunks_got: the number of chunks taken out of the queue
+        num_bytes_got: the number of bytes taken out of the queue
+        num_chunks_dropped: the number of chunks discarded to stay within the byte budget, or offered after the queue was closed
+        num_bytes_dropped: the number of bytes in the dropped chunks
+        num_chunks_spilled: the number of chunks written to the spill file
+        num_bytes_spilled: the number of bytes in the spilled chunks
+        num_blocked_puts: the number of puts that had to wait for room in the queue
+        seconds_blocked: the total time puts spent waiting for room in the queue
+        peak_num_bytes_in_memory: the most bytes held in memory at once
+        peak_num_spilled_bytes: the most bytes waiting in the spill file at once
+    """
+
+    num_chunks_put: int
+    num_bytes_put: int
+    num_chunks_got: int
+    num_bytes_got: int
+    num_chunks_dropped: int
+    num_bytes_dropped: int
+    num_chunks_spilled: int
+    num_bytes_spilled: int
+    num_blocked_puts: int
+    seconds_blocked: float
+    peak_num_bytes_in_memory: int
+    peak_num_spilled_bytes: int
+
+
+class BackpressureQueue:
+    """Hand FIFO reads to consumers while holding at most a fixed number of bytes in memory.
+
+    When a chunk does not fit in the byte budget, the policy decides what
+    happens:
+
+    block: the put waits until consumers make room, so the reader stops
+    reading and the data backs up into the FIFO of the board.
+
+    drop_oldest: the oldest chunks in memory are discarded until the new
+    one fits.
+
+    drop_newest: the new chunk is discarded.
+
+    spill: the new chunk is appended to a MemoryMappedSpillFile instead,
+    and so is every chunk after it until consumers have caught up, so that
+    chunks still come out of the queue in the order they were put in. The
+    reader keeps draining the board FIFO at memory speed while the RAM used
+    stays within the budget. Chunks larger than the whole budget are
+    spilled too.
+
+    Chunks are kept as given, not copied, so they must not be modified
+    after being put. Every put and get updates the counters returned by
+    get_counters.
+
+    Args:
+        max_num_bytes: the byte budget of the chunks held in memory. Chunks larger than this are rejected, except by the spill policy
+        policy: one of BACKPRESSURE_POLICIES
+        spill_directory: the directory of the spill file. Defaults to the directory used by the tempfile module
+    """
+
+    def __init__(
+        self,
+        max_num_bytes: int,
+        policy: str = BACKPRESSURE_POLICY_BLOCK,
+        spill_directory: Optional[str] = None,
+    ) -> None:
+        if max_num_bytes < 1:
+            raise ValueError(f"max_num_bytes must be at least 1, got {max_num_bytes}")
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(
+                f"policy must be one of {BACKPRESSURE_POLICIES}, got '{policy}'"
+            )
+        self._max_num_bytes = max_num_bytes
+        self._policy = policy
+        self._spill_directory = spill_directory
+        self._condition = threading.Condition()
+        self._chunks: Deque[Union[bytes, bytearray, memoryview]] = deque()
+        self._num_bytes = 0
+        self._spill_file: Optional[MemoryMappedSpillFile] = None
+        self._is_closed = False
+
+        self._num_chunks_put = 0
+        self._num_bytes_put = 0
+        self._num_chunks_got = 0
+        self._num_bytes_got = 0
+        self._num_chunks_dropped = 0
+        self._num_bytes_dropped = 0
+        self._num_chunks_spilled = 0
+        self._num_bytes_spilled = 0
+        self._num_blocked_puts = 0
+        self._seconds_blocked = 0.0
+        self._peak_num_bytes = 0
+        self._peak_num_spilled_bytes = 0
+
+    def get_max_num_bytes(self) -> int:
+        return self._max_num_bytes
+
+    def get_policy(self) -> str:
+        return self._policy
+
+    def get_num_bytes(self) -> int:
+        """Get the number of bytes held in memory."""
+        with self._condition:
+            return self._num_bytes
+
+    def get_num_spilled_bytes(self) -> int:
+        """Get the number of bytes waiting in the spill file."""
+        with self._condition:
+            return self._get_num_spilled_chunks_and_bytes()[1]
+
+    def get_num_chunks(self) -> int:
+        """Get the number of chunks waiting to be taken, in memory or spilled."""
+        with self._condition:
+            return len(self._chunks) + self._get_num_spilled_chunks_and_bytes()[0]
+
+    def _get_num_spilled_chunks_and_bytes(self) -> Tuple[int, int]:
+        if self._spill_file is None:
+            return 0, 0
+        return self._spill_file.get_num_chunks(), self._spill_file.get_num_bytes()
+
+    def is_closed(self) -> bool:
+        return self._is_closed
+
+    def get_counters(self) -> BackpressureCounters:
+        with self._condition:
+            return BackpressureCounters(
+                num_chunks_put=self._num_chunks_put,
+                num_bytes_put=self._num_bytes_put,
+                num_chunks_got=self._num_chunks_got,
+                num_bytes_got=self._num_bytes_got,
+                num_chunks_dropped=self._num_chunks_dropped,
+                num_bytes_dropped=self._num_bytes_dropped,
+                num_chunks_spilled=self._num_chunks_spilled,
+                num_bytes_spilled=self._num_bytes_spilled,
+                num_blocked_puts=self._num_blocked_puts,
+                seconds_blocked=self._seconds_blocked,
+                peak_num_bytes_in_memory=self._peak_num_bytes,
+                peak_num_spilled_bytes=self._peak_num_spilled_bytes,
+            )
+
+    def _drop(self, num_bytes: int) -> None:
+        self._num_chunks_dropped += 1
+        self._num_bytes_dropped += num_bytes
+
+    def _wait_for_room(self, num_bytes: int, timeout: Optional[float]) -> None:
+        if self._num_bytes + num_bytes <= self._max_num_bytes or self._is_closed:
+            return
+        self._num_blocked_puts += 1
+        start = time.perf_counter()
+        try:
+            if not self._condition.wait_for(
+                lambda: self._num_bytes + num_bytes <= self._max_num_bytes
+                or self._is_closed,
+                timeout=timeout,
+            ):
+                raise queue.Full()
+        finally:
+            self._seconds_blocked += time.perf_counter() - start
+
+    def put(
+        self,
+        data: Union[bytes, bytearray, memoryview],
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """Add a chunk to the end of the queue, applying the policy if it does not fit.
+
+        Args:
+            data: the chunk, e.g. the result of read_from_fifo
+            timeout: with the block policy, the longest time in seconds to wait for room. Waits indefinitely if None
+
+        Return:
+            Whether the chunk was queued (in memory or spilled) rather than dropped
+
+        Raises:
+            queue.Full: if the block policy timed out waiting for room. The chunk is not queued and not counted
+            ValueError: if the chunk is larger than the byte budget and the policy is not spill
+        """
+        num_bytes = len(data)
+        if (
+            num_bytes > self._max_num_bytes
+            and self._policy != BACKPRESSURE_POLICY_SPILL
+        ):
+            raise ValueError(
+                f"A chunk of {num_bytes} bytes can never fit in the budget of {self._max_num_bytes} bytes"
+            )
+        with self._condition:
+            if self._policy == BACKPRESSURE_POLICY_BLOCK:
+                self._wait_for_room(num_bytes, timeout)
+            self._num_chunks_put += 1
+            self._num_bytes_put += num_bytes
+            if self._is_closed:
+                self._drop(num_bytes)
+                return False
+            is_spilling = (
+                self._spill_file is not None and self._spill_file.get_num_chunks() > 0
+            )
+            if is_spilling or self._num_bytes + num_bytes > self._max_num_bytes:
+                if self._policy == BACKPRESSURE_POLICY_DROP_NEWEST:
+                    self._drop(num_bytes)
+                    return False
+                if self._policy == BACKPRESSURE_POLICY_SPILL:
+                    if self._spill_file is None:
+                        self._spill_file = MemoryMappedSpillFile(self._spill_directory)
+                    self._spill_file.append(data)
+                    self._num_chunks_spilled += 1
+                    self._num_bytes_spilled += num_bytes
+                    self._peak_num_spilled_bytes = max(
+                        self._peak_num_spilled_bytes, self._spill_file.get_num_bytes()
+                    )
+                    self._condition.notify_all()
+                    return True
+                while self._num_bytes + num_bytes > self._max_num_bytes:
+                    self._drop(len(self._chunks[0]))
+                    self._num_bytes -= len(self._chunks.popleft())
+            self._chunks.append(data)
+            self._num_bytes += num_bytes
+            self._peak_num_bytes = max(self._peak_num_bytes, self._num_bytes)
+            self._condition.notify_all()
+            return True
+
+    def get(
+        self, timeout: Optional[float] = None
+    ) -> Optional[Union[bytes, bytearray, memoryview]]:
+        """Take the chunk at the front of the queue, waiting for one if it is empty.
+
+        Args:
+            timeout: the longest time in seconds to wait for a chunk. Waits indefinitely if None
+
+        Return:
+            The chunk, or None if none arrived in time or the queue is closed and empty
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._chunks
+                or self._get_num_spilled_chunks_and_bytes()[0]
+                or self._is_closed,
+                timeout=timeout,
+            ):
+                return None
+            data: Union[bytes, bytearray, memoryview]
+            if self._chunks:
+                data = self._chunks.popleft()
+                self._num_bytes -= len(data)
+            elif self._get_num_spilled_chunks_and_bytes()[0]:
+                data = self._spill_file.pop()  # type: ignore[union-attr] # there are spilled chunks
+            else:
+                return None
+            if self._is_closed:
+                self._remove_spill_file_if_empty()
+            self._num_chunks_got += 1
+            self._num_bytes_got += len(data)
+            self._condition.notify_all()
+            return data
+
+    def close(self) -> None:
+        """Stop accepting chunks and wake every waiting put and get.
+
+        Chunks already queued can still be taken, and the spill file is
+        removed once they have been.
+        """
+        with self._condition:
+            self._is_closed = True
+            self._remove_spill_file_if_empty()
+            self._condition.notify_all()
+
+    def _remove_spill_file_if_empty(self) -> None:
+        if self._spill_file is not None and self._spill_file.get_num_chunks() == 0:
+            self._spill_file.close()
+            self._spill_file = None
+
+
+class FifoReader:
+    """Read the FIFO of a board from a background thread into a BackpressureQueue.
+
+    Reads are scheduled by a FifoPollingScheduler, and each is limited to
+    the byte budget of the queue, so that even after a long stall no read is
+    too large for the queue to take. With the block policy the thread stops
+    reading while the queue is full, and the data backs up into the FIFO of
+    the board instead of host memory. Consumers take the chunks from the
+    queue.
+
+    Args:
+        front_panel: the initialized board (or simulator) to read from
+        output_queue: the queue the reads are put into
+        scheduler: decides when to read. Defaults to a FifoPollingScheduler with default settings
+    """
+
+    # how often a put waiting for room checks whether the reader has been stopped
+    default_put_timeout = 0.1
+
+    def __init__(
+        self,
+        front_panel: FrontPanelBase,
+        output_queue: BackpressureQueue,
+        scheduler: Optional[FifoPollingScheduler] = None,
+    ) -> None:
+        if scheduler is None:
+            scheduler = FifoPollingScheduler()
+        self._front_panel = front_panel
+        self._output_queue = output_queue
+        self._scheduler = scheduler
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._background_error: Optional[Exception] = None
+
+    def get_output_queue(self) -> BackpressureQueue:
+        return self._output_queue
+
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Start reading in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._background_error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread.
+
+        A read still waiting for room in the queue is discarded. If reading
+        raised an error, the thread stopped at that point and the error is
+        raised here.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        if self._background_error is not None:
+            raise self._background_error
+
+    def _put(self, data: Union[bytearray, memoryview]) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self._output_queue.put(data, timeout=self.default_put_timeout)
+            except queue.Full:
+                continue
+            return
+
+    def _run(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                data, seconds_until_next_poll = self._scheduler.poll(
+                    self._front_panel,
+                    max_bytes=self._output_queue.get_max_num_bytes(),
+                )
+                if len(data) > 0:
+                    self._put(data)
+                self._stop_event.wait(seconds_until_next_poll)
+        except Exception as e:  # pylint: disable=broad-except # the error is raised again by stop
+            self._background_error = e
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""Decoding large captures of FIFO data in a pool of processes.
+
+The data is copied once into shared memory, split into chunks of whole
+round robins, and every worker de-interleaves its chunks straight into
+shared output arrays at their final position, so the per-channel arrays
+are assembled in order without sending any samples through pipes. The
+arrays returned are views of the shared output memory itself, which is
+released once they (and every view of them) have been garbage collected.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from multiprocessing import shared_memory
+from typing import Any
+from typing import cast
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+import weakref
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .constants import CHANNELS_PER_DATA_FRAME
+from .constants import DATA_FRAMES_PER_ROUND_ROBIN
+from .constants import NUM_CHANNELS
+from .demux import DATA_FRAME_DTYPE
+from .demux import find_first_incorrect_header
+from .demux import get_round_robin_view
+from .demux import ROUND_ROBIN_SIZE_BYTES
+from .exceptions import OpalKellyIncompleteRoundRobinError
+from .exceptions import OpalKellyIncorrectHeaderError
+
+
+def _decode_frames_into(
+    frames: NDArray[np.void],
+    channel_data: NDArray[np.uint16],
+    sample_indices: NDArray[np.uint32],
+    start: int,
+    stop: int,
+) -> None:
+    # the round robins from start to stop of all the frames are written to the same positions of the outputs
+    num_round_robins = channel_data.shape[1]
+    channel_data.reshape(
+        DATA_FRAMES_PER_ROUND_ROBIN, CHANNELS_PER_DATA_FRAME, num_round_robins
+    )[:, :, start:stop] = frames[start:stop]["data"].transpose(1, 2, 0)
+    sample_indices[:, start:stop] = frames[start:stop]["sample_idx"].T
+
+
+def _decode_chunk_into(
+    data_buffer: memoryview,
+    channel_data_buffer: memoryview,
+    sample_indices_buffer: memoryview,
+    num_round_robins: int,
+    start: int,
+    stop: int,
+    check_headers: bool,
+) -> Optional[int]:
+    frames = np.ndarray(
+        (num_round_robins, DATA_FRAMES_PER_ROUND_ROBIN),
+        dtype=DATA_FRAME_DTYPE,
+        buffer=data_buffer,
+    )
+    if check_headers:
+        first_bad_frame = find_first_incorrect_header(frames[start:stop])
+        if first_bad_frame is not None:
+            return start * DATA_FRAMES_PER_ROUND_ROBIN + first_bad_frame
+    _decode_frames_into(
+        frames,
+        np.ndarray(
+            (NUM_CHANNELS, num_round_robins),
+            dtype=np.uint16,
+            buffer=channel_data_buffer,
+        ),
+        np.ndarray(
+            (DATA_FRAMES_PER_ROUND_ROBIN, num_round_robins),
+            dtype=np.uint32,
+            buffer=sample_indices_buffer,
+        ),
+        start,
+        stop,
+    )
+    return None
+
+
+def _decode_chunk(
+    shared_memory_names: Tuple[str, str, str],
+    num_round_robins: int,
+    start: int,
+    stop: int,
+    check_headers: bool,
+) -> Optional[int]:
+    # runs in a worker process. Returns the position of the first data frame with an incorrect header, if any
+    memories = [shared_memory.SharedMemory(name=name) for name in shared_memory_names]
+    try:
+        # the arrays viewing the shared memory are all released when this returns, so the memory can be closed
+        return _decode_chunk_into(
+            cast(memoryview, memories[0].buf),
+            cast(memoryview, memories[1].buf),
+            cast(memoryview, memories[2].buf),
+            num_round_robins,
+            start,
+            stop,
+            check_headers,
+        )
+    finally:
+        for memory in memories:
+            memory.close()
+
+
+class _SharedMemoryArrayOwner:
+    # exposes an array of shared memory to numpy without holding a buffer of it, so the memory can be closed once this is garbage collected
+    def __init__(
+        self, memory: shared_memory.SharedMemory, shape: Tuple[int, int], dtype: Any
+    ) -> None:
+        self.__array_interface__: Dict[str, Any] = np.ndarray(
+            shape, dtype=dtype, buffer=memory.buf
+        ).__array_interface__
+        weakref.finalize(self, memory.close)
+
+
+def _view_shared_memory(
+    memory: shared_memory.SharedMemory, shape: Tuple[int, int], dtype: Any
+) -> NDArray[Any]:
+    # every view of the returned array references the owner, so the memory stays open until all of them are gone
+    return np.asarray(_SharedMemoryArrayOwner(memory, shape, dtype))
+
+
+class BatchDecoder:
+    """De-interleave large amounts of FIFO data into per-channel arrays using every core.
+
+    Meant for catching up on a backlog of raw captures, e.g. after a
+    consumer stalled. The channel data is the same as demux_round_robins
+    gives, but chunks of round robins are decoded in parallel by a pool of
+    worker processes that is started on first use and kept until close is
+    called. Data of no more than one chunk is decoded in this process,
+    since starting work in the pool would cost more than the decoding.
+
+    To keep memory use close to that of the data itself, the sample index
+    is given once per data frame rather than once per channel, and the
+    arrays returned are backed by the shared memory the workers wrote to
+    instead of being copied out of it.
+
+    Args:
+        max_workers: the number of worker processes. Defaults to the number of CPUs
+        chunk_num_round_robins: the number of round robins each worker decodes at a time
+        check_headers: whether to verify the header of every data frame
+    """
+
+    default_chunk_num_round_robins = 16384
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        chunk_num_round_robins: Optional[int] = None,
+        check_headers: bool = True,
+    ) -> None:
+        if chunk_num_round_robins is None:
+            chunk_num_round_robins = self.default_chunk_num_round_robins
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+        if chunk_num_round_robins < 1:
+            raise ValueError(
+                f"chunk_num_round_robins must be at least 1, got {chunk_num_round_robins}"
+            )
+        self._max_workers = max_workers
+        self._chunk_num_round_robins = chunk_num_round_robins
+        self._check_headers = check_headers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def get_chunk_num_round_robins(self) -> int:
+        return self._chunk_num_round_robins
+
+    def decode(
+        self, data: Union[bytes, bytearray, memoryview]
+    ) -> Tuple[NDArray[np.uint16], NDArray[np.uint32]]:
+        """Split FIFO data into one contiguous array per channel.
+
+        Args:
+            data: whole round robins, e.g. many reads from the FIFO concatenated
+
+        Return:
+            An array of shape (NUM_CHANNELS, number of round robins) holding the value of each channel's samples, and one of shape (DATA_FRAMES_PER_ROUND_ROBIN, number of round robins) holding the sample index of each data frame. Channel i was sampled at the sample index of data frame i // CHANNELS_PER_DATA_FRAME
+        """
+        num_bytes = len(data)
+        if num_bytes % ROUND_ROBIN_SIZE_BYTES != 0:
+            raise OpalKellyIncompleteRoundRobinError(
+                f"Data of {num_bytes} bytes is not a whole number of {ROUND_ROBIN_SIZE_BYTES} byte round robins"
+            )
+        num_round_robins = num_bytes // ROUND_ROBIN_SIZE_BYTES
+        if num_round_robins <= self._chunk_num_round_robins:
+            frames = get_round_robin_view(data, check_headers=self._check_headers)
+            channel_data = np.empty((NUM_CHANNELS, num_round_robins), dtype=np.uint16)
+            sample_indices = np.empty(
+                (DATA_FRAMES_PER_ROUND_ROBIN, num_round_robins), dtype=np.uint32
+            )
+            _decode_frames_into(
+                frames, channel_data, sample_indices, 0, num_round_robins
+            )
+            return channel_data, sample_indices
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+
+        data_memory = shared_memory.SharedMemory(create=True, size=num_bytes)
+        output_memories: List[shared_memory.SharedMemory] = []
+        try:
+            for size in (
+                NUM_CHANNELS * num_round_robins * 2,
+                DATA_FRAMES_PER_ROUND_ROBIN * num_round_robins * 4,
+            ):
+                output_memories.append(
+                    shared_memory.SharedMemory(create=True, size=size)
+                )
+            channel_data_memory, sample_indices_memory = output_memories
+            cast(memoryview, data_memory.buf)[:num_bytes] = data
+            shared_memory_names = (
+                data_memory.name,
+                channel_data_memory.name,
+                sample_indices_memory.name,
+            )
+            futures = [
+                self._executor.submit(
+                    _decode_chunk,
+                    shared_memory_names,
+                    num_round_robins,
+                    start,
+                    min(start + self._chunk_num_round_robins, num_round_robins),
+                    self._check_headers,
+                )
+                for start in range(0, num_round_robins, self._chunk_num_round_robins)
+            ]
+            # no worker may still be using the shared memory when it is released
+            wait(futures)
+            for future in futures:
+                first_bad_frame = future.result()
+                if first_bad_frame is not None:
+                    raise OpalKellyIncorrectHeaderError(
+                        f"Data frame {first_bad_frame} does not start with the header magic number"
+                    )
+            channel_data = _view_shared_memory(
+                channel_data_memory, (NUM_CHANNELS, num_round_robins), np.uint16
+            )
+            sample_indices = _view_shared_memory(
+                sample_indices_memory,
+                (DATA_FRAMES_PER_ROUND_ROBIN, num_round_robins),
+                np.uint32,
+            )
+        except BaseException:
+            for memory in output_memories:
+                memory.close()
+            raise
+        finally:
+            data_memory.close()
+            data_memory.unlink()
+            # the name is not needed once the workers are done. The memory itself stays until it is closed
+            for memory in output_memories:
+                memory.unlink()
+        return channel_data, sample_indices
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of the acquisition hot path, with JSON results and baseline comparison.
+
+Run the whole suite from the command line with::
+
+    python -m xem_wrapper.benchmarks --output results.json --baseline baseline.json
+
+No board is needed: FrontPanel benchmarks use BenchmarkXem, which answers
+every call immediately, so they measure only the cost of the Python side.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+from stdlib_utils import SimpleMultiprocessingQueue
+
+from .constants import HEADER_MAGIC_NUMBER
+from .constants import NUM_CHANNELS
+from .constants import PIPE_OUT_FIFO
+from .constants import WIRE_OUT_NUM_WORDS_FIFO
+from .demux import build_round_robins
+from .demux import ChannelDemultiplexer
+from .demux import demux_round_robins
+from .demux import ROUND_ROBIN_SIZE_BYTES
+from .front_panel import FrontPanel
+from .front_panel import FrontPanelBase
+from .front_panel import FrontPanelSimulator
+from .main import build_header_magic_number_bytes
+from .main import check_header
+from .main import convert_sample_idx
+from .main import convert_word
+from .main import read_from_fifo
+from .main import read_wire_out
+from .main import set_wire_in
+from .ok_wrapper import okCFrontPanel
+
+BENCHMARK_RESULTS_FORMAT_VERSION = 1
+
+# the number of round robins in each FIFO read of the read and bulk decoding benchmarks
+BENCHMARK_NUM_ROUND_ROBINS = 64
+
+
+class BenchmarkXem(okCFrontPanel):
+    """A stand-in for a board that answers every call immediately.
+
+    The FIFO always holds num_words_fifo words, and reads from it return
+    the requested number of bytes without writing to the buffer.
+
+    Args:
+        num_words_fifo: the value of WIRE_OUT_NUM_WORDS_FIFO
+    """
+
+    def __init__(self, num_words_fifo: int = 0) -> None:
+        super().__init__()
+        self._num_words_fifo = num_words_fifo
+
+    # pylint: disable=invalid-name,no-self-use,unused-argument # these override the SWIG methods
+
+    def IsFrontPanelEnabled(self) -> bool:
+        return True
+
+    def UpdateWireOuts(self) -> int:
+        return 0
+
+    def GetWireOutValue(self, ep_addr: int) -> int:
+        if ep_addr == WIRE_OUT_NUM_WORDS_FIFO:
+            return self._num_words_fifo
+        return 0
+
+    def SetWireInValue(self, ep_addr: int, value: int, mask: int) -> int:
+        return 0
+
+    def UpdateWireIns(self) -> int:
+        return 0
+
+    def ReadFromBlockPipeOut(self, ep_addr: int, block_size: int, data: Any) -> int:
+        return len(data)
+
+
+class BenchmarkResult(NamedTuple):
+    """The timing of one benchmark.
+
+    Attributes:
+        num_calls: the number of calls timed in each repeat
+        num_repeats: the number of repeats
+        best_ns_per_call: the mean time per call in nanoseconds of the fastest repeat
+        median_ns_per_call: the median over the repeats of the mean time per call in nanoseconds
+    """
+
+    num_calls: int
+    num_repeats: int
+    best_ns_per_call: float
+    median_ns_per_call: float
+
+
+class BenchmarkRegression(NamedTuple):
+    """A benchmark that got slower than its baseline.
+
+    Attributes:
+        name: the name of the benchmark
+        baseline_ns_per_call: the best time per call of the baseline
+        ns_per_call: the best time per call of the new result
+        ratio: ns_per_call divided by baseline_ns_per_call
+    """
+
+    name: str
+    baseline_ns_per_call: float
+    ns_per_call: float
+    ratio: float
+
+
+def time_calls(
+    func: Callable[[], Any], num_calls: int, num_repeats: int
+) -> BenchmarkResult:
+    """Time repeated calls of a function.
+
+    Args:
+        func: the function to time, called with no arguments
+        num_calls: the number of calls in each repeat
+        num_repeats: the number of times to repeat the timing
+
+    Return:
+        The timing, based on the mean time per call of each repeat
+    """
+    if num_calls < 1 or num_repeats < 1:
+        raise ValueError(
+            f"num_calls and num_repeats must be at least 1, got {num_calls} and {num_repeats}"
+        )
+    calls = range(num_calls)
+    ns_per_call: List[float] = []
+    for _ in range(num_repeats):
+        start = time.perf_counter_ns()
+        for _ in calls:
+            func()
+        ns_per_call.append((time.perf_counter_ns() - start) / num_calls)
+    return BenchmarkResult(
+        num_calls=num_calls,
+        num_repeats=num_repeats,
+        best_ns_per_call=min(ns_per_call),
+        median_ns_per_call=statistics.median(ns_per_call),
+    )
+
+
+def _build_fifo_data(num_round_robins: int) -> bytearray:
+    channel_data = np.arange(NUM_CHANNELS * num_round_robins, dtype=np.uint16).reshape(
+        NUM_CHANNELS, num_round_robins
+    )
+    sample_indices = np.arange(num_round_robins, dtype=np.uint32) * 1000
+    return build_round_robins(channel_data, sample_indices)
+
+
+def _create_front_panel(num_words_fifo: int = 0) -> FrontPanel:
+    front_panel = FrontPanel(BenchmarkXem(num_words_fifo=num_words_fifo))
+    front_panel.initialize_board()
+    return front_panel
+
+
+def _setup_read_from_fifo_main() -> Callable[[], Any]:
+    xem = BenchmarkXem(
+        num_words_fifo=BENCHMARK_NUM_ROUND_ROBINS * ROUND_ROBIN_SIZE_BYTES // 4
+    )
+    return lambda: read_from_fifo(xem)
+
+
+def _setup_read_from_fifo_front_panel() -> Callable[[], Any]:
+    front_panel = _create_front_panel(
+        num_words_fifo=BENCHMARK_NUM_ROUND_ROBINS * ROUND_ROBIN_SIZE_BYTES // 4
+    )
+    return front_panel.read_from_fifo
+
+
+def _setup_read_from_fifo_into_front_panel() -> Callable[[], Any]:
+    num_bytes = BENCHMARK_NUM_ROUND_ROBINS * ROUND_ROBIN_SIZE_BYTES
+    front_panel = _create_front_panel(num_words_fifo=num_bytes // 4)
+    data_buffer = bytearray(num_bytes)
+    return lambda: front_panel.read_from_fifo_into(data_buffer)
+
+
+def _setup_read_wire_out_main() -> Callable[[], Any]:
+    xem = BenchmarkXem()
+    return lambda: read_wire_out(xem, WIRE_OUT_NUM_WORDS_FIFO)
+
+
+def _setup_read_wire_out_front_panel() -> Callable[[], Any]:
+    front_panel = _create_front_panel()
+    return lambda: front_panel.read_wire_out(WIRE_OUT_NUM_WORDS_FIFO)
+
+
+def _setup_set_wire_in_main() -> Callable[[], Any]:
+    xem = BenchmarkXem()
+    return lambda: set_wire_in(xem, 0x00, 0x0002, 0x0002)
+
+
+def _setup_set_wire_in_front_panel() -> Callable[[], Any]:
+    front_panel = _create_front_panel()
+    return lambda: front_panel.set_wire_in(0x00, 0x0002, 0x0002)
+
+
+def _setup_board_must_be_initialized() -> Callable[[], Any]:
+    # the methods of FrontPanelBase do nothing, so this times the cost of calling a checked method once the board is initialized
+    front_panel = FrontPanelBase()
+    front_panel.initialize_board()
+    return lambda: front_panel.read_wire_out(WIRE_OUT_NUM_WORDS_FIFO)
+
+
+def _setup_convert_word() -> Callable[[], Any]:
+    word_bytes = bytearray(b"\x34\x12")
+    return lambda: convert_word(word_bytes)
+
+
+def _setup_convert_sample_idx() -> Callable[[], Any]:
+    sample_idx_bytes = bytearray(b"\x78\x56\x34\x12")
+    return lambda: convert_sample_idx(sample_idx_bytes)
+
+
+def _setup_check_header() -> Callable[[], Any]:
+    header_bytes = build_header_magic_number_bytes(HEADER_MAGIC_NUMBER)
+    return lambda: check_header(header_bytes)
+
+
+def _setup_demux_round_robins() -> Callable[[], Any]:
+    data = _build_fifo_data(BENCHMARK_NUM_ROUND_ROBINS)
+    return lambda: demux_round_robins(data)
+
+
+def _setup_channel_demultiplexer_append() -> Callable[[], Any]:
+    data = _build_fifo_data(BENCHMARK_NUM_ROUND_ROBINS)
+    demultiplexer = ChannelDemultiplexer(
+        initial_capacity=BENCHMARK_NUM_ROUND_ROBINS, check_headers=True
+    )
+
+    def append() -> None:
+        if demultiplexer.get_num_samples() >= demultiplexer.get_capacity():
+            demultiplexer.clear()
+        demultiplexer.append(data)
+
+    return append
+
+
+def _setup_simulator_read_wire_out() -> Callable[[], Any]:
+    wire_out_queue = SimpleMultiprocessingQueue()
+    simulator = FrontPanelSimulator(
+        {"wire_outs": {WIRE_OUT_NUM_WORDS_FIFO: wire_out_queue}}
+    )
+    simulator.initialize_board()
+
+    def put_and_read() -> None:
+        wire_out_queue.put_nowait(0)
+        simulator.read_wire_out(WIRE_OUT_NUM_WORDS_FIFO)
+
+    return put_and_read
+
+
+def _setup_simulator_read_from_fifo() -> Callable[[], Any]:
+    data = _build_fifo_data(BENCHMARK_NUM_ROUND_ROBINS)
+    fifo = SimpleMultiprocessingQueue()
+    # the simulator validates the FIFO when it is created, which is fastest when it is not empty
+    fifo.put_nowait(data)
+    simulator = FrontPanelSimulator({"pipe_outs": {PIPE_OUT_FIFO: fifo}})
+    simulator.initialize_board()
+    simulator.read_from_fifo()
+
+    def put_and_read() -> None:
+        fifo.put_nowait(data)
+        simulator.read_from_fifo()
+
+    return put_and_read
+
+
+# the setup of each benchmark, which returns the function to time, and the default number of calls in each repeat
+BENCHMARKS: Dict[str, Tuple[Callable[[], Callable[[], Any]], int]] = {
+    "read_from_fifo.main": (_setup_read_from_fifo_main, 2000),
+    "read_from_fifo.front_panel": (_setup_read_from_fifo_front_panel, 2000),
+    "read_from_fifo_into.front_panel": (_setup_read_from_fifo_into_front_panel, 2000),
+    "read_wire_out.main": (_setup_read_wire_out_main, 20000),
+    "read_wire_out.front_panel": (_setup_read_wire_out_front_panel, 20000),
+    "set_wire_in.main": (_setup_set_wire_in_main, 20000),
+    "set_wire_in.front_panel": (_setup_set_wire_in_front_panel, 20000),
+    "board_must_be_initialized": (_setup_board_must_be_initialized, 50000),
+    "decode.convert_word": (_setup_convert_word, 50000),
+    "decode.convert_sample_idx": (_setup_convert_sample_idx, 50000),
+    "decode.check_header": (_setup_check_header, 50000),
+    "decode.demux_round_robins": (_setup_demux_round_robins, 2000),
+    "decode.channel_demultiplexer_append": (_setup_channel_demultiplexer_append, 2000),
+    "simulator.read_wire_out": (_setup_simulator_read_wire_out, 2000),
+    "simulator.read_from_fifo": (_setup_simulator_read_from_fifo, 2000),
+}
+
+
+def run_benchmarks(
+    names: Optional[Sequence[str]] = None,
+    num_calls: Optional[int] = None,
+    num_repeats: int = 5,
+) -> Dict[str, BenchmarkResult]:
+    """Run benchmarks of the suite.
+
+    Args:
+        names: the names of the benchmarks to run. Defaults to all of BENCHMARKS
+        num_calls: the number of calls in each repeat. Defaults to the number set for each benchmark
+        num_repeats: the number of times to repeat the timing of each benchmark
+
+    Return:
+        The result of each benchmark, by name
+    """
+    if names is None:
+        names = list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            raise ValueError(f"There is no benchmark named '{name}'")
+    results: Dict[str, BenchmarkResult] = dict()
+    for name in names:
+        setup, default_num_calls = BENCHMARKS[name]
+        results[name] = time_calls(
+            setup(),
+            default_num_calls if num_calls is None else num_calls,
+            num_repeats,
+        )
+    return results
+
+
+def save_benchmark_results(results: Dict[str, BenchmarkResult], file_path: str) -> None:
+    """Write benchmark results to a JSON file, along with the Python version and platform."""
+    contents = {
+        "format_version": BENCHMARK_RESULTS_FORMAT_VERSION,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {name: result._asdict() for name, result in results.items()},
+    }
+    with open(file_path, "w", encoding="utf-8") as results_file:
+        json.dump(contents, results_file, indent=2)
+
+
+def load_benchmark_results(file_path: str) -> Dict[str, BenchmarkResult]:
+    """Read benchmark results written by save_benchmark_results."""
+    with open(file_path, encoding="utf-8") as results_file:
+        contents = json.load(results_file)
+    if contents.get("format_version") != BENCHMARK_RESULTS_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported benchmark results format version {contents.get('format_version')!r} in {file_path}"
+        )
+    return {
+        name: BenchmarkResult(**result) for name, result in contents["results"].items()
+    }
+
+
+def compare_to_baseline(
+    results: Dict[str, BenchmarkResult],
+    baseline: Dict[str, BenchmarkResult],
+    tolerance: float = 0.1,
+) -> List[BenchmarkRegression]:
+    """Find the benchmarks that are slower than their baseline by more than the tolerance.
+
+    The best time per call is compared, since it is the least affected by
+    other activity on the machine. Benchmarks missing from either set of
+    results are ignored.
+
+    Args:
+        results: the new results
+        baseline: the results to compare against
+        tolerance: the allowed slowdown, as a fraction of the baseline time
+
+    Return:
+        The regressions, slowest first
+    """
+    regressions: List[BenchmarkRegression] = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        baseline_ns_per_call = baseline[name].best_ns_per_call
+        ratio = result.best_ns_per_call / baseline_ns_per_call
+        if ratio > 1 + tolerance:
+            regressions.append(
+                BenchmarkRegression(
+                    name=name,
+                    baseline_ns_per_call=baseline_ns_per_call,
+                    ns_per_call=result.best_ns_per_call,
+                    ratio=ratio,
+                )
+            )
+    return sorted(regressions, key=lambda regression: regression.ratio, reverse=True)
+
+
+def run_benchmark_suite(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the suite from the command line.
+
+    Args:
+        argv: the command line arguments. Defaults to sys.argv
+
+    Return:
+        1 if any benchmark regressed against the baseline, 0 otherwise
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--benchmark",
+        action="append",
+        dest="names",
+        choices=list(BENCHMARKS),
+        help="a benchmark to run, can be repeated. Defaults to all",
+    )
+    parser.add_argument("--num-calls", type=int, help="calls in each repeat")
+    parser.add_argument("--num-repeats", type=int, default=5)
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="JSON file of results to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="allowed slowdown as a fraction of the baseline (default 0.1)",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        names=args.names, num_calls=args.num_calls, num_repeats=args.num_repeats
+    )
+    for name, result in results.items():
+        print(
+            f"{name:40} {result.best_ns_per_call:12.1f} ns/call (median {result.median_ns_per_call:.1f})"
+        )
+    if args.output is not None:
+        save_benchmark_results(results, args.output)
+    if args.baseline is None:
+        return 0
+    regressions = compare_to_baseline(
+        results, load_benchmark_results(args.baseline), tolerance=args.tolerance
+    )
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression.name}: {regression.baseline_ns_per_call:.1f} -> {regression.ns_per_call:.1f} ns/call ({regression.ratio:.2f}x)"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_benchmark_suite())
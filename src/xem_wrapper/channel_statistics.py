@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""Online per-channel statistics for health monitoring of the acquisition."""
+from typing import NamedTuple
+from typing import Optional
+from typing import Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .constants import NUM_CHANNELS
+from .demux import demux_round_robins
+
+
+class ChannelStatisticsSnapshot(NamedTuple):
+    """Statistics of each channel over the current window.
+
+    Attributes:
+        num_samples: the number of samples of each channel in the window
+        mean: the mean of each channel (NaN if there are no samples)
+        variance: the population variance of each channel (NaN if there are no samples)
+        min: the smallest value of each channel (NaN if there are no samples)
+        max: the largest value of each channel (NaN if there are no samples)
+        num_saturated: the number of samples of each channel at or beyond the saturation limits
+    """
+
+    num_samples: int
+    mean: NDArray[np.float64]
+    variance: NDArray[np.float64]
+    min: NDArray[np.float64]
+    max: NDArray[np.float64]
+    num_saturated: NDArray[np.int64]
+
+
+class RunningChannelStatistics:
+    """Accumulate per-channel statistics chunk by chunk without storing samples.
+
+    Each chunk is reduced with whole-array operations and merged into the
+    running totals with the parallel form of Welford's algorithm, so the
+    cost of an update depends only on the size of the chunk and taking a
+    snapshot only on the number of channels.
+
+    Args:
+        num_channels: the number of channels (rows) in each chunk
+        saturation_low: values at or below this count as saturated
+        saturation_high: values at or above this count as saturated
+    """
+
+    default_saturation_low = 0
+    default_saturation_high = 0xFFFF
+
+    def __init__(
+        self,
+        num_channels: int = NUM_CHANNELS,
+        saturation_low: Optional[int] = None,
+        saturation_high: Optional[int] = None,
+    ) -> None:
+        if saturation_low is None:
+            saturation_low = self.default_saturation_low
+        if saturation_high is None:
+            saturation_high = self.default_saturation_high
+        if num_channels < 1:
+            raise ValueError(f"num_channels must be at least 1, got {num_channels}")
+        if saturation_low >= saturation_high:
+            raise ValueError(
+                f"saturation_low must be less than saturation_high, got {saturation_low} and {saturation_high}"
+            )
+        self._num_channels = num_channels
+        self._saturation_low = saturation_low
+        self._saturation_high = saturation_high
+        self._num_samples = 0
+        self._mean = np.zeros(num_channels)
+        self._sum_squared_deviations = np.zeros(num_channels)
+        self._min = np.full(num_channels, np.inf)
+        self._max = np.full(num_channels, -np.inf)
+        self._num_saturated = np.zeros(num_channels, dtype=np.int64)
+
+    def get_num_channels(self) -> int:
+        return self._num_channels
+
+    def get_num_samples(self) -> int:
+        """Get the number of samples of each channel in the current window."""
+        return self._num_samples
+
+    def reset(self) -> None:
+        """Start a new window."""
+        self._num_samples = 0
+        self._mean.fill(0)
+        self._sum_squared_deviations.fill(0)
+        self._min.fill(np.inf)
+        self._max.fill(-np.inf)
+        self._num_saturated.fill(0)
+
+    def update(self, channel_data: NDArray[np.generic]) -> None:
+        """Merge a chunk of samples into the running statistics.
+
+        Args:
+            channel_data: array of shape (number of channels, number of samples)
+        """
+        if channel_data.shape[0] != self._num_channels:
+            raise ValueError(
+                f"Expected data for {self._num_channels} channels, got {channel_data.shape[0]}"
+            )
+        chunk_num_samples = channel_data.shape[1]
+        if chunk_num_samples == 0:
+            return
+        chunk = channel_data.astype(np.float64)
+        chunk_mean = chunk.mean(axis=1)
+        chunk_sum_squared_deviations = np.square(chunk - chunk_mean[:, None]).sum(
+            axis=1
+        )
+        total_num_samples = self._num_samples + chunk_num_samples
+        delta = chunk_mean - self._mean
+        self._mean += delta * (chunk_num_samples / total_num_samples)
+        self._sum_squared_deviations += chunk_sum_squared_deviations + np.square(
+            delta
+        ) * (self._num_samples * chunk_num_samples / total_num_samples)
+        self._num_samples = total_num_samples
+        np.minimum(self._min, chunk.min(axis=1), out=self._min)
+        np.maximum(self._max, chunk.max(axis=1), out=self._max)
+        self._num_saturated += np.count_nonzero(
+            (chunk <= self._saturation_low) | (chunk >= self._saturation_high),
+            axis=1,
+        )
+
+    def update_fifo_data(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        """Merge the samples of a FIFO read into the running statistics.
+
+        Args:
+            data: whole round robins as returned by read_from_fifo
+        """
+        channel_data, _ = demux_round_robins(data)
+        self.update(channel_data)
+
+    def snapshot(self, reset_window: bool = False) -> ChannelStatisticsSnapshot:
+        """Get the statistics of the current window.
+
+        Args:
+            reset_window: whether to start a new window after taking the snapshot
+
+        Return:
+            Copies of the statistics, unaffected by later updates
+        """
+        if self._num_samples == 0:
+            nan_array = np.full(self._num_channels, np.nan)
+            snapshot = ChannelStatisticsSnapshot(
+                0,
+                nan_array,
+                nan_array.copy(),
+                nan_array.copy(),
+                nan_array.copy(),
+                self._num_saturated.copy(),
+            )
+        else:
+            snapshot = ChannelStatisticsSnapshot(
+                self._num_samples,
+                self._mean.copy(),
+                self._sum_squared_deviations / self._num_samples,
+                self._min.copy(),
+                self._max.copy(),
+                self._num_saturated.copy(),
+            )
+        if reset_window:
+            self.reset()
+        return snapshot
@@ -3,8 +3,12 @@
 # USB transfer related values
 HEADER_MAGIC_NUMBER = 0xC691199927021942
 BLOCK_SIZE = 32  # must be a power of 2, ideally equal to size of data frame
+MAX_BLOCK_SIZE = 16384  # largest block size supported by block pipes over USB 3.0
 DATA_FRAME_SIZE_WORDS = 9
 DATA_FRAMES_PER_ROUND_ROBIN = 8
+ROUND_ROBIN_SIZE_WORDS = DATA_FRAME_SIZE_WORDS * DATA_FRAMES_PER_ROUND_ROBIN
+CHANNELS_PER_DATA_FRAME = 12  # each data frame carries one 2-byte value per channel after its header and sample index
+NUM_CHANNELS = CHANNELS_PER_DATA_FRAME * DATA_FRAMES_PER_ROUND_ROBIN
 
 # Trigger-in values
 TRIGGER_IN_SPI = 0x41
@@ -15,8 +19,12 @@ WIRE_IN_NUM_SAMPLES = 0x01
 
 # Wire-out values
 WIRE_OUT_NUM_WORDS_FIFO = 0x20
+WIRE_OUT_NUM_WORDS_FREE_PIPE_IN = 0x21
 WIRE_OUT_IS_SPI_RUNNING = 0x22
 WIRE_OUT_IS_PLL_LOCKED = 0x24  # Not used in mantarray
 
+# Pipe-in values
+PIPE_IN_FIFO = 0x80
+
 # Pipe-out values
 PIPE_OUT_FIFO = 0xA0
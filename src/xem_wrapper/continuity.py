@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""Streaming detection of dropped and duplicated samples from sample indices."""
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Union
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .constants import DATA_FRAMES_PER_ROUND_ROBIN
+from .demux import get_round_robin_view
+
+# sample indices are unsigned 32-bit values that wrap around
+SAMPLE_IDX_MODULUS = 2 ** 32
+
+CONTINUITY_EVENT_DROPPED = "dropped"
+CONTINUITY_EVENT_DUPLICATED = "duplicated"
+CONTINUITY_EVENT_DISCONTINUITY = "discontinuity"
+
+
+class ContinuityEvent(NamedTuple):
+    """A break in the expected progression of sample indices.
+
+    Attributes:
+        kind: one of CONTINUITY_EVENT_DROPPED, CONTINUITY_EVENT_DUPLICATED or CONTINUITY_EVENT_DISCONTINUITY
+        position: the position of the offending sample in the stream, counting from the first sample checked
+        sample_idx: the sample index that was received
+        expected_sample_idx: the sample index that should have been received
+        num_samples: the number of samples dropped or duplicated (0 for a discontinuity)
+    """
+
+    kind: str
+    position: int
+    sample_idx: int
+    expected_sample_idx: int
+    num_samples: int
+
+
+class SampleIndexContinuityMonitor:
+    """Check that sample indices increase by a fixed stride across reads.
+
+    Each chunk is checked with whole-array operations, carrying the last
+    index over from the previous chunk. Differences are taken modulo 2**32 so
+    the wraparound of the 32-bit counter is not reported. A forward jump
+    that is a whole number of strides counts as dropped samples, a repeated
+    index counts as a duplicated sample, and anything else (a backwards
+    jump or a step that is not a multiple of the stride) counts as a
+    discontinuity, after which checking resumes from the new index.
+
+    Args:
+        expected_stride: the expected increase of the sample index from one sample to the next
+        max_num_events: the most recent events to keep for inspection. Counters are not limited
+    """
+
+    default_expected_stride = 1
+    default_max_num_events = 1000
+
+    def __init__(
+        self,
+        expected_stride: Optional[int] = None,
+        max_num_events: Optional[int] = None,
+    ) -> None:
+        if expected_stride is None:
+            expected_stride = self.default_expected_stride
+        if max_num_events is None:
+            max_num_events = self.default_max_num_events
+        if not 0 < expected_stride < SAMPLE_IDX_MODULUS // 2:
+            raise ValueError(
+                f"expected_stride must be between 1 and {SAMPLE_IDX_MODULUS // 2 - 1}, got {expected_stride}"
+            )
+        if max_num_events < 0:
+            raise ValueError(
+                f"max_num_events must not be negative, got {max_num_events}"
+            )
+        self._expected_stride = expected_stride
+        self._max_num_events = max_num_events
+        self._last_sample_idx: Optional[int] = None
+        self._num_samples_checked = 0
+        self._num_dropped = 0
+        self._num_duplicated = 0
+        self._num_gaps = 0
+        self._num_discontinuities = 0
+        self._events: List[ContinuityEvent] = []
+
+    def reset(self) -> None:
+        """Forget the last sample index and clear all counters and events."""
+        self._last_sample_idx = None
+        self._num_samples_checked = 0
+        self._num_dropped = 0
+        self._num_duplicated = 0
+        self._num_gaps = 0
+        self._num_discontinuities = 0
+        self._events = []
+
+    def get_expected_stride(self) -> int:
+        return self._expected_stride
+
+    def get_num_samples_checked(self) -> int:
+        return self._num_samples_checked
+
+    def get_num_dropped(self) -> int:
+        """Get the total number of samples missing from the stream."""
+        return self._num_dropped
+
+    def get_num_duplicated(self) -> int:
+        """Get the total number of samples that repeated the previous sample index."""
+        return self._num_duplicated
+
+    def get_num_gaps(self) -> int:
+        """Get the number of places in the stream where samples were dropped."""
+        return self._num_gaps
+
+    def get_num_discontinuities(self) -> int:
+        return self._num_discontinuities
+
+    def get_counters(self) -> Dict[str, int]:
+        """Get all counters, e.g. for reporting to an alerting system."""
+        return {
+            "num_samples_checked": self._num_samples_checked,
+            "num_dropped": self._num_dropped,
+            "num_duplicated": self._num_duplicated,
+            "num_gaps": self._num_gaps,
+            "num_discontinuities": self._num_discontinuities,
+        }
+
+    def get_events(self) -> List[ContinuityEvent]:
+        """Get the most recent events, oldest first."""
+        return list(self._events)
+
+    def check(self, sample_indices: ArrayLike) -> List[ContinuityEvent]:
+        """Check the next chunk of sample indices of the stream.
+
+        Args:
+            sample_indices: one-dimensional array of sample indices in the order they were received
+
+        Return:
+            The events found in this chunk
+        """
+        indices = np.asarray(sample_indices, dtype=np.int64).ravel()
+        if indices.size == 0:
+            return []
+        start_position = self._num_samples_checked
+        if self._last_sample_idx is None:
+            previous = indices[:-1]
+            current = indices[1:]
+            first_position = start_position + 1
+        else:
+            previous = np.concatenate(([self._last_sample_idx], indices[:-1]))
+            current = indices
+            first_position = start_position
+        self._last_sample_idx = int(indices[-1])
+        self._num_samples_checked += indices.size
+
+        steps = (current - previous) % SAMPLE_IDX_MODULUS
+        bad_step_idxs = np.flatnonzero(steps != self._expected_stride)
+        if bad_step_idxs.size == 0:
+            return []
+
+        bad_steps = steps[bad_step_idxs]
+        is_duplicate = bad_steps == 0
+        is_gap = (
+            (bad_steps < SAMPLE_IDX_MODULUS // 2)
+            & (bad_steps % self._expected_stride == 0)
+            & ~is_duplicate
+        )
+        num_dropped = np.where(is_gap, bad_steps // self._expected_stride - 1, 0)
+        self._num_duplicated += int(np.count_nonzero(is_duplicate))
+        self._num_gaps += int(np.count_nonzero(is_gap))
+        self._num_dropped += int(num_dropped.sum())
+        self._num_discontinuities += int(np.count_nonzero(~(is_gap | is_duplicate)))
+
+        expected = (
+            previous[bad_step_idxs] + self._expected_stride
+        ) % SAMPLE_IDX_MODULUS
+        events = []
+        for step_idx, sample_idx, expected_sample_idx, duplicate, gap, dropped in zip(
+            bad_step_idxs.tolist(),
+            current[bad_step_idxs].tolist(),
+            expected.tolist(),
+            is_duplicate.tolist(),
+            is_gap.tolist(),
+            num_dropped.tolist(),
+        ):
+            if duplicate:
+                kind, num_samples = CONTINUITY_EVENT_DUPLICATED, 1
+            elif gap:
+                kind, num_samples = CONTINUITY_EVENT_DROPPED, dropped
+            else:
+                kind, num_samples = CONTINUITY_EVENT_DISCONTINUITY, 0
+            events.append(
+                ContinuityEvent(
+                    kind,
+                    first_position + step_idx,
+                    sample_idx,
+                    expected_sample_idx,
+                    num_samples,
+                )
+            )
+        self._events.extend(events)
+        del self._events[: max(len(self._events) - self._max_num_events, 0)]
+        return events
+
+    def check_fifo_data(
+        self, data: Union[bytes, bytearray, memoryview], frame_idx: int = 0
+    ) -> List[ContinuityEvent]:
+        """Check the sample indices of one data frame position across a FIFO read.
+
+        Args:
+            data: whole round robins as returned by read_from_fifo
+            frame_idx: which data frame of each round robin to take the sample index from
+
+        Return:
+            The events found in this read
+        """
+        if not 0 <= frame_idx < DATA_FRAMES_PER_ROUND_ROBIN:
+            raise ValueError(
+                f"frame_idx must be between 0 and {DATA_FRAMES_PER_ROUND_ROBIN - 1}, got {frame_idx}"
+            )
+        frames = get_round_robin_view(data, check_headers=False)
+        return self.check(frames["sample_idx"][:, frame_idx])
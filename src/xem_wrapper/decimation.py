@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""Streaming reduction of the sample rate of per-channel data."""
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .demux import demux_frames
+from .demux import get_round_robin_view
+
+DECIMATION_MODE_STRIDE = "stride"
+DECIMATION_MODE_MEAN = "mean"
+DECIMATION_MODE_ENVELOPE = "envelope"
+DECIMATION_MODES = (
+    DECIMATION_MODE_STRIDE,
+    DECIMATION_MODE_MEAN,
+    DECIMATION_MODE_ENVELOPE,
+)
+
+
+class StreamingDecimator:
+    """Reduce the sample rate of every channel by a fixed factor across reads.
+
+    The stream is divided into consecutive blocks of ``factor`` samples and
+    each block is reduced to one output sample:
+
+        stride: the first sample of the block is kept and the rest are discarded
+        mean: the mean of the block
+        envelope: the min and max of the block, so that spikes stay visible
+
+    Blocks may span reads; the samples of an incomplete block are held until
+    the rest of the block arrives. In stride mode nothing needs to be held,
+    and only the kept round robins are ever de-interleaved.
+
+    The sample index of each output sample is that of the first sample of
+    its block.
+
+    Args:
+        factor: the number of input samples per output sample
+        mode: one of DECIMATION_MODES
+        check_headers: whether to verify the header of every data frame of FIFO data
+    """
+
+    def __init__(
+        self,
+        factor: int,
+        mode: str = DECIMATION_MODE_STRIDE,
+        check_headers: bool = True,
+    ) -> None:
+        if factor < 1:
+            raise ValueError(f"factor must be at least 1, got {factor}")
+        if mode not in DECIMATION_MODES:
+            raise ValueError(f"mode must be one of {DECIMATION_MODES}, got '{mode}'")
+        self._factor = factor
+        self._mode = mode
+        self._check_headers = check_headers
+        self._num_samples_seen = 0
+        self._pending_data: Optional[NDArray[np.generic]] = None
+        self._pending_sample_indices: Optional[NDArray[np.generic]] = None
+
+    def get_factor(self) -> int:
+        return self._factor
+
+    def get_mode(self) -> str:
+        return self._mode
+
+    def get_num_samples_seen(self) -> int:
+        """Get the number of input samples per channel processed so far."""
+        return self._num_samples_seen
+
+    def get_num_pending_samples(self) -> int:
+        """Get the number of samples per channel held back waiting for the rest of their block."""
+        if self._pending_data is None:
+            return 0
+        return int(self._pending_data.shape[1])
+
+    def reset(self) -> None:
+        """Discard any held samples and start a new block with the next sample."""
+        self._num_samples_seen = 0
+        self._pending_data = None
+        self._pending_sample_indices = None
+
+    def _get_stride_offset(self) -> int:
+        return -self._num_samples_seen % self._factor
+
+    def process(
+        self, channel_data: NDArray[np.generic], sample_indices: NDArray[np.generic]
+    ) -> Tuple[NDArray[np.generic], NDArray[np.generic]]:
+        """Decimate the next chunk of already de-interleaved samples.
+
+        Args:
+            channel_data: array of shape (number of channels, number of samples)
+            sample_indices: array of the same shape holding the sample index of each sample
+
+        Return:
+            The decimated values and their sample indices. In envelope mode the values have shape (2, number of channels, number of output samples) holding the mins then the maxes; otherwise they have shape (number of channels, number of output samples)
+        """
+        if self._mode == DECIMATION_MODE_STRIDE:
+            offset = self._get_stride_offset()
+            self._num_samples_seen += channel_data.shape[1]
+            return (
+                np.ascontiguousarray(channel_data[:, offset :: self._factor]),
+                np.ascontiguousarray(sample_indices[:, offset :: self._factor]),
+            )
+
+        self._num_samples_seen += channel_data.shape[1]
+        if self._pending_data is not None and self._pending_sample_indices is not None:
+            channel_data = np.concatenate((self._pending_data, channel_data), axis=1)
+            sample_indices = np.concatenate(
+                (self._pending_sample_indices, sample_indices), axis=1
+            )
+        num_channels, num_samples = channel_data.shape
+        num_blocks = num_samples // self._factor
+        num_complete_samples = num_blocks * self._factor
+        if num_complete_samples < num_samples:
+            self._pending_data = channel_data[:, num_complete_samples:].copy()
+            self._pending_sample_indices = sample_indices[
+                :, num_complete_samples:
+            ].copy()
+        else:
+            self._pending_data = None
+            self._pending_sample_indices = None
+
+        blocks = channel_data[:, :num_complete_samples].reshape(
+            num_channels, num_blocks, self._factor
+        )
+        output_sample_indices = np.ascontiguousarray(
+            sample_indices[:, : num_complete_samples : self._factor]
+        )
+        if self._mode == DECIMATION_MODE_MEAN:
+            return blocks.mean(axis=2), output_sample_indices
+        return np.stack((blocks.min(axis=2), blocks.max(axis=2))), output_sample_indices
+
+    def process_fifo_data(
+        self, data: Union[bytes, bytearray, memoryview]
+    ) -> Tuple[NDArray[np.generic], NDArray[np.generic]]:
+        """Decimate a FIFO read.
+
+        Args:
+            data: whole round robins as returned by read_from_fifo
+
+        Return:
+            The same as process, with one channel per entry of NUM_CHANNELS
+        """
+        frames = get_round_robin_view(data, check_headers=self._check_headers)
+        if self._mode == DECIMATION_MODE_STRIDE:
+            # only de-interleave the round robins that are kept
+            offset = self._get_stride_offset()
+            self._num_samples_seen += frames.shape[0]
+            return demux_frames(frames[offset :: self._factor])
+        return self.process(*demux_frames(frames))
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""Vectorized de-interleaving of FIFO data into per-channel arrays.
+
+Each data frame is a header (two little-endian 32-bit words, most
+significant word first), a little-endian 32-bit sample index, and one
+little-endian 16-bit value for each of CHANNELS_PER_DATA_FRAME channels.
+Channel numbers run across the frames of a round robin, so channel ``c``
+is value ``c % CHANNELS_PER_DATA_FRAME`` of frame
+``c // CHANNELS_PER_DATA_FRAME`` and has one sample per round robin.
+"""
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+from numpy.typing import ArrayLike
+from numpy.typing import NDArray
+
+from .constants import CHANNELS_PER_DATA_FRAME
+from .constants import DATA_FRAMES_PER_ROUND_ROBIN
+from .constants import HEADER_MAGIC_NUMBER
+from .constants import NUM_CHANNELS
+from .constants import ROUND_ROBIN_SIZE_WORDS
+from .exceptions import OpalKellyIncompleteRoundRobinError
+from .exceptions import OpalKellyIncorrectHeaderError
+
+DATA_FRAME_DTYPE = np.dtype(
+    [
+        ("header", "<u4", (2,)),
+        ("sample_idx", "<u4"),
+        ("data", "<u2", (CHANNELS_PER_DATA_FRAME,)),
+    ]
+)
+ROUND_ROBIN_SIZE_BYTES = ROUND_ROBIN_SIZE_WORDS * 4
+
+_HEADER_HIGH_WORD = HEADER_MAGIC_NUMBER >> 32
+_HEADER_LOW_WORD = HEADER_MAGIC_NUMBER & 0xFFFFFFFF
+
+
+def get_round_robin_view(
+    data: Union[bytes, bytearray, memoryview], check_headers: bool = True
+) -> NDArray[np.void]:
+    """Interpret FIFO data as data frames without copying it.
+
+    Args:
+        data: whole round robins as returned by read_from_fifo
+        check_headers: whether to verify the header of every data frame
+
+    Return:
+        A read-only structured array of shape (number of round robins, DATA_FRAMES_PER_ROUND_ROBIN) with the fields of DATA_FRAME_DTYPE
+    """
+    if len(data) % ROUND_ROBIN_SIZE_BYTES != 0:
+        raise OpalKellyIncompleteRoundRobinError(
+            f"Data of {len(data)} bytes is not a whole number of {ROUND_ROBIN_SIZE_BYTES} byte round robins"
+        )
+    frames = np.frombuffer(data, dtype=DATA_FRAME_DTYPE).reshape(
+        -1, DATA_FRAMES_PER_ROUND_ROBIN
+    )
+    if check_headers:
+        first_bad_frame = find_first_incorrect_header(frames)
+        if first_bad_frame is not None:
+            raise OpalKellyIncorrectHeaderError(
+                f"Data frame {first_bad_frame} does not start with the header magic number"
+            )
+    return frames
+
+
+def find_first_incorrect_header(frames: NDArray[np.void]) -> Optional[int]:
+    """Find the first data frame that does not start with the header magic number.
+
+    Args:
+        frames: structured array of data frames as returned by get_round_robin_view, or any slice of one along the first axis
+
+    Return:
+        The position of the data frame counting across round robins, or None if every header is correct
+    """
+    headers = frames["header"]
+    is_correct = (headers[..., 0] == _HEADER_HIGH_WORD) & (
+        headers[..., 1] == _HEADER_LOW_WORD
+    )
+    if is_correct.all():
+        return None
+    return int(np.flatnonzero(~is_correct.ravel())[0])
+
+
+def demux_round_robins(
+    data: Union[bytes, bytearray, memoryview], check_headers: bool = True
+) -> Tuple[NDArray[np.uint16], NDArray[np.uint32]]:
+    """Split FIFO data into one contiguous array per channel.
+
+    Args:
+        data: whole round robins as returned by read_from_fifo
+        check_headers: whether to verify the header of every data frame
+
+    Return:
+        Arrays of shape (NUM_CHANNELS, number of round robins) holding the value and sample index of each channel's samples
+    """
+    return demux_frames(get_round_robin_view(data, check_headers=check_headers))
+
+
+def demux_frames(
+    frames: NDArray[np.void],
+) -> Tuple[NDArray[np.uint16], NDArray[np.uint32]]:
+    """Split data frames into one contiguous array per channel.
+
+    Args:
+        frames: structured array of shape (number of round robins, DATA_FRAMES_PER_ROUND_ROBIN) as returned by get_round_robin_view, or any slice of one along the first axis
+
+    Return:
+        Arrays of shape (NUM_CHANNELS, number of round robins) holding the value and sample index of each channel's samples
+    """
+    channel_data = np.ascontiguousarray(
+        frames["data"].transpose(1, 2, 0).reshape(NUM_CHANNELS, -1)
+    )
+    sample_indices = np.repeat(frames["sample_idx"].T, CHANNELS_PER_DATA_FRAME, axis=0)
+    return channel_data, sample_indices
+
+
+def build_round_robins(channel_data: ArrayLike, sample_indices: ArrayLike) -> bytearray:
+    """Interleave per-channel samples into FIFO data (the inverse of demux_round_robins).
+
+    Useful for generating data to put into the FIFO of a FrontPanelSimulator.
+
+    Args:
+        channel_data: values of shape (NUM_CHANNELS, number of round robins)
+        sample_indices: sample indices of each data frame, broadcastable to shape (DATA_FRAMES_PER_ROUND_ROBIN, number of round robins)
+
+    Return:
+        The data frames with correct headers
+    """
+    channel_values = np.asarray(channel_data)
+    num_round_robins = channel_values.shape[1]
+    frames = np.empty(
+        (num_round_robins, DATA_FRAMES_PER_ROUND_ROBIN), dtype=DATA_FRAME_DTYPE
+    )
+    frames["header"] = (_HEADER_HIGH_WORD, _HEADER_LOW_WORD)
+    frames["sample_idx"] = np.broadcast_to(
+        sample_indices, (DATA_FRAMES_PER_ROUND_ROBIN, num_round_robins)
+    ).T
+    frames["data"] = channel_values.reshape(
+        DATA_FRAMES_PER_ROUND_ROBIN, CHANNELS_PER_DATA_FRAME, num_round_robins
+    ).transpose(2, 0, 1)
+    return bytearray(frames.tobytes())
+
+
+class ChannelDemultiplexer:
+    """Accumulate successive FIFO reads into growable per-channel arrays.
+
+    All channels are stored in one C-contiguous block, so each channel's
+    samples (and the sample indices of its data frame) are returned as
+    contiguous views with no copying. The storage doubles in size whenever
+    it fills up.
+
+    Args:
+        initial_capacity: the number of samples per channel to allocate storage for up front
+        check_headers: whether to verify the header of every data frame
+    """
+
+    default_initial_capacity = 1024
+
+    def __init__(
+        self, initial_capacity: Optional[int] = None, check_headers: bool = True
+    ) -> None:
+        if initial_capacity is None:
+            initial_capacity = self.default_initial_capacity
+        if initial_capacity < 1:
+            raise ValueError(
+                f"initial_capacity must be at least 1, got {initial_capacity}"
+            )
+        self._check_headers = check_headers
+        self._num_samples = 0
+        self._channel_data: NDArray[np.uint16] = np.empty(
+            (NUM_CHANNELS, initial_capacity), dtype=np.uint16
+        )
+        self._sample_indices: NDArray[np.uint32] = np.empty(
+            (DATA_FRAMES_PER_ROUND_ROBIN, initial_capacity), dtype=np.uint32
+        )
+
+    def get_num_samples(self) -> int:
+        """Get the number of samples stored for each channel."""
+        return self._num_samples
+
+    def get_capacity(self) -> int:
+        """Get the number of samples per channel that fit before the storage grows."""
+        return int(self._channel_data.shape[1])
+
+    def _grow(self, min_capacity: int) -> None:
+        new_capacity = self.get_capacity()
+        while new_capacity < min_capacity:
+            new_capacity *= 2
+        channel_data = np.empty((NUM_CHANNELS, new_capacity), dtype=np.uint16)
+        channel_data[:, : self._num_samples] = self.get_all_channel_data()
+        sample_indices = np.empty(
+            (DATA_FRAMES_PER_ROUND_ROBIN, new_capacity), dtype=np.uint32
+        )
+        sample_indices[:, : self._num_samples] = self._sample_indices[
+            :, : self._num_samples
+        ]
+        self._channel_data = channel_data
+        self._sample_indices = sample_indices
+
+    def append(self, data: Union[bytes, bytearray, memoryview]) -> int:
+        """De-interleave FIFO data onto the end of each channel.
+
+        Args:
+            data: whole round robins as returned by read_from_fifo
+
+        Return:
+            The number of samples added to each channel
+        """
+        frames = get_round_robin_view(data, check_headers=self._check_headers)
+        num_new_samples = frames.shape[0]
+        end = self._num_samples + num_new_samples
+        if end > self.get_capacity():
+            self._grow(end)
+        # a single strided copy for all channels: (frame, channel in frame, sample) lines up with the storage
+        self._channel_data.reshape(
+            DATA_FRAMES_PER_ROUND_ROBIN, CHANNELS_PER_DATA_FRAME, -1
+        )[:, :, self._num_samples : end] = frames["data"].transpose(1, 2, 0)
+        self._sample_indices[:, self._num_samples : end] = frames["sample_idx"].T
+        self._num_samples = end
+        return int(num_new_samples)
+
+    def get_channel_data(self, channel: int) -> NDArray[np.uint16]:
+        """Get a contiguous view of all stored samples of one channel.
+
+        The view is only valid until the next call to append, clear or drain.
+        """
+        return self._channel_data[channel, : self._num_samples]
+
+    def get_sample_indices(self, channel: int) -> NDArray[np.uint32]:
+        """Get a contiguous view of the sample index of each stored sample of one channel.
+
+        The view is only valid until the next call to append, clear or drain.
+        """
+        return self._sample_indices[
+            channel // CHANNELS_PER_DATA_FRAME, : self._num_samples
+        ]
+
+    def get_all_channel_data(self) -> NDArray[np.uint16]:
+        """Get a view of shape (NUM_CHANNELS, number of samples) of all stored samples."""
+        return self._channel_data[:, : self._num_samples]
+
+    def clear(self) -> None:
+        """Discard all stored samples while keeping the allocated storage."""
+        self._num_samples = 0
+
+    def drain(self) -> Tuple[NDArray[np.uint16], NDArray[np.uint32]]:
+        """Remove and return all stored samples.
+
+        Return:
+            Copies of the stored samples and their sample indices, both of shape (NUM_CHANNELS, number of samples)
+        """
+        channel_data = self.get_all_channel_data().copy()
+        sample_indices = np.repeat(
+            self._sample_indices[:, : self._num_samples],
+            CHANNELS_PER_DATA_FRAME,
+            axis=0,
+        )
+        self.clear()
+        return channel_data, sample_indices
@@ -38,6 +38,54 @@ class OpalKellyFileNotFoundError(FileNotFoundError):
     pass
 
 
+class OpalKellyInvalidBlockSizeError(Exception):
+    pass
+
+
+class OpalKellyMaxReadSizeTooSmallError(Exception):
+    pass
+
+
+class OpalKellyIncompleteRoundRobinError(Exception):
+    pass
+
+
+class OpalKellyNotEnoughTimingPointsError(Exception):
+    pass
+
+
+class OpalKellyPipeInDataNotBlockAlignedError(Exception):
+    pass
+
+
+class OpalKellyPipeInFreeSpaceTimeoutError(Exception):
+    pass
+
+
+class OpalKellyScriptError(Exception):
+    pass
+
+
+class OpalKellySequenceNotRegisteredError(Exception):
+    pass
+
+
+class OpalKellyScriptValueOutOfRangeError(Exception):
+    pass
+
+
+class OpalKellyFifoTimeoutError(Exception):
+    pass
+
+
+class OpalKellyRecordingFormatError(Exception):
+    pass
+
+
+class OpalKellyReplayError(Exception):
+    pass
+
+
 # Logical errors caught by the simulator/controller
 
 
@@ -57,6 +105,10 @@ class OpalKellySpiAlreadyStoppedError(Exception):
     pass
 
 
+class OpalKellyAcquisitionNotArmedError(Exception):
+    pass
+
+
 class FPSimulatorInvalidFIFOValueError(Exception):
     pass
 
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""Rolling throughput and fill level telemetry of the pipe-out FIFO."""
+from collections import deque
+import time
+from typing import Deque
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from .constants import DATA_FRAME_SIZE_WORDS
+
+
+class FifoTelemetrySnapshot(NamedTuple):
+    """The state of the FIFO telemetry at one moment.
+
+    Attributes:
+        bytes_per_second: the number of bytes read over the rolling window, divided by its length
+        frames_per_second: the number of data frames read over the rolling window, divided by its length
+        num_bytes_read: the total number of bytes read
+        num_frames_read: the total number of whole data frames read
+        num_reads: the total number of FIFO reads
+        num_empty_reads: the number of FIFO reads that returned no data
+        num_fill_samples: the number of times the fill level of the FIFO was read
+        last_num_words_fifo: the fill level at the last sample, or None if there has not been one
+        peak_num_words_fifo: the highest fill level sampled
+        seconds_near_capacity: the time the FIFO was at or above the near capacity fill level, assuming each sampled level holds until the next sample
+        capacity_num_words: the capacity of the FIFO
+        near_capacity_num_words: the fill level at which the FIFO counts as near capacity
+    """
+
+    bytes_per_second: float
+    frames_per_second: float
+    num_bytes_read: int
+    num_frames_read: int
+    num_reads: int
+    num_empty_reads: int
+    num_fill_samples: int
+    last_num_words_fifo: Optional[int]
+    peak_num_words_fifo: int
+    seconds_near_capacity: float
+    capacity_num_words: int
+    near_capacity_num_words: int
+
+    def get_peak_fill_fraction(self) -> float:
+        return self.peak_num_words_fifo / self.capacity_num_words
+
+
+class FifoTelemetry:
+    """Keep rolling counters of the data read from the FIFO and of its fill level.
+
+    Throughput is measured over a rolling window: every read is kept until
+    it is older than window_seconds, with a running sum so that recording a
+    read and taking a snapshot do not depend on the number of reads in the
+    window.
+
+    The fill level is sampled whenever WIRE_OUT_NUM_WORDS_FIFO is read. The
+    FIFO counts as near capacity at or above near_capacity_fraction of its
+    capacity, and the time between a sample at that level and the next
+    sample is added to the time near capacity. A growing time near capacity
+    warns of an overflow before the board reports OkHardwareFIFOOverflowError.
+
+    Args:
+        capacity_num_words: the capacity of the FIFO in words
+        near_capacity_fraction: the fraction of the capacity at which the FIFO counts as near capacity, in (0, 1]
+        window_seconds: the length of the rolling window for the throughput
+    """
+
+    # the depth of the pipe-out FIFO in the standard bit file. Override for bit files with a different FIFO
+    default_capacity_num_words = 131072
+    default_near_capacity_fraction = 0.9
+    default_window_seconds = 1.0
+
+    def __init__(
+        self,
+        capacity_num_words: Optional[int] = None,
+        near_capacity_fraction: Optional[float] = None,
+        window_seconds: Optional[float] = None,
+    ) -> None:
+        if capacity_num_words is None:
+            capacity_num_words = self.default_capacity_num_words
+        if near_capacity_fraction is None:
+            near_capacity_fraction = self.default_near_capacity_fraction
+        if window_seconds is None:
+            window_seconds = self.default_window_seconds
+        if capacity_num_words < 1:
+            raise ValueError(
+                f"capacity_num_words must be at least 1, got {capacity_num_words}"
+            )
+        if not 0 < near_capacity_fraction <= 1:
+            raise ValueError(
+                f"near_capacity_fraction must be in the range (0, 1], got {near_capacity_fraction}"
+            )
+        if window_seconds <= 0:
+            raise ValueError(f"window_seconds must be positive, got {window_seconds}")
+        self._capacity_num_words = capacity_num_words
+        self._near_capacity_num_words = max(
+            int(capacity_num_words * near_capacity_fraction), 1
+        )
+        self._window_seconds = window_seconds
+        self._frame_size_bytes = DATA_FRAME_SIZE_WORDS * 4
+        self._window_reads: Deque[Tuple[float, int]] = deque()
+        self._num_bytes_in_window = 0
+        self._num_bytes_read = 0
+        self._num_reads = 0
+        self._num_empty_reads = 0
+        self._num_fill_samples = 0
+        self._last_num_words_fifo: Optional[int] = None
+        self._last_fill_timestamp = 0.0
+        self._peak_num_words_fifo = 0
+        self._seconds_near_capacity = 0.0
+
+    def reset(self) -> None:
+        """Clear all counters, the rolling window and the fill level samples."""
+        self._window_reads = deque()
+        self._num_bytes_in_window = 0
+        self._num_bytes_read = 0
+        self._num_reads = 0
+        self._num_empty_reads = 0
+        self._num_fill_samples = 0
+        self._last_num_words_fifo = None
+        self._last_fill_timestamp = 0.0
+        self._peak_num_words_fifo = 0
+        self._seconds_near_capacity = 0.0
+
+    def get_capacity_num_words(self) -> int:
+        return self._capacity_num_words
+
+    def get_window_seconds(self) -> float:
+        return self._window_seconds
+
+    def _drop_reads_outside_window(self, timestamp: float) -> None:
+        window_start = timestamp - self._window_seconds
+        while self._window_reads and self._window_reads[0][0] <= window_start:
+            self._num_bytes_in_window -= self._window_reads.popleft()[1]
+
+    def record_read(self, num_bytes: int, timestamp: Optional[float] = None) -> None:
+        """Record a read from the FIFO.
+
+        Args:
+            num_bytes: the number of bytes the read returned
+            timestamp: the time of the read, from time.perf_counter. Defaults to now
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self._num_reads += 1
+        if num_bytes == 0:
+            self._num_empty_reads += 1
+        else:
+            self._num_bytes_read += num_bytes
+            self._window_reads.append((timestamp, num_bytes))
+            self._num_bytes_in_window += num_bytes
+        self._drop_reads_outside_window(timestamp)
+
+    def record_num_words_fifo(
+        self, num_words: int, timestamp: Optional[float] = None
+    ) -> None:
+        """Record a sample of the fill level of the FIFO.
+
+        Args:
+            num_words: the number of words in the FIFO
+            timestamp: the time of the sample, from time.perf_counter. Defaults to now
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if (
+            self._last_num_words_fifo is not None
+            and self._last_num_words_fifo >= self._near_capacity_num_words
+        ):
+            self._seconds_near_capacity += max(
+                timestamp - self._last_fill_timestamp, 0.0
+            )
+        self._num_fill_samples += 1
+        self._last_num_words_fifo = num_words
+        self._last_fill_timestamp = timestamp
+        self._peak_num_words_fifo = max(self._peak_num_words_fifo, num_words)
+
+    def snapshot(self, timestamp: Optional[float] = None) -> FifoTelemetrySnapshot:
+        """Get the current telemetry.
+
+        Args:
+            timestamp: the end of the rolling window, from time.perf_counter. Defaults to now
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self._drop_reads_outside_window(timestamp)
+        bytes_per_second = self._num_bytes_in_window / self._window_seconds
+        return FifoTelemetrySnapshot(
+            bytes_per_second=bytes_per_second,
+            frames_per_second=bytes_per_second / self._frame_size_bytes,
+            num_bytes_read=self._num_bytes_read,
+            num_frames_read=self._num_bytes_read // self._frame_size_bytes,
+            num_reads=self._num_reads,
+            num_empty_reads=self._num_empty_reads,
+            num_fill_samples=self._num_fill_samples,
+            last_num_words_fifo=self._last_num_words_fifo,
+            peak_num_words_fifo=self._peak_num_words_fifo,
+            seconds_near_capacity=self._seconds_near_capacity,
+            capacity_num_words=self._capacity_num_words,
+            near_capacity_num_words=self._near_capacity_num_words,
+        )
@@ -3,47 +3,153 @@
 from __future__ import annotations
 
 from collections import deque
+import contextlib
+import functools
+import json
 import multiprocessing
+import os
+import queue
+import threading
 from typing import Any
 from typing import Callable
 from typing import cast
+from typing import ContextManager
 from typing import Deque
 from typing import Dict
+from typing import List
+from typing import Mapping
 from typing import Optional
+from typing import Sequence
+from typing import Tuple
 from typing import TypeVar
 from typing import Union
 
 from stdlib_utils import is_queue_eventually_not_empty
 from stdlib_utils import SimpleMultiprocessingQueue
 
+from .constants import BLOCK_SIZE
 from .constants import DATA_FRAME_SIZE_WORDS
 from .constants import DATA_FRAMES_PER_ROUND_ROBIN
+from .constants import MAX_BLOCK_SIZE
+from .constants import PIPE_IN_FIFO
 from .constants import PIPE_OUT_FIFO
+from .constants import ROUND_ROBIN_SIZE_WORDS
+from .constants import TRIGGER_IN_SPI
+from .constants import WIRE_OUT_NUM_WORDS_FIFO
+from .constants import WIRE_OUT_NUM_WORDS_FREE_PIPE_IN
 from .exceptions import FPSimulatorInvalidFIFOValueError
+from .exceptions import OpalKellyAcquisitionNotArmedError
 from .exceptions import OpalKellyBoardAlreadyInitializedError
 from .exceptions import OpalKellyBoardNotInitializedError
+from .exceptions import OpalKellyScriptError
+from .exceptions import OpalKellySequenceNotRegisteredError
 from .exceptions import OpalKellySpiAlreadyStartedError
 from .exceptions import OpalKellySpiAlreadyStoppedError
+from .exceptions import parse_hardware_return_code
+from .fifo_telemetry import FifoTelemetry
+from .fifo_telemetry import FifoTelemetrySnapshot
+from .latency import LatencyRecorder
+from .latency import MethodLatencyStatistics
+from .locking import EndpointLockingXem
+from .locking import LOCK_GROUP_DEVICE
+from .locking import LOCK_GROUP_TRIGGERS
+from .locking import LOCK_GROUP_WIRE_INS
+from .locking import LOCK_GROUP_WIRE_OUTS
 from .main import activate_trigger_in
+from .main import align_max_read_num_bytes
+from .main import benchmark_block_sizes
 from .main import check_file_exists
+from .main import create_lua_script_engine
+from .main import FifoRead
 from .main import get_device_id
+from .main import get_num_bytes_of_round_robins
 from .main import get_num_words_fifo
+from .main import get_num_words_free_pipe_in
+from .main import get_read_alignment_num_bytes
 from .main import get_serial_number
 from .main import initialize_board
+from .main import is_short_transfer
 from .main import is_spi_running
-from .main import read_from_fifo
+from .main import is_triggered
+from .main import load_script
+from .main import read_from_fifo_into_with_status
+from .main import read_from_fifo_with_status
+from .main import read_register
+from .main import read_registers
 from .main import read_wire_out
+from .main import read_wire_outs
+from .main import run_script_function
 from .main import set_device_id
+from .main import set_num_samples
+from .main import set_run_mode
 from .main import set_wire_in
 from .main import start_acquisition
 from .main import stop_acquisition
+from .main import update_trigger_outs
+from .main import validate_block_size
 from .main import validate_device_id
+from .main import validate_pipe_in_num_bytes
+from .main import write_register
+from .main import write_registers
+from .main import write_to_pipe_in
 from .ok_wrapper import okCFrontPanel
+from .ok_wrapper import okCScriptEngine
+from .scripting import ControlSequence
+from .scripting import convert_to_script_argument
+from .scripting import SEQUENCE_STEP_ACTIVATE_TRIGGER_IN
+from .scripting import SEQUENCE_STEP_SET_WIRE_IN
+from .status import StatusPoller
 
 GenericFunctionType = TypeVar(
     "GenericFunctionType", bound=Callable[..., Any]
 )  # https://mypy.readthedocs.io/en/stable/generics.html#declaring-decorators
 
+_calibrated_block_sizes: Dict[str, int] = dict()
+
+
+def _read_calibration_file(calibration_file_path: str) -> Dict[str, int]:
+    if not os.path.isfile(calibration_file_path):
+        return dict()
+    with open(calibration_file_path, encoding="utf-8") as calibration_file:
+        return {
+            serial_number: int(block_size)
+            for serial_number, block_size in json.load(calibration_file).items()
+        }
+
+
+def _write_calibration_file(
+    calibration_file_path: str, serial_number: str, block_size: int
+) -> None:
+    block_sizes = _read_calibration_file(calibration_file_path)
+    block_sizes[serial_number] = block_size
+    with open(calibration_file_path, "w", encoding="utf-8") as calibration_file:
+        json.dump(block_sizes, calibration_file, indent=4, sort_keys=True)
+
+
+def get_calibrated_block_size(
+    serial_number: str, calibration_file_path: Optional[str] = None
+) -> Optional[int]:
+    """Get the block size found by the last calibration of the given board.
+
+    Calibrations made by this process are checked first, then the
+    calibration file, which keeps them across processes.
+
+    Args:
+        serial_number: the serial number of the XEM
+        calibration_file_path: the JSON file calibrations were saved to, if any
+
+    Return:
+        The calibrated block size, or None if the board has not been calibrated.
+    """
+    block_size = _calibrated_block_sizes.get(serial_number)
+    if block_size is None and calibration_file_path is not None:
+        block_size = _read_calibration_file(calibration_file_path).get(serial_number)
+    return block_size
+
+
+def clear_calibrated_block_sizes() -> None:
+    _calibrated_block_sizes.clear()
+
 
 def validate_simulated_fifo_reads(
     fifo: Union[
@@ -88,18 +194,56 @@ def board_must_be_initialized(
     Based on https://stackoverflow.com/questions/38286098/python-method-decorator-to-access-an-instance-variable/38286176
 
     To be used as a decorator for methods that logically require the board to be initialized before they should ever be run.
+
+    The check only runs until the board is initialized: initialize_board
+    then switches the instance to a subclass made by _get_initialized_class,
+    in which every decorated method is replaced by the method itself. Calls
+    made through the class, e.g. FrontPanel.read_wire_out(front_panel, ...),
+    or through super() still go through the check.
     """
 
-    def decorator(
-        self: Any, *args: Any, **kwargs: Any
-    ) -> Any:  # Eli (3/10/20) not sure how to declare the 'self' as type FrontPanelBase...positioning the decorator definition above the class definition gives errors in the decorator, and below the class definition gives errors in the class...
+    @functools.wraps(method_to_decorate)
+    def decorator(self: Any, *args: Any, **kwargs: Any) -> Any:
+        # Eli (3/10/20) not sure how to declare the 'self' as type FrontPanelBase...positioning the decorator definition above the class definition gives errors in the decorator, and below the class definition gives errors in the class...
         if not self.is_board_initialized():
             raise OpalKellyBoardNotInitializedError()
         return method_to_decorate(self, *args, **kwargs)
 
+    setattr(decorator, "_board_must_be_initialized", True)
     return cast(GenericFunctionType, decorator)
 
 
+_initialized_classes: Dict[type, type] = dict()
+
+
+def _get_initialized_class(cls: type) -> type:
+    """Get the subclass that instances of a class switch to once their board is initialized.
+
+    It has the same name, and each method decorated with
+    board_must_be_initialized is replaced by the undecorated method, so
+    calls on an initialized board skip the check entirely.
+    """
+    if cls not in _initialized_classes:
+        undecorated_methods: Dict[str, Any] = dict()
+        for klass in cls.__mro__:
+            for name in vars(klass):
+                method = getattr(cls, name)
+                if getattr(method, "_board_must_be_initialized", False):
+                    undecorated_methods[name] = method.__wrapped__
+        _initialized_classes[cls] = type(
+            cls.__name__,
+            (cls,),
+            {
+                "__module__": cls.__module__,
+                "__qualname__": cls.__qualname__,
+                "__doc__": cls.__doc__,
+                "_uninitialized_class": cls,
+                **undecorated_methods,
+            },
+        )
+    return _initialized_classes[cls]
+
+
 class FrontPanelBase:
     """Base class that performs actions relevant to live board and simulation.
 
@@ -108,12 +252,64 @@ class FrontPanelBase:
 
     default_xem_serial_number = "1917000Q70"
 
+    # the methods that talk to the board, which are recorded while latency instrumentation is enabled
+    instrumented_method_names = (
+        "read_wire_out",
+        "read_wire_outs",
+        "set_wire_in",
+        "set_device_id",
+        "read_from_fifo",
+        "read_from_fifo_into",
+        "read_from_fifo_with_status",
+        "get_num_words_fifo",
+        "write_to_pipe_in",
+        "get_num_words_free_pipe_in",
+        "is_spi_running",
+        "start_acquisition",
+        "stop_acquisition",
+        "activate_trigger_in",
+        "update_trigger_outs",
+        "is_triggered",
+        "update_and_check_triggers",
+        "run_sequence",
+        "read_register",
+        "write_register",
+        "read_registers",
+        "write_registers",
+    )
+
     def __init__(self) -> None:
         self._is_board_initialized = False
         self._bit_file_name: Optional[str] = None
         self._device_id = ""
         self._is_spi_running = False
+        self._is_acquisition_armed = False
         self._serial_number = self.default_xem_serial_number
+        self._control_sequences: Dict[str, ControlSequence] = dict()
+        self._latency_recorder: Optional[LatencyRecorder] = None
+        self._status_poller: Optional[StatusPoller] = None
+        self._method_overrides: Dict[str, Callable[..., Any]] = dict()
+        self._bind_methods()
+
+    def _bind_methods(self) -> None:
+        """Shadow methods on this instance according to its current state.
+
+        Instrumented methods are replaced by a recording wrapper while
+        latency instrumentation is enabled. Only the overrides installed
+        here are ever removed, so anything else set on the instance (e.g. a
+        mock) is left alone.
+        """
+        instance_attributes = vars(self)
+        for method_name, override in self._method_overrides.items():
+            if instance_attributes.get(method_name) is override:
+                del instance_attributes[method_name]
+        self._method_overrides = dict()
+        if self._latency_recorder is not None:
+            for method_name in self.instrumented_method_names:
+                self._method_overrides[method_name] = self._latency_recorder.wrap(
+                    method_name, getattr(self, method_name)
+                )
+        instance_attributes.update(self._method_overrides)
 
     def hard_stop(self, timeout: Optional[float] = None) -> Dict[str, Any]:
         # pylint:disable=no-self-use,unused-argument # Eli (10/27/20): make this compatible with the same interface that InfiniteLoopingParallelismMixIn has
@@ -123,6 +319,62 @@ class FrontPanelBase:
     def is_board_initialized(self) -> bool:
         return self._is_board_initialized
 
+    def is_thread_safe(self) -> bool:
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        return False
+
+    def get_status_poller(self) -> StatusPoller:
+        """Get the status poller shared by everything that reads the status of this board.
+
+        It is created with the default settings on first use. Reading the
+        status through it instead of with is_spi_running or
+        get_num_words_fifo lets any number of threads share each
+        UpdateWireOuts transfer.
+        """
+        if self._status_poller is None:
+            self._status_poller = StatusPoller(
+                lambda ep_addrs: self.read_wire_outs(
+                    ep_addrs
+                )  # pylint: disable=unnecessary-lambda # the method is looked up at each call, since it is swapped while latency instrumentation is enabled
+            )
+        return self._status_poller
+
+    def is_latency_instrumentation_enabled(self) -> bool:
+        return self._latency_recorder is not None
+
+    def enable_latency_instrumentation(self) -> None:
+        """Start recording the calls of every method in instrumented_method_names.
+
+        Each method is replaced on this instance by a recording wrapper, so
+        there is no cost at all while instrumentation is disabled. Enabling
+        it again keeps the statistics recorded so far.
+        """
+        if self._latency_recorder is not None:
+            return
+        self._latency_recorder = LatencyRecorder(self.instrumented_method_names)
+        self._bind_methods()
+
+    def disable_latency_instrumentation(self) -> None:
+        """Stop recording and discard the statistics."""
+        if self._latency_recorder is None:
+            return
+        self._latency_recorder = None
+        self._bind_methods()
+
+    def get_latency_snapshot(self) -> Dict[str, MethodLatencyStatistics]:
+        """Get the statistics recorded for each instrumented method since the last reset.
+
+        Return:
+            The statistics by method name, or an empty dict if instrumentation is disabled
+        """
+        if self._latency_recorder is None:
+            return dict()
+        return self._latency_recorder.snapshot()
+
+    def reset_latency_statistics(self) -> None:
+        if self._latency_recorder is not None:
+            self._latency_recorder.reset()
+
     def initialize_board(
         self,
         bit_file_name: Optional[str] = None,
@@ -137,6 +389,10 @@ class FrontPanelBase:
 
         self._is_board_initialized = True
         self._bit_file_name = bit_file_name
+        if "_uninitialized_class" not in vars(type(self)):
+            self.__class__ = _get_initialized_class(type(self))
+            # recording wrappers made before the switch would keep calling the checked methods
+            self._bind_methods()
 
     @board_must_be_initialized
     def read_wire_out(self, ep_addr: int) -> int:
@@ -144,6 +400,11 @@ class FrontPanelBase:
         # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
         return 0
 
+    @board_must_be_initialized
+    def read_wire_outs(self, ep_addrs: Sequence[int]) -> Dict[int, int]:
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        return {ep_addr: 0 for ep_addr in ep_addrs}
+
     @board_must_be_initialized
     def set_wire_in(self, ep_addr: int, value: int, mask: int) -> None:
         # pylint: disable=unused-argument # this is needed so that the function signatures match for subclasses that override it
@@ -155,21 +416,58 @@ class FrontPanelBase:
         validate_device_id(new_id)
 
     @board_must_be_initialized
-    def read_from_fifo(self) -> bytearray:
+    def read_from_fifo(self, max_bytes: Optional[int] = None) -> bytearray:
         # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        if max_bytes is not None:
+            align_max_read_num_bytes(max_bytes)
         return bytearray(0)
 
+    @board_must_be_initialized
+    def read_from_fifo_into(self, data_buffer: Union[bytearray, memoryview]) -> int:
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        align_max_read_num_bytes(len(data_buffer))
+        return 0
+
+    @board_must_be_initialized
+    def read_from_fifo_with_status(
+        self, max_bytes: Optional[int] = None
+    ) -> Tuple[bytearray, FifoRead]:
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        if max_bytes is not None:
+            align_max_read_num_bytes(max_bytes)
+        return bytearray(0), FifoRead(0, 0, 0)
+
     @board_must_be_initialized
     def get_num_words_fifo(self) -> int:
         # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
         return 0
 
+    @board_must_be_initialized
+    def write_to_pipe_in(
+        self,
+        data: Union[bytearray, memoryview],
+        ep_addr: int = PIPE_IN_FIFO,
+        block_size: Optional[int] = None,
+    ) -> int:
+        # pylint: disable=unused-argument # this is needed so that the function signatures match for subclasses that override it
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        return 0
+
+    @board_must_be_initialized
+    def get_num_words_free_pipe_in(self) -> int:
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        return 0
+
     def get_serial_number(self) -> str:
         return self._serial_number
 
     def get_device_id(self) -> str:
         return self._device_id
 
+    def get_block_size(self) -> int:
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        return BLOCK_SIZE
+
     def get_bit_file_name(self) -> Optional[str]:
         return self._bit_file_name
 
@@ -186,6 +484,33 @@ class FrontPanelBase:
             raise OpalKellySpiAlreadyStartedError()
         self._is_spi_running = True
 
+    @board_must_be_initialized
+    def arm_acquisition(
+        self, num_samples: Optional[int] = None, continuous: Optional[bool] = None
+    ) -> None:
+        """Do everything needed to start acquisition except sending the trigger.
+
+        After this, fire_acquisition_trigger only has to send the trigger,
+        so that acquisition can be started on several boards as close
+        together as possible.
+
+        Args:
+            num_samples: if given, the number of samples to acquire
+            continuous: if given, whether to run SPI data acquisition continuously
+        """
+        # pylint: disable=unused-argument # the settings are staged by subclasses that talk to a board
+        if self.is_spi_running():
+            raise OpalKellySpiAlreadyStartedError()
+        self._is_acquisition_armed = True
+
+    @board_must_be_initialized
+    def fire_acquisition_trigger(self) -> None:
+        """Start acquisition prepared by arm_acquisition."""
+        if not self._is_acquisition_armed:
+            raise OpalKellyAcquisitionNotArmedError()
+        self._is_acquisition_armed = False
+        self._is_spi_running = True
+
     @board_must_be_initialized
     def stop_acquisition(self) -> None:
         if not self.is_spi_running():
@@ -198,17 +523,226 @@ class FrontPanelBase:
         # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
         return
 
+    @board_must_be_initialized
+    def update_trigger_outs(self) -> None:
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        return
+
+    @board_must_be_initialized
+    def is_triggered(self, ep_addr: int, mask: int) -> bool:
+        # pylint: disable=unused-argument # this is needed so that the function signatures match for subclasses that override it
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        return False
+
+    @board_must_be_initialized
+    def update_and_check_triggers(
+        self, triggers: Sequence[Tuple[int, int]]
+    ) -> List[bool]:
+        """Latch the trigger-outs and check the given bits of them.
+
+        Use this instead of update_trigger_outs followed by is_triggered
+        when other threads may poll the trigger-outs too, since each update
+        replaces the latched state that is_triggered reads.
+
+        Args:
+            triggers: the endpoint address and bit mask of each trigger-out to check
+
+        Return:
+            Whether any of the bits of each trigger-out were triggered, in the same order
+        """
+        self.update_trigger_outs()
+        return [self.is_triggered(ep_addr, mask) for ep_addr, mask in triggers]
+
+    def update_and_check_trigger(self, ep_addr: int, mask: int) -> bool:
+        """Latch the trigger-outs and check whether any of the given bits fired."""
+        return self.update_and_check_triggers([(ep_addr, mask)])[0]
+
+    def get_sequence_names(self) -> List[str]:
+        """Get the names of all registered control sequences."""
+        return list(self._control_sequences)
+
+    def _get_control_sequence(self, name: str) -> ControlSequence:
+        if name not in self._control_sequences:
+            raise OpalKellySequenceNotRegisteredError(
+                f"No control sequence named '{name}' has been registered"
+            )
+        return self._control_sequences[name]
+
+    @board_must_be_initialized
+    def register_sequence(self, sequence: ControlSequence) -> None:
+        """Make a control sequence available to run_sequence, replacing any with the same name."""
+        self._control_sequences[sequence.get_name()] = sequence
+
+    @board_must_be_initialized
+    def run_sequence(self, name: str, *arguments: int) -> None:
+        self._get_control_sequence(name).resolve_steps(arguments)
+
+    @board_must_be_initialized
+    def read_register(self, addr: int) -> int:
+        # pylint: disable=unused-argument # this is needed so that the function signatures match for subclasses that override it
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        return 0
+
+    @board_must_be_initialized
+    def write_register(self, addr: int, data: int) -> None:
+        # pylint: disable=unused-argument # this is needed so that the function signatures match for subclasses that override it
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        return
+
+    @board_must_be_initialized
+    def read_registers(self, addresses: Sequence[int]) -> List[int]:
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        return [0] * len(addresses)
+
+    @board_must_be_initialized
+    def write_registers(self, registers: Mapping[int, int]) -> None:
+        # pylint: disable=unused-argument # this is needed so that the function signatures match for subclasses that override it
+        # pylint: disable=no-self-use # this is needed so that the function signatures match for subclasses that override it
+        return
+
 
 class FrontPanel(FrontPanelBase):
-    """Class-based interface for interacting with a XEM."""
+    """Class-based interface for interacting with a XEM.
+
+    Args:
+        xem: the board to interact with
+        block_size: the block size in bytes of pipe transfers
+        thread_safe: whether any number of threads may call the methods at once. If so, calls to the board are serialized per endpoint group by an EndpointLockingXem, and pipe transfers release the GIL, so a FIFO read on one thread does not block wire-out reads on another. Poll trigger-outs with update_and_check_triggers, since an update from another thread can replace the latched state between update_trigger_outs and is_triggered. Control sequences hold the locks of every group but the pipes while they run, since the script engine calls the board directly
+    """
+
+    default_candidate_block_sizes = tuple(
+        2 ** exponent
+        for exponent in range(BLOCK_SIZE.bit_length() - 1, MAX_BLOCK_SIZE.bit_length())
+    )
+    # the data of 32 round robins, the same target as the FIFO polling scheduler
+    default_max_read_alignment_num_bytes = ROUND_ROBIN_SIZE_WORDS * 4 * 32
 
-    def __init__(self, xem: okCFrontPanel):
+    def __init__(
+        self,
+        xem: okCFrontPanel,
+        block_size: int = BLOCK_SIZE,
+        thread_safe: bool = False,
+    ):
         super().__init__()
         self._xem = xem
+        # held for the whole of each FIFO read, which toggles read mode around the transfer
+        self._fifo_lock = threading.RLock()
+        # held from each update of the trigger-outs until the latched state has been checked
+        self._trigger_lock = threading.RLock()
+        self._locking_xem: Optional[EndpointLockingXem] = None
+        if thread_safe:
+            locking_xem = EndpointLockingXem(xem)
+            self._locking_xem = locking_xem
+            self._xem = cast(okCFrontPanel, locking_xem)
+            self._fifo_lock = locking_xem.get_pipe_lock(PIPE_OUT_FIFO)
+            self._trigger_lock = locking_xem.get_lock(LOCK_GROUP_TRIGGERS)
+        self._is_thread_safe = thread_safe
+        validate_block_size(block_size)
+        self._block_size = block_size
+        self._num_short_transfers = 0
+        self._script_engine: Optional[okCScriptEngine] = None
+        self._fifo_telemetry = FifoTelemetry()
 
     def get_xem(self) -> okCFrontPanel:
         return self._xem
 
+    def is_thread_safe(self) -> bool:
+        return self._is_thread_safe
+
+    def get_block_size(self) -> int:
+        return self._block_size
+
+    def set_block_size(self, block_size: int) -> None:
+        """Set the block size of pipe transfers.
+
+        FIFO reads are a multiple of both the round robin size and the block
+        size, so less than get_read_alignment_num_bytes(block_size) of data
+        can be left in the FIFO until the next read. Larger block sizes raise
+        throughput at the cost of this latency.
+
+        Args:
+            block_size: the block size in bytes
+        """
+        validate_block_size(block_size)
+        self._block_size = block_size
+
+    @board_must_be_initialized
+    def calibrate_block_size(
+        self,
+        candidate_block_sizes: Optional[Sequence[int]] = None,
+        num_bytes: Optional[int] = None,
+        num_repeats: int = 10,
+        max_read_alignment_num_bytes: Optional[int] = None,
+        calibration_file_path: Optional[str] = None,
+    ) -> Dict[int, float]:
+        """Find and use the block size with the highest throughput.
+
+        Only block sizes whose read alignment fits the latency budget are
+        tried, since up to that much data can be held back in the FIFO by
+        each read. The chosen block size is remembered for the serial number
+        of the board so that other FrontPanel instances can reuse it with
+        load_calibrated_block_size, and is also saved to the calibration
+        file if one is given. Data read during calibration is discarded.
+
+        Args:
+            candidate_block_sizes: the block sizes in bytes to try. Defaults to all powers of 2 from BLOCK_SIZE to MAX_BLOCK_SIZE
+            num_bytes: the size of each transfer made while benchmarking
+            num_repeats: the number of transfers to time for each candidate
+            max_read_alignment_num_bytes: the latency budget. Candidates whose get_read_alignment_num_bytes is larger are skipped
+            calibration_file_path: the JSON file to save the calibrated block size to
+
+        Return:
+            The throughput in bytes per second of each candidate block size that was tried.
+        """
+        if candidate_block_sizes is None:
+            candidate_block_sizes = self.default_candidate_block_sizes
+        if max_read_alignment_num_bytes is None:
+            max_read_alignment_num_bytes = self.default_max_read_alignment_num_bytes
+        candidate_block_sizes = [
+            block_size
+            for block_size in candidate_block_sizes
+            if get_read_alignment_num_bytes(block_size) <= max_read_alignment_num_bytes
+        ]
+        if not candidate_block_sizes:
+            raise ValueError(
+                f"No candidate block size has a read alignment within {max_read_alignment_num_bytes} bytes"
+            )
+        with self._fifo_lock:
+            throughputs = benchmark_block_sizes(
+                self.get_xem(),
+                candidate_block_sizes,
+                num_bytes=num_bytes,
+                num_repeats=num_repeats,
+            )
+        best_block_size = max(throughputs, key=lambda size: throughputs[size])
+        self.set_block_size(best_block_size)
+        serial_number = self.get_serial_number()
+        _calibrated_block_sizes[serial_number] = best_block_size
+        if calibration_file_path is not None:
+            _write_calibration_file(
+                calibration_file_path, serial_number, best_block_size
+            )
+        return throughputs
+
+    def load_calibrated_block_size(
+        self, calibration_file_path: Optional[str] = None
+    ) -> bool:
+        """Use the block size previously calibrated for this board, if any.
+
+        Args:
+            calibration_file_path: the JSON file a previous process saved its calibrations to
+
+        Return:
+            True if a calibrated block size was found and applied, False otherwise
+        """
+        block_size = get_calibrated_block_size(
+            self.get_serial_number(), calibration_file_path=calibration_file_path
+        )
+        if block_size is None:
+            return False
+        self.set_block_size(block_size)
+        return True
+
     def initialize_board(
         self,
         bit_file_name: Optional[str] = None,
@@ -220,12 +754,24 @@ class FrontPanel(FrontPanelBase):
         )
         initialize_board(self.get_xem(), bit_file_name=bit_file_name)
 
+    @board_must_be_initialized
     def read_wire_out(self, ep_addr: int) -> int:
-        super().read_wire_out(ep_addr)
         return read_wire_out(self.get_xem(), ep_addr)
 
+    @board_must_be_initialized
+    def read_wire_outs(self, ep_addrs: Sequence[int]) -> Dict[int, int]:
+        """Read several wire-outs with a single UpdateWireOuts transfer.
+
+        Reading WIRE_OUT_NUM_WORDS_FIFO this way is recorded in the FIFO
+        telemetry just like get_num_words_fifo.
+        """
+        values = read_wire_outs(self.get_xem(), ep_addrs)
+        if WIRE_OUT_NUM_WORDS_FIFO in values:
+            self._fifo_telemetry.record_num_words_fifo(values[WIRE_OUT_NUM_WORDS_FIFO])
+        return values
+
+    @board_must_be_initialized
     def set_wire_in(self, ep_addr: int, value: int, mask: int) -> None:
-        super().set_wire_in(ep_addr, value, mask)
         set_wire_in(self.get_xem(), ep_addr, value, mask)
 
     def set_device_id(self, new_id: str) -> None:
@@ -238,38 +784,219 @@ class FrontPanel(FrontPanelBase):
     def get_serial_number(self) -> str:
         return get_serial_number(self.get_xem())
 
+    def get_fifo_telemetry(self) -> FifoTelemetry:
+        return self._fifo_telemetry
+
+    def set_fifo_telemetry(self, fifo_telemetry: FifoTelemetry) -> None:
+        """Replace the FIFO telemetry, e.g. with one for a FIFO of a different capacity."""
+        self._fifo_telemetry = fifo_telemetry
+
+    def get_fifo_telemetry_snapshot(self) -> FifoTelemetrySnapshot:
+        """Get the throughput of FIFO reads and the fill level history of the FIFO."""
+        return self._fifo_telemetry.snapshot()
+
+    @board_must_be_initialized
     def get_num_words_fifo(self) -> int:
-        super().get_num_words_fifo()
-        return get_num_words_fifo(self.get_xem())
+        num_words = get_num_words_fifo(self.get_xem())
+        self._fifo_telemetry.record_num_words_fifo(num_words)
+        return num_words
 
-    def read_from_fifo(self) -> bytearray:
+    def read_from_fifo(self, max_bytes: Optional[int] = None) -> bytearray:
         super().read_from_fifo()
-        return read_from_fifo(self.get_xem())
+        data, _ = self._read_from_fifo_with_status(max_bytes)
+        return data
+
+    def read_from_fifo_with_status(
+        self, max_bytes: Optional[int] = None
+    ) -> Tuple[bytearray, FifoRead]:
+        """Read all unread data from the FIFO and report how the read went.
+
+        The FIFO level in the status is the one read to size the transfer, so
+        it can be used instead of a separate call to get_num_words_fifo.
+
+        Args:
+            max_bytes: if given, read at most this many bytes (rounded down to whole round robins and blocks) and leave the rest in the FIFO
+
+        Return:
+            The data read, as returned by read_from_fifo, and the status of the read
+        """
+        super().read_from_fifo_with_status()
+        return self._read_from_fifo_with_status(max_bytes)
+
+    def _read_from_fifo_with_status(
+        self, max_bytes: Optional[int]
+    ) -> Tuple[bytearray, FifoRead]:
+        with self._fifo_lock:
+            data, fifo_read = read_from_fifo_with_status(
+                self.get_xem(), block_size=self._block_size, max_bytes=max_bytes
+            )
+            self._record_fifo_read(fifo_read, len(data))
+        return data, fifo_read
+
+    def read_from_fifo_into(self, data_buffer: Union[bytearray, memoryview]) -> int:
+        super().read_from_fifo_into(data_buffer)
+        with self._fifo_lock:
+            fifo_read = read_from_fifo_into_with_status(
+                self.get_xem(), data_buffer, block_size=self._block_size
+            )
+            num_bytes_read = get_num_bytes_of_round_robins(fifo_read.num_bytes_read)
+            self._record_fifo_read(fifo_read, num_bytes_read)
+        return num_bytes_read
+
+    def _record_fifo_read(self, fifo_read: FifoRead, num_bytes_read: int) -> None:
+        # the FIFO level is read to size every transfer, so it is a free telemetry sample
+        self._fifo_telemetry.record_num_words_fifo(fifo_read.num_words_fifo)
+        if is_short_transfer(fifo_read):
+            self._num_short_transfers += 1
+        self._fifo_telemetry.record_read(num_bytes_read)
+
+    def get_num_short_transfers(self) -> int:
+        """Get the number of FIFO reads that received fewer bytes than requested."""
+        return self._num_short_transfers
+
+    @board_must_be_initialized
+    def write_to_pipe_in(
+        self,
+        data: Union[bytearray, memoryview],
+        ep_addr: int = PIPE_IN_FIFO,
+        block_size: Optional[int] = None,
+    ) -> int:
+        """Write data to a block pipe-in endpoint.
+
+        Args:
+            data: writable buffer holding the data. Its length must be a multiple of the block size
+            ep_addr: the address of the pipe-in endpoint
+            block_size: the block size in bytes to use for the transfer. Defaults to the block size of this FrontPanel
+
+        Return:
+            The number of bytes written
+        """
+        if block_size is None:
+            block_size = self._block_size
+        return write_to_pipe_in(
+            self.get_xem(), data, ep_addr=ep_addr, block_size=block_size
+        )
 
+    @board_must_be_initialized
+    def get_num_words_free_pipe_in(self) -> int:
+        return get_num_words_free_pipe_in(self.get_xem())
+
+    @board_must_be_initialized
     def is_spi_running(self) -> bool:
-        super().is_spi_running()
         return is_spi_running(self.get_xem())
 
     def start_acquisition(self) -> None:
         super().start_acquisition()
         start_acquisition(self.get_xem())
 
+    def arm_acquisition(
+        self, num_samples: Optional[int] = None, continuous: Optional[bool] = None
+    ) -> None:
+        super().arm_acquisition(num_samples=num_samples, continuous=continuous)
+        if continuous is not None:
+            set_run_mode(self.get_xem(), continuous)
+        if num_samples is not None:
+            set_num_samples(self.get_xem(), num_samples)
+
+    def fire_acquisition_trigger(self) -> None:
+        super().fire_acquisition_trigger()
+        start_acquisition(self.get_xem())
+
     def stop_acquisition(self) -> None:
         super().stop_acquisition()
         stop_acquisition(self.get_xem())
 
+    @board_must_be_initialized
     def activate_trigger_in(self, ep_addr: int, bit: int) -> None:
-        super().activate_trigger_in(ep_addr, bit)
         activate_trigger_in(self.get_xem(), ep_addr, bit)
 
+    @board_must_be_initialized
+    def update_trigger_outs(self) -> None:
+        update_trigger_outs(self.get_xem())
+
+    @board_must_be_initialized
+    def is_triggered(self, ep_addr: int, mask: int) -> bool:
+        return is_triggered(self.get_xem(), ep_addr, mask)
+
+    def update_and_check_triggers(
+        self, triggers: Sequence[Tuple[int, int]]
+    ) -> List[bool]:
+        with self._trigger_lock:
+            return super().update_and_check_triggers(triggers)
+
+    def _get_script_engine(self) -> okCScriptEngine:
+        if self._script_engine is None:
+            self._script_engine = create_lua_script_engine(self.get_xem())
+        return self._script_engine
+
+    def _hold_script_locks(self) -> ContextManager[Any]:
+        # the script engine calls the board directly, bypassing the EndpointLockingXem, and sequences use every group of endpoints but the pipes
+        if self._locking_xem is None:
+            return contextlib.nullcontext()
+        return self._locking_xem.hold_locks(
+            (
+                LOCK_GROUP_WIRE_INS,
+                LOCK_GROUP_WIRE_OUTS,
+                LOCK_GROUP_TRIGGERS,
+                LOCK_GROUP_DEVICE,
+            )
+        )
+
+    def register_sequence(self, sequence: ControlSequence) -> None:
+        """Compile a control sequence to Lua and load it into the script engine of the board."""
+        super().register_sequence(sequence)
+        with self._hold_script_locks():
+            load_script(
+                self._get_script_engine(), sequence.get_name(), sequence.to_lua()
+            )
+
+    def run_sequence(self, name: str, *arguments: int) -> None:
+        """Run a registered control sequence with a single script function call.
+
+        Args:
+            name: the name of the sequence
+            arguments: the value of each argument of the sequence
+        """
+        super().run_sequence(name, *arguments)
+        with self._hold_script_locks():
+            results = run_script_function(
+                self._get_script_engine(),
+                name,
+                [convert_to_script_argument(argument) for argument in arguments],
+            )
+        return_code = results[0]
+        if not isinstance(return_code, int):
+            raise OpalKellyScriptError(
+                f"Sequence '{name}' returned {return_code!r} instead of a return code"
+            )
+        parse_hardware_return_code(return_code)
+
+    @board_must_be_initialized
+    def read_register(self, addr: int) -> int:
+        return read_register(self.get_xem(), addr)
+
+    @board_must_be_initialized
+    def write_register(self, addr: int, data: int) -> None:
+        write_register(self.get_xem(), addr, data)
+
+    @board_must_be_initialized
+    def read_registers(self, addresses: Sequence[int]) -> List[int]:
+        return read_registers(self.get_xem(), addresses)
+
+    @board_must_be_initialized
+    def write_registers(self, registers: Mapping[int, int]) -> None:
+        write_registers(self.get_xem(), registers)
+
 
 class FrontPanelSimulator(FrontPanelBase):
     """Simulates a okCFrontPanel/XEM object.
 
     Args:
-        simulated_response_queues: dictionary where the ultimate leaves should be multiprocessing_utils.SimpleMultiprocessingQueue or multiprocessing.Queue objects. These values are popped off the end of the queue and returned as if coming from the XEM. The 'wire_outs' key should contain a sub-dict with keys of integer values representing the ep addresses.
+        simulated_response_queues: dictionary where the ultimate leaves should be multiprocessing_utils.SimpleMultiprocessingQueue or multiprocessing.Queue objects. These values are popped off the end of the queue and returned as if coming from the XEM. The 'wire_outs' key should contain a sub-dict with keys of integer values representing the ep addresses. The optional 'trigger_outs' key has the same layout, with each value being a bit mask of the triggers that fired. The optional 'pipe_ins' key has the same layout, and each write to a pipe-in is put into the queue of its endpoint.
     """
 
+    default_num_words_free_pipe_in = 0xFFFFFFFF
+
     def __init__(self, simulated_response_queues: Dict[str, Any]):
         super().__init__()
         if "pipe_outs" in simulated_response_queues:
@@ -278,9 +1005,12 @@ class FrontPanelSimulator(FrontPanelBase):
             validate_simulated_fifo_reads(fifo)
         self._simulated_response_queues = simulated_response_queues
         self._is_spi_running = False
+        self._unread_fifo_bytearray: Optional[bytearray] = None
+        self._latched_trigger_outs: Dict[int, int] = dict()
+        self._register_file: Dict[int, int] = dict()
 
+    @board_must_be_initialized
     def read_wire_out(self, ep_addr: int) -> int:
-        super().read_wire_out(ep_addr)
         wire_out_queues = self._simulated_response_queues["wire_outs"]
         the_queue = wire_out_queues[ep_addr]
         simulated_wire_out_value = the_queue.get_nowait()
@@ -291,23 +1021,169 @@ class FrontPanelSimulator(FrontPanelBase):
 
         return simulated_wire_out_value
 
+    @board_must_be_initialized
+    def read_wire_outs(self, ep_addrs: Sequence[int]) -> Dict[int, int]:
+        """Take the next value from the simulated wire-out queue of each endpoint."""
+        return {ep_addr: self.read_wire_out(ep_addr) for ep_addr in ep_addrs}
+
     def set_device_id(self, new_id: str) -> None:
         super().set_device_id(new_id)
         self._device_id = new_id
 
-    def read_from_fifo(self) -> bytearray:
-        super().read_from_fifo()
-        pipe_out_queues = self._simulated_response_queues["pipe_outs"]
-        fifo = pipe_out_queues[PIPE_OUT_FIFO]
-        this_fifo_bytearray = fifo.get_nowait()
-        if not isinstance(this_fifo_bytearray, bytearray):
-            raise NotImplementedError(
-                "Items put into the simulated FIFO should always be of type bytearray."
-            )
+    @board_must_be_initialized
+    def update_trigger_outs(self) -> None:
+        """Latch every value put into the simulated trigger-out queues since the last update.
+
+        Each value in the queue of an endpoint is a bit mask of the triggers
+        that fired. Unlike reads, this does not wait for items to arrive in the
+        queues, since it is expected to be polled.
+        """
+        trigger_out_queues = self._simulated_response_queues.get("trigger_outs", {})
+        self._latched_trigger_outs = dict()
+        for ep_addr, the_queue in trigger_out_queues.items():
+            fired_bits = 0
+            while True:
+                try:
+                    fired_bits |= the_queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._latched_trigger_outs[ep_addr] = fired_bits
+
+    @board_must_be_initialized
+    def is_triggered(self, ep_addr: int, mask: int) -> bool:
+        return self._latched_trigger_outs.get(ep_addr, 0) & mask != 0
+
+    @board_must_be_initialized
+    def activate_trigger_in(self, ep_addr: int, bit: int) -> None:
+        """Activate a simulated trigger-in.
+
+        Bit 0 of TRIGGER_IN_SPI starts SPI data acquisition and bit 1 stops
+        it, the same as on the board, so sequences that send these triggers
+        leave the simulator in the same state as start_acquisition and
+        stop_acquisition. Other trigger-ins are ignored.
+        """
+        if ep_addr != TRIGGER_IN_SPI:
+            return
+        if bit == 0:
+            self._is_spi_running = True
+        elif bit == 1:
+            self._is_spi_running = False
+
+    @board_must_be_initialized
+    def write_to_pipe_in(
+        self,
+        data: Union[bytearray, memoryview],
+        ep_addr: int = PIPE_IN_FIFO,
+        block_size: Optional[int] = None,
+    ) -> int:
+        """Put a copy of the data into the simulated pipe-in sink queue of the endpoint.
+
+        Args:
+            data: the data to write. Its length must be a multiple of the block size
+            ep_addr: the address of the pipe-in endpoint, a key of the 'pipe_ins' sub-dict
+            block_size: the block size in bytes to validate the data against. Defaults to BLOCK_SIZE
+        """
+        if block_size is None:
+            block_size = BLOCK_SIZE
+        validate_pipe_in_num_bytes(len(data), block_size)
+        pipe_in_queues = self._simulated_response_queues["pipe_ins"]
+        pipe_in_queues[ep_addr].put_nowait(bytearray(data))
+        return len(data)
+
+    @board_must_be_initialized
+    def get_num_words_free_pipe_in(self) -> int:
+        """Get the simulated free space of the pipe-in FIFO.
+
+        Values are taken from the WIRE_OUT_NUM_WORDS_FREE_PIPE_IN queue of
+        the simulated wire outs if there is one, otherwise the sink never
+        fills up.
+        """
+        if WIRE_OUT_NUM_WORDS_FREE_PIPE_IN in self._simulated_response_queues.get(
+            "wire_outs", {}
+        ):
+            return self.read_wire_out(WIRE_OUT_NUM_WORDS_FREE_PIPE_IN)
+        return self.default_num_words_free_pipe_in
+
+    def run_sequence(self, name: str, *arguments: int) -> None:
+        """Run the steps of a registered control sequence one by one through the methods of the simulator."""
+        super().run_sequence(name, *arguments)
+        for kind, operands in self._get_control_sequence(name).resolve_steps(arguments):
+            if kind == SEQUENCE_STEP_SET_WIRE_IN:
+                self.set_wire_in(*operands)
+            elif kind == SEQUENCE_STEP_ACTIVATE_TRIGGER_IN:
+                self.activate_trigger_in(*operands)
+            else:
+                self.write_register(*operands)
+
+    def get_register_file(self) -> Dict[int, int]:
+        """Get a copy of every register written so far, keyed by address."""
+        return dict(self._register_file)
+
+    @board_must_be_initialized
+    def read_register(self, addr: int) -> int:
+        """Read a register of the simulated register file.
+
+        Registers that have never been written read as 0.
+        """
+        return self._register_file.get(addr, 0)
+
+    @board_must_be_initialized
+    def write_register(self, addr: int, data: int) -> None:
+        self._register_file[addr] = data
+
+    @board_must_be_initialized
+    def read_registers(self, addresses: Sequence[int]) -> List[int]:
+        return [self._register_file.get(addr, 0) for addr in addresses]
+
+    @board_must_be_initialized
+    def write_registers(self, registers: Mapping[int, int]) -> None:
+        self._register_file.update(registers)
+
+    def read_from_fifo(self, max_bytes: Optional[int] = None) -> bytearray:
+        super().read_from_fifo(max_bytes=max_bytes)
+        if self._unread_fifo_bytearray is not None:
+            this_fifo_bytearray = self._unread_fifo_bytearray
+            self._unread_fifo_bytearray = None
+        else:
+            pipe_out_queues = self._simulated_response_queues["pipe_outs"]
+            fifo = pipe_out_queues[PIPE_OUT_FIFO]
+            this_fifo_bytearray = fifo.get_nowait()
+            if not isinstance(this_fifo_bytearray, bytearray):
+                raise NotImplementedError(
+                    "Items put into the simulated FIFO should always be of type bytearray."
+                )
+        if max_bytes is not None:
+            max_num_bytes = align_max_read_num_bytes(max_bytes)
+            if len(this_fifo_bytearray) > max_num_bytes:
+                self._unread_fifo_bytearray = this_fifo_bytearray[max_num_bytes:]
+                this_fifo_bytearray = this_fifo_bytearray[:max_num_bytes]
         return this_fifo_bytearray
 
+    def read_from_fifo_into(self, data_buffer: Union[bytearray, memoryview]) -> int:
+        super().read_from_fifo_into(data_buffer)
+        if self._unread_fifo_bytearray is None:
+            pipe_out_queues = self._simulated_response_queues["pipe_outs"]
+            if not is_queue_eventually_not_empty(pipe_out_queues[PIPE_OUT_FIFO]):
+                return 0
+        data = self.read_from_fifo(max_bytes=len(data_buffer))
+        num_bytes_read = len(data)
+        data_buffer[:num_bytes_read] = data
+        return num_bytes_read
+
+    def read_from_fifo_with_status(
+        self, max_bytes: Optional[int] = None
+    ) -> Tuple[bytearray, FifoRead]:
+        super().read_from_fifo_with_status(max_bytes=max_bytes)
+        num_words_fifo = self.get_num_words_fifo()
+        if num_words_fifo == 0:
+            return bytearray(0), FifoRead(0, 0, 0)
+        data = self.read_from_fifo(max_bytes=max_bytes)
+        return data, FifoRead(num_words_fifo, len(data), len(data))
+
+    @board_must_be_initialized
     def get_num_words_fifo(self) -> int:
-        super().get_num_words_fifo()
+        if self._unread_fifo_bytearray is not None:
+            return len(self._unread_fifo_bytearray) // 4
         pipe_out_queues = self._simulated_response_queues["pipe_outs"]
         fifo = pipe_out_queues[PIPE_OUT_FIFO]
         if not is_queue_eventually_not_empty(fifo):
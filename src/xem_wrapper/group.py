@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""Synchronized acquisition from several boards with a merged data stream."""
+from concurrent.futures import ThreadPoolExecutor
+import time
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .continuity import SAMPLE_IDX_MODULUS
+from .demux import get_round_robin_view
+from .demux import ROUND_ROBIN_SIZE_BYTES
+from .front_panel import FrontPanelBase
+
+
+class MergedRoundRobins(NamedTuple):
+    """Round robins from several boards in order of aligned sample index.
+
+    Attributes:
+        board_indices: the position in the group of the board each round robin came from
+        sample_indices: the aligned (unwrapped and offset) sample index of each round robin
+        data: the round robins themselves, concatenated in the same order
+    """
+
+    board_indices: NDArray[np.int64]
+    sample_indices: NDArray[np.int64]
+    data: bytearray
+
+
+def _make_empty_merged_round_robins() -> MergedRoundRobins:
+    return MergedRoundRobins(
+        np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), bytearray(0)
+    )
+
+
+class SampleIndexStreamMerger:
+    """K-way merge of the round robin streams of several boards.
+
+    The sample index of the first data frame of each round robin is unwrapped
+    past 2**32 and shifted by the offset of its board to give an aligned
+    sample index. Since every board's stream is already in order, round
+    robins can be released as soon as every board has produced data up to
+    their aligned sample index; anything newer is held until then. Round
+    robins with the same aligned sample index are ordered by board.
+
+    Args:
+        num_boards: the number of streams to merge
+        sample_idx_offsets: added to the unwrapped sample indices of each board to align them. Defaults to 0 for every board
+    """
+
+    def __init__(
+        self, num_boards: int, sample_idx_offsets: Optional[Sequence[int]] = None
+    ) -> None:
+        if num_boards < 1:
+            raise ValueError(f"num_boards must be at least 1, got {num_boards}")
+        if sample_idx_offsets is None:
+            sample_idx_offsets = [0] * num_boards
+        if len(sample_idx_offsets) != num_boards:
+            raise ValueError(
+                f"Expected {num_boards} sample index offsets, got {len(sample_idx_offsets)}"
+            )
+        self._num_boards = num_boards
+        self._sample_idx_offsets = list(sample_idx_offsets)
+        self._last_raw_sample_idxs: List[Optional[int]] = [None] * num_boards
+        self._last_unwrapped_sample_idxs = [0] * num_boards
+        self._pending_sample_idxs: List[List[NDArray[np.int64]]] = [
+            [] for _ in range(num_boards)
+        ]
+        self._pending_round_robins: List[List[NDArray[np.uint8]]] = [
+            [] for _ in range(num_boards)
+        ]
+
+    def get_num_boards(self) -> int:
+        return self._num_boards
+
+    def get_sample_idx_offsets(self) -> List[int]:
+        return list(self._sample_idx_offsets)
+
+    def get_num_pending_round_robins(self) -> int:
+        """Get the number of round robins held back until the other boards catch up."""
+        return sum(
+            len(sample_idxs)
+            for board_pending in self._pending_sample_idxs
+            for sample_idxs in board_pending
+        )
+
+    def add(self, board_idx: int, data: Union[bytes, bytearray, memoryview]) -> None:
+        """Add the next FIFO read of one board.
+
+        The data is copied, so the buffer can be reused for the next read.
+
+        Args:
+            board_idx: the position of the board in the group
+            data: whole round robins as returned by read_from_fifo
+        """
+        frames = get_round_robin_view(data, check_headers=False)
+        if frames.shape[0] == 0:
+            return
+        raw_sample_idxs = frames["sample_idx"][:, 0].astype(np.int64)
+        last_raw_sample_idx = self._last_raw_sample_idxs[board_idx]
+        if last_raw_sample_idx is None:
+            last_raw_sample_idx = int(raw_sample_idxs[0])
+            self._last_unwrapped_sample_idxs[board_idx] = last_raw_sample_idx
+        steps = (
+            np.diff(raw_sample_idxs, prepend=last_raw_sample_idx) % SAMPLE_IDX_MODULUS
+        )
+        unwrapped_sample_idxs = self._last_unwrapped_sample_idxs[board_idx] + np.cumsum(
+            steps
+        )
+        self._last_raw_sample_idxs[board_idx] = int(raw_sample_idxs[-1])
+        self._last_unwrapped_sample_idxs[board_idx] = int(unwrapped_sample_idxs[-1])
+
+        self._pending_sample_idxs[board_idx].append(
+            unwrapped_sample_idxs + self._sample_idx_offsets[board_idx]
+        )
+        self._pending_round_robins[board_idx].append(
+            np.frombuffer(data, dtype=np.uint8)
+            .reshape(-1, ROUND_ROBIN_SIZE_BYTES)
+            .copy()
+        )
+
+    def _get_watermark(self) -> Optional[int]:
+        if any(idx is None for idx in self._last_raw_sample_idxs):
+            return None
+        return min(
+            unwrapped + offset
+            for unwrapped, offset in zip(
+                self._last_unwrapped_sample_idxs, self._sample_idx_offsets
+            )
+        )
+
+    def pop_merged(self, flush: bool = False) -> MergedRoundRobins:
+        """Remove and return the round robins that can be placed in their final order.
+
+        Args:
+            flush: whether to release everything that is pending, e.g. once acquisition has stopped
+
+        Return:
+            The released round robins in order of aligned sample index
+        """
+        watermark = None
+        if not flush:
+            watermark = self._get_watermark()
+            if watermark is None:
+                return _make_empty_merged_round_robins()
+        board_idxs: List[NDArray[np.int64]] = []
+        sample_idxs: List[NDArray[np.int64]] = []
+        round_robins: List[NDArray[np.uint8]] = []
+        for board_idx in range(self._num_boards):
+            if not self._pending_sample_idxs[board_idx]:
+                continue
+            board_sample_idxs = np.concatenate(self._pending_sample_idxs[board_idx])
+            board_round_robins = np.concatenate(self._pending_round_robins[board_idx])
+            num_released = (
+                board_sample_idxs.size
+                if watermark is None
+                else int(np.searchsorted(board_sample_idxs, watermark, side="right"))
+            )
+            self._pending_sample_idxs[board_idx] = [board_sample_idxs[num_released:]]
+            self._pending_round_robins[board_idx] = [board_round_robins[num_released:]]
+            board_idxs.append(np.full(num_released, board_idx, dtype=np.int64))
+            sample_idxs.append(board_sample_idxs[:num_released])
+            round_robins.append(board_round_robins[:num_released])
+        if not sample_idxs:
+            return _make_empty_merged_round_robins()
+        all_sample_idxs = np.concatenate(sample_idxs)
+        # a stable sort of already sorted runs, with boards concatenated in order, is a k-way merge that breaks ties by board
+        order = np.argsort(all_sample_idxs, kind="stable")
+        return MergedRoundRobins(
+            np.concatenate(board_idxs)[order],
+            all_sample_idxs[order],
+            bytearray(np.concatenate(round_robins)[order].tobytes()),
+        )
+
+
+class FrontPanelGroup:
+    """Control several boards as one and merge their data streams.
+
+    Acquisition is started on all boards back to back with everything that
+    can be prepared ahead of time done first, and the host time at which
+    each trigger was sent is recorded to measure the skew between boards.
+    FIFOs are read concurrently, one thread per board, and merged in order
+    of aligned sample index.
+
+    Args:
+        front_panels: the initialized boards (or simulators) in the group
+        sample_rate: the nominal sample rate in samples per second. If given, the measured trigger skew is converted into sample index offsets used to align the streams
+    """
+
+    def __init__(
+        self,
+        front_panels: Sequence[FrontPanelBase],
+        sample_rate: Optional[float] = None,
+    ) -> None:
+        if not front_panels:
+            raise ValueError("At least one board is needed to form a group")
+        self._front_panels = list(front_panels)
+        self._sample_rate = sample_rate
+        self._trigger_skews: Optional[List[float]] = None
+        self._merger = SampleIndexStreamMerger(len(self._front_panels))
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def get_front_panels(self) -> List[FrontPanelBase]:
+        return list(self._front_panels)
+
+    def get_merger(self) -> SampleIndexStreamMerger:
+        return self._merger
+
+    def get_trigger_skews(self) -> Optional[List[float]]:
+        """Get the delay in seconds between starting acquisition on the first board and each board.
+
+        Return:
+            None until acquisition has been started
+        """
+        if self._trigger_skews is None:
+            return None
+        return list(self._trigger_skews)
+
+    def start_acquisition(
+        self, num_samples: Optional[int] = None, continuous: Optional[bool] = None
+    ) -> List[float]:
+        """Start acquisition on all boards with as little spread as possible.
+
+        Every board is armed first, which checks that it is ready and stages
+        its settings, so that a board that is not ready does not leave the
+        others running. Then only the triggers are sent, in a tight loop. If
+        a trigger fails, the boards already started are stopped again.
+
+        Args:
+            num_samples: if given, the number of samples each board acquires
+            continuous: if given, whether each board runs SPI data acquisition continuously
+
+        Return:
+            The measured trigger skew of each board relative to the first, in seconds
+        """
+        for front_panel in self._front_panels:
+            front_panel.arm_acquisition(num_samples=num_samples, continuous=continuous)
+        fire_methods = [
+            front_panel.fire_acquisition_trigger for front_panel in self._front_panels
+        ]
+        trigger_times: List[float] = []
+        perf_counter = time.perf_counter
+        try:
+            for fire_method in fire_methods:
+                before = perf_counter()
+                fire_method()
+                after = perf_counter()
+                trigger_times.append((before + after) / 2)
+        except Exception:
+            # a partly started group produces streams that cannot be merged
+            for front_panel in self._front_panels[: len(trigger_times)]:
+                front_panel.stop_acquisition()
+            raise
+        trigger_skews = [
+            trigger_time - trigger_times[0] for trigger_time in trigger_times
+        ]
+        sample_idx_offsets = None
+        if self._sample_rate is not None:
+            sample_idx_offsets = [
+                round(skew * self._sample_rate) for skew in trigger_skews
+            ]
+        self._merger = SampleIndexStreamMerger(
+            len(self._front_panels), sample_idx_offsets
+        )
+        self._trigger_skews = trigger_skews
+        return list(trigger_skews)
+
+    def stop_acquisition(self) -> None:
+        for front_panel in self._front_panels:
+            front_panel.stop_acquisition()
+
+    def read_from_fifos(self) -> List[bytearray]:
+        """Read the FIFO of every board concurrently.
+
+        Return:
+            The data read from each board, in the order of the group
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=len(self._front_panels),
+                thread_name_prefix="xem_wrapper_group_read",
+            )
+        futures = [
+            self._executor.submit(front_panel.read_from_fifo)
+            for front_panel in self._front_panels
+        ]
+        return [future.result() for future in futures]
+
+    def read_merged(self, flush: bool = False) -> MergedRoundRobins:
+        """Read every FIFO concurrently and return the data that can be merged so far.
+
+        Args:
+            flush: whether to release all pending data, e.g. after acquisition has stopped
+        """
+        for board_idx, data in enumerate(self.read_from_fifos()):
+            self._merger.add(board_idx, data)
+        return self._merger.pop_merged(flush=flush)
+
+    def close(self) -> None:
+        """Stop the threads used for concurrent reads."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""Per-method call counts, error counts and latency histograms."""
+import bisect
+import itertools
+import math
+import threading
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Sequence
+from typing import Tuple
+from typing import Type
+
+from .exceptions import OpalKellyHardwareError
+
+# bucket i counts latencies whose number of nanoseconds has a bit length of i, i.e. from 2**(i-1) up to (but not including) 2**i. The last bucket also counts everything longer
+LATENCY_HISTOGRAM_NUM_BUCKETS = 40
+
+# the key that errors which are not an OpalKellyHardwareError are counted under
+OTHER_ERROR_NAME = "other"
+
+_NUM_CALLS_IDX = 0
+_TOTAL_NS_IDX = 1
+_MAX_NS_IDX = 2
+_FIRST_BUCKET_IDX = 3
+
+
+def get_latency_bucket_upper_bound_ns(bucket_idx: int) -> float:
+    """Get the exclusive upper bound in nanoseconds of a histogram bucket.
+
+    Return:
+        2**bucket_idx, or infinity for the last bucket
+    """
+    if bucket_idx >= LATENCY_HISTOGRAM_NUM_BUCKETS - 1:
+        return math.inf
+    return float(2 ** bucket_idx)
+
+
+def _get_hardware_error_types() -> List[Type[Exception]]:
+    error_types: List[Type[Exception]] = [OpalKellyHardwareError]
+    for error_type in error_types:
+        error_types.extend(
+            subclass
+            for subclass in error_type.__subclasses__()
+            if subclass not in error_types
+        )
+    return error_types
+
+
+class MethodLatencyStatistics(NamedTuple):
+    """The calls of one method since the last reset.
+
+    Attributes:
+        num_calls: the number of calls, including the ones that raised an error
+        num_errors: the number of calls that raised, by the name of the OpalKellyHardwareError subclass (or OTHER_ERROR_NAME). Only errors that occurred are included
+        total_ns: the summed latency of all calls in nanoseconds
+        max_ns: the longest latency in nanoseconds
+        bucket_counts: the number of calls in each latency bucket, see get_latency_bucket_upper_bound_ns
+    """
+
+    num_calls: int
+    num_errors: Dict[str, int]
+    total_ns: int
+    max_ns: int
+    bucket_counts: Tuple[int, ...]
+
+    def get_mean_ns(self) -> float:
+        if self.num_calls == 0:
+            return math.nan
+        return self.total_ns / self.num_calls
+
+    def get_percentile_ns(self, percentile: float) -> float:
+        """Estimate a latency percentile from the histogram.
+
+        Args:
+            percentile: the percentile, from 0 to 100
+
+        Return:
+            The upper bound of the bucket holding the percentile (capped at max_ns), or NaN if there were no calls
+        """
+        if not 0 <= percentile <= 100:
+            raise ValueError(f"percentile must be from 0 to 100, got {percentile}")
+        if self.num_calls == 0:
+            return math.nan
+        rank = max(math.ceil(self.num_calls * percentile / 100), 1)
+        bucket_idx = bisect.bisect_left(
+            list(itertools.accumulate(self.bucket_counts)), rank
+        )
+        return min(get_latency_bucket_upper_bound_ns(bucket_idx), self.max_ns)
+
+
+class LatencyRecorder:
+    """Record call counts, error counts and latency histograms of methods.
+
+    All counters are allocated up front, and each recorded call only does
+    integer arithmetic on them, so the added cost of a call is well under a
+    microsecond. The counters are not locked; calls made at the same time
+    from different threads may occasionally be miscounted.
+
+    Only the outermost recorded call on each thread is recorded, so a
+    recorded method that calls another one (e.g. start_acquisition checking
+    is_spi_running) counts as a single call with its full latency.
+
+    Args:
+        method_names: the names of the methods that can be recorded
+    """
+
+    def __init__(self, method_names: Sequence[str]) -> None:
+        self._error_types = _get_hardware_error_types()
+        self._error_idxs: Dict[Type[BaseException], int] = {
+            error_type: error_idx
+            for error_idx, error_type in enumerate(self._error_types)
+        }
+        self._counters: Dict[str, List[int]] = {
+            method_name: [0] * (_FIRST_BUCKET_IDX + LATENCY_HISTOGRAM_NUM_BUCKETS)
+            for method_name in method_names
+        }
+        # the last error counter of each method is for errors of other types
+        self._error_counters: Dict[str, List[int]] = {
+            method_name: [0] * (len(self._error_types) + 1)
+            for method_name in method_names
+        }
+        self._thread_state = threading.local()
+
+    def get_method_names(self) -> List[str]:
+        return list(self._counters)
+
+    def wrap(self, method_name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a callable so that each call is recorded under the given method name.
+
+        Return:
+            A function with the same arguments and return value as method
+        """
+        counters = self._counters[method_name]
+        error_counters = self._error_counters[method_name]
+        error_idxs = self._error_idxs
+        other_error_idx = len(self._error_types)
+        last_bucket_idx = _FIRST_BUCKET_IDX + LATENCY_HISTOGRAM_NUM_BUCKETS - 1
+        perf_counter_ns = time.perf_counter_ns
+        thread_state = self._thread_state
+
+        def recorded_method(*args: Any, **kwargs: Any) -> Any:
+            if getattr(thread_state, "is_recording", False):
+                return method(*args, **kwargs)
+            thread_state.is_recording = True
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            except Exception as e:
+                error_counters[error_idxs.get(type(e), other_error_idx)] += 1
+                raise
+            finally:
+                latency_ns = perf_counter_ns() - start
+                thread_state.is_recording = False
+                counters[_NUM_CALLS_IDX] += 1
+                counters[_TOTAL_NS_IDX] += latency_ns
+                if latency_ns > counters[_MAX_NS_IDX]:
+                    counters[_MAX_NS_IDX] = latency_ns
+                counters[
+                    min(_FIRST_BUCKET_IDX + latency_ns.bit_length(), last_bucket_idx)
+                ] += 1
+
+        return recorded_method
+
+    def snapshot(self) -> Dict[str, MethodLatencyStatistics]:
+        """Get the statistics of every method.
+
+        Return:
+            The statistics by method name
+        """
+        statistics: Dict[str, MethodLatencyStatistics] = dict()
+        for method_name, counters in self._counters.items():
+            num_errors: Dict[str, int] = dict()
+            for error_idx, count in enumerate(self._error_counters[method_name]):
+                if count == 0:
+                    continue
+                error_name = (
+                    self._error_types[error_idx].__name__
+                    if error_idx < len(self._error_types)
+                    else OTHER_ERROR_NAME
+                )
+                num_errors[error_name] = count
+            statistics[method_name] = MethodLatencyStatistics(
+                num_calls=counters[_NUM_CALLS_IDX],
+                num_errors=num_errors,
+                total_ns=counters[_TOTAL_NS_IDX],
+                max_ns=counters[_MAX_NS_IDX],
+                bucket_counts=tuple(counters[_FIRST_BUCKET_IDX:]),
+            )
+        return statistics
+
+    def reset(self) -> None:
+        """Set all counters back to zero.
+
+        The counters are cleared in place, so methods that were already
+        wrapped keep recording.
+        """
+        for counters in self._counters.values():
+            counters[:] = [0] * len(counters)
+        for error_counters in self._error_counters.values():
+            error_counters[:] = [0] * len(error_counters)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Sharing one okCFrontPanel between threads with a lock per endpoint group."""
+import contextlib
+import functools
+import threading
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import Sequence
+
+from .ok_wrapper import okCFrontPanel
+
+LOCK_GROUP_WIRE_INS = "wire_ins"
+LOCK_GROUP_WIRE_OUTS = "wire_outs"
+LOCK_GROUP_TRIGGERS = "triggers"
+LOCK_GROUP_DEVICE = "device"
+LOCK_GROUP_PIPE = "pipe"
+
+# the lock group of each okCFrontPanel method that shares state with other methods. Every other method is in LOCK_GROUP_DEVICE
+METHOD_LOCK_GROUPS = {
+    "SetWireInValue": LOCK_GROUP_WIRE_INS,
+    "GetWireInValue": LOCK_GROUP_WIRE_INS,
+    "UpdateWireIns": LOCK_GROUP_WIRE_INS,
+    "UpdateWireOuts": LOCK_GROUP_WIRE_OUTS,
+    "GetWireOutValue": LOCK_GROUP_WIRE_OUTS,
+    "ActivateTriggerIn": LOCK_GROUP_TRIGGERS,
+    "UpdateTriggerOuts": LOCK_GROUP_TRIGGERS,
+    "IsTriggered": LOCK_GROUP_TRIGGERS,
+    "ReadFromPipeOut": LOCK_GROUP_PIPE,
+    "ReadFromPipeOutThr": LOCK_GROUP_PIPE,
+    "ReadFromBlockPipeOut": LOCK_GROUP_PIPE,
+    "ReadFromBlockPipeOutThr": LOCK_GROUP_PIPE,
+    "WriteToPipeIn": LOCK_GROUP_PIPE,
+    "WriteToPipeInThr": LOCK_GROUP_PIPE,
+    "WriteToBlockPipeIn": LOCK_GROUP_PIPE,
+    "WriteToBlockPipeInThr": LOCK_GROUP_PIPE,
+}
+
+# the variant of each pipe transfer that releases the GIL while it runs
+THREADED_TRANSFER_METHODS = {
+    "ReadFromPipeOut": "ReadFromPipeOutThr",
+    "ReadFromBlockPipeOut": "ReadFromBlockPipeOutThr",
+    "WriteToPipeIn": "WriteToPipeInThr",
+    "WriteToBlockPipeIn": "WriteToBlockPipeInThr",
+}
+
+
+class EndpointLockingXem:
+    """Stand in for an okCFrontPanel that any number of threads can call at once.
+
+    The Opal Kelly API only needs calls that share state on the host to be
+    serialized: the wire-ins share one buffer that UpdateWireIns sends, the
+    wire-outs one buffer that UpdateWireOuts fills, and the trigger-outs
+    one latch that UpdateTriggerOuts refreshes and IsTriggered reads. So
+    each of these groups has its own lock, each pipe endpoint has its own
+    lock keyed by address, and everything else (registers, device
+    settings, scripts) shares a device lock. A long transfer on a pipe
+    then only blocks other transfers on the same pipe, never a wire-out
+    read from a control thread.
+
+    Pipe transfers are made with the Thr variants of the API, which
+    release the GIL while the transfer runs, so other Python threads keep
+    running alongside them. The locks are reentrant, so a sequence of calls
+    that must not be interleaved (such as enabling read mode, reading the
+    FIFO and disabling read mode) can be made while holding a lock from
+    get_lock.
+
+    Args:
+        xem: the board to share
+        use_threaded_transfers: whether to make pipe transfers with the Thr variants of the API
+    """
+
+    def __init__(self, xem: okCFrontPanel, use_threaded_transfers: bool = True) -> None:
+        self._xem = xem
+        self._use_threaded_transfers = use_threaded_transfers
+        self._locks: Dict[str, threading.RLock] = {
+            LOCK_GROUP_WIRE_INS: threading.RLock(),
+            LOCK_GROUP_WIRE_OUTS: threading.RLock(),
+            LOCK_GROUP_TRIGGERS: threading.RLock(),
+            LOCK_GROUP_DEVICE: threading.RLock(),
+        }
+        self._pipe_locks: Dict[int, threading.RLock] = dict()
+        self._pipe_locks_lock = threading.Lock()
+
+    def get_xem(self) -> okCFrontPanel:
+        return self._xem
+
+    def get_lock(self, lock_group: str) -> threading.RLock:
+        """Get the lock of a group of methods other than the pipes."""
+        return self._locks[lock_group]
+
+    @contextlib.contextmanager
+    def hold_locks(self, lock_groups: Sequence[str]) -> Iterator[None]:
+        """Hold the locks of several groups other than the pipes at once.
+
+        The locks are always acquired in the same order, whatever the order
+        of lock_groups, so that threads holding several of them at a time
+        cannot deadlock.
+
+        Args:
+            lock_groups: the groups whose locks to hold
+        """
+        with contextlib.ExitStack() as stack:
+            for lock_group, lock in self._locks.items():
+                if lock_group in lock_groups:
+                    stack.enter_context(lock)
+            yield
+
+    def get_pipe_lock(self, ep_addr: int) -> threading.RLock:
+        """Get the lock of the pipe with the given endpoint address."""
+        pipe_lock = self._pipe_locks.get(ep_addr)
+        if pipe_lock is None:
+            with self._pipe_locks_lock:
+                pipe_lock = self._pipe_locks.setdefault(ep_addr, threading.RLock())
+        return pipe_lock
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        target_name = name
+        if self._use_threaded_transfers:
+            target_name = THREADED_TRANSFER_METHODS.get(name, name)
+        attribute = getattr(self._xem, target_name)
+        if not callable(attribute):
+            return attribute
+        lock_group = METHOD_LOCK_GROUPS.get(name, LOCK_GROUP_DEVICE)
+        locked_method: Callable[..., Any]
+        if lock_group == LOCK_GROUP_PIPE:
+            locked_method = functools.partial(self._call_pipe_method, attribute)
+        else:
+            locked_method = functools.partial(
+                self._call_method, self._locks[lock_group], attribute
+            )
+        # cache the wrapper so that later lookups do not go through __getattr__
+        setattr(self, name, locked_method)
+        return locked_method
+
+    @staticmethod
+    def _call_method(
+        lock: threading.RLock, method: Callable[..., Any], *args: Any
+    ) -> Any:
+        with lock:
+            return method(*args)
+
+    def _call_pipe_method(self, method: Callable[..., Any], *args: Any) -> Any:
+        with self.get_pipe_lock(args[0]):
+            return method(*args)
@@ -1,33 +1,56 @@
 # -*- coding: utf-8 -*-
 """Everything goes here until we can reorganize the package."""
 
+import math
 import os
 import struct
+import time
 from typing import cast
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
 from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
 
 from .constants import BLOCK_SIZE
-from .constants import DATA_FRAME_SIZE_WORDS
-from .constants import DATA_FRAMES_PER_ROUND_ROBIN
 from .constants import HEADER_MAGIC_NUMBER
+from .constants import MAX_BLOCK_SIZE
+from .constants import PIPE_IN_FIFO
 from .constants import PIPE_OUT_FIFO
+from .constants import ROUND_ROBIN_SIZE_WORDS
 from .constants import TRIGGER_IN_SPI
 from .constants import WIRE_IN_NUM_SAMPLES
 from .constants import WIRE_IN_RESET_MODE
 from .constants import WIRE_OUT_IS_PLL_LOCKED
 from .constants import WIRE_OUT_IS_SPI_RUNNING
 from .constants import WIRE_OUT_NUM_WORDS_FIFO
+from .constants import WIRE_OUT_NUM_WORDS_FREE_PIPE_IN
+from .exceptions import OpalKellyFifoTimeoutError
 from .exceptions import OpalKellyFileNotFoundError
 from .exceptions import OpalKellyFrontPanelNotSupportedError
 from .exceptions import OpalKellyHeaderNotEightBytesError
 from .exceptions import OpalKellyIDGreaterThan32BytesError
+from .exceptions import OpalKellyInvalidBlockSizeError
+from .exceptions import OpalKellyMaxReadSizeTooSmallError
 from .exceptions import OpalKellyNoDeviceFoundError
+from .exceptions import OpalKellyPipeInDataNotBlockAlignedError
 from .exceptions import OpalKellySampleIdxNotFourBytesError
+from .exceptions import OpalKellyScriptError
+from .exceptions import OpalKellyScriptValueOutOfRangeError
 from .exceptions import OpalKellyWordNotTwoBytesError
 from .exceptions import parse_hardware_return_code
 from .ok_wrapper import FrontPanelDevices
 from .ok_wrapper import okCFrontPanel
+from .ok_wrapper import okCScriptEngine
+from .ok_wrapper import okCScriptValue
+from .ok_wrapper import okCScriptValues
 from .ok_wrapper import okTDeviceInfo
+from .ok_wrapper import okTRegisterEntries
+from .ok_wrapper import okTRegisterEntry
 
 
 def build_header_magic_number_bytes(header_magic_number: int) -> bytearray:
@@ -63,6 +86,28 @@ def read_wire_out(xem: okCFrontPanel, ep_addr: int) -> int:
     return result
 
 
+def read_wire_outs(xem: okCFrontPanel, ep_addrs: Sequence[int]) -> Dict[int, int]:
+    """Get the most recent values of several wire-out endpoints in a single transaction.
+
+    All wire-outs are updated by one UpdateWireOuts call, so this costs a
+    single transfer over USB however many endpoints are read.
+
+    Args:
+        xem: the XEM7310 on which to read the wire-outs
+        ep_addrs: the addresses of the wire-out endpoints
+
+    Return:
+        The value of each wire-out, keyed by address
+    """
+    parse_hardware_return_code(xem.UpdateWireOuts())
+    values: Dict[int, int] = dict()
+    for ep_addr in ep_addrs:
+        result: int = xem.GetWireOutValue(ep_addr)
+        parse_hardware_return_code(result)
+        values[ep_addr] = result
+    return values
+
+
 def set_wire_in(xem: okCFrontPanel, ep_addr: int, value: int, mask: int) -> None:
     """Set a value to the specified bits on the wire-in endpoint.
 
@@ -76,31 +121,360 @@ def set_wire_in(xem: okCFrontPanel, ep_addr: int, value: int, mask: int) -> None
     parse_hardware_return_code(xem.UpdateWireIns())
 
 
-def read_from_fifo(xem: okCFrontPanel) -> bytearray:
+def validate_block_size(block_size: int) -> None:
+    """Validate the block size to use for block pipe transfers.
+
+    Args:
+        block_size: the block size in bytes. Must be a power of 2 no larger than MAX_BLOCK_SIZE
+    """
+    if block_size <= 0 or block_size & (block_size - 1) != 0:
+        raise OpalKellyInvalidBlockSizeError(
+            f"Block size must be a power of 2, got {block_size}"
+        )
+    if block_size > MAX_BLOCK_SIZE:
+        raise OpalKellyInvalidBlockSizeError(
+            f"Block size must be no larger than {MAX_BLOCK_SIZE}, got {block_size}"
+        )
+
+
+def get_read_alignment_num_bytes(block_size: int = BLOCK_SIZE) -> int:
+    """Get the smallest number of bytes that can be read from the FIFO.
+
+    Every read must contain only complete round robins and also be a whole
+    number of blocks. This is also the most data that can be left waiting
+    in the FIFO after a read, so large block sizes add latency: with a block
+    size of 16384 bytes up to 147456 bytes (512 round robins) may be held
+    back until the next read.
+
+    Args:
+        block_size: the block size in bytes used for the transfer
+
+    Return:
+        The least common multiple of the round robin size and the block size.
+    """
+    round_robin_size_bytes = ROUND_ROBIN_SIZE_WORDS * 4
+    return (
+        round_robin_size_bytes
+        * block_size
+        // math.gcd(round_robin_size_bytes, block_size)
+    )
+
+
+def align_max_read_num_bytes(max_bytes: int, block_size: int = BLOCK_SIZE) -> int:
+    """Round a limit on the size of a FIFO read down to a valid read size.
+
+    Args:
+        max_bytes: the largest number of bytes that may be read
+        block_size: the block size in bytes used for the transfer
+
+    Return:
+        The largest multiple of the read alignment that does not exceed max_bytes.
+    """
+    alignment_num_bytes = get_read_alignment_num_bytes(block_size)
+    if max_bytes < alignment_num_bytes:
+        raise OpalKellyMaxReadSizeTooSmallError(
+            f"max_bytes must be at least {alignment_num_bytes} with a block size of {block_size}, got {max_bytes}"
+        )
+    return max_bytes - max_bytes % alignment_num_bytes
+
+
+class FifoRead(NamedTuple):
+    """The status of one read from the FIFO.
+
+    Attributes:
+        num_words_fifo: the number of words in the FIFO when the size of the read was chosen
+        num_bytes_requested: the number of bytes the transfer asked the board for
+        num_bytes_read: the number of bytes the board transferred
+    """
+
+    num_words_fifo: int
+    num_bytes_requested: int
+    num_bytes_read: int
+
+
+def read_from_fifo(
+    xem: okCFrontPanel, block_size: int = BLOCK_SIZE, max_bytes: Optional[int] = None
+) -> bytearray:
     """Read all unread data from the FIFO of the given XEM7310 board.
 
+    If the board transfers fewer bytes than were requested (a short
+    transfer), only the whole round robins actually received are returned.
+    Use read_from_fifo_with_status to find out whether that happened.
+
     Args:
         xem: the XEM7310 to read data from
+        block_size: the block size in bytes to use for the transfer
+        max_bytes: if given, read at most this many bytes (rounded down to whole round robins and blocks) and leave the rest in the FIFO
 
     Return:
         A bytearray containing all data in the FIFO at the time of the read
     """
+    data, _ = read_from_fifo_with_status(
+        xem, block_size=block_size, max_bytes=max_bytes
+    )
+    return data
+
+
+def read_from_fifo_with_status(
+    xem: okCFrontPanel, block_size: int = BLOCK_SIZE, max_bytes: Optional[int] = None
+) -> Tuple[bytearray, FifoRead]:
+    """Read all unread data from the FIFO and report how the read went.
+
+    Args:
+        xem: the XEM7310 to read data from
+        block_size: the block size in bytes to use for the transfer
+        max_bytes: if given, read at most this many bytes (rounded down to whole round robins and blocks) and leave the rest in the FIFO
+
+    Return:
+        The data read, as returned by read_from_fifo, and the status of the read
+    """
+    max_num_bytes: Optional[int] = None
+    if max_bytes is not None:
+        max_num_bytes = align_max_read_num_bytes(max_bytes, block_size)
     num_words_fifo = get_num_words_fifo(xem)
-    if num_words_fifo < DATA_FRAME_SIZE_WORDS * DATA_FRAMES_PER_ROUND_ROBIN:
-        return bytearray(0)
+    num_bytes_to_read = _get_num_bytes_to_read(
+        num_words_fifo, block_size, max_num_bytes
+    )
+    if num_bytes_to_read == 0:
+        return bytearray(0), FifoRead(num_words_fifo, 0, 0)
+
+    data_buffer = bytearray(num_bytes_to_read)
+    num_bytes_read = _read_fifo_into(xem, block_size, data_buffer)
+    del data_buffer[get_num_bytes_of_round_robins(num_bytes_read) :]
+    return data_buffer, FifoRead(num_words_fifo, num_bytes_to_read, num_bytes_read)
+
+
+def read_from_fifo_into(
+    xem: okCFrontPanel,
+    data_buffer: Union[bytearray, memoryview],
+    block_size: int = BLOCK_SIZE,
+) -> int:
+    """Read unread data from the FIFO directly into an existing buffer.
 
-    incomplete_round_robin_words = num_words_fifo % (
-        DATA_FRAME_SIZE_WORDS * DATA_FRAMES_PER_ROUND_ROBIN
+    As much data as is available is read, up to the size of the buffer
+    rounded down to whole round robins and blocks. This avoids allocating a
+    new bytearray for every read, for example when reading straight into
+    shared memory.
+
+    Args:
+        xem: the XEM7310 to read data from
+        data_buffer: writable buffer to read the data into, starting at its first byte
+        block_size: the block size in bytes to use for the transfer
+
+    Return:
+        The number of bytes of whole round robins written into the buffer
+    """
+    fifo_read = read_from_fifo_into_with_status(xem, data_buffer, block_size=block_size)
+    return get_num_bytes_of_round_robins(fifo_read.num_bytes_read)
+
+
+def read_from_fifo_into_with_status(
+    xem: okCFrontPanel,
+    data_buffer: Union[bytearray, memoryview],
+    block_size: int = BLOCK_SIZE,
+) -> FifoRead:
+    """Read unread data from the FIFO into an existing buffer and report how the read went.
+
+    Args:
+        xem: the XEM7310 to read data from
+        data_buffer: writable buffer to read the data into, starting at its first byte
+        block_size: the block size in bytes to use for the transfer
+
+    Return:
+        The status of the read. Only the whole round robins of num_bytes_read are valid data
+    """
+    max_num_bytes = align_max_read_num_bytes(len(data_buffer), block_size)
+    num_words_fifo = get_num_words_fifo(xem)
+    num_bytes_to_read = _get_num_bytes_to_read(
+        num_words_fifo, block_size, max_num_bytes
     )
-    num_words_to_read = num_words_fifo - incomplete_round_robin_words
-    data_buffer = bytearray(num_words_to_read * 4)
+    if num_bytes_to_read == 0:
+        return FifoRead(num_words_fifo, 0, 0)
+    num_bytes_read = _read_fifo_into(
+        xem, block_size, memoryview(data_buffer)[:num_bytes_to_read]
+    )
+    return FifoRead(num_words_fifo, num_bytes_to_read, num_bytes_read)
+
+
+def _get_num_bytes_to_read(
+    num_words_fifo: int, block_size: int, max_num_bytes: Optional[int]
+) -> int:
+    alignment_num_words = get_read_alignment_num_bytes(block_size) // 4
+    if num_words_fifo < alignment_num_words:
+        return 0
+    num_bytes_to_read = (num_words_fifo - num_words_fifo % alignment_num_words) * 4
+    if max_num_bytes is not None:
+        num_bytes_to_read = min(num_bytes_to_read, max_num_bytes)
+    return num_bytes_to_read
+
+
+def get_num_bytes_of_round_robins(num_bytes: int) -> int:
+    """Round a number of bytes read from the FIFO down to whole round robins.
+
+    Only whole round robins can be decoded, so the partial one at the end
+    of a short transfer is dropped.
+
+    Args:
+        num_bytes: the number of bytes transferred
+
+    Return:
+        The number of bytes of the whole round robins among them.
+    """
+    return num_bytes - num_bytes % (ROUND_ROBIN_SIZE_WORDS * 4)
+
+
+def _read_fifo_into(
+    xem: okCFrontPanel, block_size: int, data_buffer: Union[bytearray, memoryview]
+) -> int:
     # enable read mode
     set_wire_in(xem, WIRE_IN_RESET_MODE, 0x0002, 0x0002)
-    read_result = xem.ReadFromBlockPipeOut(PIPE_OUT_FIFO, BLOCK_SIZE, data_buffer)
-    parse_hardware_return_code(read_result)
+    num_bytes_read: int = xem.ReadFromBlockPipeOut(
+        PIPE_OUT_FIFO, block_size, data_buffer
+    )
+    parse_hardware_return_code(num_bytes_read)
     # disable read mode
     set_wire_in(xem, WIRE_IN_RESET_MODE, 0x0000, 0x0002)
-    return data_buffer
+    return num_bytes_read
+
+
+def validate_pipe_in_num_bytes(num_bytes: int, block_size: int = BLOCK_SIZE) -> None:
+    """Validate the size of a write to a block pipe-in.
+
+    Args:
+        num_bytes: the number of bytes to write
+        block_size: the block size in bytes to use for the transfer
+    """
+    validate_block_size(block_size)
+    if num_bytes % block_size != 0:
+        raise OpalKellyPipeInDataNotBlockAlignedError(
+            f"The number of bytes written to a block pipe-in must be a multiple of the block size {block_size}, got {num_bytes}"
+        )
+
+
+def write_to_pipe_in(
+    xem: okCFrontPanel,
+    data: Union[bytearray, memoryview],
+    ep_addr: int = PIPE_IN_FIFO,
+    block_size: int = BLOCK_SIZE,
+) -> int:
+    """Write data to a block pipe-in endpoint of the given XEM7310 board.
+
+    Uses WriteToBlockPipeInThr, which releases the GIL for the duration of
+    the transfer so other Python threads can keep running.
+
+    Args:
+        xem: the XEM7310 to write data to
+        data: writable buffer holding the data. Its length must be a multiple of the block size
+        ep_addr: the address of the pipe-in endpoint
+        block_size: the block size in bytes to use for the transfer
+
+    Return:
+        The number of bytes written
+    """
+    validate_pipe_in_num_bytes(len(data), block_size)
+    num_bytes_written: int = xem.WriteToBlockPipeInThr(ep_addr, block_size, data)
+    parse_hardware_return_code(num_bytes_written)
+    return num_bytes_written
+
+
+def get_num_words_free_pipe_in(xem: okCFrontPanel) -> int:
+    """Get the number of 4 byte words of free space in the pipe-in FIFO of the given XEM7310 board.
+
+    Args:
+        xem: XEM7310 board to check the pipe-in FIFO of
+
+    Return:
+        The number of words that can be written without overflowing the FIFO
+    """
+    return read_wire_out(xem, WIRE_OUT_NUM_WORDS_FREE_PIPE_IN)
+
+
+def is_short_transfer(fifo_read: FifoRead) -> bool:
+    """Check whether a read from the FIFO was a short transfer.
+
+    Args:
+        fifo_read: the status returned by read_from_fifo_with_status or read_from_fifo_into_with_status
+
+    Return:
+        True if the board transferred fewer bytes than were requested
+    """
+    return fifo_read.num_bytes_read < fifo_read.num_bytes_requested
+
+
+def benchmark_block_sizes(
+    xem: okCFrontPanel,
+    candidate_block_sizes: Sequence[int],
+    num_bytes: Optional[int] = None,
+    num_repeats: int = 10,
+    fifo_timeout: float = 1.0,
+) -> Dict[int, float]:
+    """Measure the throughput of FIFO transfers using different block sizes.
+
+    The data read during the benchmark is discarded, so this should only be
+    run while the board is producing data that is not needed. Before each
+    transfer the FIFO is checked to hold enough data for it, so that an
+    idle board raises an error instead of stalling the transfer, and only
+    the transfers themselves are timed.
+
+    Args:
+        xem: the XEM7310 to read data from
+        candidate_block_sizes: the block sizes in bytes to measure
+        num_bytes: the size of each transfer, rounded up to the read alignment of each candidate. Defaults to the smallest size that is aligned for every candidate
+        num_repeats: the number of transfers to time for each candidate
+        fifo_timeout: the longest time in seconds to wait for the FIFO to hold enough data for a transfer
+
+    Return:
+        The throughput in bytes per second of each candidate block size.
+    """
+    for block_size in candidate_block_sizes:
+        validate_block_size(block_size)
+    if num_bytes is None:
+        num_bytes = get_read_alignment_num_bytes(max(candidate_block_sizes))
+    if num_bytes < 1:
+        raise ValueError(f"num_bytes must be at least 1, got {num_bytes}")
+    throughputs: Dict[int, float] = dict()
+    # enable read mode
+    set_wire_in(xem, WIRE_IN_RESET_MODE, 0x0002, 0x0002)
+    try:
+        for block_size in candidate_block_sizes:
+            alignment_num_bytes = get_read_alignment_num_bytes(block_size)
+            data_buffer = bytearray(
+                math.ceil(num_bytes / alignment_num_bytes) * alignment_num_bytes
+            )
+            total_num_bytes_read = 0
+            elapsed = 0.0
+            for _ in range(num_repeats):
+                _wait_for_num_words_fifo(xem, len(data_buffer) // 4, fifo_timeout)
+                start = time.perf_counter()
+                num_bytes_read = xem.ReadFromBlockPipeOut(
+                    PIPE_OUT_FIFO, block_size, data_buffer
+                )
+                elapsed += time.perf_counter() - start
+                parse_hardware_return_code(num_bytes_read)
+                total_num_bytes_read += num_bytes_read
+            # a clock too coarse to time the transfers at all means they were as fast as can be measured
+            throughputs[block_size] = (
+                total_num_bytes_read / elapsed if elapsed > 0 else math.inf
+            )
+    finally:
+        # disable read mode
+        set_wire_in(xem, WIRE_IN_RESET_MODE, 0x0000, 0x0002)
+    return throughputs
+
+
+def _wait_for_num_words_fifo(
+    xem: okCFrontPanel, num_words: int, timeout: float
+) -> None:
+    deadline: Optional[float] = None
+    while get_num_words_fifo(xem) < num_words:
+        now = time.perf_counter()
+        if deadline is None:
+            deadline = now + timeout
+        elif now >= deadline:
+            raise OpalKellyFifoTimeoutError(
+                f"The FIFO did not hold the {num_words} words needed for a transfer within {timeout} seconds"
+            )
+        time.sleep(0.001)
 
 
 def reset_fifos(xem: okCFrontPanel) -> None:
@@ -365,3 +739,178 @@ def activate_trigger_in(xem: okCFrontPanel, ep_addr: int, bit: int) -> None:
     """
     hardware_return_code = xem.ActivateTriggerIn(ep_addr, bit)
     parse_hardware_return_code(hardware_return_code)
+
+
+def update_trigger_outs(xem: okCFrontPanel) -> None:
+    """Latch the current state of all trigger-out endpoints of the XEM7310.
+
+    Args:
+        xem: XEM7310 board to update the trigger outs of
+    """
+    parse_hardware_return_code(xem.UpdateTriggerOuts())
+
+
+def is_triggered(xem: okCFrontPanel, ep_addr: int, mask: int) -> bool:
+    """Check whether any of the given trigger-out bits fired before the last update.
+
+    Does not communicate with the board; call update_trigger_outs first.
+
+    Args:
+        xem: XEM7310 board to check the trigger outs of
+        ep_addr: address of the trigger out endpoint
+        mask: the bits of the trigger out to check
+
+    Return:
+        True if any of the bits in the mask were triggered
+    """
+    return bool(xem.IsTriggered(ep_addr, mask))
+
+
+def _parse_register_runtime_error(error: RuntimeError) -> None:
+    # ReadRegister raises RuntimeError("Error <return code>") instead of returning the code
+    try:
+        return_code = int(str(error).split()[-1])
+    except (IndexError, ValueError):
+        return
+    parse_hardware_return_code(return_code)
+
+
+def read_register(xem: okCFrontPanel, addr: int) -> int:
+    """Read a single register over the register bridge of the XEM7310.
+
+    Args:
+        xem: XEM7310 board to read the register of
+        addr: the address of the register
+
+    Return:
+        The 32-bit value of the register
+    """
+    try:
+        value = xem.ReadRegister(addr)
+    except RuntimeError as e:
+        _parse_register_runtime_error(e)
+        raise
+    return value
+
+
+def write_register(xem: okCFrontPanel, addr: int, data: int) -> None:
+    """Write a single register over the register bridge of the XEM7310.
+
+    Args:
+        xem: XEM7310 board to write the register of
+        addr: the address of the register
+        data: the 32-bit value to write
+    """
+    parse_hardware_return_code(xem.WriteRegister(addr, data))
+
+
+def _build_register_entries(registers: Iterable[Tuple[int, int]]) -> okTRegisterEntries:
+    entries = okTRegisterEntries()
+    for addr, data in registers:
+        entry = okTRegisterEntry()
+        entry.address = addr
+        entry.data = data
+        entries.append(entry)
+    return entries
+
+
+def read_registers(xem: okCFrontPanel, addresses: Sequence[int]) -> List[int]:
+    """Read many registers in a single transaction over the register bridge.
+
+    Args:
+        xem: XEM7310 board to read the registers of
+        addresses: the addresses of the registers, in the order to read them
+
+    Return:
+        The value of each register, in the same order as the addresses
+    """
+    entries = _build_register_entries((addr, 0) for addr in addresses)
+    parse_hardware_return_code(xem.ReadRegisters(entries))
+    return [int(entry.data) for entry in entries]
+
+
+def write_registers(xem: okCFrontPanel, registers: Mapping[int, int]) -> None:
+    """Write a whole register map in a single transaction over the register bridge.
+
+    Args:
+        xem: XEM7310 board to write the registers of
+        registers: the value to write to each register address. Registers are written in the iteration order of the mapping
+    """
+    parse_hardware_return_code(
+        xem.WriteRegisters(_build_register_entries(registers.items()))
+    )
+
+
+def create_lua_script_engine(xem: okCFrontPanel) -> okCScriptEngine:
+    """Create a FrontPanel Lua script engine bound to the given XEM7310 board.
+
+    Args:
+        xem: XEM7310 board that the scripts will control
+
+    Return:
+        The script engine
+    """
+    try:
+        return xem.CreateLuaScriptEngine()
+    except RuntimeError as e:
+        raise OpalKellyScriptError(str(e)) from e
+
+
+def load_script(engine: okCScriptEngine, name: str, code: str) -> None:
+    """Load Lua source into a script engine, defining the functions it contains.
+
+    Args:
+        engine: the script engine to load the source into
+        name: the name of the chunk, used in error messages
+        code: the Lua source
+    """
+    try:
+        engine.LoadScript(name, code)
+    except RuntimeError as e:
+        raise OpalKellyScriptError(str(e)) from e
+
+
+def _convert_script_value(value: okCScriptValue) -> Union[bool, int, str, None]:
+    if value.IsBool():
+        return value.GetBool()
+    if value.IsNumber():
+        return value.GetNumber()
+    if value.IsString():
+        return value.GetString()
+    return None
+
+
+def run_script_function(
+    engine: okCScriptEngine,
+    function_name: str,
+    arguments: Sequence[Union[bool, int, str]] = (),
+) -> List[Union[bool, int, str, None]]:
+    """Call a function previously loaded into a script engine.
+
+    Integer arguments must fit in a signed 32-bit integer, which is all
+    okCScriptValue can hold.
+
+    Args:
+        engine: the script engine the function was loaded into
+        function_name: the name of the global Lua function to call
+        arguments: the arguments to pass to the function
+
+    Return:
+        The values returned by the function. Buffers are returned as None
+    """
+    script_arguments = okCScriptValues()
+    for argument in arguments:
+        if (
+            isinstance(argument, int)
+            and not isinstance(argument, bool)
+            and not -(2 ** 31) <= argument < 2 ** 31
+        ):
+            raise OpalKellyScriptValueOutOfRangeError(
+                f"Integer arguments of script functions must fit in a signed 32-bit integer, got {argument}"
+            )
+        script_arguments.append(okCScriptValue(argument))
+    try:
+        results = engine.RunScriptFunction(function_name, script_arguments)
+    except RuntimeError as e:
+        raise OpalKellyScriptError(str(e)) from e
+    return [_convert_script_value(result) for result in results]
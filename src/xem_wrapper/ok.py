@@ -409,7 +409,7 @@ if not is_cpu_arm():
         def erase(self, *args):
             return _ok.okCScriptValues_erase(self, *args)
 
-        def __init__(self, *args):
+        def __init__(self, *args) -> None:
             _ok.okCScriptValues_swiginit(self, _ok.new_okCScriptValues(*args))
 
         def push_back(self, x) -> None:
@@ -649,7 +649,7 @@ if not is_cpu_arm():
         def erase(self, *args):
             return _ok.okTRegisterEntries_erase(self, *args)
 
-        def __init__(self, *args):
+        def __init__(self, *args) -> None:
             _ok.okTRegisterEntries_swiginit(self, _ok.new_okTRegisterEntries(*args))
 
         def push_back(self, x) -> None:
@@ -832,7 +832,7 @@ if not is_cpu_arm():
         )
         data = property(_ok.okTRegisterEntry_data_get, _ok.okTRegisterEntry_data_set)
 
-        def __init__(self):
+        def __init__(self) -> None:
             _ok.okTRegisterEntry_swiginit(self, _ok.new_okTRegisterEntry())
 
         __swig_destroy__ = _ok.delete_okTRegisterEntry
@@ -1357,7 +1357,7 @@ if not is_cpu_arm():
         InvalidResetProfile = _ok.okCFrontPanel_InvalidResetProfile
         InvalidParameter = _ok.okCFrontPanel_InvalidParameter
 
-        def __init__(self):
+        def __init__(self) -> None:
             _ok.okCFrontPanel_swiginit(self, _ok.new_okCFrontPanel())
 
         __swig_destroy__ = _ok.delete_okCFrontPanel
@@ -1407,13 +1407,13 @@ if not is_cpu_arm():
         def FlashEraseSector(self, address):
             return _ok.okCFrontPanel_FlashEraseSector(self, address)
 
-        def ReadRegisters(self, regs):
+        def ReadRegisters(self, regs: okTRegisterEntries) -> int:
             return _ok.okCFrontPanel_ReadRegisters(self, regs)
 
-        def WriteRegister(self, addr, data):
+        def WriteRegister(self, addr: int, data: int) -> int:
             return _ok.okCFrontPanel_WriteRegister(self, addr, data)
 
-        def WriteRegisters(self, regs):
+        def WriteRegisters(self, regs: okTRegisterEntries) -> int:
             return _ok.okCFrontPanel_WriteRegisters(self, regs)
 
         def GetDeviceListModel(self, num: int):
@@ -1526,7 +1526,7 @@ if not is_cpu_arm():
         def ActivateTriggerIn(self, epAddr: int, bit: int) -> int:
             return _ok.okCFrontPanel_ActivateTriggerIn(self, epAddr, bit)
 
-        def UpdateTriggerOuts(self):
+        def UpdateTriggerOuts(self) -> int:
             return _ok.okCFrontPanel_UpdateTriggerOuts(self)
 
         def IsTriggered(self, epAddr: int, mask) -> bool:
@@ -1558,7 +1558,7 @@ if not is_cpu_arm():
         def CheckAPIVersion(major: int, minor: int, micro: int) -> bool:
             return _ok.okCFrontPanel_CheckAPIVersion(major, minor, micro)
 
-        def ReadRegister(self, addr):
+        def ReadRegister(self, addr: int) -> int:
             return _ok.okCFrontPanel_ReadRegister(self, addr)
 
         def FlashWrite(self, address, data):
@@ -1605,7 +1605,7 @@ if not is_cpu_arm():
         ):
             return _ok.okCFrontPanel_GetDeviceSensors(self)
 
-        def CreateLuaScriptEngine(self):
+        def CreateLuaScriptEngine(self) -> "okCScriptEngine":
             return _ok.okCFrontPanel_CreateLuaScriptEngine(self)
 
 
@@ -1748,7 +1748,7 @@ if not is_cpu_arm():
         )
         __repr__ = _swig_repr
 
-        def __init__(self, *args):
+        def __init__(self, *args) -> None:
             _ok.okCScriptValue_swiginit(self, _ok.new_okCScriptValue(*args))
 
         def IsNumber(self) -> bool:
@@ -1792,7 +1792,7 @@ if not is_cpu_arm():
 
         __repr__ = _swig_repr
 
-        def LoadScript(self, name, code) -> None:
+        def LoadScript(self, name: str, code: str) -> None:
             return _ok.okCScriptEngine_LoadScript(self, name, code)
 
         def LoadFile(self, path) -> None:
@@ -1803,7 +1803,7 @@ if not is_cpu_arm():
 
         __swig_destroy__ = _ok.delete_okCScriptEngine
 
-        def RunScriptFunction(self, *args):
+        def RunScriptFunction(self, *args) -> okCScriptValues:
             return _ok.okCScriptEngine_RunScriptFunction(self, *args)
 
 
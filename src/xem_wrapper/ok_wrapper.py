@@ -3,7 +3,12 @@ from stdlib_utils import is_cpu_arm
 try:  # pragma: no cover
     from .ok import FrontPanelDevices
     from .ok import okCFrontPanel
+    from .ok import okCScriptEngine
+    from .ok import okCScriptValue
+    from .ok import okCScriptValues
     from .ok import okTDeviceInfo
+    from .ok import okTRegisterEntries
+    from .ok import okTRegisterEntry
 except ImportError:  # pragma: no cover
     if not is_cpu_arm():
         raise
@@ -24,12 +29,39 @@ except ImportError:  # pragma: no cover
         def ReadFromBlockPipeOut(*args, **kwargs):
             pass
     
+        def WriteToBlockPipeInThr(*args, **kwargs):
+            pass
+    
+        def ReadFromBlockPipeOutThr(*args, **kwargs):
+            pass
+    
+        def CreateLuaScriptEngine(*args, **kwargs):
+            pass
+    
         def SetWireInValue(*args, **kwargs):
             pass
     
         def ActivateTriggerIn(*args, **kwargs):
             pass
     
+        def UpdateTriggerOuts(*args, **kwargs):
+            pass
+    
+        def IsTriggered(*args, **kwargs):
+            pass
+    
+        def ReadRegister(*args, **kwargs):
+            pass
+    
+        def WriteRegister(*args, **kwargs):
+            pass
+    
+        def ReadRegisters(*args, **kwargs):
+            pass
+    
+        def WriteRegisters(*args, **kwargs):
+            pass
+    
         def IsFrontPanelEnabled(*args, **kwargs):
             pass
     
@@ -50,4 +82,25 @@ except ImportError:  # pragma: no cover
 
     class okTDeviceInfo:
         deviceID = ""
-        serialNumber = ""
\ No newline at end of file
+        serialNumber = ""
+
+    class okTRegisterEntries(list):
+        pass
+
+    class okTRegisterEntry:
+        address = 0
+        data = 0
+
+    class okCScriptEngine:
+        def LoadScript(*args, **kwargs):
+            pass
+
+        def RunScriptFunction(*args, **kwargs):
+            pass
+
+    class okCScriptValue:
+        def __init__(*args, **kwargs):
+            pass
+
+    class okCScriptValues(list):
+        pass
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""Streaming of large buffers to a block pipe-in, e.g. waveforms and calibration tables."""
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+import time
+from typing import List
+from typing import Optional
+from typing import Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .constants import PIPE_IN_FIFO
+from .exceptions import OpalKellyPipeInFreeSpaceTimeoutError
+from .front_panel import FrontPanelBase
+from .main import validate_block_size
+
+
+def _as_byte_view(
+    data: Union[bytes, bytearray, memoryview, NDArray[np.generic]]
+) -> memoryview:
+    if isinstance(data, np.ndarray):
+        little_endian_dtype = data.dtype.newbyteorder("<")
+        if data.dtype != little_endian_dtype:
+            data = data.astype(little_endian_dtype)
+        return np.ascontiguousarray(data).reshape(-1).view(np.uint8).data
+    return memoryview(data).cast("B")
+
+
+class PipeInStreamWriter:
+    """Write a stream of data to a block pipe-in in fixed-size chunks.
+
+    Written data is gathered into chunks of chunk_size bytes, and each full
+    chunk is transferred on a background thread while the next one is
+    filled. Two chunk buffers are used in turn, so copying (and, for NumPy
+    arrays, converting to little-endian bytes) the next chunk overlaps the
+    current transfer.
+
+    Background transfers are only used if the front panel is thread safe.
+    Otherwise each chunk is transferred by the thread calling write or
+    flush, so the writer never uses the front panel at the same time as
+    the rest of the caller's code.
+
+    Before each transfer, the free space of the pipe-in FIFO is read from
+    WIRE_OUT_NUM_WORDS_FREE_PIPE_IN and the transfer waits until the whole
+    chunk fits, so chunk_size must be no larger than the FIFO. Only one
+    transfer or wire-out read is in progress at any time.
+
+    Data that does not fill a chunk is held until more is written or
+    flush is called.
+
+    Args:
+        front_panel: the initialized board (or simulator) to write to
+        ep_addr: the address of the pipe-in endpoint
+        block_size: the block size in bytes to use for the transfers. Defaults to the block size of the front panel
+        chunk_size: the number of bytes in each transfer. Must be a multiple of the block size
+        check_free_space: whether to wait for space in the FIFO before each transfer
+        free_space_timeout: the longest time in seconds to wait for space in the FIFO before raising an error
+    """
+
+    default_chunk_size = 65536
+    default_free_space_timeout = 1.0
+    free_space_poll_interval = 0.0005
+
+    def __init__(
+        self,
+        front_panel: FrontPanelBase,
+        ep_addr: int = PIPE_IN_FIFO,
+        block_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        check_free_space: bool = True,
+        free_space_timeout: Optional[float] = None,
+    ) -> None:
+        if block_size is None:
+            block_size = front_panel.get_block_size()
+        if chunk_size is None:
+            chunk_size = self.default_chunk_size
+        if free_space_timeout is None:
+            free_space_timeout = self.default_free_space_timeout
+        validate_block_size(block_size)
+        if chunk_size <= 0 or chunk_size % block_size != 0:
+            raise ValueError(
+                f"chunk_size must be a positive multiple of the block size {block_size}, got {chunk_size}"
+            )
+        self._front_panel = front_panel
+        self._ep_addr = ep_addr
+        self._block_size = block_size
+        self._chunk_size = chunk_size
+        self._check_free_space = check_free_space
+        self._free_space_timeout = free_space_timeout
+        self._chunk_buffers: List[bytearray] = [
+            bytearray(chunk_size),
+            bytearray(chunk_size),
+        ]
+        self._chunk_idx = 0
+        self._num_bytes_in_chunk = 0
+        self._transfer: Optional["Future[int]"] = None
+        self._num_bytes_written = 0
+        self._num_chunks_written = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def get_chunk_size(self) -> int:
+        return self._chunk_size
+
+    def get_block_size(self) -> int:
+        return self._block_size
+
+    def get_num_bytes_written(self) -> int:
+        """Get the number of bytes transferred to the board so far, including padding."""
+        return self._num_bytes_written
+
+    def get_num_chunks_written(self) -> int:
+        return self._num_chunks_written
+
+    def get_num_bytes_pending(self) -> int:
+        """Get the number of bytes written that have not yet been transferred."""
+        return self._num_bytes_in_chunk
+
+    def _wait_for_transfer(self) -> None:
+        if self._transfer is None:
+            return
+        transfer = self._transfer
+        self._transfer = None
+        self._num_bytes_written += transfer.result()
+        self._num_chunks_written += 1
+
+    def _wait_for_free_space(self, num_bytes: int) -> None:
+        num_words = num_bytes // 4
+        deadline = time.perf_counter() + self._free_space_timeout
+        while self._front_panel.get_num_words_free_pipe_in() < num_words:
+            if time.perf_counter() >= deadline:
+                raise OpalKellyPipeInFreeSpaceTimeoutError(
+                    f"The pipe-in FIFO did not have space for {num_words} words within {self._free_space_timeout} seconds"
+                )
+            time.sleep(self.free_space_poll_interval)
+
+    def _start_transfer(self, num_bytes: int) -> None:
+        # the previous transfer used the other chunk buffer, and must finish before the FIFO is checked or the next transfer starts
+        self._wait_for_transfer()
+        if self._check_free_space:
+            self._wait_for_free_space(num_bytes)
+        chunk = memoryview(self._chunk_buffers[self._chunk_idx])[:num_bytes]
+        if not self._front_panel.is_thread_safe():
+            self._num_bytes_written += self._front_panel.write_to_pipe_in(
+                chunk, ep_addr=self._ep_addr, block_size=self._block_size
+            )
+            self._num_chunks_written += 1
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="xem_wrapper_pipe_in"
+                )
+            self._transfer = self._executor.submit(
+                self._front_panel.write_to_pipe_in,
+                chunk,
+                ep_addr=self._ep_addr,
+                block_size=self._block_size,
+            )
+        self._chunk_idx = 1 - self._chunk_idx
+        self._num_bytes_in_chunk = 0
+
+    def write(
+        self, data: Union[bytes, bytearray, memoryview, NDArray[np.generic]]
+    ) -> None:
+        """Add data to the stream, transferring every chunk that is filled.
+
+        Args:
+            data: any bytes-like object, or a NumPy array whose elements are written in C order as little-endian values
+        """
+        byte_view = _as_byte_view(data)
+        offset = 0
+        while offset < len(byte_view):
+            chunk_buffer = self._chunk_buffers[self._chunk_idx]
+            num_bytes = min(
+                self._chunk_size - self._num_bytes_in_chunk, len(byte_view) - offset
+            )
+            chunk_buffer[
+                self._num_bytes_in_chunk : self._num_bytes_in_chunk + num_bytes
+            ] = byte_view[offset : offset + num_bytes]
+            self._num_bytes_in_chunk += num_bytes
+            offset += num_bytes
+            if self._num_bytes_in_chunk == self._chunk_size:
+                self._start_transfer(self._chunk_size)
+
+    def flush(self) -> int:
+        """Transfer all pending data and wait for every transfer to finish.
+
+        A partly filled chunk is padded with zeros up to a whole number of blocks.
+
+        Return:
+            The number of padding bytes added
+        """
+        num_padding_bytes = 0
+        if self._num_bytes_in_chunk > 0:
+            num_padding_bytes = -self._num_bytes_in_chunk % self._block_size
+            num_bytes = self._num_bytes_in_chunk + num_padding_bytes
+            chunk_buffer = self._chunk_buffers[self._chunk_idx]
+            chunk_buffer[self._num_bytes_in_chunk : num_bytes] = bytes(
+                num_padding_bytes
+            )
+            self._start_transfer(num_bytes)
+        self._wait_for_transfer()
+        return num_padding_bytes
+
+    def close(self) -> None:
+        """Flush all pending data and stop the transfer thread."""
+        try:
+            self.flush()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
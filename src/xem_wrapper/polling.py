@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""Scheduling of FIFO reads based on the observed fill rate of the FIFO."""
+import time
+from typing import Optional
+from typing import Tuple
+
+from .constants import ROUND_ROBIN_SIZE_WORDS
+from .front_panel import FrontPanelBase
+from .main import get_read_alignment_num_bytes
+
+
+class FifoPollingScheduler:
+    """Decide when the FIFO should next be polled and read.
+
+    The fill rate of the FIFO is estimated from successive readings of
+    WIRE_OUT_NUM_WORDS_FIFO (accounting for any words read in between) and
+    smoothed with an exponentially weighted moving average. The next read
+    is scheduled for the moment the FIFO is expected to reach the target
+    watermark, so that each transfer is large enough to be efficient while
+    latency is still bounded by the max poll interval.
+
+    Args:
+        target_num_words: the FIFO fill level (in words) to aim for at each read
+        min_poll_interval: the shortest delay in seconds that will ever be scheduled
+        max_poll_interval: the longest delay in seconds that will ever be scheduled. Also the longest time data that is at least one round robin in size will be left in the FIFO
+        smoothing_factor: weight given to the newest fill rate measurement, must be in (0, 1]
+    """
+
+    default_target_num_words = ROUND_ROBIN_SIZE_WORDS * 32
+    default_min_poll_interval = 0.001
+    default_max_poll_interval = 0.5
+    default_smoothing_factor = 0.3
+
+    def __init__(
+        self,
+        target_num_words: Optional[int] = None,
+        min_poll_interval: Optional[float] = None,
+        max_poll_interval: Optional[float] = None,
+        smoothing_factor: Optional[float] = None,
+    ) -> None:
+        if target_num_words is None:
+            target_num_words = self.default_target_num_words
+        if min_poll_interval is None:
+            min_poll_interval = self.default_min_poll_interval
+        if max_poll_interval is None:
+            max_poll_interval = self.default_max_poll_interval
+        if smoothing_factor is None:
+            smoothing_factor = self.default_smoothing_factor
+        if target_num_words < ROUND_ROBIN_SIZE_WORDS:
+            raise ValueError(
+                f"target_num_words must be at least one round robin ({ROUND_ROBIN_SIZE_WORDS} words), got {target_num_words}"
+            )
+        if not 0 < min_poll_interval <= max_poll_interval:
+            raise ValueError(
+                f"Poll intervals must satisfy 0 < min_poll_interval <= max_poll_interval, got {min_poll_interval} and {max_poll_interval}"
+            )
+        if not 0 < smoothing_factor <= 1:
+            raise ValueError(
+                f"smoothing_factor must be in the range (0, 1], got {smoothing_factor}"
+            )
+        self._target_num_words = target_num_words
+        self._min_poll_interval = min_poll_interval
+        self._max_poll_interval = max_poll_interval
+        self._smoothing_factor = smoothing_factor
+
+        self._fill_rate: Optional[float] = None
+        self._last_num_words: Optional[int] = None
+        self._last_timestamp: Optional[float] = None
+        self._num_words_read_since_last_poll = 0
+        self._last_read_timestamp: Optional[float] = None
+
+    def get_target_num_words(self) -> int:
+        return self._target_num_words
+
+    def get_fill_rate(self) -> Optional[float]:
+        """Get the estimated fill rate of the FIFO in words per second.
+
+        Return:
+            None until at least two FIFO levels have been recorded.
+        """
+        return self._fill_rate
+
+    def get_estimated_num_words(self) -> int:
+        """Get the number of words expected to be in the FIFO right after the last poll and any reads since."""
+        if self._last_num_words is None:
+            return 0
+        return max(self._last_num_words - self._num_words_read_since_last_poll, 0)
+
+    def get_predicted_num_words(self, timestamp: Optional[float] = None) -> int:
+        """Get the number of words expected to be in the FIFO at the given time.
+
+        The estimate after the last poll is extrapolated at the estimated fill rate.
+
+        Args:
+            timestamp: the time in seconds. Defaults to time.perf_counter()
+        """
+        num_words = self.get_estimated_num_words()
+        if not self._fill_rate or self._last_timestamp is None:
+            return num_words
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        elapsed = max(timestamp - self._last_timestamp, 0)
+        return num_words + int(self._fill_rate * elapsed)
+
+    def record_num_words_fifo(
+        self, num_words: int, timestamp: Optional[float] = None
+    ) -> None:
+        """Record a reading of the number of words in the FIFO.
+
+        Args:
+            num_words: the value read from WIRE_OUT_NUM_WORDS_FIFO
+            timestamp: time of the reading in seconds. Defaults to time.perf_counter()
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if self._last_timestamp is not None:
+            elapsed = timestamp - self._last_timestamp
+            if elapsed > 0:
+                num_words_added = num_words - self.get_estimated_num_words()
+                measured_rate = max(num_words_added, 0) / elapsed
+                if self._fill_rate is None:
+                    self._fill_rate = measured_rate
+                else:
+                    self._fill_rate += self._smoothing_factor * (
+                        measured_rate - self._fill_rate
+                    )
+        self._last_num_words = num_words
+        self._last_timestamp = timestamp
+        self._num_words_read_since_last_poll = 0
+
+    def record_read(
+        self, num_words_read: int, timestamp: Optional[float] = None
+    ) -> None:
+        """Record that words were read out of the FIFO since the last poll.
+
+        Args:
+            num_words_read: the number of words removed from the FIFO
+            timestamp: time of the read in seconds. Defaults to time.perf_counter()
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self._num_words_read_since_last_poll += num_words_read
+        self._last_read_timestamp = timestamp
+
+    def is_read_due(
+        self,
+        timestamp: Optional[float] = None,
+        read_alignment_num_words: int = ROUND_ROBIN_SIZE_WORDS,
+    ) -> bool:
+        """Check whether the FIFO should be read now.
+
+        A read is due once the predicted FIFO level holds at least one whole
+        read, and either reaches the target watermark or the max poll
+        interval has elapsed since the last read.
+
+        Args:
+            timestamp: the time in seconds. Defaults to time.perf_counter()
+            read_alignment_num_words: the size in words of the smallest possible read, as given by get_read_alignment_num_bytes for the block size used
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        num_words = self.get_predicted_num_words(timestamp)
+        if num_words < read_alignment_num_words:
+            return False
+        if num_words >= self._target_num_words:
+            return True
+        if self._last_read_timestamp is None:
+            return True
+        return timestamp - self._last_read_timestamp >= self._max_poll_interval
+
+    def get_seconds_until_next_poll(self) -> float:
+        """Get the delay after which the FIFO is expected to reach the target watermark.
+
+        Return:
+            The delay in seconds, clipped to the configured poll interval range.
+        """
+        if not self._fill_rate:
+            return self._max_poll_interval
+        num_words_remaining = self._target_num_words - self.get_estimated_num_words()
+        delay = num_words_remaining / self._fill_rate
+        return min(max(delay, self._min_poll_interval), self._max_poll_interval)
+
+    def poll(
+        self,
+        front_panel: FrontPanelBase,
+        timestamp: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ) -> Tuple[bytearray, float]:
+        """Poll the FIFO level of the board and read from it if a read is due.
+
+        If a read is predicted to be due, the FIFO is read straight away and
+        the level read to size the transfer is recorded, so only one wire-out
+        read is made. Otherwise only the level is read, and the FIFO is read
+        if that shows a read is due after all.
+
+        Args:
+            front_panel: the board (or simulator) to poll
+            timestamp: time of the poll in seconds. Defaults to time.perf_counter()
+            max_bytes: if given, read at most this many bytes (rounded down to whole round robins and blocks) and leave the rest in the FIFO
+
+        Return:
+            The data read (empty if no read was due) and the number of seconds to wait before polling again.
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        read_alignment_num_words = (
+            get_read_alignment_num_bytes(front_panel.get_block_size()) // 4
+        )
+        if not self.is_read_due(timestamp, read_alignment_num_words):
+            self.record_num_words_fifo(front_panel.get_num_words_fifo(), timestamp)
+            if not self.is_read_due(timestamp, read_alignment_num_words):
+                return bytearray(0), self.get_seconds_until_next_poll()
+        data, fifo_read = front_panel.read_from_fifo_with_status(max_bytes=max_bytes)
+        self.record_num_words_fifo(fifo_read.num_words_fifo, timestamp)
+        self.record_read(len(data) // 4, timestamp)
+        return data, self.get_seconds_until_next_poll()
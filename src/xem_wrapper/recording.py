@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+"""Record the calls made to an okCFrontPanel and replay them without a board.
+
+A recording is two files. The log holds one compact binary record per call
+(the method, arguments, return value or error, and timing). The data file,
+at the log path plus RECORDING_DATA_FILE_SUFFIX, holds the contents of
+every buffer passed to a call, such as the data of FIFO reads, so that bulk
+data does not bloat the log.
+
+Both RecordingXem and ReplayXem stand in for an okCFrontPanel, so a
+session is recorded and replayed through the usual FrontPanel::
+
+    recorder = RecordingXem(open_board(), "session.xemrec")
+    front_panel = FrontPanel(cast(okCFrontPanel, recorder))
+    ...
+    recorder.close()
+
+    front_panel = FrontPanel(cast(okCFrontPanel, ReplayXem("session.xemrec", speed=10)))
+"""
+import functools
+import mmap
+import struct
+import threading
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from .exceptions import OpalKellyRecordingFormatError
+from .exceptions import OpalKellyReplayError
+from .ok_wrapper import okCFrontPanel
+from .ok_wrapper import okTDeviceInfo
+from .ok_wrapper import okTRegisterEntries
+
+RECORDING_MAGIC = b"XEMREC01"
+RECORDING_DATA_FILE_SUFFIX = ".data"
+
+# the fields of okTDeviceInfo that are recorded
+DEVICE_INFO_FIELDS = (
+    "deviceID",
+    "serialNumber",
+    "productName",
+    "productID",
+    "deviceMajorVersion",
+    "deviceMinorVersion",
+)
+
+# the methods that return data by filling in one of their arguments
+OUTPUT_ARGUMENT_METHODS = frozenset(
+    (
+        "ReadFromBlockPipeOut",
+        "ReadFromBlockPipeOutThr",
+        "GetDeviceInfo",
+        "ReadRegisters",
+    )
+)
+
+_RECORD_METHOD_NAME = 0
+_RECORD_CALL = 1
+_OUTCOME_RETURNED = 0
+_OUTCOME_RAISED = 1
+
+_TAG_NONE = 0
+_TAG_FALSE = 1
+_TAG_TRUE = 2
+_TAG_INT = 3
+_TAG_FLOAT = 4
+_TAG_STR = 5
+_TAG_BUFFER = 6
+_TAG_DEVICE_INFO = 7
+_TAG_REGISTER_ENTRIES = 8
+_TAG_UNSUPPORTED = 9
+
+_METHOD_NAME_HEADER = struct.Struct("<BH")
+_CALL_HEADER = struct.Struct("<BHddB")
+_BYTE = struct.Struct("<B")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_LENGTH = struct.Struct("<I")
+_BUFFER_LOCATION = struct.Struct("<QQ")
+_REGISTER_ENTRY = struct.Struct("<II")
+
+
+class UnsupportedValue(NamedTuple):
+    """A value that could not be recorded, such as a script engine.
+
+    Attributes:
+        description: the repr of the value
+    """
+
+    description: str
+
+
+RecordedValue = Union[
+    None,
+    bool,
+    int,
+    float,
+    str,
+    memoryview,
+    Dict[str, Union[int, str]],
+    List[Tuple[int, int]],
+    UnsupportedValue,
+]
+
+
+class RecordedCall(NamedTuple):
+    """One call in a recording.
+
+    Attributes:
+        method_name: the name of the okCFrontPanel method
+        arguments: the arguments after the call. Buffers are memoryviews of the data file, okTDeviceInfo is a dict of DEVICE_INFO_FIELDS and okTRegisterEntries is a list of (address, data) pairs
+        return_value: the value returned, or None if the call raised
+        error_message: the message of the RuntimeError the call raised, or None
+        start_seconds: the time the call started, relative to the start of the recording
+        duration_seconds: the time the call took
+    """
+
+    method_name: str
+    arguments: Tuple[RecordedValue, ...]
+    return_value: RecordedValue
+    error_message: Optional[str]
+    start_seconds: float
+    duration_seconds: float
+
+
+def _encode_str(value: str, out: bytearray) -> None:
+    encoded = value.encode("utf-8")
+    out += _LENGTH.pack(len(encoded))
+    out += encoded
+
+
+class RecordingXem:
+    """Pass calls through to an okCFrontPanel while recording each of them.
+
+    Errors that the SWIG layer raises as RuntimeError are recorded and
+    raised again. Calls are recorded in the order they finish, under a lock,
+    so a board shared between threads can also be recorded.
+
+    Args:
+        xem: the board to record the calls to
+        log_path: the path of the log file. The data file is created next to it
+    """
+
+    def __init__(self, xem: okCFrontPanel, log_path: str) -> None:
+        self._xem = xem
+        self._lock = threading.Lock()
+        self._method_ids: Dict[str, int] = dict()
+        self._num_calls = 0
+        self._data_offset = 0
+        self._start = time.perf_counter()
+        # pylint: disable=consider-using-with # the files stay open until close is called
+        self._log_file = open(log_path, "wb")
+        self._data_file = open(log_path + RECORDING_DATA_FILE_SUFFIX, "wb")
+        self._log_file.write(RECORDING_MAGIC)
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._xem, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+        recorded_method = functools.partial(self._record_call, name, attribute)
+        # cache the wrapper so that later lookups do not go through __getattr__
+        setattr(self, name, recorded_method)
+        return recorded_method
+
+    def __enter__(self) -> "RecordingXem":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def get_num_calls(self) -> int:
+        return self._num_calls
+
+    def close(self) -> None:
+        """Finish writing the recording and close its files."""
+        with self._lock:
+            self._log_file.close()
+            self._data_file.close()
+
+    def _encode_value(self, value: Any, out: bytearray) -> None:
+        # bool must be checked before int, since it is a subclass of int
+        if value is None:
+            out += _BYTE.pack(_TAG_NONE)
+        elif isinstance(value, bool):
+            out += _BYTE.pack(_TAG_TRUE if value else _TAG_FALSE)
+        elif isinstance(value, int):
+            out += _BYTE.pack(_TAG_INT)
+            out += _INT.pack(value)
+        elif isinstance(value, float):
+            out += _BYTE.pack(_TAG_FLOAT)
+            out += _FLOAT.pack(value)
+        elif isinstance(value, str):
+            out += _BYTE.pack(_TAG_STR)
+            _encode_str(value, out)
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            num_bytes = self._data_file.write(value)
+            out += _BYTE.pack(_TAG_BUFFER)
+            out += _BUFFER_LOCATION.pack(self._data_offset, num_bytes)
+            self._data_offset += num_bytes
+        elif isinstance(value, okTDeviceInfo):
+            out += _BYTE.pack(_TAG_DEVICE_INFO)
+            for field_name in DEVICE_INFO_FIELDS:
+                self._encode_value(getattr(value, field_name), out)
+        elif isinstance(value, okTRegisterEntries):
+            out += _BYTE.pack(_TAG_REGISTER_ENTRIES)
+            out += _LENGTH.pack(len(value))
+            for entry_idx in range(len(value)):
+                entry = value[entry_idx]
+                out += _REGISTER_ENTRY.pack(entry.address, entry.data)
+        else:
+            out += _BYTE.pack(_TAG_UNSUPPORTED)
+            _encode_str(repr(value), out)
+
+    def _get_method_id(self, method_name: str, out: bytearray) -> int:
+        method_id = self._method_ids.get(method_name)
+        if method_id is None:
+            method_id = len(self._method_ids)
+            self._method_ids[method_name] = method_id
+            out += _METHOD_NAME_HEADER.pack(_RECORD_METHOD_NAME, method_id)
+            _encode_str(method_name, out)
+        return method_id
+
+    def _record_call(
+        self, method_name: str, method: Callable[..., Any], *args: Any
+    ) -> Any:
+        start = time.perf_counter()
+        error: Optional[RuntimeError] = None
+        result = None
+        try:
+            result = method(*args)
+        except RuntimeError as e:
+            error = e
+        duration = time.perf_counter() - start
+        with self._lock:
+            record = bytearray()
+            method_id = self._get_method_id(method_name, record)
+            record += _CALL_HEADER.pack(
+                _RECORD_CALL, method_id, start - self._start, duration, len(args)
+            )
+            for arg in args:
+                self._encode_value(arg, record)
+            if error is None:
+                record += _BYTE.pack(_OUTCOME_RETURNED)
+                self._encode_value(result, record)
+            else:
+                record += _BYTE.pack(_OUTCOME_RAISED)
+                _encode_str(str(error), record)
+            self._log_file.write(record)
+            self._num_calls += 1
+        if error is not None:
+            raise error
+        return result
+
+
+class _LogReader:
+    def __init__(self, log: bytes, data: Union[mmap.mmap, bytes], log_path: str):
+        self._log = log
+        self._data = memoryview(data)
+        self._log_path = log_path
+        self._offset = 0
+
+    def _unpack(self, struct_format: struct.Struct) -> Tuple[Any, ...]:
+        try:
+            values = struct_format.unpack_from(self._log, self._offset)
+        except struct.error as e:
+            raise OpalKellyRecordingFormatError(
+                f"The recording {self._log_path} ends in the middle of a record"
+            ) from e
+        self._offset += struct_format.size
+        return values
+
+    def _decode_str(self) -> str:
+        (num_bytes,) = self._unpack(_LENGTH)
+        if self._offset + num_bytes > len(self._log):
+            raise OpalKellyRecordingFormatError(
+                f"The recording {self._log_path} ends in the middle of a record"
+            )
+        value = self._log[self._offset : self._offset + num_bytes].decode("utf-8")
+        self._offset += num_bytes
+        return value
+
+    def _decode_value(self) -> RecordedValue:
+        (tag,) = self._unpack(_BYTE)
+        if tag == _TAG_NONE:
+            return None
+        if tag in (_TAG_FALSE, _TAG_TRUE):
+            return bool(tag == _TAG_TRUE)
+        if tag == _TAG_INT:
+            return int(self._unpack(_INT)[0])
+        if tag == _TAG_FLOAT:
+            return float(self._unpack(_FLOAT)[0])
+        if tag == _TAG_STR:
+            return self._decode_str()
+        if tag == _TAG_BUFFER:
+            data_offset, num_bytes = self._unpack(_BUFFER_LOCATION)
+            if data_offset + num_bytes > len(self._data):
+                raise OpalKellyRecordingFormatError(
+                    f"The data file of the recording {self._log_path} is missing recorded buffers"
+                )
+            return self._data[data_offset : data_offset + num_bytes]
+        if tag == _TAG_DEVICE_INFO:
+            return {
+                field_name: self._decode_value()  # type: ignore[misc] # fields are only ints and strings
+                for field_name in DEVICE_INFO_FIELDS
+            }
+        if tag == _TAG_REGISTER_ENTRIES:
+            (num_entries,) = self._unpack(_LENGTH)
+            return [
+                (int(address), int(data))
+                for address, data in (
+                    self._unpack(_REGISTER_ENTRY) for _ in range(num_entries)
+                )
+            ]
+        if tag == _TAG_UNSUPPORTED:
+            return UnsupportedValue(self._decode_str())
+        raise OpalKellyRecordingFormatError(
+            f"Unknown value tag {tag} in the recording {self._log_path}"
+        )
+
+    def read_calls(self) -> List[RecordedCall]:
+        if not self._log.startswith(RECORDING_MAGIC):
+            raise OpalKellyRecordingFormatError(
+                f"{self._log_path} is not a recording of okCFrontPanel calls"
+            )
+        self._offset = len(RECORDING_MAGIC)
+        method_names: Dict[int, str] = dict()
+        calls: List[RecordedCall] = []
+        while self._offset < len(self._log):
+            record_type = self._log[self._offset]
+            if record_type == _RECORD_METHOD_NAME:
+                _, method_id = self._unpack(_METHOD_NAME_HEADER)
+                method_names[method_id] = self._decode_str()
+                continue
+            if record_type != _RECORD_CALL:
+                raise OpalKellyRecordingFormatError(
+                    f"Unknown record type {record_type} in the recording {self._log_path}"
+                )
+            _, method_id, start, duration, num_args = self._unpack(_CALL_HEADER)
+            arguments = tuple(self._decode_value() for _ in range(num_args))
+            (outcome,) = self._unpack(_BYTE)
+            return_value: RecordedValue = None
+            error_message: Optional[str] = None
+            if outcome == _OUTCOME_RETURNED:
+                return_value = self._decode_value()
+            else:
+                error_message = self._decode_str()
+            calls.append(
+                RecordedCall(
+                    method_name=method_names[method_id],
+                    arguments=arguments,
+                    return_value=return_value,
+                    error_message=error_message,
+                    start_seconds=start,
+                    duration_seconds=duration,
+                )
+            )
+        return calls
+
+
+def read_recording(log_path: str) -> List[RecordedCall]:
+    """Read every call of a recording made by RecordingXem.
+
+    The data file is memory-mapped, so recorded buffers are only read from
+    disk when they are used.
+
+    Args:
+        log_path: the path of the log file
+
+    Return:
+        The calls, in the order they were recorded
+    """
+    with open(log_path, "rb") as log_file:
+        log = log_file.read()
+    with open(log_path + RECORDING_DATA_FILE_SUFFIX, "rb") as data_file:
+        data: Union[mmap.mmap, bytes] = b""
+        if data_file.seek(0, 2) > 0:
+            data = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+    return _LogReader(log, data, log_path).read_calls()
+
+
+class ReplayXem:
+    """Answer okCFrontPanel calls from a recording instead of a board.
+
+    Each call must be the next call of the recording, with the same method
+    name. If strict, the integer, string and boolean arguments must also
+    match, so that a change in control logic is reported where the replay
+    diverges from the recording. Methods that return data through an
+    argument (OUTPUT_ARGUMENT_METHODS) have the recorded data copied into
+    it, and recorded RuntimeErrors are raised again.
+
+    Args:
+        log_path: the path of the log file of the recording
+        speed: how many times faster than the original pace to replay, e.g. 1 for the original pace. If None, calls are answered as fast as possible
+        strict: whether to check the scalar arguments of each call
+    """
+
+    def __init__(
+        self, log_path: str, speed: Optional[float] = None, strict: bool = True
+    ) -> None:
+        if speed is not None and speed <= 0:
+            raise ValueError(f"speed must be positive, got {speed}")
+        self._calls = read_recording(log_path)
+        self._speed = speed
+        self._strict = strict
+        self._next_call_idx = 0
+        self._lock = threading.Lock()
+        self._replay_start: Optional[float] = None
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        replayed_method = functools.partial(self._replay_call, name)
+        setattr(self, name, replayed_method)
+        return replayed_method
+
+    def get_num_calls(self) -> int:
+        return len(self._calls)
+
+    def get_num_calls_remaining(self) -> int:
+        return len(self._calls) - self._next_call_idx
+
+    def _check_arguments(self, call: RecordedCall, args: Tuple[Any, ...]) -> None:
+        if len(args) != len(call.arguments):
+            raise OpalKellyReplayError(
+                f"Call {self._next_call_idx} to {call.method_name} had {len(call.arguments)} arguments in the recording, got {len(args)}"
+            )
+        for arg_idx, (recorded, actual) in enumerate(zip(call.arguments, args)):
+            if isinstance(recorded, (bool, int, str)) and recorded != actual:
+                raise OpalKellyReplayError(
+                    f"Argument {arg_idx} of call {self._next_call_idx} to {call.method_name} was {recorded!r} in the recording, got {actual!r}"
+                )
+
+    @staticmethod
+    def _restore_outputs(call: RecordedCall, args: Tuple[Any, ...]) -> None:
+        for recorded, actual in zip(call.arguments, args):
+            if isinstance(recorded, memoryview):
+                num_bytes = min(len(recorded), len(actual))
+                actual[:num_bytes] = recorded[:num_bytes]
+            elif isinstance(recorded, dict):
+                for field_name, field_value in recorded.items():
+                    setattr(actual, field_name, field_value)
+            elif isinstance(recorded, list):
+                for entry_idx, (_, data) in enumerate(recorded[: len(actual)]):
+                    entry = actual[entry_idx]
+                    entry.data = data
+                    actual[entry_idx] = entry
+
+    def _wait_for_original_pace(self, call: RecordedCall) -> None:
+        if self._speed is None:
+            return
+        if self._replay_start is None:
+            self._replay_start = time.perf_counter() - call.start_seconds / self._speed
+        finish = (
+            self._replay_start
+            + (call.start_seconds + call.duration_seconds) / self._speed
+        )
+        delay = finish - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _replay_call(self, method_name: str, *args: Any) -> Any:
+        with self._lock:
+            if self._next_call_idx >= len(self._calls):
+                raise OpalKellyReplayError(
+                    f"The recording has no more calls, but {method_name} was called"
+                )
+            call = self._calls[self._next_call_idx]
+            if call.method_name != method_name:
+                raise OpalKellyReplayError(
+                    f"Call {self._next_call_idx} was to {call.method_name} in the recording, got {method_name}"
+                )
+            if self._strict:
+                self._check_arguments(call, args)
+            if isinstance(call.return_value, UnsupportedValue):
+                raise OpalKellyReplayError(
+                    f"Call {self._next_call_idx} to {method_name} returned {call.return_value.description}, which cannot be replayed"
+                )
+            if method_name in OUTPUT_ARGUMENT_METHODS:
+                self._restore_outputs(call, args)
+            self._next_call_idx += 1
+            self._wait_for_original_pace(call)
+        if call.error_message is not None:
+            raise RuntimeError(call.error_message)
+        return call.return_value
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""Shared memory ring buffer for handing FIFO reads to other processes.
+
+A single producer process (the one talking to the board) writes each FIFO
+read into the next slot of the ring buffer, and any number of consumer
+processes attach to the same block of shared memory by name and read the
+slots in order without copying or pickling.
+
+Layout of the shared memory block:
+    header: number of slots, slot size in bytes, next sequence number to be written
+    slot table: for each slot, the sequence number of the data it holds and its length in bytes
+    data: the slots themselves
+"""
+from multiprocessing import shared_memory
+import struct
+from typing import cast
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from .front_panel import FrontPanelBase
+
+_HEADER_FORMAT = "<QQQ"
+_HEADER_SIZE = struct.calcsize(_HEADER_FORMAT)
+_WRITE_SEQUENCE_OFFSET = 16
+_SLOT_ENTRY_FORMAT = "<QQ"
+_SLOT_ENTRY_SIZE = struct.calcsize(_SLOT_ENTRY_FORMAT)
+# marks a slot that is currently being written to by the producer
+_SLOT_BEING_WRITTEN = 0xFFFFFFFFFFFFFFFF
+
+
+def _get_slot_entry_offset(slot_idx: int) -> int:
+    return _HEADER_SIZE + slot_idx * _SLOT_ENTRY_SIZE
+
+
+class SharedMemoryRingBuffer:
+    """Producer side of a single-producer/multi-consumer ring buffer.
+
+    The producer owns the shared memory and is responsible for unlinking it
+    once all consumers are finished.
+
+    Args:
+        num_slots: the number of reads the buffer can hold before the oldest is overwritten
+        slot_size: the largest read in bytes that fits in a slot
+        name: the name of the shared memory block. A unique name is generated if not given
+    """
+
+    def __init__(self, num_slots: int, slot_size: int, name: Optional[str] = None):
+        if num_slots < 1:
+            raise ValueError(f"num_slots must be at least 1, got {num_slots}")
+        if slot_size < 1:
+            raise ValueError(f"slot_size must be at least 1, got {slot_size}")
+        self._num_slots = num_slots
+        self._slot_size = slot_size
+        self._data_offset = _get_slot_entry_offset(num_slots)
+        self._shared_memory = shared_memory.SharedMemory(
+            name=name, create=True, size=self._data_offset + num_slots * slot_size
+        )
+        self._buf = cast(memoryview, self._shared_memory.buf)
+        struct.pack_into(_HEADER_FORMAT, self._buf, 0, num_slots, slot_size, 0)
+        for slot_idx in range(num_slots):
+            struct.pack_into(
+                _SLOT_ENTRY_FORMAT,
+                self._buf,
+                _get_slot_entry_offset(slot_idx),
+                _SLOT_BEING_WRITTEN,
+                0,
+            )
+        self._write_sequence = 0
+        self._reserved_slot_previous_entry: Optional[Tuple[int, int]] = None
+
+    def get_name(self) -> str:
+        return self._shared_memory.name
+
+    def get_num_slots(self) -> int:
+        return self._num_slots
+
+    def get_slot_size(self) -> int:
+        return self._slot_size
+
+    def get_write_sequence(self) -> int:
+        """Get the sequence number that the next committed slot will have."""
+        return self._write_sequence
+
+    def reserve(self) -> memoryview:
+        """Get a writable view of the next slot so data can be read straight into it.
+
+        Consumers treat the slot as overwritten from this point on. Either
+        commit or abort must be called before reserving again.
+
+        Return:
+            A memoryview of the full slot
+        """
+        if self._reserved_slot_previous_entry is not None:
+            raise RuntimeError("A slot is already reserved")
+        slot_idx = self._write_sequence % self._num_slots
+        entry_offset = _get_slot_entry_offset(slot_idx)
+        self._reserved_slot_previous_entry = struct.unpack_from(
+            _SLOT_ENTRY_FORMAT, self._buf, entry_offset
+        )
+        struct.pack_into(
+            _SLOT_ENTRY_FORMAT, self._buf, entry_offset, _SLOT_BEING_WRITTEN, 0
+        )
+        slot_start = self._data_offset + slot_idx * self._slot_size
+        return self._buf[slot_start : slot_start + self._slot_size]
+
+    def commit(self, num_bytes: int) -> int:
+        """Publish the reserved slot to consumers.
+
+        Args:
+            num_bytes: the number of valid bytes written into the reserved slot
+
+        Return:
+            The sequence number of the published slot
+        """
+        if self._reserved_slot_previous_entry is None:
+            raise RuntimeError("No slot is reserved")
+        if not 0 <= num_bytes <= self._slot_size:
+            raise ValueError(
+                f"num_bytes must be between 0 and the slot size {self._slot_size}, got {num_bytes}"
+            )
+        sequence = self._write_sequence
+        struct.pack_into(
+            _SLOT_ENTRY_FORMAT,
+            self._buf,
+            _get_slot_entry_offset(sequence % self._num_slots),
+            sequence,
+            num_bytes,
+        )
+        self._write_sequence += 1
+        # the write sequence is only advanced after the slot entry is complete, so consumers never see a partially published slot
+        struct.pack_into("<Q", self._buf, _WRITE_SEQUENCE_OFFSET, self._write_sequence)
+        self._reserved_slot_previous_entry = None
+        return sequence
+
+    def abort(self) -> None:
+        """Release the reserved slot without publishing it.
+
+        The slot must not have been written to, since its previous contents
+        become visible to consumers again.
+        """
+        if self._reserved_slot_previous_entry is None:
+            raise RuntimeError("No slot is reserved")
+        struct.pack_into(
+            _SLOT_ENTRY_FORMAT,
+            self._buf,
+            _get_slot_entry_offset(self._write_sequence % self._num_slots),
+            *self._reserved_slot_previous_entry,
+        )
+        self._reserved_slot_previous_entry = None
+
+    def write(self, data: Union[bytes, bytearray, memoryview]) -> int:
+        """Copy data into the next slot and publish it.
+
+        Return:
+            The sequence number of the published slot
+        """
+        if len(data) > self._slot_size:
+            raise ValueError(
+                f"Data of {len(data)} bytes does not fit in slot size {self._slot_size}"
+            )
+        slot = self.reserve()
+        slot[: len(data)] = data
+        slot.release()
+        return self.commit(len(data))
+
+    def write_from_fifo(self, front_panel: FrontPanelBase) -> Optional[int]:
+        """Read from the FIFO of the board directly into the next slot.
+
+        Args:
+            front_panel: the board (or simulator) to read from
+
+        Return:
+            The sequence number of the published slot, or None if there was no data to read
+        """
+        slot = self.reserve()
+        try:
+            num_bytes_read = front_panel.read_from_fifo_into(slot)
+        except BaseException:
+            slot.release()
+            self.abort()
+            raise
+        slot.release()
+        if num_bytes_read == 0:
+            self.abort()
+            return None
+        return self.commit(num_bytes_read)
+
+    def close(self) -> None:
+        """Detach from the shared memory without destroying it."""
+        self._buf.release()
+        self._shared_memory.close()
+
+    def unlink(self) -> None:
+        """Destroy the shared memory once all processes are finished with it."""
+        self._shared_memory.unlink()
+
+
+class SharedMemoryRingBufferReader:
+    """Consumer side of a SharedMemoryRingBuffer.
+
+    Each reader tracks its own position, so readers in different processes
+    progress independently. If a reader falls more than a full ring behind
+    the producer, the slots it missed are counted as dropped and it skips
+    ahead to the oldest slot still available.
+
+    Views returned by read point straight into shared memory and are only
+    guaranteed to hold the data of their sequence number until the producer
+    wraps around to that slot again; use is_valid after processing a view to
+    confirm it was not overwritten in the meantime.
+
+    Args:
+        name: the name of the shared memory block of the ring buffer
+        start_from_latest: whether to skip data committed before this reader attached
+    """
+
+    def __init__(self, name: str, start_from_latest: bool = False):
+        self._shared_memory = shared_memory.SharedMemory(name=name)
+        self._buf = cast(memoryview, self._shared_memory.buf)
+        num_slots, slot_size, write_sequence = struct.unpack_from(
+            _HEADER_FORMAT, self._buf, 0
+        )
+        self._num_slots: int = num_slots
+        self._slot_size: int = slot_size
+        self._data_offset = _get_slot_entry_offset(num_slots)
+        self._next_sequence: int = write_sequence if start_from_latest else 0
+        self._num_overruns = 0
+        self._num_dropped = 0
+
+    def get_next_sequence(self) -> int:
+        return self._next_sequence
+
+    def get_num_overruns(self) -> int:
+        """Get the number of times the producer overwrote data before it was read."""
+        return self._num_overruns
+
+    def get_num_dropped(self) -> int:
+        """Get the number of slots that were overwritten before they were read."""
+        return self._num_dropped
+
+    def get_num_available(self) -> int:
+        """Get the number of committed slots that have not been read yet."""
+        return self._get_write_sequence() - self._next_sequence
+
+    def _get_write_sequence(self) -> int:
+        write_sequence: int = struct.unpack_from(
+            "<Q", self._buf, _WRITE_SEQUENCE_OFFSET
+        )[0]
+        return write_sequence
+
+    def _get_slot_entry(self, sequence: int) -> Tuple[int, int]:
+        slot_sequence, num_bytes = struct.unpack_from(
+            _SLOT_ENTRY_FORMAT,
+            self._buf,
+            _get_slot_entry_offset(sequence % self._num_slots),
+        )
+        return slot_sequence, num_bytes
+
+    def _skip_to(self, sequence: int) -> None:
+        self._num_overruns += 1
+        self._num_dropped += sequence - self._next_sequence
+        self._next_sequence = sequence
+
+    def read(self) -> Optional[Tuple[int, memoryview]]:
+        """Get the next unread slot.
+
+        Return:
+            The sequence number and a read-only view of the data of the next slot, or None if no new data has been committed
+        """
+        while True:
+            write_sequence = self._get_write_sequence()
+            if self._next_sequence >= write_sequence:
+                return None
+            oldest_available_sequence = write_sequence - self._num_slots
+            if self._next_sequence < oldest_available_sequence:
+                self._skip_to(oldest_available_sequence)
+            sequence = self._next_sequence
+            slot_sequence, num_bytes = self._get_slot_entry(sequence)
+            if slot_sequence != sequence:
+                # the producer started overwriting this slot after the write sequence was read
+                self._skip_to(sequence + 1)
+                continue
+            slot_start = (
+                self._data_offset + (sequence % self._num_slots) * self._slot_size
+            )
+            self._next_sequence += 1
+            return sequence, self._buf[slot_start : slot_start + num_bytes].toreadonly()
+
+    def is_valid(self, sequence: int) -> bool:
+        """Check that the slot of the given sequence number has not been overwritten.
+
+        Args:
+            sequence: the sequence number returned by read along with the view
+        """
+        return self._get_slot_entry(sequence)[0] == sequence
+
+    def close(self) -> None:
+        """Detach from the shared memory.
+
+        All views returned by read must be released first.
+        """
+        self._buf.release()
+        self._shared_memory.close()
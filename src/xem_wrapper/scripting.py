@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""Named control sequences that run as a single FrontPanel Lua script function."""
+import re
+from typing import List
+from typing import NamedTuple
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+from .constants import TRIGGER_IN_SPI
+from .constants import WIRE_IN_NUM_SAMPLES
+from .constants import WIRE_IN_RESET_MODE
+from .exceptions import OpalKellyScriptValueOutOfRangeError
+
+SEQUENCE_STEP_SET_WIRE_IN = "set_wire_in"
+SEQUENCE_STEP_ACTIVATE_TRIGGER_IN = "activate_trigger_in"
+SEQUENCE_STEP_WRITE_REGISTER = "write_register"
+
+# the global through which the FrontPanel Lua script engine exposes the device
+LUA_DEVICE_NAME = "okFP"
+
+_LUA_KEYWORDS = frozenset(
+    (
+        "and break do else elseif end false for function goto if in local nil not or "
+        "repeat return then true until while"
+    ).split()
+)
+_IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+UINT32_MODULUS = 2 ** 32
+
+
+def _validate_identifier(identifier: str) -> None:
+    if (
+        _IDENTIFIER_PATTERN.fullmatch(identifier) is None
+        or identifier in _LUA_KEYWORDS
+        or identifier == LUA_DEVICE_NAME
+    ):
+        raise ValueError(
+            f"'{identifier}' is not a valid name for a sequence or argument"
+        )
+
+
+def convert_to_script_argument(value: int) -> int:
+    """Reinterpret an unsigned 32-bit sequence argument as the signed integer with the same bits.
+
+    Script function arguments can only hold signed 32-bit integers, so the
+    Lua function of a sequence converts its arguments back to unsigned.
+
+    Args:
+        value: the unsigned 32-bit value
+
+    Return:
+        The value to pass to the script function
+    """
+    if value >= UINT32_MODULUS // 2:
+        return value - UINT32_MODULUS
+    return value
+
+
+class SequenceStep(NamedTuple):
+    """One control operation of a sequence.
+
+    Attributes:
+        kind: one of SEQUENCE_STEP_SET_WIRE_IN, SEQUENCE_STEP_ACTIVATE_TRIGGER_IN or SEQUENCE_STEP_WRITE_REGISTER
+        operands: the arguments of the operation, in the order of the matching FrontPanel method. Each is either a value or the name of an argument of the sequence
+    """
+
+    kind: str
+    operands: Tuple[Union[int, str], ...]
+
+
+class ControlSequence:
+    """An ordered list of control operations that runs as one unit.
+
+    On a board, the sequence is compiled to a Lua function and loaded into
+    the FrontPanel script engine, so the whole sequence is a single call
+    from Python instead of one call (and one return code check) per step.
+    The simulator runs the same steps one by one through its own methods.
+
+    Operands of the steps can be fixed values, or the name of an argument
+    that is given each time the sequence runs. Each set_wire_in step both
+    sets and updates the wire-ins, the same as FrontPanel.set_wire_in. The
+    Lua function stops at the first step that fails and returns its error
+    code. Arguments are unsigned 32-bit integers, like the values of
+    wire-ins and registers.
+
+    Args:
+        name: the name of the sequence, which must be a valid Lua identifier
+        argument_names: the names of the arguments the sequence takes, in order
+    """
+
+    def __init__(self, name: str, argument_names: Sequence[str] = ()) -> None:
+        _validate_identifier(name)
+        for argument_name in argument_names:
+            _validate_identifier(argument_name)
+        if len(set(argument_names)) != len(argument_names):
+            raise ValueError(f"Argument names must be unique, got {argument_names}")
+        self._name = name
+        self._argument_names = tuple(argument_names)
+        self._steps: List[SequenceStep] = []
+
+    def get_name(self) -> str:
+        return self._name
+
+    def get_argument_names(self) -> Tuple[str, ...]:
+        return self._argument_names
+
+    def get_steps(self) -> List[SequenceStep]:
+        return list(self._steps)
+
+    def _add_step(self, kind: str, *operands: Union[int, str]) -> "ControlSequence":
+        for operand in operands:
+            if isinstance(operand, str):
+                if operand not in self._argument_names:
+                    raise ValueError(
+                        f"'{operand}' is not an argument of sequence '{self._name}'"
+                    )
+            elif not 0 <= operand < UINT32_MODULUS:
+                raise OpalKellyScriptValueOutOfRangeError(
+                    f"Operands of sequence '{self._name}' must be unsigned 32-bit integers, got {operand}"
+                )
+        self._steps.append(SequenceStep(kind, operands))
+        return self
+
+    def set_wire_in(
+        self, ep_addr: Union[int, str], value: Union[int, str], mask: Union[int, str]
+    ) -> "ControlSequence":
+        """Add a step that sets and updates a wire-in.
+
+        Return:
+            The sequence itself, so that steps can be chained
+        """
+        return self._add_step(SEQUENCE_STEP_SET_WIRE_IN, ep_addr, value, mask)
+
+    def activate_trigger_in(
+        self, ep_addr: Union[int, str], bit: Union[int, str]
+    ) -> "ControlSequence":
+        """Add a step that activates a trigger-in.
+
+        Return:
+            The sequence itself, so that steps can be chained
+        """
+        return self._add_step(SEQUENCE_STEP_ACTIVATE_TRIGGER_IN, ep_addr, bit)
+
+    def write_register(
+        self, addr: Union[int, str], data: Union[int, str]
+    ) -> "ControlSequence":
+        """Add a step that writes a register over the register bridge.
+
+        Return:
+            The sequence itself, so that steps can be chained
+        """
+        return self._add_step(SEQUENCE_STEP_WRITE_REGISTER, addr, data)
+
+    def resolve_steps(
+        self, arguments: Sequence[int]
+    ) -> List[Tuple[str, Tuple[int, ...]]]:
+        """Substitute the given arguments into the steps.
+
+        Args:
+            arguments: the value of each argument of the sequence, in order
+
+        Return:
+            The kind and the operand values of each step
+        """
+        if len(arguments) != len(self._argument_names):
+            raise ValueError(
+                f"Sequence '{self._name}' takes {len(self._argument_names)} arguments, got {len(arguments)}"
+            )
+        for argument_name, argument in zip(self._argument_names, arguments):
+            if not 0 <= argument < UINT32_MODULUS:
+                raise OpalKellyScriptValueOutOfRangeError(
+                    f"Argument '{argument_name}' must be an unsigned 32-bit integer, got {argument}"
+                )
+        values = dict(zip(self._argument_names, arguments))
+        return [
+            (
+                step.kind,
+                tuple(
+                    values[operand] if isinstance(operand, str) else operand
+                    for operand in step.operands
+                ),
+            )
+            for step in self._steps
+        ]
+
+    def to_lua(self) -> str:
+        """Compile the sequence to the source of a Lua function with the name of the sequence.
+
+        Return:
+            Lua source defining a global function that returns 0, or the error code of the first step that failed
+        """
+        lines = [f"function {self._name}({', '.join(self._argument_names)})"]
+        # undo convert_to_script_argument
+        for argument_name in self._argument_names:
+            lines.append(
+                f"    if {argument_name} < 0 then {argument_name} = {argument_name} + {hex(UINT32_MODULUS)} end"
+            )
+        lines.append("    local code")
+        for step in self._steps:
+            operands = ", ".join(
+                operand if isinstance(operand, str) else hex(operand)
+                for operand in step.operands
+            )
+            if step.kind == SEQUENCE_STEP_SET_WIRE_IN:
+                calls = [f"SetWireInValue({operands})", "UpdateWireIns()"]
+            elif step.kind == SEQUENCE_STEP_ACTIVATE_TRIGGER_IN:
+                calls = [f"ActivateTriggerIn({operands})"]
+            else:
+                calls = [f"WriteRegister({operands})"]
+            for call in calls:
+                lines.append(f"    code = {LUA_DEVICE_NAME}:{call}")
+                lines.append("    if code < 0 then return code end")
+        lines.append("    return 0")
+        lines.append("end")
+        return "\n".join(lines) + "\n"
+
+
+def build_start_acquisition_sequence(
+    name: str = "start_acquisition_sequence", continuous: bool = True
+) -> ControlSequence:
+    """Build the sequence of reset_fifos, set_run_mode, set_num_samples and start_acquisition.
+
+    Args:
+        name: the name to register the sequence under
+        continuous: whether to run SPI data acquisition continuously
+
+    Return:
+        A sequence that takes the number of samples as its only argument
+    """
+    run_mode_value = 0x00000002 if continuous else 0x00000000
+    return (
+        ControlSequence(name, ("num_samples",))
+        .set_wire_in(WIRE_IN_RESET_MODE, 0x0004, 0x0004)
+        .set_wire_in(WIRE_IN_RESET_MODE, 0x0000, 0x0004)
+        .set_wire_in(WIRE_IN_RESET_MODE, run_mode_value, 0x00000002)
+        .set_wire_in(WIRE_IN_NUM_SAMPLES, "num_samples", 0xFFFFFFFF)
+        .activate_trigger_in(TRIGGER_IN_SPI, 0)
+    )
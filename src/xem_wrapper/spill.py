@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""An append-only, memory-mapped file for chunks that do not fit in memory."""
+import mmap
+import struct
+import tempfile
+from typing import BinaryIO
+from typing import Optional
+from typing import Union
+
+_CHUNK_HEADER = struct.Struct("<Q")
+
+
+class MemoryMappedSpillFile:
+    """Absorb bursts of FIFO reads on disk and give them back in order.
+
+    Chunks are appended to a temporary file through a memory map, each
+    prefixed with its length, and popped from the front in the order they
+    were appended. Appending and popping are plain memory copies, so the
+    thread reading the board keeps draining its FIFO at the speed of the
+    page cache rather than of the disk, and the operating system writes the
+    pages out in the background.
+
+    Once the chunks popped take up more than half of the file, the chunks
+    still waiting are moved to its beginning, and the file shrinks by
+    halving while they fill no more than a quarter of it. A chunk that does
+    not fit at the end is appended after the same move, and the file only
+    grows (by doubling) if the chunks waiting and the new one together do
+    not fit. So the file stays within a small multiple of the data waiting
+    in it even when consumers never fully catch up, and shrinks back to its
+    initial capacity once they do.
+
+    Args:
+        directory: the directory of the file. Defaults to the directory used by the tempfile module
+        initial_capacity: the size in bytes of the file when it is created or emptied
+    """
+
+    default_initial_capacity = 16 * 1024 * 1024
+
+    def __init__(
+        self, directory: Optional[str] = None, initial_capacity: Optional[int] = None
+    ) -> None:
+        if initial_capacity is None:
+            initial_capacity = self.default_initial_capacity
+        if initial_capacity < _CHUNK_HEADER.size:
+            raise ValueError(
+                f"initial_capacity must be at least {_CHUNK_HEADER.size} bytes, got {initial_capacity}"
+            )
+        self._initial_capacity = initial_capacity
+        # pylint: disable=consider-using-with # the file stays open until close is called
+        self._file: BinaryIO = tempfile.TemporaryFile(dir=directory)
+        self._file.truncate(initial_capacity)
+        self._mmap = mmap.mmap(self._file.fileno(), initial_capacity)
+        self._read_offset = 0
+        self._write_offset = 0
+        self._num_chunks = 0
+        self._num_bytes = 0
+        self._peak_num_bytes = 0
+
+    def get_capacity(self) -> int:
+        """Get the current size of the file in bytes."""
+        return len(self._mmap)
+
+    def get_num_chunks(self) -> int:
+        return self._num_chunks
+
+    def get_num_bytes(self) -> int:
+        """Get the number of bytes of data in the chunks waiting to be popped."""
+        return self._num_bytes
+
+    def get_peak_num_bytes(self) -> int:
+        """Get the high-water mark of get_num_bytes."""
+        return self._peak_num_bytes
+
+    def _resize(self, capacity: int) -> None:
+        self._mmap.close()
+        self._file.truncate(capacity)
+        self._mmap = mmap.mmap(self._file.fileno(), capacity)
+
+    def _compact(self) -> None:
+        # move the chunks waiting to be popped to the beginning of the file
+        num_bytes_waiting = self._write_offset - self._read_offset
+        self._mmap.move(0, self._read_offset, num_bytes_waiting)
+        self._read_offset = 0
+        self._write_offset = num_bytes_waiting
+
+    def append(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        """Add a chunk to the end of the file."""
+        num_bytes = len(data)
+        end = self._write_offset + _CHUNK_HEADER.size + num_bytes
+        if end > self.get_capacity() and self._read_offset > 0:
+            self._compact()
+            end = self._write_offset + _CHUNK_HEADER.size + num_bytes
+        if end > self.get_capacity():
+            capacity = self.get_capacity()
+            while capacity < end:
+                capacity *= 2
+            self._resize(capacity)
+        data_start = self._write_offset + _CHUNK_HEADER.size
+        _CHUNK_HEADER.pack_into(self._mmap, self._write_offset, num_bytes)
+        self._mmap[data_start:end] = data
+        self._write_offset = end
+        self._num_chunks += 1
+        self._num_bytes += num_bytes
+        self._peak_num_bytes = max(self._peak_num_bytes, self._num_bytes)
+
+    def pop(self) -> bytearray:
+        """Remove and return the chunk at the front of the file."""
+        if self._num_chunks == 0:
+            raise IndexError("pop from an empty spill file")
+        (num_bytes,) = _CHUNK_HEADER.unpack_from(self._mmap, self._read_offset)
+        data_start = self._read_offset + _CHUNK_HEADER.size
+        with memoryview(self._mmap) as view:
+            data = bytearray(view[data_start : data_start + num_bytes])
+        self._read_offset = data_start + num_bytes
+        self._num_chunks -= 1
+        self._num_bytes -= num_bytes
+        if self._num_chunks == 0:
+            self._read_offset = 0
+            self._write_offset = 0
+            if self.get_capacity() > self._initial_capacity:
+                self._resize(self._initial_capacity)
+        elif self._read_offset > self.get_capacity() // 2:
+            self._compact()
+            capacity = self.get_capacity()
+            while (
+                capacity // 2 >= self._initial_capacity
+                and self._write_offset <= capacity // 4
+            ):
+                capacity //= 2
+            if capacity < self.get_capacity():
+                self._resize(capacity)
+        return data
+
+    def close(self) -> None:
+        """Discard the file and any chunks still in it."""
+        self._mmap.close()
+        self._file.close()
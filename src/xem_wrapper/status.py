@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""Sharing reads of the status wire-outs between any number of threads."""
+import threading
+import time
+from typing import Callable
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from .constants import WIRE_OUT_IS_PLL_LOCKED
+from .constants import WIRE_OUT_IS_SPI_RUNNING
+from .constants import WIRE_OUT_NUM_WORDS_FIFO
+
+
+class BoardStatus(NamedTuple):
+    """The status wire-outs of a board, as read by one transfer.
+
+    Attributes:
+        timestamp: the time from time.perf_counter at which the transfer started. The values are at least this recent
+        wire_out_values: the value of each status wire-out, keyed by address
+    """
+
+    timestamp: float
+    wire_out_values: Dict[int, int]
+
+    def get_age(self) -> float:
+        """Get the time in seconds since the status was read."""
+        return time.perf_counter() - self.timestamp
+
+    def is_spi_running(self) -> bool:
+        return self.wire_out_values[WIRE_OUT_IS_SPI_RUNNING] & 0x00000001 == 0x00000001
+
+    def is_pll_locked(self) -> bool:
+        return self.wire_out_values[WIRE_OUT_IS_PLL_LOCKED] & 0x00000001 == 0x00000001
+
+    def get_num_words_fifo(self) -> int:
+        return self.wire_out_values[WIRE_OUT_NUM_WORDS_FIFO]
+
+
+class StatusPoller:
+    """Cache the status wire-outs of a board and share each refresh between threads.
+
+    Every refresh reads all the status wire-outs with a single
+    read_wire_outs call, i.e. one UpdateWireOuts transfer over USB. Readers
+    get the cached status, and a reader that needs a fresher status than
+    the cached one starts a refresh. While a refresh is in progress, any
+    other thread that needs one waits for its result instead of making
+    another transfer, so concurrent status queries never multiply the USB
+    traffic.
+
+    The status can also be kept fresh in the background by calling start,
+    which refreshes it every poll_interval seconds from a daemon thread.
+
+    Each FrontPanel has a poller for sharing, see FrontPanelBase.get_status_poller.
+
+    Args:
+        read_wire_outs: reads the given wire-outs in one transaction and returns their values keyed by address, e.g. FrontPanel.read_wire_outs
+        poll_interval: the time in seconds between refreshes of the background thread
+        status_ep_addrs: the addresses of the wire-outs to read at each refresh
+    """
+
+    default_poll_interval = 0.05
+    default_status_ep_addrs = (
+        WIRE_OUT_IS_SPI_RUNNING,
+        WIRE_OUT_IS_PLL_LOCKED,
+        WIRE_OUT_NUM_WORDS_FIFO,
+    )
+
+    def __init__(
+        self,
+        read_wire_outs: Callable[[Sequence[int]], Dict[int, int]],
+        poll_interval: Optional[float] = None,
+        status_ep_addrs: Optional[Sequence[int]] = None,
+    ) -> None:
+        if poll_interval is None:
+            poll_interval = self.default_poll_interval
+        if status_ep_addrs is None:
+            status_ep_addrs = self.default_status_ep_addrs
+        if poll_interval <= 0:
+            raise ValueError(f"poll_interval must be positive, got {poll_interval}")
+        if not status_ep_addrs:
+            raise ValueError("status_ep_addrs must have at least one address")
+        self._read_wire_outs = read_wire_outs
+        self._poll_interval = poll_interval
+        self._status_ep_addrs: Tuple[int, ...] = tuple(status_ep_addrs)
+        self._condition = threading.Condition()
+        self._status: Optional[BoardStatus] = None
+        self._is_refreshing = False
+        self._num_refreshes = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._background_error: Optional[Exception] = None
+
+    def get_poll_interval(self) -> float:
+        return self._poll_interval
+
+    def get_status_ep_addrs(self) -> Tuple[int, ...]:
+        return self._status_ep_addrs
+
+    def get_num_refreshes(self) -> int:
+        """Get the number of transfers made to refresh the status."""
+        with self._condition:
+            return self._num_refreshes
+
+    def _refresh(self) -> BoardStatus:
+        # called with the lock held, and releases it during the transfer
+        num_refreshes = self._num_refreshes
+        while self._is_refreshing:
+            self._condition.wait()
+        if self._num_refreshes != num_refreshes:
+            # another thread finished a refresh that started after this one was requested, or was in progress
+            return self._status  # type: ignore[return-value] # a finished refresh always sets the status
+        self._is_refreshing = True
+        self._condition.release()
+        try:
+            timestamp = time.perf_counter()
+            wire_out_values = self._read_wire_outs(self._status_ep_addrs)
+        finally:
+            self._condition.acquire()
+            self._is_refreshing = False
+            self._condition.notify_all()
+        self._status = BoardStatus(timestamp, wire_out_values)
+        self._num_refreshes += 1
+        return self._status
+
+    def refresh(self) -> BoardStatus:
+        """Read the status now, or wait for the result of a read already in progress."""
+        with self._condition:
+            return self._refresh()
+
+    def get_status(self, max_staleness: Optional[float] = None) -> BoardStatus:
+        """Get the cached status, refreshing it first if it is too old.
+
+        Args:
+            max_staleness: the oldest status in seconds that is acceptable. If None, any cached status is. The status is always refreshed if it has never been read
+
+        Return:
+            The status
+        """
+        with self._condition:
+            status = self._status
+            if status is not None and (
+                max_staleness is None
+                or time.perf_counter() - status.timestamp <= max_staleness
+            ):
+                return status
+            return self._refresh()
+
+    def is_spi_running(self, max_staleness: Optional[float] = None) -> bool:
+        return self.get_status(max_staleness=max_staleness).is_spi_running()
+
+    def is_pll_locked(self, max_staleness: Optional[float] = None) -> bool:
+        return self.get_status(max_staleness=max_staleness).is_pll_locked()
+
+    def get_num_words_fifo(self, max_staleness: Optional[float] = None) -> int:
+        return self.get_status(max_staleness=max_staleness).get_num_words_fifo()
+
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Start refreshing the status every poll_interval seconds in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._background_error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread.
+
+        If a refresh in the background thread raised an error, the thread
+        stopped at that point and the error is raised here.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        if self._background_error is not None:
+            raise self._background_error
+
+    def _run(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                with self._condition:
+                    # a refresh made by a reader since the last one counts as this one
+                    status = self._status
+                    if (
+                        status is None
+                        or time.perf_counter() - status.timestamp >= self._poll_interval
+                    ):
+                        status = self._refresh()
+                self._stop_event.wait(
+                    status.timestamp + self._poll_interval - time.perf_counter()
+                )
+        except Exception as e:  # pylint: disable=broad-except # the error is raised again by stop
+            self._background_error = e
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""Mapping between board sample indices and host time."""
+from collections import deque
+import math
+import time
+from typing import Deque
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+from numpy.typing import ArrayLike
+from numpy.typing import NDArray
+
+from .continuity import SAMPLE_IDX_MODULUS
+from .demux import get_round_robin_view
+from .exceptions import OpalKellyNotEnoughTimingPointsError
+
+
+class SampleClockAligner:
+    """Estimate the host time at which any sample was acquired.
+
+    Each time data is read, the newest sample index and the host time of the
+    read are recorded. A straight line (host time = offset + seconds per
+    sample * sample index) is fit by least squares to the most recent points,
+    giving both the offset between the clocks and the drift of the board's
+    sample clock relative to the host. The fit is updated incrementally as
+    points are added and dropped from the window, so recording a point costs
+    the same no matter how large the window is. Since removing points from
+    running sums accumulates rounding error, the sums are recomputed exactly
+    from the window each time it has been entirely replaced, which keeps
+    the amortized cost constant.
+
+    Sample indices wrap around at 2**32, so they are unwrapped into a
+    continuously increasing count as they are recorded. Raw indices passed
+    for conversion are unwrapped relative to the newest recorded point, so
+    they must be within 2**31 samples of it.
+
+    The latency between acquisition and the read is absorbed into the
+    offset; its variation shows up in the error estimate.
+
+    Args:
+        max_num_points: the number of most recent points to fit
+    """
+
+    default_max_num_points = 256
+
+    def __init__(self, max_num_points: Optional[int] = None) -> None:
+        if max_num_points is None:
+            max_num_points = self.default_max_num_points
+        if max_num_points < 3:
+            raise ValueError(f"max_num_points must be at least 3, got {max_num_points}")
+        self._points: Deque[Tuple[float, float]] = deque()
+        self._max_num_points = max_num_points
+        self._last_raw_sample_idx: Optional[int] = None
+        self._last_unwrapped_sample_idx = 0
+        self._mean_idx = 0.0
+        self._mean_time = 0.0
+        self._sum_squares_idx = 0.0
+        self._sum_squares_time = 0.0
+        self._sum_products = 0.0
+        self._num_points_since_recompute = 0
+
+    def get_num_points(self) -> int:
+        return len(self._points)
+
+    def reset(self) -> None:
+        """Discard all recorded points, e.g. after the sample index of the board is reset."""
+        self._points.clear()
+        self._last_raw_sample_idx = None
+        self._last_unwrapped_sample_idx = 0
+        self._mean_idx = 0.0
+        self._mean_time = 0.0
+        self._sum_squares_idx = 0.0
+        self._sum_squares_time = 0.0
+        self._sum_products = 0.0
+        self._num_points_since_recompute = 0
+
+    def _add_point(self, sample_idx: float, host_time: float) -> None:
+        self._points.append((sample_idx, host_time))
+        num_points = len(self._points)
+        delta_idx = sample_idx - self._mean_idx
+        delta_time = host_time - self._mean_time
+        self._mean_idx += delta_idx / num_points
+        self._mean_time += delta_time / num_points
+        self._sum_squares_idx += delta_idx * (sample_idx - self._mean_idx)
+        self._sum_squares_time += delta_time * (host_time - self._mean_time)
+        self._sum_products += delta_idx * (host_time - self._mean_time)
+
+    def _remove_oldest_point(self) -> None:
+        sample_idx, host_time = self._points.popleft()
+        num_points = len(self._points)
+        delta_idx = sample_idx - self._mean_idx
+        delta_time = host_time - self._mean_time
+        self._mean_idx -= delta_idx / num_points
+        self._mean_time -= delta_time / num_points
+        self._sum_squares_idx -= delta_idx * (sample_idx - self._mean_idx)
+        self._sum_squares_time -= delta_time * (host_time - self._mean_time)
+        self._sum_products -= delta_idx * (host_time - self._mean_time)
+
+    def _recompute_fit(self) -> None:
+        points = np.array(self._points, dtype=np.float64)
+        self._mean_idx, self._mean_time = (float(mean) for mean in points.mean(axis=0))
+        deltas_idx = points[:, 0] - self._mean_idx
+        deltas_time = points[:, 1] - self._mean_time
+        self._sum_squares_idx = float(np.dot(deltas_idx, deltas_idx))
+        self._sum_squares_time = float(np.dot(deltas_time, deltas_time))
+        self._sum_products = float(np.dot(deltas_idx, deltas_time))
+        self._num_points_since_recompute = 0
+
+    def record(self, sample_idx: int, host_time: Optional[float] = None) -> None:
+        """Record that the sample with the given index had been acquired by the given host time.
+
+        Args:
+            sample_idx: the raw 32-bit sample index of the newest sample read
+            host_time: the time of the read in seconds. Defaults to time.perf_counter()
+        """
+        if host_time is None:
+            host_time = time.perf_counter()
+        if self._last_raw_sample_idx is None:
+            unwrapped_sample_idx = sample_idx
+        else:
+            unwrapped_sample_idx = self._last_unwrapped_sample_idx + (
+                (sample_idx - self._last_raw_sample_idx) % SAMPLE_IDX_MODULUS
+            )
+        self._last_raw_sample_idx = sample_idx
+        self._last_unwrapped_sample_idx = unwrapped_sample_idx
+        if len(self._points) == self._max_num_points:
+            self._remove_oldest_point()
+        self._add_point(float(unwrapped_sample_idx), host_time)
+        self._num_points_since_recompute += 1
+        if self._num_points_since_recompute == self._max_num_points:
+            self._recompute_fit()
+
+    def record_fifo_data(
+        self,
+        data: Union[bytes, bytearray, memoryview],
+        host_time: Optional[float] = None,
+    ) -> None:
+        """Record the newest sample index of a FIFO read.
+
+        Args:
+            data: whole round robins as returned by read_from_fifo
+            host_time: the time of the read in seconds. Defaults to time.perf_counter()
+        """
+        frames = get_round_robin_view(data, check_headers=False)
+        if frames.shape[0] == 0:
+            return
+        self.record(int(frames["sample_idx"][-1, -1]), host_time)
+
+    def _get_fit(self) -> Tuple[float, float, float]:
+        num_points = len(self._points)
+        if num_points < 3 or self._sum_squares_idx <= 0:
+            raise OpalKellyNotEnoughTimingPointsError(
+                f"At least 3 points with different sample indices are needed to fit the sample clock, {num_points} recorded"
+            )
+        seconds_per_sample = self._sum_products / self._sum_squares_idx
+        sum_squared_residuals = max(
+            self._sum_squares_time - seconds_per_sample * self._sum_products, 0.0
+        )
+        residual_std = math.sqrt(sum_squared_residuals / (num_points - 2))
+        return seconds_per_sample, self._mean_time, residual_std
+
+    def get_sample_rate(self) -> float:
+        """Get the estimated rate of the sample clock in samples per second of host time."""
+        seconds_per_sample, _, _ = self._get_fit()
+        return 1 / seconds_per_sample
+
+    def get_residual_std(self) -> float:
+        """Get the standard deviation in seconds of the recorded points about the fit."""
+        _, _, residual_std = self._get_fit()
+        return residual_std
+
+    def unwrap_sample_indices(self, sample_indices: ArrayLike) -> NDArray[np.int64]:
+        """Convert raw 32-bit sample indices to the unwrapped count used by the fit.
+
+        Args:
+            sample_indices: raw sample indices within 2**31 samples of the newest recorded one
+        """
+        if self._last_raw_sample_idx is None:
+            raise OpalKellyNotEnoughTimingPointsError(
+                "No sample index has been recorded yet"
+            )
+        offsets = (
+            np.asarray(sample_indices, dtype=np.int64) - self._last_raw_sample_idx
+        ) % SAMPLE_IDX_MODULUS
+        offsets = np.where(
+            offsets >= SAMPLE_IDX_MODULUS // 2, offsets - SAMPLE_IDX_MODULUS, offsets
+        )
+        unwrapped: NDArray[np.int64] = offsets + self._last_unwrapped_sample_idx
+        return unwrapped
+
+    def sample_idx_to_host_time(
+        self, sample_indices: ArrayLike
+    ) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """Estimate the host time at which each sample was acquired.
+
+        Args:
+            sample_indices: raw sample indices within 2**31 samples of the newest recorded one
+
+        Return:
+            The estimated host times in seconds and the standard error of each estimate
+        """
+        seconds_per_sample, mean_time, residual_std = self._get_fit()
+        idx_from_mean = (
+            self.unwrap_sample_indices(sample_indices).astype(np.float64)
+            - self._mean_idx
+        )
+        host_times = mean_time + seconds_per_sample * idx_from_mean
+        errors = residual_std * np.sqrt(
+            1 / len(self._points) + np.square(idx_from_mean) / self._sum_squares_idx
+        )
+        return host_times, errors
+
+    def host_time_to_sample_idx(
+        self, host_times: ArrayLike
+    ) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """Estimate which sample was being acquired at each host time.
+
+        Args:
+            host_times: times in seconds on the same clock as the recorded points
+
+        Return:
+            The estimated unwrapped sample indices (fractional), which can be wrapped back with ``% SAMPLE_IDX_MODULUS`` after rounding, and the standard error of each estimate in samples
+        """
+        seconds_per_sample, mean_time, residual_std = self._get_fit()
+        idx_from_mean = (
+            np.asarray(host_times, dtype=np.float64) - mean_time
+        ) / seconds_per_sample
+        sample_indices: NDArray[np.float64] = self._mean_idx + idx_from_mean
+        # the error of the fitted time at the estimated index, converted to samples
+        errors = (
+            residual_std
+            * np.sqrt(
+                1 / len(self._points) + np.square(idx_from_mean) / self._sum_squares_idx
+            )
+            / abs(seconds_per_sample)
+        )
+        return sample_indices, errors
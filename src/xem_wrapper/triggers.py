@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""Waiting for trigger-out events from any number of threads."""
+import threading
+import time
+from typing import List
+from typing import Optional
+
+from .front_panel import FrontPanelBase
+
+
+class _PendingTrigger:
+    def __init__(self, ep_addr: int, mask: int) -> None:
+        self.ep_addr = ep_addr
+        self.mask = mask
+        self.is_fired = False
+
+
+class TriggerOutWaiter:
+    """Block threads until trigger-out bits fire, sharing the polling between them.
+
+    Only one waiting thread at a time polls the board. Each poll is a single
+    update_and_check_triggers call, which checks the latched state for the
+    endpoint and bits of every waiter, so one transfer over USB serves
+    any number of waiters on any endpoints. When a waiter returns or times
+    out, another takes over the polling.
+
+    The time between polls starts at min_poll_interval and is multiplied by
+    backoff_factor after each poll in which nothing fired, up to
+    max_poll_interval. It drops back to min_poll_interval whenever a trigger
+    fires or a new wait starts, since events are often expected soon after
+    a wait begins.
+
+    Trigger-outs are latched by the board between updates, so a trigger
+    counts if it is reported by any update made after the wait started.
+
+    Args:
+        front_panel: the initialized board (or simulator) to poll
+        min_poll_interval: the shortest time in seconds between polls
+        max_poll_interval: the longest time in seconds between polls
+        backoff_factor: how much the time between polls grows after each poll in which nothing fired
+    """
+
+    default_min_poll_interval = 0.0005
+    default_max_poll_interval = 0.05
+    default_backoff_factor = 2.0
+
+    def __init__(
+        self,
+        front_panel: FrontPanelBase,
+        min_poll_interval: Optional[float] = None,
+        max_poll_interval: Optional[float] = None,
+        backoff_factor: Optional[float] = None,
+    ) -> None:
+        if min_poll_interval is None:
+            min_poll_interval = self.default_min_poll_interval
+        if max_poll_interval is None:
+            max_poll_interval = self.default_max_poll_interval
+        if backoff_factor is None:
+            backoff_factor = self.default_backoff_factor
+        if min_poll_interval < 0:
+            raise ValueError(
+                f"min_poll_interval must not be negative, got {min_poll_interval}"
+            )
+        if max_poll_interval < min_poll_interval:
+            raise ValueError(
+                f"max_poll_interval must be at least min_poll_interval, got {max_poll_interval} and {min_poll_interval}"
+            )
+        if backoff_factor < 1:
+            raise ValueError(f"backoff_factor must be at least 1, got {backoff_factor}")
+        self._front_panel = front_panel
+        self._min_poll_interval = min_poll_interval
+        self._max_poll_interval = max_poll_interval
+        self._backoff_factor = backoff_factor
+        self._poll_interval = min_poll_interval
+        self._condition = threading.Condition()
+        self._pending_triggers: List[_PendingTrigger] = []
+        self._is_polling = False
+        self._num_updates = 0
+
+    def get_front_panel(self) -> FrontPanelBase:
+        return self._front_panel
+
+    def get_poll_interval(self) -> float:
+        """Get the current time in seconds between polls."""
+        with self._condition:
+            return self._poll_interval
+
+    def get_num_updates(self) -> int:
+        """Get the number of times the trigger-outs have been updated."""
+        with self._condition:
+            return self._num_updates
+
+    def get_num_waiters(self) -> int:
+        with self._condition:
+            return len(self._pending_triggers)
+
+    def _poll(self, sleep_seconds: float) -> None:
+        # called with the lock held, and releases it during the sleep and the transfer
+        self._condition.release()
+        try:
+            time.sleep(sleep_seconds)
+            with self._condition:
+                pending_triggers = list(self._pending_triggers)
+            is_fired_by_trigger = self._front_panel.update_and_check_triggers(
+                [
+                    (pending_trigger.ep_addr, pending_trigger.mask)
+                    for pending_trigger in pending_triggers
+                ]
+            )
+            fired_triggers = [
+                pending_trigger
+                for pending_trigger, is_fired in zip(
+                    pending_triggers, is_fired_by_trigger
+                )
+                if is_fired
+            ]
+        finally:
+            self._condition.acquire()
+            self._is_polling = False
+            self._condition.notify_all()
+        self._num_updates += 1
+        for fired_trigger in fired_triggers:
+            fired_trigger.is_fired = True
+        if fired_triggers:
+            self._poll_interval = self._min_poll_interval
+        else:
+            self._poll_interval = min(
+                self._poll_interval * self._backoff_factor, self._max_poll_interval
+            )
+
+    def wait_for_trigger(
+        self, ep_addr: int, mask: int, timeout: Optional[float] = None
+    ) -> bool:
+        """Block until any of the given bits of a trigger-out endpoint fire.
+
+        Args:
+            ep_addr: address of the trigger out endpoint
+            mask: the bits of the trigger out to wait for
+            timeout: the longest time in seconds to wait. Waits forever if None
+
+        Return:
+            True if the trigger fired, False if the timeout expired first
+        """
+        if mask == 0:
+            raise ValueError("mask must have at least one bit set")
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        pending_trigger = _PendingTrigger(ep_addr, mask)
+        with self._condition:
+            self._pending_triggers.append(pending_trigger)
+            self._poll_interval = self._min_poll_interval
+            try:
+                while not pending_trigger.is_fired:
+                    remaining: Optional[float] = None
+                    if deadline is not None:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            return False
+                    if self._is_polling:
+                        self._condition.wait(remaining)
+                        continue
+                    self._is_polling = True
+                    sleep_seconds = self._poll_interval
+                    if remaining is not None:
+                        sleep_seconds = min(sleep_seconds, remaining)
+                    self._poll(sleep_seconds)
+            finally:
+                self._pending_triggers.remove(pending_trigger)
+        return True
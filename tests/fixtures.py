@@ -6,6 +6,8 @@ from stdlib_utils import get_current_file_abs_directory
 from xem_wrapper import front_panel
 from xem_wrapper import FrontPanel
 from xem_wrapper import okCFrontPanel
+from xem_wrapper import ROUND_ROBIN_SIZE_WORDS
+from xem_wrapper import SharedMemoryRingBuffer
 
 
 @pytest.fixture(scope="function", name="initialized_front_panel_with_dummy_xem")
@@ -24,3 +26,11 @@ def fixture_test_bit_file_paths():
     test_path_1 = os.path.join(base_path, "test_file_1.bit")
 
     yield test_path_0, test_path_1
+
+
+@pytest.fixture(scope="function", name="ring_buffer")
+def fixture_ring_buffer():
+    rb = SharedMemoryRingBuffer(num_slots=4, slot_size=ROUND_ROBIN_SIZE_WORDS * 4 * 2)
+    yield rb
+    rb.close()
+    rb.unlink()
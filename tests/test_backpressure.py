@@ -0,0 +1,433 @@
+# -*- coding: utf-8 -*-
+import queue
+import threading
+import time
+
+import pytest
+from stdlib_utils import SimpleMultiprocessingQueue
+from xem_wrapper import backpressure
+from xem_wrapper import BACKPRESSURE_POLICIES
+from xem_wrapper import BACKPRESSURE_POLICY_BLOCK
+from xem_wrapper import BACKPRESSURE_POLICY_DROP_NEWEST
+from xem_wrapper import BACKPRESSURE_POLICY_DROP_OLDEST
+from xem_wrapper import BACKPRESSURE_POLICY_SPILL
+from xem_wrapper import BackpressureCounters
+from xem_wrapper import BackpressureQueue
+from xem_wrapper import FifoPollingScheduler
+from xem_wrapper import FifoRead
+from xem_wrapper import FifoReader
+from xem_wrapper import FrontPanelBase
+from xem_wrapper import FrontPanelSimulator
+from xem_wrapper import OpalKellyBoardNotInitializedError
+from xem_wrapper import PIPE_OUT_FIFO
+from xem_wrapper import ROUND_ROBIN_SIZE_BYTES
+from xem_wrapper import ROUND_ROBIN_SIZE_WORDS
+
+
+def _chunk(value, num_bytes=4):
+    return bytearray([value]) * num_bytes
+
+
+def _get_all(backpressure_queue):
+    chunks = []
+    while backpressure_queue.get_num_chunks() > 0:
+        chunks.append(backpressure_queue.get())
+    return chunks
+
+
+def test_BackpressureQueue__uses_defaults():
+    backpressure_queue = BackpressureQueue(100)
+    assert backpressure_queue.get_max_num_bytes() == 100
+    assert backpressure_queue.get_policy() == BACKPRESSURE_POLICY_BLOCK
+    assert backpressure_queue.get_counters() == BackpressureCounters(
+        0, 0, 0, 0, 0, 0, 0, 0, 0, 0.0, 0, 0
+    )
+    assert backpressure_queue.is_closed() is False
+
+
+@pytest.mark.parametrize(
+    "test_kwargs,test_description",
+    [
+        ({"max_num_bytes": 0}, "raises error for no byte budget"),
+        (
+            {"max_num_bytes": 10, "policy": "drop_everything"},
+            "raises error for unknown policy",
+        ),
+    ],
+)
+def test_BackpressureQueue__raises_error_for_invalid_settings(
+    test_kwargs, test_description
+):
+    with pytest.raises(ValueError):
+        BackpressureQueue(**test_kwargs)
+
+
+@pytest.mark.parametrize(
+    "test_policy",
+    [
+        BACKPRESSURE_POLICY_BLOCK,
+        BACKPRESSURE_POLICY_DROP_OLDEST,
+        BACKPRESSURE_POLICY_DROP_NEWEST,
+    ],
+)
+def test_BackpressureQueue_put__raises_error_for_chunk_larger_than_budget(test_policy):
+    backpressure_queue = BackpressureQueue(8, policy=test_policy)
+    with pytest.raises(ValueError, match="9 bytes"):
+        backpressure_queue.put(_chunk(1, num_bytes=9))
+    assert backpressure_queue.get_counters().num_chunks_put == 0
+
+
+def test_BackpressureQueue_put__spills_chunk_larger_than_budget_with_spill_policy(
+    tmp_path,
+):
+    backpressure_queue = BackpressureQueue(
+        8, policy=BACKPRESSURE_POLICY_SPILL, spill_directory=str(tmp_path)
+    )
+    assert backpressure_queue.put(_chunk(1, num_bytes=9)) is True
+    assert backpressure_queue.put(_chunk(2)) is True
+    assert backpressure_queue.get_num_bytes() == 0
+    assert _get_all(backpressure_queue) == [_chunk(1, num_bytes=9), _chunk(2)]
+    counters = backpressure_queue.get_counters()
+    assert counters.num_chunks_spilled == 2
+    assert counters.num_bytes_spilled == 13
+    backpressure_queue.close()
+
+
+@pytest.mark.parametrize("test_policy", BACKPRESSURE_POLICIES)
+def test_BackpressureQueue__returns_chunks_in_order_while_within_budget(test_policy):
+    backpressure_queue = BackpressureQueue(12, policy=test_policy)
+    chunks = [_chunk(1), memoryview(_chunk(2)), bytes(_chunk(3))]
+    for chunk in chunks:
+        assert backpressure_queue.put(chunk) is True
+    assert backpressure_queue.get_num_bytes() == 12
+    assert backpressure_queue.get_num_chunks() == 3
+    actual = _get_all(backpressure_queue)
+    assert all(
+        actual_chunk is expected_chunk
+        for actual_chunk, expected_chunk in zip(actual, chunks)
+    )
+    assert backpressure_queue.get_counters() == BackpressureCounters(
+        num_chunks_put=3,
+        num_bytes_put=12,
+        num_chunks_got=3,
+        num_bytes_got=12,
+        num_chunks_dropped=0,
+        num_bytes_dropped=0,
+        num_chunks_spilled=0,
+        num_bytes_spilled=0,
+        num_blocked_puts=0,
+        seconds_blocked=0.0,
+        peak_num_bytes_in_memory=12,
+        peak_num_spilled_bytes=0,
+    )
+
+
+def test_BackpressureQueue__drop_oldest__discards_oldest_chunks_until_new_one_fits():
+    backpressure_queue = BackpressureQueue(10, policy=BACKPRESSURE_POLICY_DROP_OLDEST)
+    for value in range(3):
+        assert backpressure_queue.put(_chunk(value)) is True
+    assert backpressure_queue.put(_chunk(3, num_bytes=6)) is True
+    assert backpressure_queue.get_num_bytes() == 10
+    assert _get_all(backpressure_queue) == [_chunk(2), _chunk(3, num_bytes=6)]
+    counters = backpressure_queue.get_counters()
+    assert counters.num_chunks_dropped == 2
+    assert counters.num_bytes_dropped == 8
+    assert counters.peak_num_bytes_in_memory == 10
+
+
+def test_BackpressureQueue__drop_newest__discards_chunks_that_do_not_fit():
+    backpressure_queue = BackpressureQueue(10, policy=BACKPRESSURE_POLICY_DROP_NEWEST)
+    assert backpressure_queue.put(_chunk(0)) is True
+    assert backpressure_queue.put(_chunk(1)) is True
+    assert backpressure_queue.put(_chunk(2)) is False
+    assert backpressure_queue.put(_chunk(3, num_bytes=2)) is True
+    assert _get_all(backpressure_queue) == [
+        _chunk(0),
+        _chunk(1),
+        _chunk(3, num_bytes=2),
+    ]
+    counters = backpressure_queue.get_counters()
+    assert counters.num_chunks_dropped == 1
+    assert counters.num_bytes_dropped == 4
+
+
+def test_BackpressureQueue__spill__keeps_order_across_memory_and_spill_file(tmp_path):
+    backpressure_queue = BackpressureQueue(
+        8, policy=BACKPRESSURE_POLICY_SPILL, spill_directory=str(tmp_path)
+    )
+    for value in range(4):
+        assert backpressure_queue.put(_chunk(value)) is True
+    assert backpressure_queue.get_num_bytes() == 8
+    assert backpressure_queue.get_num_spilled_bytes() == 8
+    assert backpressure_queue.get() == _chunk(0)
+    # there is room in memory again, but later chunks still go behind the spilled ones
+    assert backpressure_queue.put(_chunk(4)) is True
+    assert backpressure_queue.get_num_spilled_bytes() == 12
+    assert _get_all(backpressure_queue) == [_chunk(value) for value in range(1, 5)]
+    assert backpressure_queue.get_num_spilled_bytes() == 0
+
+    # once the spill file is empty, chunks are held in memory again
+    assert backpressure_queue.put(_chunk(5)) is True
+    assert backpressure_queue.get_num_bytes() == 4
+    assert backpressure_queue.get_num_spilled_bytes() == 0
+    counters = backpressure_queue.get_counters()
+    assert counters.num_chunks_spilled == 3
+    assert counters.num_bytes_spilled == 12
+    assert counters.num_chunks_dropped == 0
+    assert counters.peak_num_bytes_in_memory == 8
+    assert counters.peak_num_spilled_bytes == 12
+
+
+def test_BackpressureQueue__spill__writes_spill_file_to_spill_directory(
+    mocker, tmp_path
+):
+    spied_spill_file = mocker.spy(backpressure, "MemoryMappedSpillFile")
+    backpressure_queue = BackpressureQueue(
+        4, policy=BACKPRESSURE_POLICY_SPILL, spill_directory=str(tmp_path)
+    )
+    backpressure_queue.put(_chunk(0))
+    spied_spill_file.assert_not_called()
+    backpressure_queue.put(_chunk(1))
+    backpressure_queue.put(_chunk(2))
+    spied_spill_file.assert_called_once_with(str(tmp_path))
+
+
+def test_BackpressureQueue__block__put_waits_for_room():
+    backpressure_queue = BackpressureQueue(8)
+    backpressure_queue.put(_chunk(0))
+    backpressure_queue.put(_chunk(1))
+    is_put = threading.Event()
+
+    def put_third_chunk():
+        backpressure_queue.put(_chunk(2))
+        is_put.set()
+
+    putting_thread = threading.Thread(target=put_third_chunk)
+    putting_thread.start()
+    assert is_put.wait(timeout=0.05) is False
+    assert backpressure_queue.get() == _chunk(0)
+    putting_thread.join()
+    assert is_put.is_set()
+    assert _get_all(backpressure_queue) == [_chunk(1), _chunk(2)]
+    counters = backpressure_queue.get_counters()
+    assert counters.num_blocked_puts == 1
+    assert counters.seconds_blocked > 0
+    assert counters.peak_num_bytes_in_memory == 8
+
+
+def test_BackpressureQueue__block__put_raises_error_after_timeout():
+    backpressure_queue = BackpressureQueue(4)
+    backpressure_queue.put(_chunk(0))
+    with pytest.raises(queue.Full):
+        backpressure_queue.put(_chunk(1), timeout=0.01)
+    counters = backpressure_queue.get_counters()
+    assert counters.num_chunks_put == 1
+    assert counters.num_blocked_puts == 1
+    assert counters.seconds_blocked >= 0.01
+    assert _get_all(backpressure_queue) == [_chunk(0)]
+
+
+def test_BackpressureQueue_close__wakes_blocked_put_which_drops_its_chunk():
+    backpressure_queue = BackpressureQueue(4)
+    backpressure_queue.put(_chunk(0))
+    results = []
+    putting_thread = threading.Thread(
+        target=lambda: results.append(backpressure_queue.put(_chunk(1)))
+    )
+    putting_thread.start()
+    time.sleep(0.02)
+    backpressure_queue.close()
+    putting_thread.join()
+    assert results == [False]
+    assert backpressure_queue.is_closed() is True
+    assert backpressure_queue.put(_chunk(2)) is False
+    counters = backpressure_queue.get_counters()
+    assert counters.num_chunks_dropped == 2
+    assert counters.num_bytes_dropped == 8
+    # chunks queued before closing can still be taken
+    assert backpressure_queue.get() == _chunk(0)
+    assert backpressure_queue.get() is None
+
+
+def test_BackpressureQueue_get__returns_None_after_timeout():
+    assert BackpressureQueue(4).get(timeout=0.01) is None
+
+
+def test_BackpressureQueue_get__waits_for_a_chunk():
+    backpressure_queue = BackpressureQueue(4)
+    timer = threading.Timer(0.02, lambda: backpressure_queue.put(_chunk(0)))
+    timer.start()
+    assert backpressure_queue.get(timeout=5) == _chunk(0)
+    timer.join()
+
+
+def test_BackpressureQueue_close__wakes_waiting_get():
+    backpressure_queue = BackpressureQueue(4)
+    timer = threading.Timer(0.02, backpressure_queue.close)
+    timer.start()
+    assert backpressure_queue.get() is None
+    timer.join()
+
+
+def test_BackpressureQueue_close__removes_spill_file_once_spilled_chunks_are_taken(
+    mocker, tmp_path
+):
+    backpressure_queue = BackpressureQueue(
+        4, policy=BACKPRESSURE_POLICY_SPILL, spill_directory=str(tmp_path)
+    )
+    for value in range(3):
+        backpressure_queue.put(_chunk(value))
+    spill_file = (
+        backpressure_queue._spill_file
+    )  # pylint: disable=protected-access # checking the file is closed
+    spied_close = mocker.spy(spill_file, "close")
+    backpressure_queue.close()
+    assert backpressure_queue.get() == _chunk(0)
+    assert backpressure_queue.get() == _chunk(1)
+    spied_close.assert_not_called()
+    assert backpressure_queue.get() == _chunk(2)
+    spied_close.assert_called_once_with()
+    assert backpressure_queue.get() is None
+
+
+@pytest.mark.parametrize("test_policy", BACKPRESSURE_POLICIES)
+def test_BackpressureQueue__keeps_memory_within_budget_with_concurrent_producer_and_consumer(
+    test_policy, tmp_path
+):
+    max_num_bytes = 64
+    backpressure_queue = BackpressureQueue(
+        max_num_bytes, policy=test_policy, spill_directory=str(tmp_path)
+    )
+    num_chunks = 500
+    taken = []
+
+    def consume():
+        while True:
+            chunk = backpressure_queue.get()
+            if chunk is None:
+                return
+            taken.append(chunk[0])
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    for value in range(num_chunks):
+        backpressure_queue.put(_chunk(value % 256, num_bytes=value % 16 + 1))
+    backpressure_queue.close()
+    consumer.join()
+
+    counters = backpressure_queue.get_counters()
+    assert counters.peak_num_bytes_in_memory <= max_num_bytes
+    assert counters.num_chunks_put == num_chunks
+    assert counters.num_chunks_got + counters.num_chunks_dropped == num_chunks
+    assert counters.num_bytes_got + counters.num_bytes_dropped == counters.num_bytes_put
+    assert len(taken) == counters.num_chunks_got
+    if test_policy in (BACKPRESSURE_POLICY_BLOCK, BACKPRESSURE_POLICY_SPILL):
+        assert taken == [value % 256 for value in range(num_chunks)]
+    if test_policy == BACKPRESSURE_POLICY_BLOCK:
+        assert counters.num_chunks_dropped == 0
+
+
+def _create_front_panel(mocker, chunks):
+    fp = FrontPanelBase()
+    fp.initialize_board()
+    mocker.patch.object(
+        fp,
+        "get_num_words_fifo",
+        autospec=True,
+        return_value=ROUND_ROBIN_SIZE_WORDS,
+    )
+    mocker.patch.object(
+        fp,
+        "read_from_fifo_with_status",
+        autospec=True,
+        side_effect=[
+            (chunk, FifoRead(ROUND_ROBIN_SIZE_WORDS, len(chunk), len(chunk)))
+            for chunk in chunks
+        ],
+    )
+    return fp
+
+
+def _create_scheduler():
+    return FifoPollingScheduler(
+        target_num_words=ROUND_ROBIN_SIZE_WORDS,
+        min_poll_interval=0.001,
+        max_poll_interval=0.001,
+    )
+
+
+def test_FifoReader__puts_reads_into_output_queue_until_stopped(mocker):
+    chunks = [_chunk(value, num_bytes=ROUND_ROBIN_SIZE_BYTES) for value in range(3)]
+    fp = _create_front_panel(mocker, [bytearray(0)] + chunks + [bytearray(0)] * 1000)
+    output_queue = BackpressureQueue(ROUND_ROBIN_SIZE_BYTES * 4)
+    fifo_reader = FifoReader(fp, output_queue, scheduler=_create_scheduler())
+    assert fifo_reader.get_output_queue() is output_queue
+    fifo_reader.start()
+    fifo_reader.start()
+    assert fifo_reader.is_running() is True
+    assert [output_queue.get(timeout=5) for _ in range(3)] == chunks
+    fifo_reader.stop()
+    fifo_reader.stop()
+    assert fifo_reader.is_running() is False
+    assert output_queue.get_counters().num_chunks_put == 3
+
+
+def test_FifoReader__limits_reads_to_byte_budget_of_output_queue():
+    expected_data = bytearray(
+        value % 256 for value in range(ROUND_ROBIN_SIZE_BYTES * 5)
+    )
+    fifo = SimpleMultiprocessingQueue()
+    fifo.put(expected_data)
+    fp = FrontPanelSimulator({"pipe_outs": {PIPE_OUT_FIFO: fifo}})
+    fp.initialize_board()
+    output_queue = BackpressureQueue(ROUND_ROBIN_SIZE_BYTES * 2)
+    fifo_reader = FifoReader(fp, output_queue, scheduler=_create_scheduler())
+    fifo_reader.start()
+    chunks = []
+    while sum(len(chunk) for chunk in chunks) < len(expected_data):
+        chunks.append(output_queue.get(timeout=5))
+    fifo_reader.stop()
+    assert [len(chunk) for chunk in chunks] == [ROUND_ROBIN_SIZE_BYTES * 2] * 2 + [
+        ROUND_ROBIN_SIZE_BYTES
+    ]
+    assert bytearray().join(chunks) == expected_data
+
+
+def test_FifoReader__uses_default_scheduler():
+    fifo_reader = FifoReader(FrontPanelBase(), BackpressureQueue(4))
+    assert isinstance(
+        fifo_reader._scheduler,  # pylint: disable=protected-access # checking the default
+        FifoPollingScheduler,
+    )
+
+
+def test_FifoReader__stops_reading_while_blocked_on_full_queue(mocker):
+    mocker.patch.object(FifoReader, "default_put_timeout", 0.01)
+    fp = _create_front_panel(
+        mocker,
+        [
+            _chunk(value % 256, num_bytes=ROUND_ROBIN_SIZE_BYTES)
+            for value in range(1000)
+        ],
+    )
+    output_queue = BackpressureQueue(ROUND_ROBIN_SIZE_BYTES * 2)
+    fifo_reader = FifoReader(fp, output_queue, scheduler=_create_scheduler())
+    fifo_reader.start()
+    time.sleep(0.1)
+    # the reader holds one read while waiting for room, and makes no more
+    assert fp.read_from_fifo_with_status.call_count == 3
+    assert output_queue.get_counters().num_blocked_puts >= 1
+    fifo_reader.stop()
+    assert output_queue.get_num_chunks() == 2
+    assert output_queue.get_counters().num_chunks_dropped == 0
+
+
+def test_FifoReader_stop__raises_error_of_background_read():
+    fifo_reader = FifoReader(
+        FrontPanelBase(), BackpressureQueue(4), scheduler=_create_scheduler()
+    )
+    fifo_reader.start()
+    time.sleep(0.02)
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fifo_reader.stop()
+    assert fifo_reader.is_running() is False
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+import gc
+from multiprocessing import shared_memory
+import os
+import time
+
+import numpy as np
+import pytest
+from xem_wrapper import batch_decoding
+from xem_wrapper import BatchDecoder
+from xem_wrapper import build_round_robins
+from xem_wrapper import CHANNELS_PER_DATA_FRAME
+from xem_wrapper import DATA_FRAME_SIZE_WORDS
+from xem_wrapper import DATA_FRAMES_PER_ROUND_ROBIN
+from xem_wrapper import demux_round_robins
+from xem_wrapper import find_first_incorrect_header
+from xem_wrapper import get_round_robin_view
+from xem_wrapper import NUM_CHANNELS
+from xem_wrapper import OpalKellyIncompleteRoundRobinError
+from xem_wrapper import OpalKellyIncorrectHeaderError
+from xem_wrapper import ROUND_ROBIN_SIZE_BYTES
+
+
+def _generate_round_robins(num_round_robins):
+    channel_data = (
+        np.arange(NUM_CHANNELS * num_round_robins, dtype=np.uint32).reshape(
+            NUM_CHANNELS, num_round_robins
+        )
+        * 7
+    ).astype(np.uint16)
+    return build_round_robins(channel_data, np.arange(num_round_robins) + 1000)
+
+
+@pytest.fixture(scope="function", name="batch_decoder")
+def fixture_batch_decoder():
+    batch_decoder = BatchDecoder(max_workers=2, chunk_num_round_robins=3)
+    yield batch_decoder
+    batch_decoder.close()
+
+
+def test_BatchDecoder__uses_defaults():
+    assert (
+        BatchDecoder().get_chunk_num_round_robins()
+        == BatchDecoder.default_chunk_num_round_robins
+    )
+
+
+@pytest.mark.parametrize(
+    "test_kwargs,test_description",
+    [
+        ({"max_workers": 0}, "raises error for no workers"),
+        ({"chunk_num_round_robins": 0}, "raises error for empty chunks"),
+    ],
+)
+def test_BatchDecoder__raises_error_for_invalid_settings(test_kwargs, test_description):
+    with pytest.raises(ValueError):
+        BatchDecoder(**test_kwargs)
+
+
+@pytest.mark.parametrize(
+    "test_num_round_robins,test_description",
+    [
+        (0, "decodes no data"),
+        (3, "decodes a single chunk in this process"),
+        (10, "decodes chunks in worker processes, with a partial last chunk"),
+        (12, "decodes chunks in worker processes"),
+    ],
+)
+def test_BatchDecoder_decode__matches_demux_round_robins(
+    test_num_round_robins, test_description, batch_decoder
+):
+    test_data = _generate_round_robins(test_num_round_robins)
+    expected_channel_data, expected_sample_indices = demux_round_robins(test_data)
+    actual_channel_data, actual_sample_indices = batch_decoder.decode(test_data)
+    np.testing.assert_array_equal(actual_channel_data, expected_channel_data)
+    assert actual_sample_indices.shape == (
+        DATA_FRAMES_PER_ROUND_ROBIN,
+        test_num_round_robins,
+    )
+    np.testing.assert_array_equal(
+        np.repeat(actual_sample_indices, CHANNELS_PER_DATA_FRAME, axis=0),
+        expected_sample_indices,
+    )
+    assert actual_channel_data.dtype == np.uint16
+    assert actual_sample_indices.dtype == np.uint32
+    assert actual_channel_data.flags.c_contiguous
+
+
+def test_BatchDecoder_decode__releases_shared_memory_once_outputs_are_garbage_collected(
+    mocker, batch_decoder
+):
+    test_data = _generate_round_robins(10)
+    spied_close = mocker.spy(shared_memory.SharedMemory, "close")
+    actual_channel_data, actual_sample_indices = batch_decoder.decode(test_data)
+    # only the input is released straight away
+    assert spied_close.call_count == 1
+    channel_0 = actual_channel_data[0]
+    del actual_channel_data, actual_sample_indices
+    gc.collect()
+    assert spied_close.call_count == 2
+    np.testing.assert_array_equal(channel_0, demux_round_robins(test_data)[0][0])
+    del channel_0
+    gc.collect()
+    assert spied_close.call_count == 3
+
+
+def test_BatchDecoder_decode__releases_shared_memory_when_a_header_is_incorrect(
+    mocker, batch_decoder
+):
+    test_data = _generate_round_robins(10)
+    test_data[ROUND_ROBIN_SIZE_BYTES * 4] ^= 0xFF
+    spied_close = mocker.spy(shared_memory.SharedMemory, "close")
+    with pytest.raises(OpalKellyIncorrectHeaderError):
+        batch_decoder.decode(test_data)
+    assert spied_close.call_count == 3
+
+
+@pytest.mark.slow
+def test_BatchDecoder_decode__is_faster_with_more_workers():
+    num_cpus = os.cpu_count() or 1
+    if num_cpus < 2:
+        pytest.skip("needs more than one CPU")
+    test_data = _generate_round_robins(2 ** 18)
+    expected_channel_data, _ = demux_round_robins(test_data)
+    durations = dict()
+    for max_workers in (1, num_cpus):
+        batch_decoder = BatchDecoder(
+            max_workers=max_workers, chunk_num_round_robins=2 ** 14
+        )
+        try:
+            # the first call starts the worker processes
+            batch_decoder.decode(test_data)
+            start = time.perf_counter()
+            actual_channel_data, _ = batch_decoder.decode(test_data)
+            durations[max_workers] = time.perf_counter() - start
+        finally:
+            batch_decoder.close()
+        np.testing.assert_array_equal(actual_channel_data, expected_channel_data)
+    assert durations[num_cpus] < durations[1]
+
+
+def test_BatchDecoder_decode__reuses_worker_processes_until_closed(batch_decoder):
+    test_data = memoryview(_generate_round_robins(7))
+    first_channel_data, _ = batch_decoder.decode(test_data)
+    second_channel_data, _ = batch_decoder.decode(test_data)
+    np.testing.assert_array_equal(first_channel_data, second_channel_data)
+    batch_decoder.close()
+    batch_decoder.close()
+    third_channel_data, _ = batch_decoder.decode(test_data)
+    np.testing.assert_array_equal(first_channel_data, third_channel_data)
+
+
+def test_BatchDecoder_decode__raises_error_with_partial_round_robin(batch_decoder):
+    test_data = _generate_round_robins(7)
+    with pytest.raises(OpalKellyIncompleteRoundRobinError):
+        batch_decoder.decode(test_data[:-4])
+
+
+def test_BatchDecoder_decode__raises_error_for_first_incorrect_header_in_any_chunk(
+    batch_decoder,
+):
+    test_data = _generate_round_robins(10)
+    frame_size = DATA_FRAME_SIZE_WORDS * 4
+    test_data[7 * ROUND_ROBIN_SIZE_BYTES + 2 * frame_size] ^= 0xFF
+    test_data[4 * ROUND_ROBIN_SIZE_BYTES + 5 * frame_size] ^= 0xFF
+    with pytest.raises(
+        OpalKellyIncorrectHeaderError,
+        match=f"frame {4 * DATA_FRAMES_PER_ROUND_ROBIN + 5} ",
+    ):
+        batch_decoder.decode(test_data)
+    actual_channel_data, _ = BatchDecoder(
+        max_workers=1, chunk_num_round_robins=3, check_headers=False
+    ).decode(test_data)
+    assert actual_channel_data.shape == (NUM_CHANNELS, 10)
+
+
+def test_find_first_incorrect_header__returns_None_if_every_header_is_correct():
+    test_frames = get_round_robin_view(_generate_round_robins(2))
+    assert find_first_incorrect_header(test_frames) is None
+    assert find_first_incorrect_header(test_frames[1:]) is None
+
+
+def test_decode_chunk__writes_chunk_into_shared_output_arrays():
+    # worker processes are not measured for coverage, so the worker function is also run here
+    num_round_robins = 4
+    test_data = _generate_round_robins(num_round_robins)
+    memories = [
+        shared_memory.SharedMemory(create=True, size=size)
+        for size in (
+            len(test_data),
+            NUM_CHANNELS * num_round_robins * 2,
+            DATA_FRAMES_PER_ROUND_ROBIN * num_round_robins * 4,
+        )
+    ]
+    try:
+        memories[0].buf[: len(test_data)] = test_data
+        names = tuple(memory.name for memory in memories)
+        for start, stop in ((0, 3), (3, 4)):
+            assert (
+                batch_decoding._decode_chunk(  # pylint: disable=protected-access # the function run by the workers
+                    names, num_round_robins, start, stop, True
+                )
+                is None
+            )
+        expected_channel_data, expected_sample_indices = demux_round_robins(test_data)
+        np.testing.assert_array_equal(
+            np.frombuffer(
+                memories[1].buf, dtype=np.uint16, count=expected_channel_data.size
+            ).reshape(NUM_CHANNELS, num_round_robins),
+            expected_channel_data,
+        )
+        np.testing.assert_array_equal(
+            np.frombuffer(
+                memories[2].buf,
+                dtype=np.uint32,
+                count=DATA_FRAMES_PER_ROUND_ROBIN * num_round_robins,
+            ).reshape(DATA_FRAMES_PER_ROUND_ROBIN, num_round_robins),
+            expected_sample_indices[::CHANNELS_PER_DATA_FRAME],
+        )
+
+        memories[0].buf[ROUND_ROBIN_SIZE_BYTES * 3] ^= 0xFF
+        assert (
+            batch_decoding._decode_chunk(  # pylint: disable=protected-access # the function run by the workers
+                names, num_round_robins, 3, 4, True
+            )
+            == 3 * DATA_FRAMES_PER_ROUND_ROBIN
+        )
+        assert (
+            batch_decoding._decode_chunk(  # pylint: disable=protected-access # the function run by the workers
+                names, num_round_robins, 3, 4, False
+            )
+            is None
+        )
+    finally:
+        for memory in memories:
+            memory.close()
+            memory.unlink()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+from xem_wrapper import benchmarks
+from xem_wrapper import FrontPanel
+from xem_wrapper import read_from_fifo
+from xem_wrapper import read_wire_out
+from xem_wrapper import ROUND_ROBIN_SIZE_BYTES
+from xem_wrapper import set_wire_in
+from xem_wrapper import WIRE_OUT_IS_SPI_RUNNING
+from xem_wrapper.benchmarks import BenchmarkRegression
+from xem_wrapper.benchmarks import BenchmarkResult
+from xem_wrapper.benchmarks import BENCHMARKS
+from xem_wrapper.benchmarks import BenchmarkXem
+from xem_wrapper.benchmarks import compare_to_baseline
+from xem_wrapper.benchmarks import load_benchmark_results
+from xem_wrapper.benchmarks import run_benchmark_suite
+from xem_wrapper.benchmarks import run_benchmarks
+from xem_wrapper.benchmarks import save_benchmark_results
+from xem_wrapper.benchmarks import time_calls
+
+
+def _create_result(best_ns_per_call):
+    return BenchmarkResult(
+        num_calls=10,
+        num_repeats=3,
+        best_ns_per_call=best_ns_per_call,
+        median_ns_per_call=best_ns_per_call * 1.5,
+    )
+
+
+def test_BenchmarkXem__answers_calls_without_a_board():
+    xem = BenchmarkXem(num_words_fifo=ROUND_ROBIN_SIZE_BYTES // 4)
+    fp = FrontPanel(xem)
+    fp.initialize_board()
+    assert len(read_from_fifo(xem)) == ROUND_ROBIN_SIZE_BYTES
+    assert read_wire_out(xem, WIRE_OUT_IS_SPI_RUNNING) == 0
+    set_wire_in(xem, 0x00, 0x0002, 0x0002)
+
+
+def test_time_calls__calls_function_for_each_call_of_each_repeat():
+    calls = []
+    result = time_calls(lambda: calls.append(None), 7, 3)
+    assert len(calls) == 21
+    assert result.num_calls == 7
+    assert result.num_repeats == 3
+    assert 0 < result.best_ns_per_call <= result.median_ns_per_call
+
+
+@pytest.mark.parametrize(
+    "test_num_calls,test_num_repeats,test_description",
+    [(0, 1, "raises error for no calls"), (1, 0, "raises error for no repeats")],
+)
+def test_time_calls__raises_error_for_invalid_counts(
+    test_num_calls, test_num_repeats, test_description
+):
+    with pytest.raises(ValueError):
+        time_calls(lambda: None, test_num_calls, test_num_repeats)
+
+
+def test_run_benchmarks__runs_every_benchmark_of_the_suite():
+    results = run_benchmarks(num_calls=3, num_repeats=2)
+    assert list(results) == list(BENCHMARKS)
+    for result in results.values():
+        assert result.num_calls == 3
+        assert result.num_repeats == 2
+        assert result.best_ns_per_call > 0
+
+
+def test_run_benchmarks__uses_default_number_of_calls_of_each_benchmark(mocker):
+    spied_time_calls = mocker.spy(benchmarks, "time_calls")
+    results = run_benchmarks(names=["decode.convert_word"], num_repeats=1)
+    assert list(results) == ["decode.convert_word"]
+    assert spied_time_calls.call_args[0][1] == BENCHMARKS["decode.convert_word"][1]
+
+
+def test_run_benchmarks__raises_error_for_unknown_benchmark():
+    with pytest.raises(ValueError, match="'not_a_benchmark'"):
+        run_benchmarks(names=["not_a_benchmark"])
+
+
+def test_save_benchmark_results__writes_json_that_load_benchmark_results_reads(
+    tmp_path,
+):
+    results = {"a": _create_result(100.0), "b": _create_result(2.5)}
+    file_path = str(tmp_path / "results.json")
+    save_benchmark_results(results, file_path)
+    with open(file_path, encoding="utf-8") as results_file:
+        contents = json.load(results_file)
+    assert contents["format_version"] == benchmarks.BENCHMARK_RESULTS_FORMAT_VERSION
+    assert contents["results"]["a"]["best_ns_per_call"] == 100.0
+    assert "python_version" in contents
+
+    assert load_benchmark_results(file_path) == results
+
+
+def test_load_benchmark_results__raises_error_for_unknown_format_version(tmp_path):
+    file_path = tmp_path / "results.json"
+    file_path.write_text(json.dumps({"format_version": 99, "results": {}}))
+    with pytest.raises(ValueError, match="format version 99"):
+        load_benchmark_results(str(file_path))
+
+
+def test_compare_to_baseline__returns_regressions_beyond_tolerance_slowest_first():
+    baseline = {
+        "fast": _create_result(100.0),
+        "slow": _create_result(100.0),
+        "slower": _create_result(100.0),
+        "not_run": _create_result(100.0),
+    }
+    results = {
+        "fast": _create_result(109.0),
+        "slow": _create_result(120.0),
+        "slower": _create_result(300.0),
+        "new": _create_result(1000.0),
+    }
+    assert compare_to_baseline(results, baseline) == [
+        BenchmarkRegression("slower", 100.0, 300.0, 3.0),
+        BenchmarkRegression("slow", 100.0, 120.0, 1.2),
+    ]
+    assert compare_to_baseline(results, baseline, tolerance=5) == []
+
+
+def test_run_benchmark_suite__writes_output_and_returns_0_without_baseline(
+    tmp_path, capsys
+):
+    file_path = str(tmp_path / "results.json")
+    assert (
+        run_benchmark_suite(
+            [
+                "--benchmark",
+                "decode.convert_word",
+                "--benchmark",
+                "decode.check_header",
+                "--num-calls",
+                "10",
+                "--num-repeats",
+                "2",
+                "--output",
+                file_path,
+            ]
+        )
+        == 0
+    )
+    assert list(load_benchmark_results(file_path)) == [
+        "decode.convert_word",
+        "decode.check_header",
+    ]
+    assert "decode.check_header" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "test_baseline_ns_per_call,expected_return_code,test_description",
+    [
+        (1e12, 0, "returns 0 when faster than baseline"),
+        (1e-3, 1, "returns 1 when slower than baseline"),
+    ],
+)
+def test_run_benchmark_suite__compares_to_baseline(
+    test_baseline_ns_per_call,
+    expected_return_code,
+    test_description,
+    tmp_path,
+    capsys,
+):
+    file_path = str(tmp_path / "baseline.json")
+    save_benchmark_results(
+        {"decode.convert_word": _create_result(test_baseline_ns_per_call)}, file_path
+    )
+    assert (
+        run_benchmark_suite(
+            [
+                "--benchmark",
+                "decode.convert_word",
+                "--num-calls",
+                "10",
+                "--baseline",
+                file_path,
+                "--tolerance",
+                "0.5",
+            ]
+        )
+        == expected_return_code
+    )
+    assert ("REGRESSION decode.convert_word" in capsys.readouterr().out) is bool(
+        expected_return_code
+    )
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from xem_wrapper import build_round_robins
+from xem_wrapper import NUM_CHANNELS
+from xem_wrapper import RunningChannelStatistics
+
+
+def test_RunningChannelStatistics__class_attributes():
+    assert RunningChannelStatistics.default_saturation_low == 0
+    assert RunningChannelStatistics.default_saturation_high == 0xFFFF
+
+
+@pytest.mark.parametrize(
+    "test_kwargs,test_description",
+    [
+        ({"num_channels": 0}, "raises error when there are no channels"),
+        (
+            {"saturation_low": 10, "saturation_high": 10},
+            "raises error when saturation limits are equal",
+        ),
+    ],
+)
+def test_RunningChannelStatistics__raises_error_with_invalid_configuration(
+    test_kwargs, test_description
+):
+    with pytest.raises(ValueError):
+        RunningChannelStatistics(**test_kwargs)
+
+
+def test_RunningChannelStatistics__snapshot__returns_nan_without_samples():
+    stats = RunningChannelStatistics()
+    assert stats.get_num_channels() == NUM_CHANNELS
+    actual = stats.snapshot()
+    assert actual.num_samples == 0
+    for values in (actual.mean, actual.variance, actual.min, actual.max):
+        assert values.shape == (NUM_CHANNELS,)
+        assert np.isnan(values).all()
+    np.testing.assert_array_equal(actual.num_saturated, 0)
+
+
+def test_RunningChannelStatistics__update__matches_statistics_of_all_chunks_combined():
+    rng = np.random.default_rng(0)
+    test_data = rng.integers(0, 0xFFFF, size=(3, 1000), endpoint=True).astype(np.uint16)
+    stats = RunningChannelStatistics(
+        num_channels=3, saturation_low=100, saturation_high=0xFF00
+    )
+    for start, end in ((0, 1), (1, 1), (1, 250), (250, 1000)):
+        stats.update(test_data[:, start:end])
+
+    actual = stats.snapshot()
+    assert actual.num_samples == stats.get_num_samples() == 1000
+    np.testing.assert_allclose(actual.mean, test_data.mean(axis=1))
+    np.testing.assert_allclose(actual.variance, test_data.var(axis=1))
+    np.testing.assert_array_equal(actual.min, test_data.min(axis=1))
+    np.testing.assert_array_equal(actual.max, test_data.max(axis=1))
+    np.testing.assert_array_equal(
+        actual.num_saturated,
+        ((test_data <= 100) | (test_data >= 0xFF00)).sum(axis=1),
+    )
+
+
+def test_RunningChannelStatistics__update__raises_error_with_wrong_number_of_channels():
+    stats = RunningChannelStatistics(num_channels=2)
+    with pytest.raises(ValueError):
+        stats.update(np.zeros((3, 5), dtype=np.uint16))
+
+
+def test_RunningChannelStatistics__snapshot__is_not_affected_by_later_updates():
+    stats = RunningChannelStatistics(num_channels=1)
+    stats.update(np.array([[1, 3]]))
+    actual = stats.snapshot()
+    stats.update(np.array([[100, 200]]))
+    assert actual.mean[0] == 2
+    assert actual.max[0] == 3
+
+
+def test_RunningChannelStatistics__snapshot__resets_window_when_requested():
+    stats = RunningChannelStatistics(num_channels=1)
+    stats.update(np.array([[0, 10]]))
+    actual = stats.snapshot(reset_window=True)
+    assert actual.num_samples == 2
+    assert actual.num_saturated[0] == 1
+    assert stats.get_num_samples() == 0
+
+    stats.update(np.array([[4, 6]]))
+    actual = stats.snapshot()
+    assert actual.mean[0] == 5
+    assert actual.variance[0] == 1
+    assert actual.min[0] == 4
+    assert actual.num_saturated[0] == 0
+
+
+def test_RunningChannelStatistics__update_fifo_data__demuxes_fifo_read():
+    test_channel_data = np.tile(
+        np.arange(NUM_CHANNELS, dtype=np.uint16)[:, None], (1, 4)
+    )
+    test_channel_data[:, 0] = 0xFFFF
+    stats = RunningChannelStatistics()
+    stats.update_fifo_data(build_round_robins(test_channel_data, np.arange(4)))
+    actual = stats.snapshot()
+    assert actual.num_samples == 4
+    np.testing.assert_array_equal(actual.min, np.arange(NUM_CHANNELS))
+    np.testing.assert_array_equal(actual.max, 0xFFFF)
+    assert actual.num_saturated[0] == 4
+    assert actual.num_saturated[1] == 1
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from xem_wrapper import build_round_robins
+from xem_wrapper import CONTINUITY_EVENT_DISCONTINUITY
+from xem_wrapper import CONTINUITY_EVENT_DROPPED
+from xem_wrapper import CONTINUITY_EVENT_DUPLICATED
+from xem_wrapper import ContinuityEvent
+from xem_wrapper import NUM_CHANNELS
+from xem_wrapper import SAMPLE_IDX_MODULUS
+from xem_wrapper import SampleIndexContinuityMonitor
+
+
+def test_SampleIndexContinuityMonitor__class_attributes():
+    assert SampleIndexContinuityMonitor.default_expected_stride == 1
+    assert SampleIndexContinuityMonitor.default_max_num_events == 1000
+    assert SAMPLE_IDX_MODULUS == 2 ** 32
+
+
+@pytest.mark.parametrize(
+    "test_kwargs,test_description",
+    [
+        ({"expected_stride": 0}, "raises error when stride is zero"),
+        ({"expected_stride": 2 ** 31}, "raises error when stride is half the modulus"),
+        ({"max_num_events": -1}, "raises error when max events is negative"),
+    ],
+)
+def test_SampleIndexContinuityMonitor__raises_error_with_invalid_configuration(
+    test_kwargs, test_description
+):
+    with pytest.raises(ValueError):
+        SampleIndexContinuityMonitor(**test_kwargs)
+
+
+def test_SampleIndexContinuityMonitor__check__reports_nothing_for_continuous_chunks():
+    monitor = SampleIndexContinuityMonitor(expected_stride=10)
+    assert monitor.get_expected_stride() == 10
+    assert monitor.check([]) == []
+    assert monitor.check(np.arange(0, 100, 10)) == []
+    assert monitor.check(np.arange(100, 200, 10)) == []
+    assert monitor.get_counters() == {
+        "num_samples_checked": 20,
+        "num_dropped": 0,
+        "num_duplicated": 0,
+        "num_gaps": 0,
+        "num_discontinuities": 0,
+    }
+
+
+def test_SampleIndexContinuityMonitor__check__handles_wraparound_within_and_across_chunks():
+    monitor = SampleIndexContinuityMonitor()
+    assert monitor.check([SAMPLE_IDX_MODULUS - 2, SAMPLE_IDX_MODULUS - 1]) == []
+    assert monitor.check([0, 1]) == []
+    assert monitor.check([2, 3, 4]) == []
+    monitor.reset()
+    assert monitor.check([SAMPLE_IDX_MODULUS - 1, 0, 1]) == []
+    assert monitor.get_num_samples_checked() == 3
+
+
+def test_SampleIndexContinuityMonitor__check__reports_dropped_samples_with_positions():
+    monitor = SampleIndexContinuityMonitor(expected_stride=2)
+    assert monitor.check([0, 2, 8, 10]) == [
+        ContinuityEvent(CONTINUITY_EVENT_DROPPED, 2, 8, 4, 2)
+    ]
+    assert monitor.check([14, 16]) == [
+        ContinuityEvent(CONTINUITY_EVENT_DROPPED, 4, 14, 12, 1)
+    ]
+    assert monitor.get_num_dropped() == 3
+    assert monitor.get_num_gaps() == 2
+
+
+def test_SampleIndexContinuityMonitor__check__reports_dropped_samples_across_wraparound():
+    monitor = SampleIndexContinuityMonitor(expected_stride=2)
+    assert monitor.check([SAMPLE_IDX_MODULUS - 2]) == []
+    assert monitor.check([2]) == [ContinuityEvent(CONTINUITY_EVENT_DROPPED, 1, 2, 0, 1)]
+    assert monitor.get_num_dropped() == 1
+
+
+def test_SampleIndexContinuityMonitor__check__reports_duplicated_samples():
+    monitor = SampleIndexContinuityMonitor()
+    monitor.check([5])
+    assert monitor.check([5, 6, 6, 6, 7]) == [
+        ContinuityEvent(CONTINUITY_EVENT_DUPLICATED, 1, 5, 6, 1),
+        ContinuityEvent(CONTINUITY_EVENT_DUPLICATED, 3, 6, 7, 1),
+        ContinuityEvent(CONTINUITY_EVENT_DUPLICATED, 4, 6, 7, 1),
+    ]
+    assert monitor.get_num_duplicated() == 3
+    assert monitor.get_num_dropped() == 0
+
+
+@pytest.mark.parametrize(
+    "test_indices,expected_event,test_description",
+    [
+        (
+            [10, 11, 3, 4],
+            ContinuityEvent(CONTINUITY_EVENT_DISCONTINUITY, 2, 3, 12, 0),
+            "reports backwards jump",
+        ),
+        (
+            [10, 20, 23],
+            ContinuityEvent(CONTINUITY_EVENT_DISCONTINUITY, 2, 23, 30, 0),
+            "reports step that is not a multiple of the stride",
+        ),
+    ],
+)
+def test_SampleIndexContinuityMonitor__check__reports_discontinuities_and_resumes_from_new_index(
+    test_indices, expected_event, test_description
+):
+    monitor = SampleIndexContinuityMonitor(
+        expected_stride=test_indices[1] - test_indices[0]
+    )
+    assert monitor.check(test_indices) == [expected_event]
+    assert monitor.get_num_discontinuities() == 1
+    assert monitor.get_num_dropped() == 0
+    assert monitor.get_num_duplicated() == 0
+
+
+def test_SampleIndexContinuityMonitor__get_events__keeps_only_most_recent_events():
+    monitor = SampleIndexContinuityMonitor(max_num_events=2)
+    monitor.check([0, 0, 0])
+    monitor.check([2])
+    actual = monitor.get_events()
+    assert [event.position for event in actual] == [2, 3]
+    assert actual[1].kind == CONTINUITY_EVENT_DROPPED
+    assert monitor.get_num_duplicated() == 2
+
+
+def test_SampleIndexContinuityMonitor__reset__clears_counters_and_last_index():
+    monitor = SampleIndexContinuityMonitor()
+    monitor.check([0, 5])
+    monitor.reset()
+    assert monitor.get_events() == []
+    assert monitor.get_num_gaps() == 0
+    assert monitor.check([100, 101]) == []
+
+
+def test_SampleIndexContinuityMonitor__check_fifo_data__checks_sample_indices_of_given_frame():
+    test_sample_indices = np.array(
+        [
+            [0, 1, 3],
+            [0, 1, 2],
+            [0, 0, 0],
+            [0, 0, 0],
+            [0, 0, 0],
+            [0, 0, 0],
+            [0, 0, 0],
+            [0, 0, 0],
+        ]
+    )
+    test_data = build_round_robins(
+        np.zeros((NUM_CHANNELS, 3), dtype=np.uint16), test_sample_indices
+    )
+    assert SampleIndexContinuityMonitor().check_fifo_data(test_data) == [
+        ContinuityEvent(CONTINUITY_EVENT_DROPPED, 2, 3, 2, 1)
+    ]
+    assert SampleIndexContinuityMonitor().check_fifo_data(test_data, frame_idx=1) == []
+    with pytest.raises(ValueError):
+        SampleIndexContinuityMonitor().check_fifo_data(test_data, frame_idx=8)
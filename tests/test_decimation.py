@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from xem_wrapper import build_round_robins
+from xem_wrapper import DECIMATION_MODE_ENVELOPE
+from xem_wrapper import DECIMATION_MODE_MEAN
+from xem_wrapper import DECIMATION_MODE_STRIDE
+from xem_wrapper import DECIMATION_MODES
+from xem_wrapper import demux_round_robins
+from xem_wrapper import NUM_CHANNELS
+from xem_wrapper import OpalKellyIncorrectHeaderError
+from xem_wrapper import StreamingDecimator
+
+
+def _generate_stream(num_samples, num_channels=NUM_CHANNELS):
+    channel_data = (
+        np.arange(num_channels * num_samples).reshape(num_channels, num_samples)
+        * 7
+        % 1000
+    ).astype(np.uint16)
+    sample_indices = np.tile(np.arange(num_samples, dtype=np.uint32), (num_channels, 1))
+    return channel_data, sample_indices
+
+
+def _process_in_chunks(decimator, channel_data, sample_indices, chunk_sizes):
+    outputs = []
+    start = 0
+    for chunk_size in chunk_sizes:
+        end = start + chunk_size
+        outputs.append(
+            decimator.process(channel_data[:, start:end], sample_indices[:, start:end])
+        )
+        start = end
+    return (
+        np.concatenate([values for values, _ in outputs], axis=-1),
+        np.concatenate([indices for _, indices in outputs], axis=-1),
+    )
+
+
+def test_DECIMATION_MODES():
+    assert DECIMATION_MODES == ("stride", "mean", "envelope")
+
+
+@pytest.mark.parametrize(
+    "test_kwargs,test_description",
+    [
+        ({"factor": 0}, "raises error when factor is zero"),
+        ({"factor": 2, "mode": "median"}, "raises error with unknown mode"),
+    ],
+)
+def test_StreamingDecimator__raises_error_with_invalid_configuration(
+    test_kwargs, test_description
+):
+    with pytest.raises(ValueError):
+        StreamingDecimator(**test_kwargs)
+
+
+def test_StreamingDecimator__getters_return_configuration():
+    decimator = StreamingDecimator(5, mode=DECIMATION_MODE_MEAN)
+    assert decimator.get_factor() == 5
+    assert decimator.get_mode() == DECIMATION_MODE_MEAN
+    assert StreamingDecimator(5).get_mode() == DECIMATION_MODE_STRIDE
+
+
+@pytest.mark.parametrize(
+    "test_chunk_sizes,test_description",
+    [
+        ([23], "decimates a single chunk"),
+        ([3, 1, 6, 13], "keeps every nth sample across chunks of uneven sizes"),
+    ],
+)
+def test_StreamingDecimator__process__stride_mode(test_chunk_sizes, test_description):
+    channel_data, sample_indices = _generate_stream(23, num_channels=3)
+    decimator = StreamingDecimator(4)
+    actual_values, actual_indices = _process_in_chunks(
+        decimator, channel_data, sample_indices, test_chunk_sizes
+    )
+    np.testing.assert_array_equal(actual_values, channel_data[:, ::4])
+    np.testing.assert_array_equal(actual_indices, sample_indices[:, ::4])
+    assert decimator.get_num_samples_seen() == 23
+    assert decimator.get_num_pending_samples() == 0
+
+
+def test_StreamingDecimator__process__mean_mode_holds_incomplete_blocks_across_chunks():
+    channel_data, sample_indices = _generate_stream(23, num_channels=3)
+    decimator = StreamingDecimator(4, mode=DECIMATION_MODE_MEAN)
+    actual_values, actual_indices = _process_in_chunks(
+        decimator, channel_data, sample_indices, [3, 1, 6, 13]
+    )
+    expected = channel_data[:, :20].reshape(3, 5, 4).mean(axis=2)
+    np.testing.assert_allclose(actual_values, expected)
+    np.testing.assert_array_equal(actual_indices, sample_indices[:, :20:4])
+    assert decimator.get_num_pending_samples() == 3
+
+
+def test_StreamingDecimator__process__envelope_mode_returns_min_and_max_of_each_block():
+    channel_data = np.array([[5, 1, 9, 2, 7, 3]], dtype=np.uint16)
+    sample_indices = np.arange(6).reshape(1, 6)
+    decimator = StreamingDecimator(3, mode=DECIMATION_MODE_ENVELOPE)
+    actual_values, actual_indices = _process_in_chunks(
+        decimator, channel_data, sample_indices, [2, 4]
+    )
+    np.testing.assert_array_equal(actual_values, [[[1, 2]], [[9, 7]]])
+    assert actual_values.dtype == np.uint16
+    np.testing.assert_array_equal(actual_indices, [[0, 3]])
+    assert decimator.get_num_pending_samples() == 0
+
+
+def test_StreamingDecimator__reset__discards_pending_samples_and_restarts_blocks():
+    channel_data, sample_indices = _generate_stream(5, num_channels=1)
+    decimator = StreamingDecimator(3, mode=DECIMATION_MODE_MEAN)
+    decimator.process(channel_data[:, :2], sample_indices[:, :2])
+    decimator.reset()
+    assert decimator.get_num_pending_samples() == 0
+    assert decimator.get_num_samples_seen() == 0
+    actual_values, _ = decimator.process(channel_data[:, 2:5], sample_indices[:, 2:5])
+    np.testing.assert_allclose(actual_values, [[channel_data[0, 2:5].mean()]])
+
+
+@pytest.mark.parametrize("test_mode", DECIMATION_MODES)
+def test_StreamingDecimator__process_fifo_data__matches_process_on_demuxed_data(
+    test_mode,
+):
+    channel_data, sample_indices = _generate_stream(11)
+    test_data = build_round_robins(channel_data, sample_indices[0])
+    expected = StreamingDecimator(3, mode=test_mode).process(
+        *demux_round_robins(test_data)
+    )
+    decimator = StreamingDecimator(3, mode=test_mode)
+    actual_1 = decimator.process_fifo_data(test_data[: 288 * 4])
+    actual_2 = decimator.process_fifo_data(memoryview(test_data)[288 * 4 :])
+    np.testing.assert_array_equal(
+        np.concatenate((actual_1[0], actual_2[0]), axis=-1), expected[0]
+    )
+    np.testing.assert_array_equal(
+        np.concatenate((actual_1[1], actual_2[1]), axis=-1), expected[1]
+    )
+
+
+def test_StreamingDecimator__process_fifo_data__checks_headers_unless_disabled():
+    test_data = build_round_robins(_generate_stream(1)[0], 0)
+    test_data[0] ^= 0xFF
+    with pytest.raises(OpalKellyIncorrectHeaderError):
+        StreamingDecimator(2).process_fifo_data(test_data)
+    actual_values, _ = StreamingDecimator(2, check_headers=False).process_fifo_data(
+        test_data
+    )
+    assert actual_values.shape == (NUM_CHANNELS, 1)
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from xem_wrapper import build_header_magic_number_bytes
+from xem_wrapper import build_round_robins
+from xem_wrapper import ChannelDemultiplexer
+from xem_wrapper import convert_sample_idx
+from xem_wrapper import convert_word
+from xem_wrapper import DATA_FRAME_DTYPE
+from xem_wrapper import DATA_FRAME_SIZE_WORDS
+from xem_wrapper import DATA_FRAMES_PER_ROUND_ROBIN
+from xem_wrapper import demux_round_robins
+from xem_wrapper import get_round_robin_view
+from xem_wrapper import HEADER_MAGIC_NUMBER
+from xem_wrapper import NUM_CHANNELS
+from xem_wrapper import OpalKellyIncompleteRoundRobinError
+from xem_wrapper import OpalKellyIncorrectHeaderError
+from xem_wrapper import ROUND_ROBIN_SIZE_BYTES
+
+
+def _generate_channel_data(num_samples, offset=0):
+    return (
+        np.arange(NUM_CHANNELS * num_samples, dtype=np.uint32).reshape(
+            NUM_CHANNELS, num_samples
+        )
+        + offset
+    ).astype(np.uint16)
+
+
+def test_DATA_FRAME_DTYPE__matches_size_of_data_frame():
+    assert DATA_FRAME_DTYPE.itemsize == DATA_FRAME_SIZE_WORDS * 4
+    assert (
+        ROUND_ROBIN_SIZE_BYTES
+        == DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN
+    )
+
+
+def test_build_round_robins__matches_byte_level_conversions():
+    test_channel_data = _generate_channel_data(2)
+    test_sample_indices = np.array([100, 200])
+    actual = build_round_robins(test_channel_data, test_sample_indices)
+    assert len(actual) == ROUND_ROBIN_SIZE_BYTES * 2
+
+    header_bytes = build_header_magic_number_bytes(HEADER_MAGIC_NUMBER)
+    frame_size = DATA_FRAME_SIZE_WORDS * 4
+    for sample_num in range(2):
+        for frame_idx in range(DATA_FRAMES_PER_ROUND_ROBIN):
+            frame_start = sample_num * ROUND_ROBIN_SIZE_BYTES + frame_idx * frame_size
+            frame = actual[frame_start : frame_start + frame_size]
+            assert frame[:8] == header_bytes
+            assert convert_sample_idx(frame[8:12]) == test_sample_indices[sample_num]
+            for value_idx in range(12):
+                channel = frame_idx * 12 + value_idx
+                assert (
+                    convert_word(frame[12 + value_idx * 2 : 14 + value_idx * 2])
+                    == test_channel_data[channel, sample_num]
+                )
+
+
+def test_get_round_robin_view__does_not_copy_data():
+    test_data = build_round_robins(_generate_channel_data(3), [0, 1, 2])
+    actual = get_round_robin_view(test_data)
+    assert actual.shape == (3, DATA_FRAMES_PER_ROUND_ROBIN)
+    assert np.shares_memory(actual, np.frombuffer(test_data, dtype=np.uint8))
+
+
+def test_get_round_robin_view__raises_error_with_partial_round_robin():
+    test_data = build_round_robins(_generate_channel_data(1), [0])
+    with pytest.raises(OpalKellyIncompleteRoundRobinError):
+        get_round_robin_view(test_data[:-4])
+
+
+def test_get_round_robin_view__raises_error_with_incorrect_header():
+    test_data = build_round_robins(_generate_channel_data(2), [0, 1])
+    test_data[ROUND_ROBIN_SIZE_BYTES + DATA_FRAME_SIZE_WORDS * 4] ^= 0xFF
+    with pytest.raises(
+        OpalKellyIncorrectHeaderError, match=f"frame {DATA_FRAMES_PER_ROUND_ROBIN + 1}"
+    ):
+        get_round_robin_view(test_data)
+    assert get_round_robin_view(test_data, check_headers=False).shape == (
+        2,
+        DATA_FRAMES_PER_ROUND_ROBIN,
+    )
+
+
+def test_demux_round_robins__returns_contiguous_array_for_each_channel():
+    test_channel_data = _generate_channel_data(5)
+    test_frame_sample_indices = np.arange(40, dtype=np.uint32).reshape(
+        DATA_FRAMES_PER_ROUND_ROBIN, 5
+    )
+    test_data = build_round_robins(test_channel_data, test_frame_sample_indices)
+
+    actual_data, actual_sample_indices = demux_round_robins(memoryview(test_data))
+
+    np.testing.assert_array_equal(actual_data, test_channel_data)
+    assert actual_data.dtype == np.uint16
+    assert actual_data.flags["C_CONTIGUOUS"] is True
+    assert actual_sample_indices.shape == (NUM_CHANNELS, 5)
+    np.testing.assert_array_equal(
+        actual_sample_indices[0], test_frame_sample_indices[0]
+    )
+    np.testing.assert_array_equal(
+        actual_sample_indices[11], test_frame_sample_indices[0]
+    )
+    np.testing.assert_array_equal(
+        actual_sample_indices[12], test_frame_sample_indices[1]
+    )
+    np.testing.assert_array_equal(
+        actual_sample_indices[95], test_frame_sample_indices[7]
+    )
+
+
+def test_demux_round_robins__returns_empty_arrays_for_empty_read():
+    actual_data, actual_sample_indices = demux_round_robins(bytearray(0))
+    assert actual_data.shape == (NUM_CHANNELS, 0)
+    assert actual_sample_indices.shape == (NUM_CHANNELS, 0)
+
+
+def test_ChannelDemultiplexer__raises_error_with_invalid_initial_capacity():
+    with pytest.raises(ValueError):
+        ChannelDemultiplexer(initial_capacity=0)
+
+
+def test_ChannelDemultiplexer__uses_default_initial_capacity():
+    demux = ChannelDemultiplexer()
+    assert demux.get_capacity() == ChannelDemultiplexer.default_initial_capacity == 1024
+    assert demux.get_num_samples() == 0
+
+
+def test_ChannelDemultiplexer__append__accumulates_successive_reads_and_grows_storage():
+    test_channel_data = _generate_channel_data(7)
+    demux = ChannelDemultiplexer(initial_capacity=2)
+
+    assert demux.append(build_round_robins(test_channel_data[:, :2], [0, 1])) == 2
+    assert demux.get_capacity() == 2
+    assert (
+        demux.append(build_round_robins(test_channel_data[:, 2:7], np.arange(2, 7)))
+        == 5
+    )
+    assert demux.get_capacity() == 8
+    assert demux.get_num_samples() == 7
+
+    np.testing.assert_array_equal(demux.get_all_channel_data(), test_channel_data)
+    for channel in (0, 13, 95):
+        actual = demux.get_channel_data(channel)
+        assert actual.flags["C_CONTIGUOUS"] is True
+        np.testing.assert_array_equal(actual, test_channel_data[channel])
+        np.testing.assert_array_equal(demux.get_sample_indices(channel), np.arange(7))
+
+
+def test_ChannelDemultiplexer__append__raises_error_with_incorrect_header_unless_disabled():
+    test_data = build_round_robins(_generate_channel_data(1), [0])
+    test_data[0] ^= 0xFF
+    with pytest.raises(OpalKellyIncorrectHeaderError):
+        ChannelDemultiplexer().append(test_data)
+    assert ChannelDemultiplexer(check_headers=False).append(test_data) == 1
+
+
+def test_ChannelDemultiplexer__drain__returns_copies_and_clears_samples():
+    test_channel_data = _generate_channel_data(3)
+    demux = ChannelDemultiplexer(initial_capacity=4)
+    demux.append(build_round_robins(test_channel_data, [5, 6, 7]))
+
+    actual_data, actual_sample_indices = demux.drain()
+    assert demux.get_num_samples() == 0
+    assert demux.get_capacity() == 4
+    np.testing.assert_array_equal(actual_data, test_channel_data)
+    np.testing.assert_array_equal(
+        actual_sample_indices, np.tile([5, 6, 7], (NUM_CHANNELS, 1))
+    )
+
+    demux.append(build_round_robins(_generate_channel_data(1, offset=1000), [8]))
+    assert actual_data[0, 0] == test_channel_data[0, 0]
+
+
+def test_ChannelDemultiplexer__clear__discards_samples():
+    demux = ChannelDemultiplexer()
+    demux.append(build_round_robins(_generate_channel_data(3), [0, 1, 2]))
+    demux.clear()
+    assert demux.get_num_samples() == 0
+    assert demux.get_channel_data(0).shape == (0,)
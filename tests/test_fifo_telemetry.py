@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import pytest
+from xem_wrapper import DATA_FRAME_SIZE_WORDS
+from xem_wrapper import fifo_telemetry
+from xem_wrapper import FifoTelemetry
+
+
+def test_FifoTelemetry__uses_defaults():
+    telemetry = FifoTelemetry()
+    assert telemetry.get_capacity_num_words() == (
+        FifoTelemetry.default_capacity_num_words
+    )
+    assert telemetry.get_window_seconds() == FifoTelemetry.default_window_seconds
+    snapshot = telemetry.snapshot()
+    assert snapshot.near_capacity_num_words == int(
+        FifoTelemetry.default_capacity_num_words
+        * FifoTelemetry.default_near_capacity_fraction
+    )
+    assert snapshot.last_num_words_fifo is None
+    assert snapshot.bytes_per_second == 0
+    assert snapshot.num_reads == 0
+
+
+@pytest.mark.parametrize(
+    "test_kwargs,test_description",
+    [
+        ({"capacity_num_words": 0}, "raises error for empty FIFO"),
+        ({"near_capacity_fraction": 0}, "raises error for zero fraction"),
+        ({"near_capacity_fraction": 1.5}, "raises error for fraction above 1"),
+        ({"window_seconds": 0}, "raises error for empty window"),
+    ],
+)
+def test_FifoTelemetry__raises_error_for_invalid_settings(
+    test_kwargs, test_description
+):
+    with pytest.raises(ValueError):
+        FifoTelemetry(**test_kwargs)
+
+
+def test_FifoTelemetry_record_read__counts_bytes_frames_and_empty_reads():
+    frame_size_bytes = DATA_FRAME_SIZE_WORDS * 4
+    telemetry = FifoTelemetry(window_seconds=2.0)
+    telemetry.record_read(frame_size_bytes * 10, timestamp=1.0)
+    telemetry.record_read(0, timestamp=1.5)
+    telemetry.record_read(frame_size_bytes * 30 + 4, timestamp=2.0)
+
+    snapshot = telemetry.snapshot(timestamp=2.5)
+    assert snapshot.num_reads == 3
+    assert snapshot.num_empty_reads == 1
+    assert snapshot.num_bytes_read == frame_size_bytes * 40 + 4
+    assert snapshot.num_frames_read == 40
+    assert snapshot.bytes_per_second == (frame_size_bytes * 40 + 4) / 2.0
+    assert snapshot.frames_per_second == snapshot.bytes_per_second / frame_size_bytes
+
+
+def test_FifoTelemetry_snapshot__only_counts_reads_within_the_rolling_window():
+    telemetry = FifoTelemetry(window_seconds=1.0)
+    telemetry.record_read(100, timestamp=10.0)
+    telemetry.record_read(200, timestamp=10.6)
+    assert telemetry.snapshot(timestamp=10.8).bytes_per_second == 300
+    assert telemetry.snapshot(timestamp=11.2).bytes_per_second == 200
+    telemetry.record_read(50, timestamp=11.7)
+    snapshot = telemetry.snapshot(timestamp=11.7)
+    assert snapshot.bytes_per_second == 50
+    assert snapshot.num_bytes_read == 350
+
+
+def test_FifoTelemetry_record_num_words_fifo__tracks_peak_and_time_near_capacity():
+    telemetry = FifoTelemetry(capacity_num_words=1000, near_capacity_fraction=0.8)
+    telemetry.record_num_words_fifo(500, timestamp=1.0)
+    telemetry.record_num_words_fifo(850, timestamp=2.0)
+    telemetry.record_num_words_fifo(900, timestamp=2.5)
+    telemetry.record_num_words_fifo(100, timestamp=3.25)
+    telemetry.record_num_words_fifo(800, timestamp=4.0)
+
+    snapshot = telemetry.snapshot()
+    assert snapshot.num_fill_samples == 5
+    assert snapshot.last_num_words_fifo == 800
+    assert snapshot.peak_num_words_fifo == 900
+    assert snapshot.get_peak_fill_fraction() == 0.9
+    assert snapshot.near_capacity_num_words == 800
+    assert snapshot.seconds_near_capacity == 1.25
+
+    # the time until the next sample counts since the last sample is at the near capacity level
+    telemetry.record_num_words_fifo(0, timestamp=4.5)
+    assert telemetry.snapshot().seconds_near_capacity == 1.75
+
+
+def test_FifoTelemetry__uses_current_time_by_default(mocker):
+    mocker.patch.object(
+        fifo_telemetry.time,
+        "perf_counter",
+        autospec=True,
+        side_effect=[1.0, 2.0, 3.0, 5.0],
+    )
+    telemetry = FifoTelemetry(capacity_num_words=10, window_seconds=1.0)
+    telemetry.record_num_words_fifo(10)
+    telemetry.record_num_words_fifo(0)
+    telemetry.record_read(40)
+    snapshot = telemetry.snapshot()
+    assert snapshot.seconds_near_capacity == 1.0
+    assert snapshot.bytes_per_second == 0
+    assert snapshot.num_bytes_read == 40
+
+
+def test_FifoTelemetry_reset__clears_all_counters():
+    telemetry = FifoTelemetry()
+    telemetry.record_read(100)
+    telemetry.record_read(0)
+    telemetry.record_num_words_fifo(FifoTelemetry.default_capacity_num_words)
+    telemetry.record_num_words_fifo(0)
+    telemetry.reset()
+    assert telemetry.snapshot() == FifoTelemetry().snapshot()
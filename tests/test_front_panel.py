@@ -1,27 +1,58 @@
 # -*- coding: utf-8 -*-
+import json
 import multiprocessing
 import os
+import threading
 
 import pytest
 from stdlib_utils import is_queue_eventually_empty
 from stdlib_utils import is_queue_eventually_not_empty
 from stdlib_utils import SimpleMultiprocessingQueue
+from xem_wrapper import BLOCK_SIZE
+from xem_wrapper import build_start_acquisition_sequence
+from xem_wrapper import clear_calibrated_block_sizes
+from xem_wrapper import ControlSequence
 from xem_wrapper import DATA_FRAME_SIZE_WORDS
 from xem_wrapper import DATA_FRAMES_PER_ROUND_ROBIN
+from xem_wrapper import EndpointLockingXem
+from xem_wrapper import FifoRead
+from xem_wrapper import FifoTelemetry
 from xem_wrapper import FPSimulatorInvalidFIFOValueError
 from xem_wrapper import front_panel
 from xem_wrapper import FrontPanel
 from xem_wrapper import FrontPanelBase
 from xem_wrapper import FrontPanelSimulator
+from xem_wrapper import get_calibrated_block_size
+from xem_wrapper import get_read_alignment_num_bytes
+from xem_wrapper import LOCK_GROUP_TRIGGERS
+from xem_wrapper import main
+from xem_wrapper import MAX_BLOCK_SIZE
 from xem_wrapper import okCFrontPanel
+from xem_wrapper import okCScriptEngine
+from xem_wrapper import okCScriptValue
+from xem_wrapper import OkHardwareDeviceNotOpenError
+from xem_wrapper import OkHardwareTimeoutError
+from xem_wrapper import OpalKellyAcquisitionNotArmedError
 from xem_wrapper import OpalKellyBoardAlreadyInitializedError
 from xem_wrapper import OpalKellyBoardNotInitializedError
 from xem_wrapper import OpalKellyFileNotFoundError
 from xem_wrapper import OpalKellyIDGreaterThan32BytesError
+from xem_wrapper import OpalKellyInvalidBlockSizeError
+from xem_wrapper import OpalKellyMaxReadSizeTooSmallError
+from xem_wrapper import OpalKellyPipeInDataNotBlockAlignedError
+from xem_wrapper import OpalKellyScriptError
+from xem_wrapper import OpalKellySequenceNotRegisteredError
 from xem_wrapper import OpalKellySpiAlreadyStartedError
 from xem_wrapper import OpalKellySpiAlreadyStoppedError
+from xem_wrapper import OTHER_ERROR_NAME
+from xem_wrapper import PIPE_IN_FIFO
 from xem_wrapper import PIPE_OUT_FIFO
+from xem_wrapper import StatusPoller
+from xem_wrapper import TRIGGER_IN_SPI
 from xem_wrapper import validate_simulated_fifo_reads
+from xem_wrapper import WIRE_OUT_IS_SPI_RUNNING
+from xem_wrapper import WIRE_OUT_NUM_WORDS_FIFO
+from xem_wrapper import WIRE_OUT_NUM_WORDS_FREE_PIPE_IN
 
 from .fixtures import fixture_initialized_front_panel_with_dummy_xem
 from .fixtures import fixture_test_bit_file_paths
@@ -90,6 +121,10 @@ def test_FrontPanelBase__has_hard_stop_method_with_same_signature_as_stdlib_util
     fp.hard_stop(timeout=5.5)
 
 
+def test_FrontPanelBase__is_not_thread_safe():
+    assert FrontPanelBase().is_thread_safe() is False
+
+
 def test_FrontPanelBase__initialize_board__sets_internal_board_state():
     fp = FrontPanelBase()
     assert fp.is_board_initialized() is False
@@ -151,6 +186,124 @@ def test_FrontPanelBase__read_wire_out__does_not_raise_error_if_board_initialize
     )  # the base function just always returns 0. Subclass implementations can return meaningful values
 
 
+def test_FrontPanelBase__read_wire_out__raises_error_if_board_not_initialized_when_called_through_the_class():
+    fp = FrontPanel(okCFrontPanel())
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        FrontPanelBase.read_wire_out(fp, 0x20)
+
+
+def test_FrontPanel__read_wire_out__raises_error_if_board_not_initialized_when_called_through_the_class(
+    mocker,
+):
+    mocked_read = mocker.patch.object(front_panel, "read_wire_out", autospec=True)
+    fp = FrontPanel(okCFrontPanel())
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        FrontPanel.read_wire_out(fp, 0x20)
+    mocked_read.assert_not_called()
+
+
+def test_FrontPanelBase__read_wire_out__is_checked_when_a_subclass_calls_it_through_super():
+    class _Subclass(FrontPanelBase):
+        def read_wire_out(self, ep_addr: int) -> int:
+            return super().read_wire_out(ep_addr) + 1
+
+    fp = _Subclass()
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.read_wire_out(0x20)
+    fp.initialize_board()
+    assert fp.read_wire_out(0x20) == 1
+
+
+def test_FrontPanelBase__initialize_board__switches_to_subclass_without_initialization_checks(
+    mocker,
+):
+    mocker.patch.object(front_panel, "initialize_board", autospec=True)
+    mocked_read = mocker.patch.object(
+        front_panel, "read_wire_out", autospec=True, return_value=5
+    )
+    fp = FrontPanel(okCFrontPanel())
+    fp.initialize_board()
+    initialized_class = type(fp)
+    assert initialized_class is not FrontPanel
+    assert isinstance(fp, FrontPanel)
+    assert initialized_class.__name__ == "FrontPanel"
+    assert initialized_class.read_wire_out is FrontPanel.read_wire_out.__wrapped__
+    # methods that are not checked are inherited as they are
+    assert "get_xem" not in vars(initialized_class)
+    assert fp.read_wire_out(0x20) == 5
+    assert FrontPanel.read_wire_out(fp, 0x20) == 5
+    assert mocked_read.call_count == 2
+
+    fp.initialize_board(allow_board_reinitialization=True)
+    assert type(fp) is initialized_class
+    other_fp = FrontPanel(okCFrontPanel())
+    other_fp.initialize_board()
+    assert type(other_fp) is initialized_class
+
+
+@pytest.mark.parametrize(
+    "test_method_name,test_args,expected_value,test_description",
+    [
+        ("read_wire_outs", ([0x20, 0x21],), {0x20: 0, 0x21: 0}, "reads wire-outs"),
+        (
+            "read_from_fifo_with_status",
+            (),
+            (bytearray(0), FifoRead(0, 0, 0)),
+            "reads from FIFO with status",
+        ),
+        ("write_to_pipe_in", (bytearray(16),), 0, "writes to pipe-in"),
+        ("get_num_words_free_pipe_in", (), 0, "gets free pipe-in space"),
+        ("activate_trigger_in", (0x40, 0), None, "activates trigger-in"),
+        ("update_trigger_outs", (), None, "updates trigger-outs"),
+        ("is_triggered", (0x60, 0x01), False, "checks trigger-out"),
+        ("read_register", (0x10,), 0, "reads register"),
+        ("write_register", (0x10, 1), None, "writes register"),
+        ("read_registers", ([0x10, 0x11],), [0, 0], "reads registers"),
+        ("write_registers", ({0x10: 1},), None, "writes registers"),
+    ],
+)
+def test_FrontPanelBase__methods_return_defaults_if_board_initialized(
+    test_method_name, test_args, expected_value, test_description
+):
+    fp = FrontPanelBase()
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        getattr(fp, test_method_name)(*test_args)
+    fp.initialize_board()
+    assert getattr(fp, test_method_name)(*test_args) == expected_value
+
+
+def test_FrontPanelBase__disable_latency_instrumentation__leaves_other_instance_attributes_in_place(
+    mocker,
+):
+    fp = FrontPanelBase()
+    fp.enable_latency_instrumentation()
+    mocked_read = mocker.patch.object(fp, "read_wire_out", autospec=True)
+    fp.disable_latency_instrumentation()
+    assert fp.read_wire_out is mocked_read
+
+
+def test_FrontPanel__calibrate_block_size__is_checked_even_though_only_the_subclass_marks_it():
+    fp = FrontPanel(okCFrontPanel())
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.calibrate_block_size()
+
+
+def test_FrontPanel__latency_instrumentation__keeps_recording_after_board_is_initialized(
+    mocker,
+):
+    mocker.patch.object(front_panel, "initialize_board", autospec=True)
+    mocker.patch.object(front_panel, "write_register", autospec=True)
+    fp = FrontPanel(okCFrontPanel())
+    fp.enable_latency_instrumentation()
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.write_register(0x10, 1)
+    fp.initialize_board()
+    fp.write_register(0x10, 1)
+    statistics = fp.get_latency_snapshot()["write_register"]
+    assert statistics.num_calls == 2
+    assert statistics.num_errors == {OTHER_ERROR_NAME: 1}
+
+
 def test_FrontPanelBase__set_device_id__raises_error_if_id_is_too_many_bytes(mocker):
     fp = FrontPanelBase()
     new_id = "123456789012345678901234567890123"
@@ -172,6 +325,16 @@ def test_FrontPanelBase__read_from_fifo__does_not_raise_error_if_board_initializ
     )  # the base function just always returns an empty bytearray. Subclass implementations can return meaningful values
 
 
+def test_FrontPanelBase__read_from_fifo__raises_error_if_max_bytes_is_too_small():
+    fp = FrontPanelBase()
+    fp.initialize_board()
+    with pytest.raises(OpalKellyMaxReadSizeTooSmallError):
+        fp.read_from_fifo(max_bytes=DATA_FRAME_SIZE_WORDS * 4)
+    assert fp.read_from_fifo(
+        max_bytes=DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN
+    ) == bytearray(0)
+
+
 def test_FrontPanelBase__get_num_words_fifo__raises_error_if_board_not_initialized():
     fp = FrontPanelBase()
     with pytest.raises(OpalKellyBoardNotInitializedError):
@@ -314,6 +477,46 @@ def test_FrontPanel__read_wire_out__reads_from_xem(
     mocked_read.assert_called_once_with(dummy_xem, 3)
 
 
+def test_FrontPanel__read_wire_outs__raises_error_if_board_not_initialized():
+    fp = FrontPanel(okCFrontPanel())
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.read_wire_outs([1, 2])
+
+
+def test_FrontPanel__read_wire_outs__reads_from_xem_and_records_fifo_fill_level(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    expected = {WIRE_OUT_IS_SPI_RUNNING: 1, WIRE_OUT_NUM_WORDS_FIFO: 72}
+    mocked_read = mocker.patch.object(
+        front_panel, "read_wire_outs", autospec=True, return_value=expected
+    )
+    assert fp.read_wire_outs(list(expected)) == expected
+    mocked_read.assert_called_once_with(fp.get_xem(), list(expected))
+    assert fp.get_fifo_telemetry_snapshot().last_num_words_fifo == 72
+
+    mocked_read.return_value = {WIRE_OUT_IS_SPI_RUNNING: 0}
+    fp.read_wire_outs([WIRE_OUT_IS_SPI_RUNNING])
+    assert fp.get_fifo_telemetry_snapshot().num_fill_samples == 1
+
+
+def test_FrontPanelBase__get_status_poller__returns_one_poller_that_reads_through_the_front_panel(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    status_poller = fp.get_status_poller()
+    assert isinstance(status_poller, StatusPoller)
+    assert fp.get_status_poller() is status_poller
+    mocked_read = mocker.patch.object(
+        fp,
+        "read_wire_outs",
+        autospec=True,
+        return_value={ep_addr: 1 for ep_addr in StatusPoller.default_status_ep_addrs},
+    )
+    assert status_poller.is_spi_running() is True
+    mocked_read.assert_called_once_with(StatusPoller.default_status_ep_addrs)
+
+
 def test_FrontPanel__set_device_id__raises_error_if_id_is_too_many_bytes(
     mocker, initialized_front_panel_with_dummy_xem
 ):
@@ -348,6 +551,20 @@ def test_FrontPanel__get_device_id__reads_id_from_xem(
     mocked_get.assert_called_once_with(dummy_xem)
 
 
+def test_FrontPanelBase__read_from_fifo_into__raises_error_if_board_not_initialized():
+    fp = FrontPanelBase()
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.read_from_fifo_into(bytearray(DATA_FRAME_SIZE_WORDS * 4 * 8))
+
+
+def test_FrontPanelBase__read_from_fifo_into__returns_0_if_board_initialized():
+    fp = FrontPanelBase()
+    fp.initialize_board()
+    assert fp.read_from_fifo_into(bytearray(DATA_FRAME_SIZE_WORDS * 4 * 8)) == 0
+    with pytest.raises(OpalKellyMaxReadSizeTooSmallError):
+        fp.read_from_fifo_into(bytearray(DATA_FRAME_SIZE_WORDS * 4))
+
+
 def test_FrontPanel__read_from_fifo__raises_error_if_board_not_initialized():
     dummy_xem = okCFrontPanel()
     fp = FrontPanel(dummy_xem)
@@ -362,11 +579,129 @@ def test_FrontPanel__read_from_fifo__reads_from_xem(
     dummy_xem = fp.get_xem()
     expected = bytearray(DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN)
     mocked_read = mocker.patch.object(
-        front_panel, "read_from_fifo", autospec=True, return_value=expected
+        front_panel,
+        "read_from_fifo_with_status",
+        autospec=True,
+        return_value=(expected, FifoRead(144, 288, 288)),
     )
     actual = fp.read_from_fifo()
     assert actual == expected
-    mocked_read.assert_called_once_with(dummy_xem)
+    mocked_read.assert_called_once_with(
+        dummy_xem, block_size=BLOCK_SIZE, max_bytes=None
+    )
+
+
+def test_FrontPanel__read_from_fifo__reads_from_xem_with_configured_block_size(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    dummy_xem = fp.get_xem()
+    mocked_read = mocker.patch.object(
+        front_panel,
+        "read_from_fifo_with_status",
+        autospec=True,
+        return_value=(bytearray(0), FifoRead(0, 0, 0)),
+    )
+    fp.set_block_size(1024)
+    fp.read_from_fifo()
+    mocked_read.assert_called_once_with(dummy_xem, block_size=1024, max_bytes=None)
+
+
+def test_FrontPanel__read_from_fifo__passes_max_bytes_to_read(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    dummy_xem = fp.get_xem()
+    mocked_read = mocker.patch.object(
+        front_panel,
+        "read_from_fifo_with_status",
+        autospec=True,
+        return_value=(bytearray(0), FifoRead(0, 0, 0)),
+    )
+    fp.read_from_fifo(max_bytes=9216)
+    mocked_read.assert_called_once_with(
+        dummy_xem, block_size=BLOCK_SIZE, max_bytes=9216
+    )
+
+
+def test_FrontPanel__read_from_fifo__counts_short_transfers(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    full_read = bytearray(DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN * 2)
+    short_read = bytearray(DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN)
+    mocker.patch.object(
+        front_panel,
+        "read_from_fifo_with_status",
+        autospec=True,
+        side_effect=[
+            (full_read, FifoRead(144, 576, 576)),
+            (short_read, FifoRead(144, 576, 300)),
+            (short_read, FifoRead(144, 576, 288)),
+        ],
+    )
+    assert fp.get_num_short_transfers() == 0
+    assert fp.read_from_fifo() is full_read
+    assert fp.get_num_short_transfers() == 0
+    assert fp.read_from_fifo() is short_read
+    fp.read_from_fifo()
+    assert fp.get_num_short_transfers() == 2
+
+
+def test_FrontPanel__read_from_fifo_with_status__returns_status_and_counts_short_transfers(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    dummy_xem = fp.get_xem()
+    short_read = bytearray(DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN)
+    expected_status = FifoRead(144, 576, 300)
+    mocked_read = mocker.patch.object(
+        front_panel,
+        "read_from_fifo_with_status",
+        autospec=True,
+        return_value=(short_read, expected_status),
+    )
+    actual_data, actual_status = fp.read_from_fifo_with_status(max_bytes=9216)
+    assert actual_data is short_read
+    assert actual_status == expected_status
+    assert fp.get_num_short_transfers() == 1
+    mocked_read.assert_called_once_with(
+        dummy_xem, block_size=BLOCK_SIZE, max_bytes=9216
+    )
+
+
+def test_FrontPanel__read_from_fifo_into__reads_from_xem_with_configured_block_size(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    dummy_xem = fp.get_xem()
+    mocked_read = mocker.patch.object(
+        front_panel,
+        "read_from_fifo_into_with_status",
+        autospec=True,
+        return_value=FifoRead(72, 288, 288),
+    )
+    test_buffer = bytearray(DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN)
+    fp.set_block_size(1024)
+    assert fp.read_from_fifo_into(test_buffer) == 288
+    mocked_read.assert_called_once_with(dummy_xem, test_buffer, block_size=1024)
+
+
+def test_FrontPanel__read_from_fifo_into__counts_short_transfers_and_returns_only_whole_round_robins(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocker.patch.object(
+        front_panel,
+        "read_from_fifo_into_with_status",
+        autospec=True,
+        side_effect=[FifoRead(144, 576, 576), FifoRead(144, 576, 300)],
+    )
+    test_buffer = bytearray(576)
+    assert fp.read_from_fifo_into(test_buffer) == 576
+    assert fp.get_num_short_transfers() == 0
+    assert fp.read_from_fifo_into(test_buffer) == 288
+    assert fp.get_num_short_transfers() == 1
 
 
 def test_FrontPanel__get_num_words_fifo__raises_error_if_board_not_initialized():
@@ -390,6 +725,88 @@ def test_FrontPanel__get_num_words_fifo__gets_num_from_xem(
     mocked_get.assert_called_once_with(dummy_xem)
 
 
+def test_FrontPanel__fifo_telemetry__records_reads_and_fill_levels(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    round_robin = bytearray(DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN)
+    mocker.patch.object(
+        front_panel,
+        "read_from_fifo_with_status",
+        autospec=True,
+        side_effect=[
+            (round_robin, FifoRead(72, 288, 288)),
+            (bytearray(0), FifoRead(0, 0, 0)),
+        ],
+    )
+    mocker.patch.object(
+        front_panel,
+        "read_from_fifo_into_with_status",
+        autospec=True,
+        side_effect=[FifoRead(72, 288, 288), FifoRead(0, 0, 0)],
+    )
+    mocker.patch.object(
+        front_panel, "get_num_words_fifo", autospec=True, side_effect=[72, 144]
+    )
+    fp.get_num_words_fifo()
+    fp.read_from_fifo()
+    fp.read_from_fifo()
+    fp.get_num_words_fifo()
+    test_buffer = bytearray(len(round_robin))
+    fp.read_from_fifo_into(test_buffer)
+    fp.read_from_fifo_into(test_buffer)
+
+    snapshot = fp.get_fifo_telemetry_snapshot()
+    assert snapshot.num_reads == 4
+    assert snapshot.num_empty_reads == 2
+    assert snapshot.num_bytes_read == 576
+    assert snapshot.num_frames_read == 2 * DATA_FRAMES_PER_ROUND_ROBIN
+    assert snapshot.bytes_per_second > 0
+    # every read samples the FIFO level too
+    assert snapshot.num_fill_samples == 6
+    assert snapshot.last_num_words_fifo == 0
+    assert snapshot.peak_num_words_fifo == 144
+
+
+def test_FrontPanel__fifo_telemetry__records_fifo_level_read_to_size_each_transfer(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=150)
+    mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocker.patch.object(
+        fp.get_xem(),
+        "ReadFromBlockPipeOut",
+        autospec=True,
+        side_effect=lambda ep_addr, block_size, data_buffer: len(data_buffer),
+    )
+    fp.read_from_fifo()
+    snapshot = fp.get_fifo_telemetry_snapshot()
+    assert snapshot.num_fill_samples == 1
+    assert snapshot.last_num_words_fifo == 150
+    assert snapshot.peak_num_words_fifo == 150
+
+    fp.read_from_fifo_into(bytearray(288))
+    assert fp.get_fifo_telemetry_snapshot().num_fill_samples == 2
+
+
+def test_FrontPanel__set_fifo_telemetry__replaces_telemetry(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    telemetry = FifoTelemetry(capacity_num_words=100, near_capacity_fraction=0.5)
+    assert fp.get_fifo_telemetry() is not telemetry
+    fp.set_fifo_telemetry(telemetry)
+    assert fp.get_fifo_telemetry() is telemetry
+    mocker.patch.object(
+        front_panel, "get_num_words_fifo", autospec=True, return_value=60
+    )
+    fp.get_num_words_fifo()
+    snapshot = fp.get_fifo_telemetry_snapshot()
+    assert snapshot.capacity_num_words == 100
+    assert snapshot.get_peak_fill_fraction() == 0.6
+
+
 def test_FrontPanel__is_spi_running__raises_error_if_board_not_initialized():
     dummy_xem = okCFrontPanel()
     fp = FrontPanel(dummy_xem)
@@ -440,6 +857,62 @@ def test_FrontPanel__start_acquisition__starts_running_spi_on_xem(
     mocked_start.assert_called_once_with(dummy_xem)
 
 
+def test_FrontPanel__arm_acquisition__raises_error_if_spi_already_started(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocker.patch.object(front_panel, "is_spi_running", autospec=True, return_value=True)
+    with pytest.raises(OpalKellySpiAlreadyStartedError):
+        fp.arm_acquisition()
+
+
+def test_FrontPanel__arm_acquisition__stages_settings_without_starting_spi(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    dummy_xem = fp.get_xem()
+    mocker.patch.object(
+        front_panel, "is_spi_running", autospec=True, return_value=False
+    )
+    mocked_run_mode = mocker.patch.object(front_panel, "set_run_mode", autospec=True)
+    mocked_num_samples = mocker.patch.object(
+        front_panel, "set_num_samples", autospec=True
+    )
+    mocked_start = mocker.patch.object(front_panel, "start_acquisition", autospec=True)
+
+    fp.arm_acquisition()
+    mocked_run_mode.assert_not_called()
+    mocked_num_samples.assert_not_called()
+
+    fp.arm_acquisition(num_samples=1000, continuous=False)
+    mocked_run_mode.assert_called_once_with(dummy_xem, False)
+    mocked_num_samples.assert_called_once_with(dummy_xem, 1000)
+    mocked_start.assert_not_called()
+
+
+def test_FrontPanel__fire_acquisition_trigger__starts_running_spi_on_xem_once_armed(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    dummy_xem = fp.get_xem()
+    mocked_is_running = mocker.patch.object(
+        front_panel, "is_spi_running", autospec=True, return_value=False
+    )
+    mocked_start = mocker.patch.object(front_panel, "start_acquisition", autospec=True)
+    with pytest.raises(OpalKellyAcquisitionNotArmedError):
+        fp.fire_acquisition_trigger()
+
+    fp.arm_acquisition()
+    mocked_is_running.reset_mock()
+    fp.fire_acquisition_trigger()
+    mocked_start.assert_called_once_with(dummy_xem)
+    # the readiness check was made while arming
+    mocked_is_running.assert_not_called()
+    assert fp.get_internal_spi_running_status() is True
+    with pytest.raises(OpalKellyAcquisitionNotArmedError):
+        fp.fire_acquisition_trigger()
+
+
 def test_FrontPanel__stop_acquisition__raises_error_if_board_not_initialized():
     dummy_xem = okCFrontPanel()
     fp = FrontPanel(dummy_xem)
@@ -517,78 +990,913 @@ def test_FrontPanel__activate_trigger_in__activates_trig_on_xem(
     mocked_set.assert_called_once_with(dummy_xem, 0x01, 0x01)
 
 
-# FrontPanelSimulator tests
-def test_FrontPanelSimulator__init__raises_error_if_fifo_populated_with_invalid_data_read():
-    fifo = SimpleMultiprocessingQueue()
-    fifo.put(bytearray(1))
-    queues = {"pipe_outs": {PIPE_OUT_FIFO: fifo}}
-    with pytest.raises(FPSimulatorInvalidFIFOValueError):
-        FrontPanelSimulator(queues)
+def test_FrontPanel__update_trigger_outs__raises_error_if_board_not_initialized():
+    fp = FrontPanel(okCFrontPanel())
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.update_trigger_outs()
 
 
-def test_FrontPanelSimulator__init__raises_fifo_error_with_correct_message():
-    fifo = SimpleMultiprocessingQueue()
-    test_reads = [
-        bytearray(0),
-        bytearray(DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN),
-        bytearray(1),
-    ]
-    for data_read in test_reads:
-        fifo.put(data_read)
-    queues = {"pipe_outs": {PIPE_OUT_FIFO: fifo}}
-    with pytest.raises(
-        FPSimulatorInvalidFIFOValueError, match="Invalid value at index 2"
-    ):
-        FrontPanelSimulator(queues)
+def test_FrontPanel__update_trigger_outs__updates_trigger_outs_on_xem(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    dummy_xem = fp.get_xem()
+    mocked_update = mocker.patch.object(
+        front_panel, "update_trigger_outs", autospec=True
+    )
+    fp.update_trigger_outs()
+    mocked_update.assert_called_once_with(dummy_xem)
 
 
-def test_FrontPanelSimulator__read_wire_out__raises_error_if_board_not_initialized():
-    fp = FrontPanelSimulator({})
+def test_FrontPanel__is_triggered__raises_error_if_board_not_initialized():
+    fp = FrontPanel(okCFrontPanel())
     with pytest.raises(OpalKellyBoardNotInitializedError):
-        fp.read_wire_out(1)
-
-
-def test_FrontPanelSimulator__read_wire_out__reads_two_values_from_queue():
-    a_queue = SimpleMultiprocessingQueue()
-    expected_1 = 55
-    expected_2 = 22
-    a_queue.put(expected_1)
-    a_queue.put(expected_2)
-    queues = {"wire_outs": {5: a_queue}}
-    fp = FrontPanelSimulator(queues)
-    fp.initialize_board()
-    actual_1 = fp.read_wire_out(5)
-    actual_2 = fp.read_wire_out(5)
-    assert actual_1 == expected_1
-    assert actual_2 == expected_2
+        fp.is_triggered(0x60, 0x01)
 
 
-def test_FrontPanelSimulator__read_wire_out__reads_values_from_correct_address():
-    queue_1 = SimpleMultiprocessingQueue()
-    queue_2 = SimpleMultiprocessingQueue()
-    expected_1 = 33
-    expected_2 = 35
-    queue_1.put(expected_1)
-    queue_2.put(expected_2)
-    queues = {"wire_outs": {6: queue_1, 8: queue_2}}
-    fp = FrontPanelSimulator(queues)
-    fp.initialize_board()
-    actual_1 = fp.read_wire_out(6)
-    actual_2 = fp.read_wire_out(8)
-    assert actual_1 == expected_1
-    assert actual_2 == expected_2
+def test_FrontPanel__is_triggered__returns_value_from_xem(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    dummy_xem = fp.get_xem()
+    mocked_is_triggered = mocker.patch.object(
+        front_panel, "is_triggered", autospec=True, return_value=True
+    )
+    assert fp.is_triggered(0x60, 0x01) is True
+    mocked_is_triggered.assert_called_once_with(dummy_xem, 0x60, 0x01)
 
 
-def test_FrontPanelSimulator__set_device_id__sets_internal_id_string():
-    new_id = "Mantarray XEM"
-    fp = FrontPanelSimulator({})
-    fp.set_device_id(new_id)
-    assert fp.get_device_id() == new_id
+def test_FrontPanel__update_and_check_triggers__raises_error_if_board_not_initialized():
+    fp = FrontPanel(okCFrontPanel())
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.update_and_check_triggers([(0x60, 0x01)])
 
 
-def test_FrontPanelSimulator__set_device_id__raises_error_if_id_is_too_many_bytes():
-    new_id = "123456789012345678901234567890123"
-    fp = FrontPanelSimulator({})
+def test_FrontPanel__update_and_check_triggers__updates_then_checks_each_trigger(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    dummy_xem = fp.get_xem()
+    mocked_update = mocker.patch.object(
+        front_panel, "update_trigger_outs", autospec=True
+    )
+    mocked_is_triggered = mocker.patch.object(
+        front_panel, "is_triggered", autospec=True, side_effect=[False, True]
+    )
+    assert fp.update_and_check_triggers([(0x60, 0x01), (0x61, 0x02)]) == [False, True]
+    mocked_update.assert_called_once_with(dummy_xem)
+    assert mocked_is_triggered.call_args_list == [
+        mocker.call(dummy_xem, 0x60, 0x01),
+        mocker.call(dummy_xem, 0x61, 0x02),
+    ]
+
+
+def test_FrontPanel__update_and_check_trigger__returns_whether_the_trigger_fired(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocker.patch.object(front_panel, "update_trigger_outs", autospec=True)
+    mocker.patch.object(front_panel, "is_triggered", autospec=True, return_value=True)
+    assert fp.update_and_check_trigger(0x60, 0x01) is True
+
+
+def test_FrontPanel__update_and_check_triggers__holds_trigger_lock_until_checked_when_thread_safe(
+    mocker,
+):
+    mocker.patch.object(front_panel, "initialize_board", autospec=True)
+    mocker.patch.object(front_panel, "update_trigger_outs", autospec=True)
+    fp = FrontPanel(okCFrontPanel(), thread_safe=True)
+    fp.initialize_board()
+    trigger_lock = fp.get_xem().get_lock(LOCK_GROUP_TRIGGERS)
+
+    def is_triggered_holding_trigger_lock(*args):
+        is_acquired_by_other_thread = []
+        other_thread = threading.Thread(
+            target=lambda: is_acquired_by_other_thread.append(
+                trigger_lock.acquire(blocking=False)
+            )
+        )
+        other_thread.start()
+        other_thread.join()
+        assert is_acquired_by_other_thread == [False]
+        return True
+
+    mocker.patch.object(
+        front_panel,
+        "is_triggered",
+        autospec=True,
+        side_effect=is_triggered_holding_trigger_lock,
+    )
+    assert fp.update_and_check_triggers([(0x60, 0x01)]) == [True]
+
+
+@pytest.mark.parametrize(
+    "test_method_name,test_args,test_description",
+    [
+        ("read_register", (0x10,), "read_register"),
+        ("write_register", (0x10, 1), "write_register"),
+        ("read_registers", ([0x10],), "read_registers"),
+        ("write_registers", ({0x10: 1},), "write_registers"),
+    ],
+)
+def test_FrontPanel__register_methods__raise_error_if_board_not_initialized(
+    test_method_name, test_args, test_description
+):
+    fp = FrontPanel(okCFrontPanel())
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        getattr(fp, test_method_name)(*test_args)
+
+
+@pytest.mark.parametrize(
+    "test_method_name,test_args,test_return_value,test_description",
+    [
+        ("read_register", (0x10,), 5, "read_register"),
+        ("write_register", (0x10, 1), None, "write_register"),
+        ("read_registers", ([0x10, 0x11],), [5, 6], "read_registers"),
+        ("write_registers", ({0x10: 1},), None, "write_registers"),
+    ],
+)
+def test_FrontPanel__register_methods__call_main_function_with_xem(
+    test_method_name,
+    test_args,
+    test_return_value,
+    test_description,
+    mocker,
+    initialized_front_panel_with_dummy_xem,
+):
+    fp = initialized_front_panel_with_dummy_xem
+    dummy_xem = fp.get_xem()
+    mocked_function = mocker.patch.object(
+        front_panel, test_method_name, autospec=True, return_value=test_return_value
+    )
+    assert getattr(fp, test_method_name)(*test_args) == test_return_value
+    mocked_function.assert_called_once_with(dummy_xem, *test_args)
+
+
+def test_FrontPanel__write_to_pipe_in__raises_error_if_board_not_initialized():
+    fp = FrontPanel(okCFrontPanel())
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.write_to_pipe_in(bytearray(BLOCK_SIZE))
+
+
+def test_FrontPanel__write_to_pipe_in__uses_block_size_of_front_panel_by_default(
+    mocker,
+):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(front_panel, "initialize_board", autospec=True)
+    fp = FrontPanel(dummy_xem, block_size=1024)
+    fp.initialize_board()
+    mocked_write = mocker.patch.object(
+        front_panel, "write_to_pipe_in", autospec=True, return_value=2048
+    )
+    data = bytearray(2048)
+    assert fp.write_to_pipe_in(data) == 2048
+    mocked_write.assert_called_once_with(
+        dummy_xem, data, ep_addr=PIPE_IN_FIFO, block_size=1024
+    )
+
+
+def test_FrontPanel__write_to_pipe_in__passes_given_endpoint_and_block_size(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocked_write = mocker.patch.object(
+        front_panel, "write_to_pipe_in", autospec=True, return_value=64
+    )
+    data = bytearray(64)
+    fp.write_to_pipe_in(data, ep_addr=0x81, block_size=64)
+    mocked_write.assert_called_once_with(
+        fp.get_xem(), data, ep_addr=0x81, block_size=64
+    )
+
+
+def test_FrontPanel__get_num_words_free_pipe_in__raises_error_if_board_not_initialized():
+    fp = FrontPanel(okCFrontPanel())
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.get_num_words_free_pipe_in()
+
+
+def test_FrontPanel__get_num_words_free_pipe_in__returns_value_from_xem(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocked_get = mocker.patch.object(
+        front_panel, "get_num_words_free_pipe_in", autospec=True, return_value=512
+    )
+    assert fp.get_num_words_free_pipe_in() == 512
+    mocked_get.assert_called_once_with(fp.get_xem())
+
+
+def test_FrontPanel__latency_instrumentation__records_calls_and_errors_of_hardware_methods(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocker.patch.object(
+        front_panel,
+        "read_wire_out",
+        autospec=True,
+        side_effect=[7, OkHardwareTimeoutError()],
+    )
+    mocker.patch.object(front_panel, "set_wire_in", autospec=True)
+    assert fp.is_latency_instrumentation_enabled() is False
+    assert fp.get_latency_snapshot() == {}
+
+    fp.enable_latency_instrumentation()
+    assert fp.is_latency_instrumentation_enabled() is True
+    assert fp.read_wire_out(0x20) == 7
+    with pytest.raises(OkHardwareTimeoutError):
+        fp.read_wire_out(0x20)
+    fp.set_wire_in(0x00, 1, 1)
+
+    snapshot = fp.get_latency_snapshot()
+    assert list(snapshot) == list(FrontPanel.instrumented_method_names)
+    assert snapshot["read_wire_out"].num_calls == 2
+    assert snapshot["read_wire_out"].num_errors == {"OkHardwareTimeoutError": 1}
+    assert snapshot["set_wire_in"].num_calls == 1
+    assert snapshot["read_register"].num_calls == 0
+
+
+def test_FrontPanel__latency_instrumentation__does_not_record_methods_called_by_other_recorded_methods(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocker.patch.object(
+        front_panel, "is_spi_running", autospec=True, return_value=False
+    )
+    mocker.patch.object(front_panel, "start_acquisition", autospec=True)
+    fp.enable_latency_instrumentation()
+    fp.start_acquisition()
+
+    snapshot = fp.get_latency_snapshot()
+    assert snapshot["start_acquisition"].num_calls == 1
+    # the check made inside start_acquisition is part of its latency
+    assert snapshot["is_spi_running"].num_calls == 0
+    fp.is_spi_running()
+    assert fp.get_latency_snapshot()["is_spi_running"].num_calls == 1
+
+
+def test_FrontPanel__latency_instrumentation__counts_errors_that_are_not_hardware_errors():
+    fp = FrontPanel(okCFrontPanel())
+    fp.enable_latency_instrumentation()
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.start_acquisition()
+    assert fp.get_latency_snapshot()["start_acquisition"].num_errors == {
+        OTHER_ERROR_NAME: 1
+    }
+
+
+def test_FrontPanel__enable_latency_instrumentation__keeps_statistics_when_already_enabled(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocker.patch.object(front_panel, "write_register", autospec=True)
+    fp.enable_latency_instrumentation()
+    fp.write_register(0x10, 1)
+    fp.enable_latency_instrumentation()
+    fp.write_register(0x10, 2)
+    assert fp.get_latency_snapshot()["write_register"].num_calls == 2
+
+    fp.reset_latency_statistics()
+    assert fp.get_latency_snapshot()["write_register"].num_calls == 0
+
+
+def test_FrontPanel__disable_latency_instrumentation__restores_the_methods_of_the_class(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocked_write = mocker.patch.object(front_panel, "write_register", autospec=True)
+    # disabling when not enabled does nothing
+    fp.disable_latency_instrumentation()
+    fp.reset_latency_statistics()
+
+    fp.enable_latency_instrumentation()
+    fp.disable_latency_instrumentation()
+    assert fp.is_latency_instrumentation_enabled() is False
+    assert fp.get_latency_snapshot() == {}
+    for method_name in FrontPanel.instrumented_method_names:
+        assert method_name not in vars(fp)
+    fp.write_register(0x10, 1)
+    mocked_write.assert_called_once_with(fp.get_xem(), 0x10, 1)
+
+
+def test_FrontPanel__register_sequence__raises_error_if_board_not_initialized():
+    fp = FrontPanel(okCFrontPanel())
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.register_sequence(ControlSequence("my_sequence"))
+
+
+def test_FrontPanel__register_sequence__loads_lua_into_script_engine_created_once(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    engine = object()
+    mocked_create = mocker.patch.object(
+        front_panel, "create_lua_script_engine", autospec=True, return_value=engine
+    )
+    mocked_load = mocker.patch.object(front_panel, "load_script", autospec=True)
+    sequence_1 = build_start_acquisition_sequence()
+    sequence_2 = ControlSequence("another_sequence").write_register(0x10, 1)
+    fp.register_sequence(sequence_1)
+    fp.register_sequence(sequence_2)
+
+    mocked_create.assert_called_once_with(fp.get_xem())
+    assert mocked_load.call_args_list == [
+        mocker.call(engine, sequence_1.get_name(), sequence_1.to_lua()),
+        mocker.call(engine, "another_sequence", sequence_2.to_lua()),
+    ]
+    assert fp.get_sequence_names() == [sequence_1.get_name(), "another_sequence"]
+
+
+def test_FrontPanel__run_sequence__raises_error_if_sequence_not_registered(
+    initialized_front_panel_with_dummy_xem,
+):
+    fp = initialized_front_panel_with_dummy_xem
+    with pytest.raises(OpalKellySequenceNotRegisteredError, match="missing"):
+        fp.run_sequence("missing")
+
+
+def test_FrontPanel__run_sequence__runs_script_function_with_arguments(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    engine = object()
+    mocker.patch.object(
+        front_panel, "create_lua_script_engine", autospec=True, return_value=engine
+    )
+    mocker.patch.object(front_panel, "load_script", autospec=True)
+    mocked_run = mocker.patch.object(
+        front_panel, "run_script_function", autospec=True, return_value=[0]
+    )
+    sequence = build_start_acquisition_sequence()
+    fp.register_sequence(sequence)
+    fp.run_sequence(sequence.get_name(), 1000)
+
+    mocked_run.assert_called_once_with(engine, sequence.get_name(), [1000])
+
+
+def test_FrontPanel__run_sequence__passes_unsigned_32_bit_arguments_as_signed_script_values(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    engine = mocker.create_autospec(okCScriptEngine, instance=True)
+    engine.RunScriptFunction.return_value = [okCScriptValue(0)]
+    mocker.patch.object(
+        front_panel, "create_lua_script_engine", autospec=True, return_value=engine
+    )
+    mocker.patch.object(front_panel, "load_script", autospec=True)
+    sequence = build_start_acquisition_sequence()
+    fp.register_sequence(sequence)
+    fp.run_sequence(sequence.get_name(), 0xFFFFFFFF)
+
+    _, script_arguments = engine.RunScriptFunction.call_args[0]
+    # the Lua function adds 2**32 back to negative arguments
+    assert script_arguments[0].GetNumber() == -1
+    assert "num_samples + 0x100000000" in sequence.to_lua()
+
+
+def test_FrontPanel__run_sequence__raises_error_for_wrong_number_of_arguments(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocker.patch.object(front_panel, "create_lua_script_engine", autospec=True)
+    mocker.patch.object(front_panel, "load_script", autospec=True)
+    mocked_run = mocker.patch.object(front_panel, "run_script_function", autospec=True)
+    sequence = build_start_acquisition_sequence()
+    fp.register_sequence(sequence)
+    with pytest.raises(ValueError, match="takes 1 arguments"):
+        fp.run_sequence(sequence.get_name())
+
+    mocked_run.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "test_results,expected_error,test_description",
+    [
+        ([-8], OkHardwareDeviceNotOpenError, "raises hardware error for error code"),
+        ([None], OpalKellyScriptError, "raises script error for missing return code"),
+    ],
+)
+def test_FrontPanel__run_sequence__raises_error_for_bad_return_code(
+    test_results,
+    expected_error,
+    test_description,
+    mocker,
+    initialized_front_panel_with_dummy_xem,
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocker.patch.object(front_panel, "create_lua_script_engine", autospec=True)
+    mocker.patch.object(front_panel, "load_script", autospec=True)
+    mocker.patch.object(
+        front_panel, "run_script_function", autospec=True, return_value=test_results
+    )
+    fp.register_sequence(ControlSequence("my_sequence"))
+    with pytest.raises(expected_error):
+        fp.run_sequence("my_sequence")
+
+
+def test_FrontPanel__default_candidate_block_sizes():
+    assert FrontPanel.default_candidate_block_sizes == (
+        32,
+        64,
+        128,
+        256,
+        512,
+        1024,
+        2048,
+        4096,
+        8192,
+        16384,
+    )
+
+
+def test_FrontPanel__uses_default_block_size():
+    fp = FrontPanel(okCFrontPanel())
+    assert fp.get_block_size() == BLOCK_SIZE
+
+
+def test_FrontPanel__accepts_block_size_kwarg():
+    fp = FrontPanel(okCFrontPanel(), block_size=MAX_BLOCK_SIZE)
+    assert fp.get_block_size() == MAX_BLOCK_SIZE
+
+
+def test_FrontPanel__raises_error_with_invalid_block_size_kwarg():
+    with pytest.raises(OpalKellyInvalidBlockSizeError):
+        FrontPanel(okCFrontPanel(), block_size=100)
+
+
+def test_FrontPanel__set_block_size__raises_error_with_invalid_block_size():
+    fp = FrontPanel(okCFrontPanel())
+    with pytest.raises(OpalKellyInvalidBlockSizeError):
+        fp.set_block_size(MAX_BLOCK_SIZE * 2)
+    assert fp.get_block_size() == BLOCK_SIZE
+
+
+def test_FrontPanel__is_not_thread_safe_by_default():
+    dummy_xem = okCFrontPanel()
+    fp = FrontPanel(dummy_xem)
+    assert fp.is_thread_safe() is False
+    assert fp.get_xem() is dummy_xem
+
+
+def test_FrontPanel__thread_safe__calls_board_through_endpoint_locks(mocker):
+    dummy_xem = okCFrontPanel()
+    fp = FrontPanel(dummy_xem, thread_safe=True)
+    assert fp.is_thread_safe() is True
+    locking_xem = fp.get_xem()
+    assert isinstance(locking_xem, EndpointLockingXem)
+    assert locking_xem.get_xem() is dummy_xem
+
+    fifo_lock = locking_xem.get_pipe_lock(PIPE_OUT_FIFO)
+
+    def benchmark_holding_fifo_lock(*args, **kwargs):
+        is_acquired_by_other_thread = []
+        other_thread = threading.Thread(
+            target=lambda: is_acquired_by_other_thread.append(
+                fifo_lock.acquire(blocking=False)
+            )
+        )
+        other_thread.start()
+        other_thread.join()
+        assert is_acquired_by_other_thread == [False]
+        return {32: 1.0}
+
+    mocker.patch.object(
+        front_panel, "get_serial_number", autospec=True, return_value="1917000Q70"
+    )
+    mocked_benchmark = mocker.patch.object(
+        front_panel,
+        "benchmark_block_sizes",
+        autospec=True,
+        side_effect=benchmark_holding_fifo_lock,
+    )
+    mocker.patch.object(front_panel, "initialize_board", autospec=True)
+    fp.initialize_board()
+    fp.calibrate_block_size()
+    assert mocked_benchmark.call_args[0][0] is locking_xem
+
+
+def test_FrontPanel__calibrate_block_size__raises_error_if_board_not_initialized():
+    fp = FrontPanel(okCFrontPanel())
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.calibrate_block_size()
+
+
+def test_FrontPanel__calibrate_block_size__benchmarks_default_candidates(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    clear_calibrated_block_sizes()
+    fp = initialized_front_panel_with_dummy_xem
+    dummy_xem = fp.get_xem()
+    mocker.patch.object(
+        front_panel, "get_serial_number", autospec=True, return_value="1917000Q70"
+    )
+    mocked_benchmark = mocker.patch.object(
+        front_panel, "benchmark_block_sizes", autospec=True, return_value={32: 1.0}
+    )
+    fp.calibrate_block_size()
+    # the larger default candidates hold back more than the default latency budget in the FIFO
+    mocked_benchmark.assert_called_once_with(
+        dummy_xem,
+        [32, 64, 128, 256, 512, 1024],
+        num_bytes=None,
+        num_repeats=10,
+    )
+
+
+def test_FrontPanel__calibrate_block_size__raises_error_when_no_candidate_fits_latency_budget(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    fp = initialized_front_panel_with_dummy_xem
+    mocked_benchmark = mocker.patch.object(
+        front_panel, "benchmark_block_sizes", autospec=True
+    )
+    with pytest.raises(ValueError, match="287"):
+        fp.calibrate_block_size(max_read_alignment_num_bytes=287)
+    mocked_benchmark.assert_not_called()
+
+
+def test_FrontPanel__calibrate_block_size__uses_and_remembers_fastest_block_size(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    clear_calibrated_block_sizes()
+    fp = initialized_front_panel_with_dummy_xem
+    dummy_xem = fp.get_xem()
+    expected_throughputs = {64: 1.0e6, 2048: 3.0e6, 8192: 2.0e6}
+    mocker.patch.object(
+        front_panel, "get_serial_number", autospec=True, return_value="1917000Q70"
+    )
+    mocked_benchmark = mocker.patch.object(
+        front_panel,
+        "benchmark_block_sizes",
+        autospec=True,
+        return_value=expected_throughputs,
+    )
+
+    actual = fp.calibrate_block_size(
+        candidate_block_sizes=[64, 2048, 8192, 16384],
+        num_bytes=2 ** 20,
+        num_repeats=3,
+        max_read_alignment_num_bytes=get_read_alignment_num_bytes(8192),
+    )
+    assert actual == expected_throughputs
+    assert fp.get_block_size() == 2048
+    assert get_calibrated_block_size("1917000Q70") == 2048
+    assert get_calibrated_block_size("other serial number") is None
+    mocked_benchmark.assert_called_once_with(
+        dummy_xem, [64, 2048, 8192], num_bytes=2 ** 20, num_repeats=3
+    )
+    # 16384 was skipped for holding back too much data in the FIFO
+
+
+def test_FrontPanel__load_calibrated_block_size__applies_block_size_remembered_for_serial_number(
+    mocker, initialized_front_panel_with_dummy_xem
+):
+    clear_calibrated_block_sizes()
+    fp = initialized_front_panel_with_dummy_xem
+    mocked_serial_number = mocker.patch.object(
+        front_panel, "get_serial_number", autospec=True, return_value="1917000Q70"
+    )
+    mocker.patch.object(
+        front_panel, "benchmark_block_sizes", autospec=True, return_value={4096: 1.0}
+    )
+    fp.calibrate_block_size()
+
+    other_fp = FrontPanel(okCFrontPanel())
+    assert other_fp.load_calibrated_block_size() is True
+    assert other_fp.get_block_size() == 4096
+
+    mocked_serial_number.return_value = "other serial number"
+    uncalibrated_fp = FrontPanel(okCFrontPanel())
+    assert uncalibrated_fp.load_calibrated_block_size() is False
+    assert uncalibrated_fp.get_block_size() == BLOCK_SIZE
+
+
+def test_FrontPanel__load_calibrated_block_size__applies_block_size_saved_to_calibration_file_by_another_process(
+    mocker, tmp_path, initialized_front_panel_with_dummy_xem
+):
+    clear_calibrated_block_sizes()
+    calibration_file_path = str(tmp_path / "calibration.json")
+    fp = initialized_front_panel_with_dummy_xem
+    mocked_serial_number = mocker.patch.object(
+        front_panel, "get_serial_number", autospec=True, return_value="1917000Q70"
+    )
+    mocked_benchmark = mocker.patch.object(
+        front_panel, "benchmark_block_sizes", autospec=True, return_value={512: 1.0}
+    )
+    fp.calibrate_block_size(calibration_file_path=calibration_file_path)
+    mocked_serial_number.return_value = "1917000Q71"
+    mocked_benchmark.return_value = {256: 1.0}
+    fp.calibrate_block_size(calibration_file_path=calibration_file_path)
+    with open(calibration_file_path, encoding="utf-8") as calibration_file:
+        assert json.load(calibration_file) == {"1917000Q70": 512, "1917000Q71": 256}
+    # a new process has not calibrated anything itself
+    clear_calibrated_block_sizes()
+
+    mocked_serial_number.return_value = "1917000Q70"
+    other_fp = FrontPanel(okCFrontPanel())
+    assert other_fp.load_calibrated_block_size() is False
+    assert (
+        other_fp.load_calibrated_block_size(calibration_file_path=calibration_file_path)
+        is True
+    )
+    assert other_fp.get_block_size() == 512
+
+    assert (
+        get_calibrated_block_size(
+            "1917000Q70", calibration_file_path=str(tmp_path / "missing.json")
+        )
+        is None
+    )
+
+
+# FrontPanelSimulator tests
+def test_FrontPanelSimulator__init__raises_error_if_fifo_populated_with_invalid_data_read():
+    fifo = SimpleMultiprocessingQueue()
+    fifo.put(bytearray(1))
+    queues = {"pipe_outs": {PIPE_OUT_FIFO: fifo}}
+    with pytest.raises(FPSimulatorInvalidFIFOValueError):
+        FrontPanelSimulator(queues)
+
+
+def test_FrontPanelSimulator__init__raises_fifo_error_with_correct_message():
+    fifo = SimpleMultiprocessingQueue()
+    test_reads = [
+        bytearray(0),
+        bytearray(DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN),
+        bytearray(1),
+    ]
+    for data_read in test_reads:
+        fifo.put(data_read)
+    queues = {"pipe_outs": {PIPE_OUT_FIFO: fifo}}
+    with pytest.raises(
+        FPSimulatorInvalidFIFOValueError, match="Invalid value at index 2"
+    ):
+        FrontPanelSimulator(queues)
+
+
+def test_FrontPanelSimulator__read_wire_out__raises_error_if_board_not_initialized():
+    fp = FrontPanelSimulator({})
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.read_wire_out(1)
+
+
+def test_FrontPanelSimulator__read_wire_outs__reads_a_value_from_the_queue_of_each_address():
+    queues = {
+        "wire_outs": {5: SimpleMultiprocessingQueue(), 6: SimpleMultiprocessingQueue()}
+    }
+    queues["wire_outs"][5].put(55)
+    queues["wire_outs"][6].put(66)
+    fp = FrontPanelSimulator(queues)
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.read_wire_outs([5, 6])
+    fp.initialize_board()
+    assert fp.read_wire_outs([5, 6]) == {5: 55, 6: 66}
+
+
+def test_FrontPanelSimulator__read_wire_out__reads_two_values_from_queue():
+    a_queue = SimpleMultiprocessingQueue()
+    expected_1 = 55
+    expected_2 = 22
+    a_queue.put(expected_1)
+    a_queue.put(expected_2)
+    queues = {"wire_outs": {5: a_queue}}
+    fp = FrontPanelSimulator(queues)
+    fp.initialize_board()
+    actual_1 = fp.read_wire_out(5)
+    actual_2 = fp.read_wire_out(5)
+    assert actual_1 == expected_1
+    assert actual_2 == expected_2
+
+
+def test_FrontPanelSimulator__read_wire_out__reads_values_from_correct_address():
+    queue_1 = SimpleMultiprocessingQueue()
+    queue_2 = SimpleMultiprocessingQueue()
+    expected_1 = 33
+    expected_2 = 35
+    queue_1.put(expected_1)
+    queue_2.put(expected_2)
+    queues = {"wire_outs": {6: queue_1, 8: queue_2}}
+    fp = FrontPanelSimulator(queues)
+    fp.initialize_board()
+    actual_1 = fp.read_wire_out(6)
+    actual_2 = fp.read_wire_out(8)
+    assert actual_1 == expected_1
+    assert actual_2 == expected_2
+
+
+def test_FrontPanelSimulator__is_triggered__raises_error_if_board_not_initialized():
+    fp = FrontPanelSimulator({})
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.is_triggered(0x60, 0x01)
+
+
+def test_FrontPanelSimulator__is_triggered__returns_false_without_trigger_out_queues():
+    fp = FrontPanelSimulator({})
+    fp.initialize_board()
+    fp.update_trigger_outs()
+    assert fp.is_triggered(0x60, 0x01) is False
+
+
+def test_FrontPanelSimulator__update_trigger_outs__latches_all_queued_bits_of_each_endpoint():
+    queue_1 = SimpleMultiprocessingQueue()
+    queue_2 = SimpleMultiprocessingQueue()
+    queue_1.put(0b0001)
+    queue_1.put(0b0100)
+    queue_2.put(0b1000)
+    fp = FrontPanelSimulator({"trigger_outs": {0x60: queue_1, 0x61: queue_2}})
+    fp.initialize_board()
+    assert fp.is_triggered(0x60, 0b0001) is False
+
+    fp.update_trigger_outs()
+    assert fp.is_triggered(0x60, 0b0001) is True
+    assert fp.is_triggered(0x60, 0b0100) is True
+    assert fp.is_triggered(0x60, 0b0010) is False
+    assert fp.is_triggered(0x61, 0b1010) is True
+    assert fp.is_triggered(0x62, 0b1111) is False
+
+
+def test_FrontPanelSimulator__update_trigger_outs__clears_bits_latched_by_previous_update():
+    the_queue = SimpleMultiprocessingQueue()
+    the_queue.put(0b0001)
+    fp = FrontPanelSimulator({"trigger_outs": {0x60: the_queue}})
+    fp.initialize_board()
+    fp.update_trigger_outs()
+    assert fp.is_triggered(0x60, 0b0001) is True
+
+    fp.update_trigger_outs()
+    assert fp.is_triggered(0x60, 0b0001) is False
+
+
+def test_FrontPanelSimulator__read_register__raises_error_if_board_not_initialized():
+    fp = FrontPanelSimulator({})
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.read_register(0x10)
+
+
+def test_FrontPanelSimulator__read_register__returns_zero_for_register_never_written():
+    fp = FrontPanelSimulator({})
+    fp.initialize_board()
+    assert fp.read_register(0x10) == 0
+    assert fp.read_registers([0x10, 0x11]) == [0, 0]
+
+
+def test_FrontPanelSimulator__register_file__keeps_values_from_single_and_batched_writes():
+    fp = FrontPanelSimulator({})
+    fp.initialize_board()
+    fp.write_register(0x10, 7)
+    fp.write_registers({0x11: 8, 0x12: 9, 0x10: 10})
+
+    assert fp.read_register(0x10) == 10
+    assert fp.read_registers([0x12, 0x13, 0x11]) == [9, 0, 8]
+    assert fp.get_register_file() == {0x10: 10, 0x11: 8, 0x12: 9}
+
+
+def test_FrontPanelSimulator__get_register_file__returns_a_copy():
+    fp = FrontPanelSimulator({})
+    fp.initialize_board()
+    fp.get_register_file()[0x10] = 1
+    assert fp.read_register(0x10) == 0
+
+
+def test_FrontPanelSimulator__write_to_pipe_in__raises_error_if_board_not_initialized():
+    fp = FrontPanelSimulator({})
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.write_to_pipe_in(bytearray(BLOCK_SIZE))
+
+
+def test_FrontPanelSimulator__write_to_pipe_in__puts_copy_of_each_write_into_sink_of_endpoint():
+    sink_1 = SimpleMultiprocessingQueue()
+    sink_2 = SimpleMultiprocessingQueue()
+    fp = FrontPanelSimulator({"pipe_ins": {PIPE_IN_FIFO: sink_1, 0x81: sink_2}})
+    fp.initialize_board()
+    data = bytearray(range(BLOCK_SIZE))
+    assert fp.write_to_pipe_in(memoryview(data)) == BLOCK_SIZE
+    assert fp.write_to_pipe_in(bytearray(128), ep_addr=0x81, block_size=64) == 128
+    data[0] = 255
+
+    actual = sink_1.get_nowait()
+    assert isinstance(actual, bytearray)
+    assert actual == bytearray(range(BLOCK_SIZE))
+    assert sink_2.get_nowait() == bytearray(128)
+
+
+def test_FrontPanelSimulator__write_to_pipe_in__raises_error_for_partial_block():
+    fp = FrontPanelSimulator({"pipe_ins": {PIPE_IN_FIFO: SimpleMultiprocessingQueue()}})
+    fp.initialize_board()
+    with pytest.raises(OpalKellyPipeInDataNotBlockAlignedError):
+        fp.write_to_pipe_in(bytearray(BLOCK_SIZE + 4))
+
+
+def test_FrontPanelSimulator__get_num_words_free_pipe_in__is_unlimited_without_simulated_wire_out():
+    fp = FrontPanelSimulator({"wire_outs": {}})
+    fp.initialize_board()
+    assert (
+        fp.get_num_words_free_pipe_in()
+        == FrontPanelSimulator.default_num_words_free_pipe_in
+    )
+
+
+def test_FrontPanelSimulator__get_num_words_free_pipe_in__reads_simulated_wire_out():
+    the_queue = SimpleMultiprocessingQueue()
+    the_queue.put(100)
+    fp = FrontPanelSimulator(
+        {"wire_outs": {WIRE_OUT_NUM_WORDS_FREE_PIPE_IN: the_queue}}
+    )
+    fp.initialize_board()
+    assert fp.get_num_words_free_pipe_in() == 100
+
+
+def test_FrontPanelSimulator__get_num_words_free_pipe_in__raises_error_if_board_not_initialized():
+    fp = FrontPanelSimulator({})
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.get_num_words_free_pipe_in()
+
+
+def test_FrontPanelSimulator__latency_instrumentation__records_sequence_as_one_call():
+    fp = FrontPanelSimulator({})
+    fp.initialize_board()
+    fp.enable_latency_instrumentation()
+    fp.register_sequence(ControlSequence("my_sequence").write_register(0x10, 1))
+    fp.run_sequence("my_sequence")
+
+    snapshot = fp.get_latency_snapshot()
+    assert snapshot["run_sequence"].num_calls == 1
+    # the steps are part of the latency of the sequence, the same as on a board
+    assert snapshot["write_register"].num_calls == 0
+    assert fp.get_register_file() == {0x10: 1}
+
+
+def test_FrontPanelSimulator__run_sequence__raises_error_if_board_not_initialized():
+    fp = FrontPanelSimulator({})
+    with pytest.raises(OpalKellyBoardNotInitializedError):
+        fp.run_sequence("my_sequence")
+
+
+def test_FrontPanelSimulator__run_sequence__runs_each_step_through_simulator_methods(
+    mocker,
+):
+    fp = FrontPanelSimulator({})
+    fp.initialize_board()
+    spied_set_wire_in = mocker.spy(fp, "set_wire_in")
+    spied_activate = mocker.spy(fp, "activate_trigger_in")
+    sequence = (
+        ControlSequence("configure", ("gain", "num_samples"))
+        .write_register(0x10, "gain")
+        .set_wire_in(0x01, "num_samples", 0xFFFFFFFF)
+        .activate_trigger_in(0x41, 0)
+        .write_register(0x11, 3)
+    )
+    fp.register_sequence(sequence)
+    fp.run_sequence("configure", 7, 1000)
+
+    assert fp.get_register_file() == {0x10: 7, 0x11: 3}
+    spied_set_wire_in.assert_called_once_with(0x01, 1000, 0xFFFFFFFF)
+    spied_activate.assert_called_once_with(0x41, 0)
+
+
+def test_FrontPanelSimulator__run_sequence__starts_acquisition_the_same_as_start_acquisition():
+    fp_with_sequence = FrontPanelSimulator({})
+    fp_with_sequence.initialize_board()
+    fp_with_sequence.register_sequence(build_start_acquisition_sequence())
+    fp_with_sequence.run_sequence("start_acquisition_sequence", 1000)
+
+    fp_with_method = FrontPanelSimulator({})
+    fp_with_method.initialize_board()
+    fp_with_method.start_acquisition()
+
+    assert fp_with_sequence.is_spi_running() is True
+    assert fp_with_sequence.is_spi_running() == fp_with_method.is_spi_running()
+    with pytest.raises(OpalKellySpiAlreadyStartedError):
+        fp_with_sequence.start_acquisition()
+    fp_with_sequence.stop_acquisition()
+    assert fp_with_sequence.is_spi_running() is False
+
+
+def test_FrontPanelSimulator__activate_trigger_in__starts_and_stops_acquisition_with_spi_trigger():
+    fp = FrontPanelSimulator({})
+    fp.initialize_board()
+    fp.activate_trigger_in(TRIGGER_IN_SPI, 0)
+    assert fp.is_spi_running() is True
+    # other trigger-ins and bits do not change the acquisition state
+    fp.activate_trigger_in(TRIGGER_IN_SPI + 1, 1)
+    fp.activate_trigger_in(TRIGGER_IN_SPI, 2)
+    assert fp.is_spi_running() is True
+    fp.activate_trigger_in(TRIGGER_IN_SPI, 1)
+    assert fp.is_spi_running() is False
+    fp.start_acquisition()
+    assert fp.is_spi_running() is True
+
+
+def test_FrontPanelSimulator__set_device_id__sets_internal_id_string():
+    new_id = "Mantarray XEM"
+    fp = FrontPanelSimulator({})
+    fp.set_device_id(new_id)
+    assert fp.get_device_id() == new_id
+
+
+def test_FrontPanelSimulator__set_device_id__raises_error_if_id_is_too_many_bytes():
+    new_id = "123456789012345678901234567890123"
+    fp = FrontPanelSimulator({})
     with pytest.raises(OpalKellyIDGreaterThan32BytesError):
         fp.set_device_id(new_id)
 
@@ -708,3 +2016,84 @@ def test_FrontPanelSimulator__get_num_words_fifo__returns_0_when_fifo_queue_is_e
 
     actual = fp.get_num_words_fifo()
     assert actual == expected_num_words
+
+
+def test_FrontPanelSimulator__read_from_fifo__reads_at_most_max_bytes_and_leaves_rest_in_fifo():
+    round_robin_size_bytes = DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN
+    test_read_1 = bytearray([i % 256 for i in range(round_robin_size_bytes * 5)])
+    test_read_2 = bytearray([1] * round_robin_size_bytes)
+    fifo = SimpleMultiprocessingQueue()
+    fifo.put(test_read_1)
+    fifo.put(test_read_2)
+    queues = {"pipe_outs": {PIPE_OUT_FIFO: fifo}}
+    fp = FrontPanelSimulator(queues)
+    fp.initialize_board()
+
+    actual_1 = fp.read_from_fifo(max_bytes=round_robin_size_bytes * 2 + 1)
+    assert actual_1 == test_read_1[: round_robin_size_bytes * 2]
+    assert fp.get_num_words_fifo() == round_robin_size_bytes * 3 // 4
+    actual_2 = fp.read_from_fifo(max_bytes=round_robin_size_bytes * 2)
+    assert (
+        actual_2 == test_read_1[round_robin_size_bytes * 2 : round_robin_size_bytes * 4]
+    )
+    actual_3 = fp.read_from_fifo(max_bytes=round_robin_size_bytes * 2)
+    assert actual_3 == test_read_1[round_robin_size_bytes * 4 :]
+    assert fp.get_num_words_fifo() == round_robin_size_bytes // 4
+    actual_4 = fp.read_from_fifo(max_bytes=round_robin_size_bytes * 2)
+    assert actual_4 == test_read_2
+
+
+def test_FrontPanelSimulator__read_from_fifo_with_status__reports_fifo_level_before_read():
+    round_robin_size_bytes = DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN
+    test_read = bytearray([i % 256 for i in range(round_robin_size_bytes * 3)])
+    fifo = SimpleMultiprocessingQueue()
+    fifo.put(test_read)
+    queues = {"pipe_outs": {PIPE_OUT_FIFO: fifo}}
+    fp = FrontPanelSimulator(queues)
+    fp.initialize_board()
+
+    actual_data, actual_status = fp.read_from_fifo_with_status(
+        max_bytes=round_robin_size_bytes * 2
+    )
+    assert actual_data == test_read[: round_robin_size_bytes * 2]
+    assert actual_status == FifoRead(
+        round_robin_size_bytes * 3 // 4,
+        round_robin_size_bytes * 2,
+        round_robin_size_bytes * 2,
+    )
+    fp.read_from_fifo_with_status()
+    assert fp.read_from_fifo_with_status() == (bytearray(0), FifoRead(0, 0, 0))
+
+
+def test_FrontPanelSimulator__read_from_fifo__raises_error_if_max_bytes_is_too_small():
+    fifo = SimpleMultiprocessingQueue()
+    fifo.put(bytearray(DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN))
+    queues = {"pipe_outs": {PIPE_OUT_FIFO: fifo}}
+    fp = FrontPanelSimulator(queues)
+    fp.initialize_board()
+    with pytest.raises(OpalKellyMaxReadSizeTooSmallError):
+        fp.read_from_fifo(max_bytes=1)
+
+
+def test_FrontPanelSimulator__read_from_fifo_into__copies_queued_data_into_buffer():
+    round_robin_size_bytes = DATA_FRAME_SIZE_WORDS * 4 * DATA_FRAMES_PER_ROUND_ROBIN
+    test_read_1 = bytearray([i % 256 for i in range(round_robin_size_bytes * 3)])
+    test_read_2 = bytearray([1] * round_robin_size_bytes)
+    fifo = SimpleMultiprocessingQueue()
+    fifo.put(test_read_1)
+    fifo.put(test_read_2)
+    queues = {"pipe_outs": {PIPE_OUT_FIFO: fifo}}
+    fp = FrontPanelSimulator(queues)
+    fp.initialize_board()
+    test_buffer = bytearray(round_robin_size_bytes * 2)
+
+    assert fp.read_from_fifo_into(test_buffer) == round_robin_size_bytes * 2
+    assert test_buffer == test_read_1[: round_robin_size_bytes * 2]
+    assert fp.read_from_fifo_into(test_buffer) == round_robin_size_bytes
+    assert (
+        test_buffer[:round_robin_size_bytes]
+        == test_read_1[round_robin_size_bytes * 2 :]
+    )
+    assert fp.read_from_fifo_into(memoryview(test_buffer)) == round_robin_size_bytes
+    assert test_buffer[:round_robin_size_bytes] == test_read_2
+    assert fp.read_from_fifo_into(test_buffer) == 0
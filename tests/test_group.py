@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from stdlib_utils import SimpleMultiprocessingQueue
+from xem_wrapper import build_round_robins
+from xem_wrapper import FrontPanelGroup
+from xem_wrapper import FrontPanelSimulator
+from xem_wrapper import group
+from xem_wrapper import NUM_CHANNELS
+from xem_wrapper import OpalKellySpiAlreadyStartedError
+from xem_wrapper import PIPE_OUT_FIFO
+from xem_wrapper import ROUND_ROBIN_SIZE_BYTES
+from xem_wrapper import SAMPLE_IDX_MODULUS
+from xem_wrapper import SampleIndexStreamMerger
+
+
+def _build_reads(sample_indices, fill_value=0):
+    channel_data = np.full(
+        (NUM_CHANNELS, len(sample_indices)), fill_value, dtype=np.uint16
+    )
+    return build_round_robins(channel_data, np.asarray(sample_indices, dtype=np.uint32))
+
+
+def _create_simulator(*fifo_reads):
+    fifo = SimpleMultiprocessingQueue()
+    for fifo_read in fifo_reads:
+        fifo.put(fifo_read)
+    fp = FrontPanelSimulator({"pipe_outs": {PIPE_OUT_FIFO: fifo}})
+    fp.initialize_board()
+    return fp
+
+
+def _get_fill_values(merged):
+    return [
+        merged.data[i * ROUND_ROBIN_SIZE_BYTES + 12]
+        for i in range(len(merged.sample_indices))
+    ]
+
+
+@pytest.mark.parametrize(
+    "test_kwargs,test_description",
+    [
+        ({"num_boards": 0}, "raises error when there are no boards"),
+        (
+            {"num_boards": 2, "sample_idx_offsets": [0]},
+            "raises error when number of offsets does not match number of boards",
+        ),
+    ],
+)
+def test_SampleIndexStreamMerger__raises_error_with_invalid_configuration(
+    test_kwargs, test_description
+):
+    with pytest.raises(ValueError):
+        SampleIndexStreamMerger(**test_kwargs)
+
+
+def test_SampleIndexStreamMerger__holds_data_until_every_board_has_caught_up():
+    merger = SampleIndexStreamMerger(2)
+    assert merger.get_num_boards() == 2
+    assert merger.get_sample_idx_offsets() == [0, 0]
+    merger.add(0, _build_reads([0, 2, 4, 6], fill_value=10))
+    merger.add(1, bytearray(0))
+    actual = merger.pop_merged()
+    assert actual.sample_indices.size == 0
+    assert actual.data == bytearray(0)
+    assert merger.get_num_pending_round_robins() == 4
+
+    merger.add(1, _build_reads([1, 3], fill_value=11))
+    actual = merger.pop_merged()
+    np.testing.assert_array_equal(actual.sample_indices, [0, 1, 2, 3])
+    np.testing.assert_array_equal(actual.board_indices, [0, 1, 0, 1])
+    assert _get_fill_values(actual) == [10, 11, 10, 11]
+    assert merger.get_num_pending_round_robins() == 2
+
+    merger.add(1, _build_reads([5], fill_value=11))
+    actual = merger.pop_merged()
+    np.testing.assert_array_equal(actual.sample_indices, [4, 5])
+
+    actual = merger.pop_merged(flush=True)
+    np.testing.assert_array_equal(actual.sample_indices, [6])
+    np.testing.assert_array_equal(actual.board_indices, [0])
+    assert merger.get_num_pending_round_robins() == 0
+    assert merger.pop_merged(flush=True).sample_indices.size == 0
+
+
+def test_SampleIndexStreamMerger__pop_merged__flushes_boards_that_have_not_produced_data():
+    merger = SampleIndexStreamMerger(2)
+    assert merger.pop_merged(flush=True).sample_indices.size == 0
+    merger.add(1, _build_reads([3, 4]))
+    actual = merger.pop_merged(flush=True)
+    np.testing.assert_array_equal(actual.sample_indices, [3, 4])
+    np.testing.assert_array_equal(actual.board_indices, [1, 1])
+
+
+def test_SampleIndexStreamMerger__orders_equal_sample_indices_by_board():
+    merger = SampleIndexStreamMerger(3)
+    for board_idx in (2, 0, 1):
+        merger.add(board_idx, _build_reads([7, 8], fill_value=board_idx))
+    actual = merger.pop_merged()
+    np.testing.assert_array_equal(actual.board_indices, [0, 1, 2, 0, 1, 2])
+    assert _get_fill_values(actual) == [0, 1, 2, 0, 1, 2]
+
+
+def test_SampleIndexStreamMerger__aligns_boards_with_offsets_and_unwraps_sample_indices():
+    merger = SampleIndexStreamMerger(2, sample_idx_offsets=[0, 3])
+    merger.add(0, _build_reads([SAMPLE_IDX_MODULUS - 1]))
+    merger.add(0, _build_reads([0, 1]))
+    merger.add(1, _build_reads([SAMPLE_IDX_MODULUS - 3, SAMPLE_IDX_MODULUS - 2]))
+    actual = merger.pop_merged(flush=True)
+    np.testing.assert_array_equal(
+        actual.sample_indices,
+        [
+            SAMPLE_IDX_MODULUS - 1,
+            SAMPLE_IDX_MODULUS,
+            SAMPLE_IDX_MODULUS,
+            SAMPLE_IDX_MODULUS + 1,
+            SAMPLE_IDX_MODULUS + 1,
+        ],
+    )
+    np.testing.assert_array_equal(actual.board_indices, [0, 0, 1, 0, 1])
+
+
+def test_FrontPanelGroup__raises_error_without_boards():
+    with pytest.raises(ValueError):
+        FrontPanelGroup([])
+
+
+def test_FrontPanelGroup__start_acquisition__starts_all_boards_and_measures_skew(
+    mocker,
+):
+    front_panels = [_create_simulator() for _ in range(3)]
+    mocker.patch.object(
+        group.time, "perf_counter", side_effect=[1.0, 1.2, 1.5, 1.7, 2.0, 2.4]
+    )
+    fp_group = FrontPanelGroup(front_panels, sample_rate=1000)
+    assert fp_group.get_front_panels() == front_panels
+    assert fp_group.get_trigger_skews() is None
+
+    actual = fp_group.start_acquisition()
+    assert actual == pytest.approx([0, 0.5, 1.1])
+    assert fp_group.get_trigger_skews() == actual
+    assert all(fp.is_spi_running() for fp in front_panels)
+    assert fp_group.get_merger().get_sample_idx_offsets() == [0, 500, 1100]
+
+    fp_group.stop_acquisition()
+    assert not any(fp.is_spi_running() for fp in front_panels)
+
+
+def test_FrontPanelGroup__start_acquisition__does_not_start_any_board_if_one_is_not_ready():
+    front_panels = [_create_simulator() for _ in range(2)]
+    front_panels[1].start_acquisition()
+
+    fp_group = FrontPanelGroup(front_panels)
+    with pytest.raises(OpalKellySpiAlreadyStartedError):
+        fp_group.start_acquisition()
+    assert front_panels[0].is_spi_running() is False
+
+
+def test_FrontPanelGroup__start_acquisition__arms_every_board_before_sending_any_trigger(
+    mocker,
+):
+    front_panels = [_create_simulator() for _ in range(2)]
+    calls = mocker.MagicMock()
+    for board_idx, fp in enumerate(front_panels):
+        calls.attach_mock(
+            mocker.patch.object(fp, "arm_acquisition", autospec=True),
+            f"arm_{board_idx}",
+        )
+        calls.attach_mock(
+            mocker.patch.object(fp, "fire_acquisition_trigger", autospec=True),
+            f"fire_{board_idx}",
+        )
+
+    FrontPanelGroup(front_panels).start_acquisition(num_samples=1000, continuous=False)
+
+    assert calls.mock_calls == [
+        mocker.call.arm_0(num_samples=1000, continuous=False),
+        mocker.call.arm_1(num_samples=1000, continuous=False),
+        mocker.call.fire_0(),
+        mocker.call.fire_1(),
+    ]
+
+
+def test_FrontPanelGroup__start_acquisition__stops_started_boards_if_a_trigger_fails(
+    mocker,
+):
+    front_panels = [_create_simulator() for _ in range(3)]
+    expected_error = ValueError("trigger failed")
+    mocker.patch.object(
+        front_panels[1],
+        "fire_acquisition_trigger",
+        autospec=True,
+        side_effect=expected_error,
+    )
+    spied_stops = [mocker.spy(fp, "stop_acquisition") for fp in front_panels]
+
+    fp_group = FrontPanelGroup(front_panels)
+    with pytest.raises(ValueError) as exc_info:
+        fp_group.start_acquisition()
+    assert exc_info.value is expected_error
+    assert [spied_stop.call_count for spied_stop in spied_stops] == [1, 0, 0]
+    assert not any(fp.is_spi_running() for fp in front_panels)
+    assert fp_group.get_trigger_skews() is None
+
+
+def test_FrontPanelGroup__start_acquisition__does_not_offset_boards_without_sample_rate():
+    fp_group = FrontPanelGroup([_create_simulator(), _create_simulator()])
+    fp_group.start_acquisition()
+    assert fp_group.get_merger().get_sample_idx_offsets() == [0, 0]
+
+
+def test_FrontPanelGroup__read_merged__reads_all_fifos_and_merges_streams():
+    front_panels = [
+        _create_simulator(_build_reads([0, 2], 1), _build_reads([4, 6], 1)),
+        _create_simulator(_build_reads([1, 3, 5], 2), _build_reads([7], 2)),
+    ]
+    fp_group = FrontPanelGroup(front_panels)
+    actual_reads = fp_group.read_from_fifos()
+    assert [len(data) for data in actual_reads] == [
+        ROUND_ROBIN_SIZE_BYTES * 2,
+        ROUND_ROBIN_SIZE_BYTES * 3,
+    ]
+    for board_idx, data in enumerate(actual_reads):
+        fp_group.get_merger().add(board_idx, data)
+
+    actual = fp_group.read_merged()
+    np.testing.assert_array_equal(actual.sample_indices, [0, 1, 2, 3, 4, 5, 6])
+    assert _get_fill_values(actual) == [1, 2, 1, 2, 1, 2, 1]
+    fp_group.close()
+    fp_group.close()
+
+    front_panels[0].get_num_words_fifo()
+    assert fp_group.get_merger().pop_merged(flush=True).sample_indices.tolist() == [7]
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+import math
+import threading
+
+import pytest
+from xem_wrapper import get_latency_bucket_upper_bound_ns
+from xem_wrapper import latency
+from xem_wrapper import LATENCY_HISTOGRAM_NUM_BUCKETS
+from xem_wrapper import LatencyRecorder
+from xem_wrapper import MethodLatencyStatistics
+from xem_wrapper import OkHardwareTimeoutError
+from xem_wrapper import OpalKellyHardwareError
+from xem_wrapper import OTHER_ERROR_NAME
+
+
+def _create_statistics(bucket_counts, max_ns):
+    counts = [0] * LATENCY_HISTOGRAM_NUM_BUCKETS
+    for bucket_idx, count in bucket_counts.items():
+        counts[bucket_idx] = count
+    return MethodLatencyStatistics(
+        num_calls=sum(counts),
+        num_errors={},
+        total_ns=0,
+        max_ns=max_ns,
+        bucket_counts=tuple(counts),
+    )
+
+
+@pytest.mark.parametrize(
+    "test_bucket_idx,expected_bound,test_description",
+    [
+        (0, 1, "returns 1 for the bucket of zero latencies"),
+        (10, 1024, "returns power of 2"),
+        (LATENCY_HISTOGRAM_NUM_BUCKETS - 1, math.inf, "returns inf for last bucket"),
+    ],
+)
+def test_get_latency_bucket_upper_bound_ns__returns_correct_value(
+    test_bucket_idx, expected_bound, test_description
+):
+    assert get_latency_bucket_upper_bound_ns(test_bucket_idx) == expected_bound
+
+
+def test_MethodLatencyStatistics__returns_nan_when_there_were_no_calls():
+    statistics = _create_statistics({}, 0)
+    assert math.isnan(statistics.get_mean_ns())
+    assert math.isnan(statistics.get_percentile_ns(50))
+
+
+@pytest.mark.parametrize(
+    "test_percentile,expected_ns,test_description",
+    [
+        (0, 1024, "returns bound of lowest bucket for 0th percentile"),
+        (50, 1024, "returns bound of bucket holding the median"),
+        (90, 1024, "returns bound of bucket holding the last of the low calls"),
+        (91, 4096, "returns bound of next non-empty bucket"),
+        (100, 6000, "returns max latency when it is below the bucket bound"),
+    ],
+)
+def test_MethodLatencyStatistics_get_percentile_ns__returns_upper_bound_of_bucket(
+    test_percentile, expected_ns, test_description
+):
+    statistics = _create_statistics({10: 90, 12: 5, 13: 5}, 6000)
+    assert statistics.get_percentile_ns(test_percentile) == expected_ns
+
+
+@pytest.mark.parametrize("test_percentile", [-1, 100.5])
+def test_MethodLatencyStatistics_get_percentile_ns__raises_error_for_invalid_percentile(
+    test_percentile,
+):
+    statistics = _create_statistics({10: 1}, 1000)
+    with pytest.raises(ValueError, match="percentile"):
+        statistics.get_percentile_ns(test_percentile)
+
+
+def test_LatencyRecorder__starts_with_zero_statistics_for_every_method():
+    recorder = LatencyRecorder(["read_wire_out", "set_wire_in"])
+    assert recorder.get_method_names() == ["read_wire_out", "set_wire_in"]
+    snapshot = recorder.snapshot()
+    assert list(snapshot) == ["read_wire_out", "set_wire_in"]
+    assert snapshot["read_wire_out"] == MethodLatencyStatistics(
+        num_calls=0,
+        num_errors={},
+        total_ns=0,
+        max_ns=0,
+        bucket_counts=(0,) * LATENCY_HISTOGRAM_NUM_BUCKETS,
+    )
+    assert math.isnan(snapshot["read_wire_out"].get_mean_ns())
+
+
+def test_LatencyRecorder_wrap__records_latency_of_each_call_and_returns_result(
+    mocker,
+):
+    mocker.patch.object(
+        latency.time,
+        "perf_counter_ns",
+        autospec=True,
+        side_effect=[100, 1600, 2000, 2003, 0, 2 ** 60],
+    )
+    recorder = LatencyRecorder(["read_wire_out"])
+    recorded_method = recorder.wrap("read_wire_out", lambda ep_addr: ep_addr + 1)
+    assert recorded_method(0x20) == 0x21
+    assert recorded_method(ep_addr=0x21) == 0x22
+    recorded_method(0x22)
+
+    statistics = recorder.snapshot()["read_wire_out"]
+    assert statistics.num_calls == 3
+    assert statistics.num_errors == {}
+    assert statistics.total_ns == 1500 + 3 + 2 ** 60
+    assert statistics.max_ns == 2 ** 60
+    assert statistics.get_mean_ns() == (1500 + 3 + 2 ** 60) / 3
+    expected_bucket_counts = [0] * LATENCY_HISTOGRAM_NUM_BUCKETS
+    expected_bucket_counts[2] = 1  # 3 ns
+    expected_bucket_counts[11] = 1  # 1500 ns
+    expected_bucket_counts[-1] = 1  # longer than the last bound
+    assert statistics.bucket_counts == tuple(expected_bucket_counts)
+
+
+def test_LatencyRecorder_wrap__records_only_outermost_of_nested_calls():
+    recorder = LatencyRecorder(["start_acquisition", "is_spi_running"])
+    recorded_is_running = recorder.wrap("is_spi_running", lambda: False)
+    recorded_start = recorder.wrap("start_acquisition", recorded_is_running)
+
+    recorded_start()
+    recorded_is_running()
+
+    snapshot = recorder.snapshot()
+    assert snapshot["start_acquisition"].num_calls == 1
+    assert snapshot["is_spi_running"].num_calls == 1
+
+
+def test_LatencyRecorder_wrap__records_calls_again_after_nested_call_raises():
+    recorder = LatencyRecorder(["outer", "inner"])
+
+    def raise_error():
+        raise ValueError()
+
+    recorded_inner = recorder.wrap("inner", raise_error)
+    recorded_outer = recorder.wrap("outer", recorded_inner)
+    with pytest.raises(ValueError):
+        recorded_outer()
+    with pytest.raises(ValueError):
+        recorded_inner()
+
+    snapshot = recorder.snapshot()
+    assert snapshot["outer"].num_calls == 1
+    assert snapshot["outer"].num_errors == {OTHER_ERROR_NAME: 1}
+    assert snapshot["inner"].num_calls == 1
+
+
+def test_LatencyRecorder_wrap__records_calls_on_each_thread_independently():
+    recorder = LatencyRecorder(["outer", "inner"])
+    recorded_inner = recorder.wrap("inner", lambda: None)
+    other_threads = []
+
+    def call_inner_on_other_thread():
+        other_thread = threading.Thread(target=recorded_inner)
+        other_thread.start()
+        other_thread.join()
+        other_threads.append(other_thread)
+
+    recorder.wrap("outer", call_inner_on_other_thread)()
+
+    snapshot = recorder.snapshot()
+    assert len(other_threads) == 1
+    assert snapshot["outer"].num_calls == 1
+    assert snapshot["inner"].num_calls == 1
+
+
+def test_LatencyRecorder_wrap__counts_errors_by_hardware_error_subclass():
+    recorder = LatencyRecorder(["read_wire_out"])
+    errors = [
+        OkHardwareTimeoutError(),
+        OkHardwareTimeoutError(),
+        OpalKellyHardwareError(),
+        ValueError(),
+    ]
+
+    def failing_method():
+        raise errors.pop(0)
+
+    recorded_method = recorder.wrap("read_wire_out", failing_method)
+    for expected_error in (
+        OkHardwareTimeoutError,
+        OkHardwareTimeoutError,
+        OpalKellyHardwareError,
+        ValueError,
+    ):
+        with pytest.raises(expected_error):
+            recorded_method()
+
+    statistics = recorder.snapshot()["read_wire_out"]
+    assert statistics.num_calls == 4
+    assert statistics.num_errors == {
+        "OpalKellyHardwareError": 1,
+        "OkHardwareTimeoutError": 2,
+        OTHER_ERROR_NAME: 1,
+    }
+
+
+def test_LatencyRecorder_reset__clears_counters_and_wrapped_methods_keep_recording():
+    recorder = LatencyRecorder(["read_wire_out"])
+    recorded_method = recorder.wrap("read_wire_out", lambda: None)
+    recorded_method()
+    recorded_method()
+    recorder.reset()
+    assert recorder.snapshot()["read_wire_out"].num_calls == 0
+
+    recorded_method()
+    statistics = recorder.snapshot()["read_wire_out"]
+    assert statistics.num_calls == 1
+    assert sum(statistics.bucket_counts) == 1
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from typing import Any
+
+import pytest
+from xem_wrapper import build_start_acquisition_sequence
+from xem_wrapper import EndpointLockingXem
+from xem_wrapper import FrontPanel
+from xem_wrapper import LOCK_GROUP_DEVICE
+from xem_wrapper import LOCK_GROUP_WIRE_INS
+from xem_wrapper import LOCK_GROUP_WIRE_OUTS
+from xem_wrapper import okCFrontPanel
+from xem_wrapper import okCScriptValue
+from xem_wrapper import PIPE_IN_FIFO
+from xem_wrapper import PIPE_OUT_FIFO
+from xem_wrapper import ROUND_ROBIN_SIZE_BYTES
+from xem_wrapper import WIRE_OUT_NUM_WORDS_FIFO
+
+
+class SimulatedScriptEngine:
+    """Run every script function by calling the board directly, like the Lua engine of a board."""
+
+    # pylint: disable=invalid-name,unused-argument # these stand in for the SWIG methods
+    def __init__(self, board: "SimulatedBoard") -> None:
+        self._board = board
+
+    def LoadScript(self, name: str, code: str) -> None:
+        self._board._call(
+            "device"
+        )  # pylint: disable=protected-access # the engine is part of the board
+
+    def RunScriptFunction(self, function_name: str, arguments: Any) -> list:
+        for group in ("wire_ins", "triggers", "device"):
+            self._board._call(
+                group, seconds=0.0005
+            )  # pylint: disable=protected-access # the engine is part of the board
+        return [okCScriptValue(0)]
+
+
+class SimulatedBoard(okCFrontPanel):
+    """Answer calls like a board, checking that calls sharing state never overlap."""
+
+    # pylint: disable=invalid-name,unused-argument # these override the SWIG methods
+    model = 7
+
+    def __init__(self, transfer_seconds: float = 0.0) -> None:
+        super().__init__()
+        self.transfer_seconds = transfer_seconds
+        self.transfer_started = threading.Event()
+        self.release_transfer = threading.Event()
+        self.release_transfer.set()
+        self.overlapping_calls: list = []
+        self.num_pipe_transfers = 0
+        self._active_calls: dict = {}
+        self._active_calls_lock = threading.Lock()
+
+    def _enter(self, group: Any) -> None:
+        with self._active_calls_lock:
+            if self._active_calls.get(group, 0) > 0:
+                self.overlapping_calls.append(group)
+            self._active_calls[group] = self._active_calls.get(group, 0) + 1
+
+    def _exit(self, group: Any) -> None:
+        with self._active_calls_lock:
+            self._active_calls[group] -= 1
+
+    def _call(self, group: Any, seconds: float = 0.0001) -> None:
+        self._enter(group)
+        time.sleep(seconds)
+        self._exit(group)
+
+    def IsFrontPanelEnabled(self) -> bool:
+        return True
+
+    def UpdateWireOuts(self) -> int:
+        self._call("wire_outs")
+        return 0
+
+    def GetWireOutValue(self, ep_addr: int) -> int:
+        self._call("wire_outs")
+        if ep_addr == WIRE_OUT_NUM_WORDS_FIFO:
+            return ROUND_ROBIN_SIZE_BYTES // 4
+        return 1
+
+    def SetWireInValue(self, ep_addr: int, value: int, mask: int) -> int:
+        self._call("wire_ins")
+        return 0
+
+    def UpdateWireIns(self) -> int:
+        self._call("wire_ins")
+        return 0
+
+    def ReadRegister(self, addr: int) -> int:
+        self._call("device")
+        return addr
+
+    def ActivateTriggerIn(self, ep_addr: int, bit: int) -> int:
+        self._call("triggers")
+        return 0
+
+    def CreateLuaScriptEngine(self) -> SimulatedScriptEngine:
+        self._call("device")
+        return SimulatedScriptEngine(self)
+
+    def ReadFromBlockPipeOut(self, ep_addr: int, block_size: int, data: Any) -> int:
+        raise NotImplementedError("Transfers should release the GIL")
+
+    def ReadFromBlockPipeOutThr(self, ep_addr: int, block_size: int, data: Any) -> int:
+        self._enter(ep_addr)
+        self.transfer_started.set()
+        self.release_transfer.wait(timeout=5)
+        time.sleep(self.transfer_seconds)
+        self.num_pipe_transfers += 1
+        self._exit(ep_addr)
+        return len(data)
+
+    def WriteToBlockPipeInThr(self, ep_addr: int, block_size: int, data: Any) -> int:
+        self._call(ep_addr, seconds=self.transfer_seconds)
+        return len(data)
+
+
+def test_EndpointLockingXem__passes_attributes_through_and_caches_locked_methods():
+    board = SimulatedBoard()
+    locking_xem = EndpointLockingXem(board)
+    assert locking_xem.get_xem() is board
+    assert locking_xem.model == 7
+    assert locking_xem.GetWireOutValue(0x21) == 1
+    assert "GetWireOutValue" in vars(locking_xem)
+    assert locking_xem.ReadRegister(0x10) == 0x10
+
+
+def test_EndpointLockingXem__does_not_forward_private_attributes():
+    locking_xem = EndpointLockingXem(SimulatedBoard())
+    with pytest.raises(AttributeError):
+        locking_xem._active_calls  # pylint: disable=pointless-statement,protected-access # testing the lookup
+
+
+def test_EndpointLockingXem__makes_transfers_with_threaded_variants_if_enabled():
+    data = bytearray(32)
+    assert EndpointLockingXem(SimulatedBoard()).ReadFromBlockPipeOut(
+        PIPE_OUT_FIFO, 32, data
+    ) == len(data)
+    with pytest.raises(NotImplementedError, match="release the GIL"):
+        EndpointLockingXem(
+            SimulatedBoard(), use_threaded_transfers=False
+        ).ReadFromBlockPipeOut(PIPE_OUT_FIFO, 32, data)
+
+
+def test_EndpointLockingXem__has_one_lock_per_group_and_per_pipe():
+    locking_xem = EndpointLockingXem(SimulatedBoard())
+    assert locking_xem.get_pipe_lock(PIPE_OUT_FIFO) is locking_xem.get_pipe_lock(
+        PIPE_OUT_FIFO
+    )
+    assert locking_xem.get_pipe_lock(PIPE_OUT_FIFO) is not locking_xem.get_pipe_lock(
+        PIPE_IN_FIFO
+    )
+    assert locking_xem.get_lock(LOCK_GROUP_WIRE_OUTS) is not locking_xem.get_lock(
+        LOCK_GROUP_DEVICE
+    )
+
+
+def test_EndpointLockingXem_hold_locks__holds_only_the_given_groups():
+    locking_xem = EndpointLockingXem(SimulatedBoard())
+
+    def is_free(lock_group):
+        is_acquired = []
+
+        def acquire():
+            lock = locking_xem.get_lock(lock_group)
+            is_acquired.append(lock.acquire(blocking=False))
+            if is_acquired[0]:
+                lock.release()
+
+        other_thread = threading.Thread(target=acquire)
+        other_thread.start()
+        other_thread.join()
+        return is_acquired[0]
+
+    with locking_xem.hold_locks((LOCK_GROUP_DEVICE, LOCK_GROUP_WIRE_INS)):
+        assert is_free(LOCK_GROUP_DEVICE) is False
+        assert is_free(LOCK_GROUP_WIRE_INS) is False
+        assert is_free(LOCK_GROUP_WIRE_OUTS) is True
+    assert is_free(LOCK_GROUP_DEVICE) is True
+
+
+def test_FrontPanel__thread_safe__reads_wire_outs_while_a_fifo_read_is_in_progress():
+    board = SimulatedBoard()
+    board.release_transfer.clear()
+    fp = FrontPanel(board, thread_safe=True)
+    fp.initialize_board()
+    fifo_reader = threading.Thread(target=fp.read_from_fifo)
+    fifo_reader.start()
+    assert board.transfer_started.wait(timeout=5)
+
+    # with a single lock around every call these would wait for the whole transfer
+    for _ in range(20):
+        assert fp.read_wire_out(0x21) == 1
+        fp.set_wire_in(0x00, 0x0001, 0x0001)
+        assert fp.read_register(0x10) == 0x10
+    assert board.num_pipe_transfers == 0
+    assert fifo_reader.is_alive()
+
+    board.release_transfer.set()
+    fifo_reader.join()
+    assert board.num_pipe_transfers == 1
+    assert board.overlapping_calls == []
+
+
+def test_FrontPanel__thread_safe__stress_test_never_overlaps_calls_that_share_state():
+    board = SimulatedBoard(transfer_seconds=0.002)
+    fp = FrontPanel(board, thread_safe=True)
+    fp.initialize_board()
+    num_iterations = 25
+    errors = []
+    control_latencies = []
+
+    def run(operation):
+        try:
+            for _ in range(num_iterations):
+                operation()
+        except Exception as e:  # pylint: disable=broad-except # reported by the test
+            errors.append(e)
+
+    def read_wire_out():
+        start = time.perf_counter()
+        fp.read_wire_out(0x21)
+        control_latencies.append(time.perf_counter() - start)
+
+    operations = [
+        fp.read_from_fifo,
+        lambda: fp.read_from_fifo_into(bytearray(ROUND_ROBIN_SIZE_BYTES)),
+        lambda: fp.write_to_pipe_in(bytearray(1024)),
+        read_wire_out,
+        lambda: fp.set_wire_in(0x00, 0x0001, 0x0001),
+        fp.get_num_words_fifo,
+        lambda: fp.read_register(0x10),
+    ]
+    threads = [
+        threading.Thread(target=run, args=(operation,)) for operation in operations
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    assert errors == []
+    assert board.overlapping_calls == []
+    assert board.num_pipe_transfers == num_iterations * 2
+    assert fp.get_fifo_telemetry_snapshot().num_reads == num_iterations * 2
+    # the two FIFO readers share the pipe, so the run takes at least the time of all their transfers in sequence
+    assert elapsed >= num_iterations * 2 * board.transfer_seconds
+    # but control reads are not held up behind them
+    assert sorted(control_latencies)[len(control_latencies) // 2] < (
+        board.transfer_seconds
+    )
+
+
+def test_FrontPanel__thread_safe__runs_sequences_without_overlapping_other_calls():
+    board = SimulatedBoard()
+    fp = FrontPanel(board, thread_safe=True)
+    fp.initialize_board()
+    sequence = build_start_acquisition_sequence()
+    fp.register_sequence(sequence)
+    num_iterations = 25
+    errors = []
+
+    def run(operation):
+        try:
+            for _ in range(num_iterations):
+                operation()
+        except Exception as e:  # pylint: disable=broad-except # reported by the test
+            errors.append(e)
+
+    operations = [
+        lambda: fp.run_sequence(sequence.get_name(), 1000),
+        lambda: fp.run_sequence(sequence.get_name(), 1000),
+        lambda: fp.set_wire_in(0x00, 0x0001, 0x0001),
+        lambda: fp.activate_trigger_in(0x41, 0),
+        lambda: fp.read_register(0x10),
+        fp.read_from_fifo,
+    ]
+    threads = [
+        threading.Thread(target=run, args=(operation,)) for operation in operations
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert board.overlapping_calls == []
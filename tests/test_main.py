@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
+import math
 import os
 import struct
 
 import pytest
 from xem_wrapper import activate_trigger_in
+from xem_wrapper import align_max_read_num_bytes
+from xem_wrapper import benchmark_block_sizes
 from xem_wrapper import BLOCK_SIZE
 from xem_wrapper import build_header_magic_number_bytes
 from xem_wrapper import check_file_exists
@@ -11,32 +14,59 @@ from xem_wrapper import check_header
 from xem_wrapper import convert_sample_idx
 from xem_wrapper import convert_wire_value
 from xem_wrapper import convert_word
+from xem_wrapper import create_lua_script_engine
 from xem_wrapper import DATA_FRAME_SIZE_WORDS
 from xem_wrapper import DATA_FRAMES_PER_ROUND_ROBIN
+from xem_wrapper import FifoRead
+from xem_wrapper import FrontPanelDevices
 from xem_wrapper import get_device_id
 from xem_wrapper import get_num_words_fifo
+from xem_wrapper import get_num_words_free_pipe_in
+from xem_wrapper import get_read_alignment_num_bytes
 from xem_wrapper import get_serial_number
 from xem_wrapper import HEADER_MAGIC_NUMBER
 from xem_wrapper import initialize_board
 from xem_wrapper import is_pll_locked
+from xem_wrapper import is_short_transfer
 from xem_wrapper import is_spi_running
+from xem_wrapper import is_triggered
+from xem_wrapper import load_script
 from xem_wrapper import main
+from xem_wrapper import MAX_BLOCK_SIZE
+from xem_wrapper import okCFrontPanel
+from xem_wrapper import okCScriptEngine
+from xem_wrapper import okCScriptValue
 from xem_wrapper import OkHardwareDeviceNotOpenError
 from xem_wrapper import OkHardwareFailedError
 from xem_wrapper import OkHardwareInvalidEndpointError
 from xem_wrapper import OkHardwareUnsupportedFeatureError
+from xem_wrapper import okTDeviceInfo
+from xem_wrapper import OpalKellyFifoTimeoutError
 from xem_wrapper import OpalKellyFileNotFoundError
 from xem_wrapper import OpalKellyFrontPanelNotSupportedError
 from xem_wrapper import OpalKellyHeaderNotEightBytesError
 from xem_wrapper import OpalKellyIDGreaterThan32BytesError
+from xem_wrapper import OpalKellyInvalidBlockSizeError
+from xem_wrapper import OpalKellyMaxReadSizeTooSmallError
 from xem_wrapper import OpalKellyNoDeviceFoundError
+from xem_wrapper import OpalKellyPipeInDataNotBlockAlignedError
 from xem_wrapper import OpalKellySampleIdxNotFourBytesError
+from xem_wrapper import OpalKellyScriptError
+from xem_wrapper import OpalKellyScriptValueOutOfRangeError
 from xem_wrapper import OpalKellyWordNotTwoBytesError
 from xem_wrapper import open_board
+from xem_wrapper import PIPE_IN_FIFO
 from xem_wrapper import PIPE_OUT_FIFO
 from xem_wrapper import read_from_fifo
+from xem_wrapper import read_from_fifo_into
+from xem_wrapper import read_from_fifo_into_with_status
+from xem_wrapper import read_from_fifo_with_status
+from xem_wrapper import read_register
+from xem_wrapper import read_registers
 from xem_wrapper import read_wire_out
+from xem_wrapper import read_wire_outs
 from xem_wrapper import reset_fifos
+from xem_wrapper import run_script_function
 from xem_wrapper import set_device_id
 from xem_wrapper import set_num_samples
 from xem_wrapper import set_run_mode
@@ -44,15 +74,19 @@ from xem_wrapper import set_wire_in
 from xem_wrapper import start_acquisition
 from xem_wrapper import stop_acquisition
 from xem_wrapper import TRIGGER_IN_SPI
+from xem_wrapper import update_trigger_outs
+from xem_wrapper import validate_block_size
 from xem_wrapper import validate_device_id
+from xem_wrapper import validate_pipe_in_num_bytes
 from xem_wrapper import WIRE_IN_NUM_SAMPLES
 from xem_wrapper import WIRE_IN_RESET_MODE
 from xem_wrapper import WIRE_OUT_IS_PLL_LOCKED
 from xem_wrapper import WIRE_OUT_IS_SPI_RUNNING
 from xem_wrapper import WIRE_OUT_NUM_WORDS_FIFO
-from xem_wrapper import FrontPanelDevices
-from xem_wrapper import okCFrontPanel
-from xem_wrapper import okTDeviceInfo
+from xem_wrapper import WIRE_OUT_NUM_WORDS_FREE_PIPE_IN
+from xem_wrapper import write_register
+from xem_wrapper import write_registers
+from xem_wrapper import write_to_pipe_in
 
 from .fixtures import fixture_test_bit_file_paths
 
@@ -161,6 +195,50 @@ def test_read_wire_out__raises_correct_error(
         read_wire_out(dummy_xem, 0x00)
 
 
+def test_read_wire_outs__reads_every_wire_out_after_a_single_update(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_update_method = mocker.patch.object(
+        dummy_xem, "UpdateWireOuts", autospec=True, return_value=0
+    )
+    mocker.patch.object(
+        dummy_xem,
+        "GetWireOutValue",
+        autospec=True,
+        side_effect=lambda ep_addr: ep_addr * 2,
+    )
+    assert read_wire_outs(dummy_xem, [0x20, 0x22, 0x23]) == {
+        0x20: 0x40,
+        0x22: 0x44,
+        0x23: 0x46,
+    }
+    mocked_update_method.assert_called_once_with()
+
+
+@pytest.mark.parametrize(
+    "test_mock_update_value,test_mock_get_value,expected_error,test_description",
+    [
+        (-8, 0, OkHardwareDeviceNotOpenError, "raises error when device is not open"),
+        (0, -1, OkHardwareFailedError, "raises error when operation fails"),
+    ],
+)
+def test_read_wire_outs__raises_correct_error(
+    test_mock_update_value,
+    test_mock_get_value,
+    expected_error,
+    test_description,
+    mocker,
+):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(
+        dummy_xem, "UpdateWireOuts", autospec=True, return_value=test_mock_update_value
+    )
+    mocker.patch.object(
+        dummy_xem, "GetWireOutValue", autospec=True, return_value=test_mock_get_value
+    )
+    with pytest.raises(expected_error):
+        read_wire_outs(dummy_xem, [0x20, 0x22])
+
+
 @pytest.mark.parametrize(
     "test_sample_idx_byte_array,expected,test_description",
     [
@@ -816,7 +894,10 @@ def test_read_from_fifo__calls_methods_with_correct_signature(
     )
     mocked_set_method = mocker.patch.object(main, "set_wire_in", autospec=True)
     mocked_read_method = mocker.patch.object(
-        dummy_xem, "ReadFromBlockPipeOut", autospec=True, return_value=0
+        dummy_xem,
+        "ReadFromBlockPipeOut",
+        autospec=True,
+        side_effect=lambda ep_addr, block_size, data_buffer: len(data_buffer),
     )
 
     read_from_fifo(dummy_xem)
@@ -871,7 +952,7 @@ def test_read_from_fifo__returns_correct_values(test_data, test_description, moc
 
     def side_effect(*args, **kwargs):
         args[2][:] = test_data[:]
-        return 0
+        return len(test_data)
 
     mocker.patch.object(
         dummy_xem, "ReadFromBlockPipeOut", autospec=True, side_effect=side_effect
@@ -912,6 +993,77 @@ def test_read_from_fifo__returns_empty_array_if_size_of_num_words_is_less_requir
     assert result == expected
 
 
+@pytest.mark.parametrize(
+    "test_num_bytes_read,expected_num_bytes,test_description",
+    [
+        (0, 0, "returns empty bytearray when no bytes transferred"),
+        (288, 288, "returns first round robin when one of two transferred"),
+        (300, 288, "drops partial round robin at end of transfer"),
+    ],
+)
+def test_read_from_fifo_with_status__returns_only_whole_round_robins_transferred_after_short_transfer(
+    test_num_bytes_read, expected_num_bytes, test_description, mocker
+):
+    dummy_xem = okCFrontPanel()
+    test_data = bytearray([i % 256 for i in range(576)])
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=150)
+    mocker.patch.object(main, "set_wire_in", autospec=True)
+
+    def side_effect(*args, **kwargs):
+        args[2][:test_num_bytes_read] = test_data[:test_num_bytes_read]
+        return test_num_bytes_read
+
+    mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True, side_effect=side_effect
+    )
+
+    data, fifo_read = read_from_fifo_with_status(dummy_xem)
+
+    assert isinstance(data, bytearray) is True
+    assert data == test_data[:expected_num_bytes]
+    assert fifo_read == FifoRead(
+        num_words_fifo=150, num_bytes_requested=576, num_bytes_read=test_num_bytes_read
+    )
+    assert is_short_transfer(fifo_read) is True
+
+
+def test_read_from_fifo_with_status__reports_full_transfer(mocker):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=144)
+    mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True, return_value=576
+    )
+
+    data, fifo_read = read_from_fifo_with_status(dummy_xem)
+
+    assert isinstance(data, bytearray) is True
+    assert len(data) == 576
+    assert fifo_read == FifoRead(
+        num_words_fifo=144, num_bytes_requested=576, num_bytes_read=576
+    )
+    assert is_short_transfer(fifo_read) is False
+
+
+def test_read_from_fifo_with_status__reports_fifo_level_without_reading_when_less_than_one_round_robin_in_fifo(
+    mocker,
+):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=71)
+    mocked_read_method = mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True
+    )
+
+    data, fifo_read = read_from_fifo_with_status(dummy_xem)
+
+    assert data == bytearray(0)
+    assert fifo_read == FifoRead(
+        num_words_fifo=71, num_bytes_requested=0, num_bytes_read=0
+    )
+    assert is_short_transfer(fifo_read) is False
+    mocked_read_method.assert_not_called()
+
+
 def test_read_from_fifo__raises_error_when_device_returns_unsupported_feature(mocker):
     dummy_xem = okCFrontPanel()
     mocker.patch.object(
@@ -930,6 +1082,427 @@ def test_read_from_fifo__raises_error_when_device_returns_unsupported_feature(mo
         read_from_fifo(dummy_xem)
 
 
+@pytest.mark.parametrize(
+    "test_block_size,test_description",
+    [
+        (0, "raises error with block size of zero"),
+        (-32, "raises error with negative block size"),
+        (48, "raises error with block size that is not a power of 2"),
+        (MAX_BLOCK_SIZE * 2, "raises error with block size larger than max"),
+    ],
+)
+def test_validate_block_size__raises_error_with_invalid_block_size(
+    test_block_size, test_description
+):
+    with pytest.raises(OpalKellyInvalidBlockSizeError, match=str(test_block_size)):
+        validate_block_size(test_block_size)
+
+
+@pytest.mark.parametrize(
+    "test_block_size,test_description",
+    [
+        (1, "does not raise error with block size of one"),
+        (BLOCK_SIZE, "does not raise error with default block size"),
+        (MAX_BLOCK_SIZE, "does not raise error with max block size"),
+    ],
+)
+def test_validate_block_size__does_not_raise_error_with_valid_block_size(
+    test_block_size, test_description
+):
+    validate_block_size(test_block_size)
+
+
+@pytest.mark.parametrize(
+    "test_block_size,expected_num_bytes,test_description",
+    [
+        (BLOCK_SIZE, 288, "returns one round robin with default block size"),
+        (64, 576, "returns two round robins with block size of 64"),
+        (1024, 9216, "returns 32 round robins with block size of 1024"),
+    ],
+)
+def test_get_read_alignment_num_bytes__returns_correct_values(
+    test_block_size, expected_num_bytes, test_description
+):
+    actual = get_read_alignment_num_bytes(test_block_size)
+    assert actual == expected_num_bytes
+    assert actual % test_block_size == 0
+    assert actual % (DATA_FRAME_SIZE_WORDS * DATA_FRAMES_PER_ROUND_ROBIN * 4) == 0
+
+
+def test_get_read_alignment_num_bytes__uses_default_block_size():
+    assert get_read_alignment_num_bytes() == get_read_alignment_num_bytes(BLOCK_SIZE)
+
+
+@pytest.mark.parametrize(
+    "test_num_words,expected_read_buffer_size,test_description",
+    [
+        (143, 0, "does not read with less than two round robins in FIFO"),
+        (144, 576, "reads two round robins with two round robins in FIFO"),
+        (287, 576, "reads two round robins with one word short of four round robins"),
+        (288, 1152, "reads four round robins with four round robins in FIFO"),
+    ],
+)
+def test_read_from_fifo__aligns_read_size_to_given_block_size(
+    test_num_words, expected_read_buffer_size, test_description, mocker
+):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(
+        main, "get_num_words_fifo", autospec=True, return_value=test_num_words
+    )
+    mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocked_read_method = mocker.patch.object(
+        dummy_xem,
+        "ReadFromBlockPipeOut",
+        autospec=True,
+        side_effect=lambda ep_addr, block_size, data_buffer: len(data_buffer),
+    )
+
+    result = read_from_fifo(dummy_xem, block_size=64)
+
+    assert len(result) == expected_read_buffer_size
+    if expected_read_buffer_size > 0:
+        mocked_read_method.assert_called_once_with(
+            PIPE_OUT_FIFO, 64, bytearray(expected_read_buffer_size)
+        )
+    else:
+        mocked_read_method.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "test_max_bytes,test_block_size,expected_num_bytes,test_description",
+    [
+        (288, BLOCK_SIZE, 288, "returns one round robin when given one round robin"),
+        (1000, BLOCK_SIZE, 864, "rounds down to whole round robins"),
+        (1151, 64, 576, "rounds down to whole blocks and round robins"),
+    ],
+)
+def test_align_max_read_num_bytes__returns_correct_values(
+    test_max_bytes, test_block_size, expected_num_bytes, test_description
+):
+    actual = align_max_read_num_bytes(test_max_bytes, test_block_size)
+    assert actual == expected_num_bytes
+
+
+def test_align_max_read_num_bytes__raises_error_when_less_than_one_aligned_read():
+    with pytest.raises(OpalKellyMaxReadSizeTooSmallError, match="576"):
+        align_max_read_num_bytes(575, block_size=64)
+
+
+@pytest.mark.parametrize(
+    "test_num_words,test_max_bytes,expected_read_buffer_size,test_description",
+    [
+        (720, 288 * 4, 288 * 4, "reads only max bytes when more data in FIFO"),
+        (720, 1000, 288 * 3, "reads max bytes rounded down to round robins"),
+        (144, 288 * 4, 288 * 2, "reads all data when less than max bytes in FIFO"),
+    ],
+)
+def test_read_from_fifo__reads_at_most_max_bytes(
+    test_num_words, test_max_bytes, expected_read_buffer_size, test_description, mocker
+):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(
+        main, "get_num_words_fifo", autospec=True, return_value=test_num_words
+    )
+    mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocked_read_method = mocker.patch.object(
+        dummy_xem,
+        "ReadFromBlockPipeOut",
+        autospec=True,
+        side_effect=lambda ep_addr, block_size, data_buffer: len(data_buffer),
+    )
+
+    result = read_from_fifo(dummy_xem, max_bytes=test_max_bytes)
+
+    assert len(result) == expected_read_buffer_size
+    mocked_read_method.assert_called_once_with(
+        PIPE_OUT_FIFO, BLOCK_SIZE, bytearray(expected_read_buffer_size)
+    )
+
+
+def test_read_from_fifo__raises_error_before_reading_when_max_bytes_is_too_small(
+    mocker,
+):
+    dummy_xem = okCFrontPanel()
+    mocked_get_method = mocker.patch.object(
+        main, "get_num_words_fifo", autospec=True, return_value=720
+    )
+    with pytest.raises(OpalKellyMaxReadSizeTooSmallError):
+        read_from_fifo(dummy_xem, max_bytes=287)
+    mocked_get_method.assert_not_called()
+
+
+def test_read_from_fifo_into__reads_directly_into_given_buffer(mocker):
+    dummy_xem = okCFrontPanel()
+    test_data = bytearray([i % 256 for i in range(576)])
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=144)
+    mocked_set_method = mocker.patch.object(main, "set_wire_in", autospec=True)
+
+    def side_effect(ep_addr, block_size, data_buffer):
+        data_buffer[:] = test_data
+        return len(data_buffer)
+
+    mocked_read_method = mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True, side_effect=side_effect
+    )
+    test_buffer = bytearray(1000)
+
+    actual = read_from_fifo_into(dummy_xem, test_buffer)
+
+    assert actual == 576
+    assert test_buffer[:576] == test_data
+    assert test_buffer[576:] == bytearray(1000 - 576)
+    mocked_read_method.assert_called_once_with(PIPE_OUT_FIFO, BLOCK_SIZE, mocker.ANY)
+    assert mocked_set_method.call_args_list == [
+        mocker.call(dummy_xem, WIRE_IN_RESET_MODE, 0x0002, 0x0002),
+        mocker.call(dummy_xem, WIRE_IN_RESET_MODE, 0x0000, 0x0002),
+    ]
+
+
+@pytest.mark.parametrize(
+    "test_num_words,test_buffer_size,expected_num_bytes_to_read,test_description",
+    [
+        (
+            720,
+            288 * 2,
+            288 * 2,
+            "reads only the size of the buffer when more data in FIFO",
+        ),
+        (720, 1000, 288 * 3, "reads buffer size rounded down to round robins"),
+        (144, 288 * 4, 288 * 2, "reads all data when less than buffer size in FIFO"),
+    ],
+)
+def test_read_from_fifo_into__reads_at_most_size_of_buffer(
+    test_num_words,
+    test_buffer_size,
+    expected_num_bytes_to_read,
+    test_description,
+    mocker,
+):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(
+        main, "get_num_words_fifo", autospec=True, return_value=test_num_words
+    )
+    mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocked_read_method = mocker.patch.object(
+        dummy_xem,
+        "ReadFromBlockPipeOut",
+        autospec=True,
+        side_effect=lambda ep_addr, block_size, data_buffer: len(data_buffer),
+    )
+
+    actual = read_from_fifo_into(dummy_xem, bytearray(test_buffer_size))
+
+    assert actual == expected_num_bytes_to_read
+    assert len(mocked_read_method.call_args[0][2]) == expected_num_bytes_to_read
+
+
+def test_read_from_fifo_into__returns_0_without_reading_when_less_than_one_round_robin_in_fifo(
+    mocker,
+):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=71)
+    mocked_read_method = mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True
+    )
+
+    assert read_from_fifo_into(dummy_xem, bytearray(288)) == 0
+    mocked_read_method.assert_not_called()
+
+
+def test_read_from_fifo_into_with_status__reports_short_transfer(mocker):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=150)
+    mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True, return_value=300
+    )
+    test_buffer = bytearray(1000)
+
+    fifo_read = read_from_fifo_into_with_status(dummy_xem, test_buffer)
+
+    assert fifo_read == FifoRead(
+        num_words_fifo=150, num_bytes_requested=576, num_bytes_read=300
+    )
+    assert is_short_transfer(fifo_read) is True
+    # only the whole round robin is counted as read
+    assert read_from_fifo_into(dummy_xem, test_buffer) == 288
+
+
+def test_read_from_fifo_into_with_status__reports_fifo_level_without_reading_when_less_than_one_round_robin_in_fifo(
+    mocker,
+):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=71)
+    mocked_read_method = mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True
+    )
+
+    fifo_read = read_from_fifo_into_with_status(dummy_xem, bytearray(288))
+
+    assert fifo_read == FifoRead(
+        num_words_fifo=71, num_bytes_requested=0, num_bytes_read=0
+    )
+    mocked_read_method.assert_not_called()
+
+
+def test_read_from_fifo_into__raises_error_when_buffer_is_smaller_than_one_round_robin():
+    dummy_xem = okCFrontPanel()
+    with pytest.raises(OpalKellyMaxReadSizeTooSmallError):
+        read_from_fifo_into(dummy_xem, bytearray(287))
+
+
+def test_benchmark_block_sizes__reads_from_pipe_with_each_block_size(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_set_method = mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=2 ** 20)
+    mocked_read_method = mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True, return_value=0
+    )
+
+    benchmark_block_sizes(dummy_xem, [32, 64], num_repeats=2)
+
+    expected_buffer = bytearray(get_read_alignment_num_bytes(64))
+    assert mocked_read_method.call_args_list == [
+        mocker.call(PIPE_OUT_FIFO, 32, expected_buffer),
+        mocker.call(PIPE_OUT_FIFO, 32, expected_buffer),
+        mocker.call(PIPE_OUT_FIFO, 64, expected_buffer),
+        mocker.call(PIPE_OUT_FIFO, 64, expected_buffer),
+    ]
+    mocked_set_method.assert_has_calls(
+        (
+            mocker.call(dummy_xem, WIRE_IN_RESET_MODE, 0x0002, 0x0002),
+            mocker.call(dummy_xem, WIRE_IN_RESET_MODE, 0x0000, 0x0002),
+        ),
+    )
+
+
+def test_benchmark_block_sizes__returns_throughput_of_each_block_size(mocker):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=2 ** 20)
+    mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True, return_value=1000
+    )
+    # only the transfers are timed, not the time spent between them
+    mocker.patch.object(
+        main.time,
+        "perf_counter",
+        autospec=True,
+        side_effect=[0.0, 1.0, 5.0, 6.0, 9.0, 9.25, 9.5, 9.75],
+    )
+
+    actual = benchmark_block_sizes(dummy_xem, [32, 1024], num_bytes=1000, num_repeats=2)
+
+    assert actual == {32: 1000.0, 1024: 4000.0}
+
+
+def test_benchmark_block_sizes__returns_infinite_throughput_when_transfers_are_too_fast_to_time(
+    mocker,
+):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=2 ** 20)
+    mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True, return_value=1000
+    )
+    mocker.patch.object(main.time, "perf_counter", autospec=True, return_value=3.0)
+
+    actual = benchmark_block_sizes(dummy_xem, [32], num_bytes=1000, num_repeats=2)
+
+    assert actual == {32: math.inf}
+
+
+def test_benchmark_block_sizes__waits_for_fifo_to_hold_enough_data_for_each_transfer(
+    mocker,
+):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocked_num_words = mocker.patch.object(
+        main, "get_num_words_fifo", autospec=True, side_effect=[0, 71, 72, 72]
+    )
+    mocked_sleep = mocker.patch.object(main.time, "sleep", autospec=True)
+    mocked_read_method = mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True, return_value=288
+    )
+
+    benchmark_block_sizes(dummy_xem, [32], num_bytes=288, num_repeats=2)
+
+    assert mocked_num_words.call_count == 4
+    assert mocked_sleep.call_count == 2
+    assert mocked_read_method.call_count == 2
+
+
+def test_benchmark_block_sizes__raises_error_when_fifo_does_not_fill_in_time(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_set_method = mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=0)
+    mocker.patch.object(main.time, "sleep", autospec=True)
+    mocker.patch.object(
+        main.time, "perf_counter", autospec=True, side_effect=[0.0, 0.5, 1.0]
+    )
+    mocked_read_method = mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True, return_value=288
+    )
+
+    with pytest.raises(OpalKellyFifoTimeoutError):
+        benchmark_block_sizes(dummy_xem, [32], fifo_timeout=1.0)
+    mocked_read_method.assert_not_called()
+    # read mode is not left enabled
+    mocked_set_method.assert_called_with(dummy_xem, WIRE_IN_RESET_MODE, 0x0000, 0x0002)
+
+
+def test_benchmark_block_sizes__raises_error_with_invalid_block_size(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_read_method = mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True, return_value=0
+    )
+    with pytest.raises(OpalKellyInvalidBlockSizeError):
+        benchmark_block_sizes(dummy_xem, [32, 48])
+    mocked_read_method.assert_not_called()
+
+
+def test_benchmark_block_sizes__raises_error_when_device_returns_error(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_set_method = mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocker.patch.object(main, "get_num_words_fifo", autospec=True, return_value=2 ** 20)
+    mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True, return_value=-15
+    )
+    with pytest.raises(OkHardwareUnsupportedFeatureError):
+        benchmark_block_sizes(dummy_xem, [32])
+    mocked_set_method.assert_called_with(dummy_xem, WIRE_IN_RESET_MODE, 0x0000, 0x0002)
+
+
+def test_benchmark_block_sizes__rounds_transfers_up_to_read_alignment_of_each_block_size(
+    mocker,
+):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(main, "set_wire_in", autospec=True)
+    mocked_num_words = mocker.patch.object(
+        main, "get_num_words_fifo", autospec=True, return_value=2 ** 20
+    )
+    mocked_read_method = mocker.patch.object(
+        dummy_xem, "ReadFromBlockPipeOut", autospec=True, return_value=0
+    )
+
+    benchmark_block_sizes(dummy_xem, [32, 1024], num_bytes=1000, num_repeats=1)
+
+    actual_num_bytes = [len(call.args[2]) for call in mocked_read_method.call_args_list]
+    assert actual_num_bytes == [
+        get_read_alignment_num_bytes(32) * 4,
+        get_read_alignment_num_bytes(1024),
+    ]
+    assert mocked_num_words.call_count == 2
+
+
+def test_benchmark_block_sizes__raises_error_with_no_bytes_to_transfer(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_set_method = mocker.patch.object(main, "set_wire_in", autospec=True)
+    with pytest.raises(ValueError, match="num_bytes"):
+        benchmark_block_sizes(dummy_xem, [32], num_bytes=0)
+    mocked_set_method.assert_not_called()
+
+
 def test_reset_fifos__calls_methods_with_correct_signature(mocker):
     dummy_xem = okCFrontPanel()
     mocked_set_method = mocker.patch.object(main, "set_wire_in", autospec=True)
@@ -1036,3 +1609,297 @@ def test_activate_trigger_in__raises_correct_errors(
 
     with pytest.raises(expected_error):
         activate_trigger_in(dummy_xem, 0x00, 0x00)
+
+
+def test_update_trigger_outs__calls_method_on_xem(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_update = mocker.patch.object(
+        dummy_xem, "UpdateTriggerOuts", autospec=True, return_value=0
+    )
+    update_trigger_outs(dummy_xem)
+
+    mocked_update.assert_called_once_with()
+
+
+def test_update_trigger_outs__raises_error_when_device_returns_error_code(mocker):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(dummy_xem, "UpdateTriggerOuts", autospec=True, return_value=-8)
+    with pytest.raises(OkHardwareDeviceNotOpenError):
+        update_trigger_outs(dummy_xem)
+
+
+@pytest.mark.parametrize(
+    "test_xem_return,expected,test_description",
+    [
+        (True, True, "returns True when bits were triggered"),
+        (False, False, "returns False when bits were not triggered"),
+    ],
+)
+def test_is_triggered__returns_result_of_xem(
+    test_xem_return, expected, test_description, mocker
+):
+    dummy_xem = okCFrontPanel()
+    mocked_is_triggered = mocker.patch.object(
+        dummy_xem, "IsTriggered", autospec=True, return_value=test_xem_return
+    )
+    assert is_triggered(dummy_xem, 0x60, 0x04) is expected
+
+    mocked_is_triggered.assert_called_once_with(0x60, 0x04)
+
+
+def test_read_register__returns_value_from_xem(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_read = mocker.patch.object(
+        dummy_xem, "ReadRegister", autospec=True, return_value=0xDEADBEEF
+    )
+    assert read_register(dummy_xem, 0x10) == 0xDEADBEEF
+
+    mocked_read.assert_called_once_with(0x10)
+
+
+def test_read_register__raises_hardware_error_when_device_reports_error_code():
+    dummy_xem = okCFrontPanel()
+    with pytest.raises(OkHardwareDeviceNotOpenError):
+        read_register(dummy_xem, 0x10)
+
+
+@pytest.mark.parametrize(
+    "test_message,test_description",
+    [
+        ("", "re-raises error with empty message"),
+        ("Something went wrong", "re-raises error without a return code"),
+        ("Error 0", "re-raises error with a non-error return code"),
+    ],
+)
+def test_read_register__re_raises_runtime_error_without_error_code(
+    test_message, test_description, mocker
+):
+    dummy_xem = okCFrontPanel()
+    mocker.patch.object(
+        dummy_xem,
+        "ReadRegister",
+        autospec=True,
+        side_effect=RuntimeError(test_message),
+    )
+    with pytest.raises(RuntimeError) as exc_info:
+        read_register(dummy_xem, 0x10)
+    assert str(exc_info.value) == test_message
+
+
+def test_write_register__calls_method_on_xem(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_write = mocker.patch.object(
+        dummy_xem, "WriteRegister", autospec=True, return_value=0
+    )
+    write_register(dummy_xem, 0x10, 0x1234)
+
+    mocked_write.assert_called_once_with(0x10, 0x1234)
+
+
+def test_write_register__raises_error_when_device_returns_error_code():
+    dummy_xem = okCFrontPanel()
+    with pytest.raises(OkHardwareDeviceNotOpenError):
+        write_register(dummy_xem, 0x10, 0x1234)
+
+
+def test_read_registers__reads_all_addresses_in_one_call_and_returns_values_in_order(
+    mocker,
+):
+    dummy_xem = okCFrontPanel()
+
+    def fill_register_entries(entries):
+        # iterating over the SWIG vector yields copies, so entries must be updated by index
+        for entry_idx in range(len(entries)):
+            entries[entry_idx].data = entries[entry_idx].address * 2
+        return 0
+
+    mocked_read = mocker.patch.object(
+        dummy_xem, "ReadRegisters", autospec=True, side_effect=fill_register_entries
+    )
+    assert read_registers(dummy_xem, [0x30, 0x10, 0x20]) == [0x60, 0x20, 0x40]
+
+    assert mocked_read.call_count == 1
+
+
+def test_read_registers__raises_error_when_device_returns_error_code():
+    dummy_xem = okCFrontPanel()
+    with pytest.raises(OkHardwareDeviceNotOpenError):
+        read_registers(dummy_xem, [0x10])
+
+
+def test_write_registers__writes_whole_register_map_in_one_call(mocker):
+    dummy_xem = okCFrontPanel()
+    written_registers = []
+
+    def record_register_entries(entries):
+        written_registers.extend((entry.address, entry.data) for entry in entries)
+        return 0
+
+    mocked_write = mocker.patch.object(
+        dummy_xem, "WriteRegisters", autospec=True, side_effect=record_register_entries
+    )
+    write_registers(dummy_xem, {0x30: 1, 0x10: 2, 0x20: 0xFFFFFFFF})
+
+    assert mocked_write.call_count == 1
+    assert written_registers == [(0x30, 1), (0x10, 2), (0x20, 0xFFFFFFFF)]
+
+
+def test_write_registers__raises_error_when_device_returns_error_code():
+    dummy_xem = okCFrontPanel()
+    with pytest.raises(OkHardwareDeviceNotOpenError):
+        write_registers(dummy_xem, {0x10: 1})
+
+
+@pytest.mark.parametrize(
+    "test_num_bytes,test_block_size,expected_error,test_description",
+    [
+        (64, 32, None, "allows a whole number of blocks"),
+        (0, 64, None, "allows no data"),
+        (
+            96,
+            64,
+            OpalKellyPipeInDataNotBlockAlignedError,
+            "raises error for a partial block",
+        ),
+        (
+            64,
+            48,
+            OpalKellyInvalidBlockSizeError,
+            "raises error for an invalid block size",
+        ),
+    ],
+)
+def test_validate_pipe_in_num_bytes__raises_errors_for_invalid_sizes(
+    test_num_bytes, test_block_size, expected_error, test_description
+):
+    if expected_error is None:
+        validate_pipe_in_num_bytes(test_num_bytes, test_block_size)
+        return
+    with pytest.raises(expected_error):
+        validate_pipe_in_num_bytes(test_num_bytes, test_block_size)
+
+
+def test_write_to_pipe_in__writes_data_with_threaded_block_pipe_in(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_write = mocker.patch.object(
+        dummy_xem, "WriteToBlockPipeInThr", autospec=True, return_value=128
+    )
+    data = bytearray(128)
+    assert write_to_pipe_in(dummy_xem, data, ep_addr=0x81, block_size=64) == 128
+
+    mocked_write.assert_called_once_with(0x81, 64, data)
+
+
+def test_write_to_pipe_in__uses_default_endpoint_and_block_size(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_write = mocker.patch.object(
+        dummy_xem, "WriteToBlockPipeInThr", autospec=True, return_value=BLOCK_SIZE
+    )
+    data = bytearray(BLOCK_SIZE)
+    write_to_pipe_in(dummy_xem, data)
+
+    mocked_write.assert_called_once_with(PIPE_IN_FIFO, BLOCK_SIZE, data)
+
+
+def test_write_to_pipe_in__raises_error_for_partial_block_before_writing(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_write = mocker.patch.object(
+        dummy_xem, "WriteToBlockPipeInThr", autospec=True
+    )
+    with pytest.raises(OpalKellyPipeInDataNotBlockAlignedError):
+        write_to_pipe_in(dummy_xem, bytearray(BLOCK_SIZE + 4))
+
+    mocked_write.assert_not_called()
+
+
+def test_write_to_pipe_in__raises_error_when_device_returns_error_code():
+    dummy_xem = okCFrontPanel()
+    with pytest.raises(OkHardwareDeviceNotOpenError):
+        write_to_pipe_in(dummy_xem, bytearray(BLOCK_SIZE))
+
+
+def test_get_num_words_free_pipe_in__reads_free_space_wire_out(mocker):
+    dummy_xem = okCFrontPanel()
+    mocked_read = mocker.patch.object(
+        main, "read_wire_out", autospec=True, return_value=4096
+    )
+    assert get_num_words_free_pipe_in(dummy_xem) == 4096
+
+    mocked_read.assert_called_once_with(dummy_xem, WIRE_OUT_NUM_WORDS_FREE_PIPE_IN)
+
+
+def test_create_lua_script_engine__returns_engine_from_xem(mocker):
+    dummy_xem = okCFrontPanel()
+    expected_engine = mocker.create_autospec(okCScriptEngine, instance=True)
+    mocker.patch.object(
+        dummy_xem,
+        "CreateLuaScriptEngine",
+        autospec=True,
+        return_value=expected_engine,
+    )
+    assert create_lua_script_engine(dummy_xem) is expected_engine
+
+
+def test_create_lua_script_engine__raises_error_when_engine_cannot_be_created():
+    dummy_xem = okCFrontPanel()
+    with pytest.raises(OpalKellyScriptError, match="Lua"):
+        create_lua_script_engine(dummy_xem)
+
+
+def test_load_script__loads_code_into_engine(mocker):
+    engine = mocker.create_autospec(okCScriptEngine, instance=True)
+    load_script(engine, "my_chunk", "function f() return 0 end")
+    engine.LoadScript.assert_called_once_with("my_chunk", "function f() return 0 end")
+
+
+def test_load_script__raises_error_when_code_cannot_be_loaded(mocker):
+    engine = mocker.create_autospec(okCScriptEngine, instance=True)
+    engine.LoadScript.side_effect = RuntimeError("syntax error near 'end'")
+    with pytest.raises(OpalKellyScriptError, match="syntax error"):
+        load_script(engine, "my_chunk", "function f( end")
+
+
+def test_run_script_function__passes_arguments_and_converts_results(mocker):
+    engine = mocker.create_autospec(okCScriptEngine, instance=True)
+    engine.RunScriptFunction.return_value = [
+        okCScriptValue(5),
+        okCScriptValue(True),
+        okCScriptValue("done"),
+        okCScriptValue(),
+    ]
+    assert run_script_function(engine, "my_function", [7, False, "x"]) == [
+        5,
+        True,
+        "done",
+        None,
+    ]
+
+    function_name, script_arguments = engine.RunScriptFunction.call_args[0]
+    assert function_name == "my_function"
+    assert len(script_arguments) == 3
+    assert script_arguments[0].GetNumber() == 7
+    assert script_arguments[1].GetBool() is False
+    assert script_arguments[2].GetString() == "x"
+
+
+@pytest.mark.parametrize(
+    "test_argument,test_description",
+    [
+        (0xFFFFFFFF, "raises error for unsigned value with the top bit set"),
+        (-(2 ** 31) - 1, "raises error for value below the signed 32-bit range"),
+    ],
+)
+def test_run_script_function__raises_error_for_integer_outside_signed_32_bit_range(
+    test_argument, test_description, mocker
+):
+    engine = mocker.create_autospec(okCScriptEngine, instance=True)
+    with pytest.raises(OpalKellyScriptValueOutOfRangeError, match="signed 32-bit"):
+        run_script_function(engine, "my_function", [test_argument])
+    engine.RunScriptFunction.assert_not_called()
+
+
+def test_run_script_function__raises_error_when_function_fails(mocker):
+    engine = mocker.create_autospec(okCScriptEngine, instance=True)
+    engine.RunScriptFunction.side_effect = RuntimeError("attempt to call a nil value")
+    with pytest.raises(OpalKellyScriptError, match="nil value"):
+        run_script_function(engine, "missing_function")
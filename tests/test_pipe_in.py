@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import numpy as np
+import pytest
+from stdlib_utils import SimpleMultiprocessingQueue
+from xem_wrapper import BLOCK_SIZE
+from xem_wrapper import FrontPanel
+from xem_wrapper import FrontPanelSimulator
+from xem_wrapper import okCFrontPanel
+from xem_wrapper import OkHardwareTimeoutError
+from xem_wrapper import OpalKellyInvalidBlockSizeError
+from xem_wrapper import OpalKellyPipeInFreeSpaceTimeoutError
+from xem_wrapper import PIPE_IN_FIFO
+from xem_wrapper import PipeInStreamWriter
+from xem_wrapper import WIRE_OUT_NUM_WORDS_FREE_PIPE_IN
+
+
+def _create_simulator(*free_space_values):
+    sink = SimpleMultiprocessingQueue()
+    wire_outs = {}
+    if free_space_values:
+        wire_outs[WIRE_OUT_NUM_WORDS_FREE_PIPE_IN] = SimpleMultiprocessingQueue()
+        for value in free_space_values:
+            wire_outs[WIRE_OUT_NUM_WORDS_FREE_PIPE_IN].put(value)
+    fp = FrontPanelSimulator({"pipe_ins": {PIPE_IN_FIFO: sink}, "wire_outs": wire_outs})
+    fp.initialize_board()
+    return fp, sink
+
+
+def _drain(sink):
+    writes = []
+    while not sink.empty():
+        writes.append(sink.get_nowait())
+    return writes
+
+
+def test_PipeInStreamWriter__uses_defaults():
+    fp, _ = _create_simulator()
+    writer = PipeInStreamWriter(fp)
+    assert writer.get_block_size() == BLOCK_SIZE
+    assert writer.get_chunk_size() == PipeInStreamWriter.default_chunk_size
+    assert writer.get_num_bytes_written() == 0
+    assert writer.get_num_chunks_written() == 0
+    assert writer.get_num_bytes_pending() == 0
+
+
+def test_PipeInStreamWriter__uses_block_size_configured_on_front_panel():
+    fp = FrontPanel(okCFrontPanel())
+    fp.set_block_size(1024)
+    assert PipeInStreamWriter(fp).get_block_size() == 1024
+    assert PipeInStreamWriter(fp, block_size=64).get_block_size() == 64
+
+
+@pytest.mark.parametrize(
+    "test_block_size,test_chunk_size,expected_error,test_description",
+    [
+        (
+            64,
+            96,
+            ValueError,
+            "raises error for chunk size that is not a whole number of blocks",
+        ),
+        (64, 0, ValueError, "raises error for empty chunks"),
+        (48, 96, OpalKellyInvalidBlockSizeError, "raises error for invalid block size"),
+    ],
+)
+def test_PipeInStreamWriter__raises_error_for_invalid_sizes(
+    test_block_size, test_chunk_size, expected_error, test_description
+):
+    fp, _ = _create_simulator()
+    with pytest.raises(expected_error):
+        PipeInStreamWriter(fp, block_size=test_block_size, chunk_size=test_chunk_size)
+
+
+def test_PipeInStreamWriter_write__holds_partial_chunk_until_flush_then_pads_to_whole_blocks():
+    fp, sink = _create_simulator()
+    writer = PipeInStreamWriter(fp, block_size=32, chunk_size=128)
+    writer.write(b"\x01" * 40)
+    assert writer.get_num_bytes_pending() == 40
+    assert _drain(sink) == []
+
+    assert writer.flush() == 24
+    assert _drain(sink) == [bytearray(b"\x01" * 40 + bytes(24))]
+    assert writer.get_num_bytes_written() == 64
+    assert writer.get_num_bytes_pending() == 0
+    writer.close()
+
+
+def test_PipeInStreamWriter_write__transfers_full_chunks_in_order_across_writes():
+    fp, sink = _create_simulator()
+    writer = PipeInStreamWriter(fp, block_size=32, chunk_size=64)
+    data = bytes(range(256)) * 2
+    writer.write(data[:100])
+    writer.write(memoryview(data)[100:300])
+    writer.write(bytearray(data[300:]))
+    assert writer.flush() == 0
+    writer.close()
+
+    writes = _drain(sink)
+    assert [len(write) for write in writes] == [64] * 8
+    assert b"".join(writes) == data
+    assert writer.get_num_chunks_written() == 8
+    assert writer.get_num_bytes_written() == len(data)
+
+
+def test_PipeInStreamWriter_write__converts_numpy_arrays_to_little_endian_bytes_in_c_order():
+    fp, sink = _create_simulator()
+    writer = PipeInStreamWriter(fp, block_size=32, chunk_size=32)
+    big_endian = np.arange(16, dtype=">u2")
+    writer.write(big_endian)
+    fortran_ordered = np.asfortranarray(np.arange(8, dtype="<u4").reshape(2, 4))
+    writer.write(fortran_ordered)
+    writer.close()
+
+    writes = _drain(sink)
+    assert writes[0] == np.arange(16, dtype="<u2").tobytes()
+    assert writes[1] == np.arange(8, dtype="<u4").tobytes()
+
+
+def test_PipeInStreamWriter_write__prepares_next_chunk_while_transfer_is_in_progress(
+    mocker,
+):
+    fp = FrontPanel(okCFrontPanel(), thread_safe=True)
+    transfer_started = threading.Event()
+    allow_transfer_to_finish = threading.Event()
+    transferred = []
+
+    def slow_write_to_pipe_in(data, ep_addr, block_size):
+        transfer_started.set()
+        allow_transfer_to_finish.wait()
+        transferred.append(bytes(data))
+        return len(data)
+
+    mocker.patch.object(fp, "write_to_pipe_in", side_effect=slow_write_to_pipe_in)
+    writer = PipeInStreamWriter(
+        fp, block_size=32, chunk_size=32, check_free_space=False
+    )
+    writer.write(b"\x01" * 32 + b"\x02" * 16)
+    assert transfer_started.wait(timeout=5)
+    # the first chunk is still being transferred, and the start of the second is already in place
+    assert transferred == []
+    assert writer.get_num_bytes_pending() == 16
+
+    allow_transfer_to_finish.set()
+    writer.close()
+    assert transferred == [b"\x01" * 32, b"\x02" * 16 + bytes(16)]
+
+
+def test_PipeInStreamWriter_write__transfers_on_calling_thread_if_front_panel_is_not_thread_safe(
+    mocker,
+):
+    fp, _ = _create_simulator()
+    transfer_threads = []
+
+    def record_write_to_pipe_in(data, ep_addr, block_size):
+        transfer_threads.append(threading.current_thread())
+        return len(data)
+
+    mocker.patch.object(fp, "write_to_pipe_in", side_effect=record_write_to_pipe_in)
+    writer = PipeInStreamWriter(fp, block_size=32, chunk_size=32)
+    writer.write(bytes(48))
+    # the full chunk was transferred before write returned
+    assert transfer_threads == [threading.current_thread()]
+    assert writer.get_num_bytes_written() == 32
+    assert writer.get_num_chunks_written() == 1
+
+    writer.close()
+    assert transfer_threads == [threading.current_thread()] * 2
+    assert writer.get_num_bytes_written() == 64
+
+
+def test_PipeInStreamWriter_write__waits_for_free_space_before_each_transfer(mocker):
+    fp, sink = _create_simulator(0, 7, 8, 8)
+    spied_get_free = mocker.spy(fp, "get_num_words_free_pipe_in")
+    mocker.patch.object(PipeInStreamWriter, "free_space_poll_interval", 0)
+    writer = PipeInStreamWriter(fp, block_size=32, chunk_size=32)
+    writer.write(bytes(64))
+    writer.close()
+
+    assert spied_get_free.call_count == 4
+    assert len(_drain(sink)) == 2
+
+
+def test_PipeInStreamWriter_write__raises_error_if_free_space_does_not_become_available(
+    mocker,
+):
+    fp, sink = _create_simulator()
+    mocker.patch.object(fp, "get_num_words_free_pipe_in", return_value=0)
+    writer = PipeInStreamWriter(
+        fp, block_size=32, chunk_size=32, free_space_timeout=0.01
+    )
+    with pytest.raises(OpalKellyPipeInFreeSpaceTimeoutError):
+        writer.write(bytes(32))
+    assert _drain(sink) == []
+
+
+def test_PipeInStreamWriter_write__does_not_read_free_space_when_disabled(mocker):
+    fp, sink = _create_simulator()
+    spied_get_free = mocker.spy(fp, "get_num_words_free_pipe_in")
+    writer = PipeInStreamWriter(
+        fp, block_size=32, chunk_size=32, check_free_space=False
+    )
+    writer.write(bytes(64))
+    writer.close()
+
+    spied_get_free.assert_not_called()
+    assert len(_drain(sink)) == 2
+
+
+def test_PipeInStreamWriter_flush__raises_error_from_failed_transfer(mocker):
+    fp = FrontPanel(okCFrontPanel(), thread_safe=True)
+    mocker.patch.object(fp, "write_to_pipe_in", side_effect=OkHardwareTimeoutError())
+    writer = PipeInStreamWriter(
+        fp, block_size=32, chunk_size=32, check_free_space=False
+    )
+    writer.write(bytes(32))
+    with pytest.raises(OkHardwareTimeoutError):
+        writer.close()
+    assert writer.get_num_bytes_written() == 0
+
+    # the transfer thread was stopped even though flushing failed
+    writer.close()
+
+
+def test_PipeInStreamWriter_close__does_nothing_when_nothing_was_written():
+    fp, sink = _create_simulator()
+    writer = PipeInStreamWriter(fp)
+    writer.close()
+    assert writer.flush() == 0
+    assert _drain(sink) == []
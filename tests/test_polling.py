@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+import pytest
+from xem_wrapper import FifoPollingScheduler
+from xem_wrapper import FifoRead
+from xem_wrapper import FrontPanelBase
+from xem_wrapper import polling
+from xem_wrapper import ROUND_ROBIN_SIZE_WORDS
+
+
+def test_FifoPollingScheduler__class_attributes():
+    assert FifoPollingScheduler.default_target_num_words == ROUND_ROBIN_SIZE_WORDS * 32
+    assert FifoPollingScheduler.default_min_poll_interval == 0.001
+    assert FifoPollingScheduler.default_max_poll_interval == 0.5
+    assert FifoPollingScheduler.default_smoothing_factor == 0.3
+
+
+def test_FifoPollingScheduler__uses_default_target_num_words():
+    scheduler = FifoPollingScheduler()
+    assert (
+        scheduler.get_target_num_words()
+        == FifoPollingScheduler.default_target_num_words
+    )
+
+
+@pytest.mark.parametrize(
+    "test_kwargs,test_description",
+    [
+        (
+            {"target_num_words": ROUND_ROBIN_SIZE_WORDS - 1},
+            "raises error when target is less than one round robin",
+        ),
+        ({"min_poll_interval": 0}, "raises error when min interval is zero"),
+        (
+            {"min_poll_interval": 2, "max_poll_interval": 1},
+            "raises error when min interval is greater than max interval",
+        ),
+        ({"smoothing_factor": 0}, "raises error when smoothing factor is zero"),
+        ({"smoothing_factor": 1.1}, "raises error when smoothing factor is above one"),
+    ],
+)
+def test_FifoPollingScheduler__raises_error_with_invalid_configuration(
+    test_kwargs, test_description
+):
+    with pytest.raises(ValueError):
+        FifoPollingScheduler(**test_kwargs)
+
+
+def test_FifoPollingScheduler__fill_rate_is_none_until_two_levels_recorded():
+    scheduler = FifoPollingScheduler()
+    assert scheduler.get_fill_rate() is None
+    scheduler.record_num_words_fifo(0, timestamp=1.0)
+    assert scheduler.get_fill_rate() is None
+    scheduler.record_num_words_fifo(100, timestamp=2.0)
+    assert scheduler.get_fill_rate() == 100
+
+
+def test_FifoPollingScheduler__fill_rate_ignores_readings_with_no_elapsed_time():
+    scheduler = FifoPollingScheduler()
+    scheduler.record_num_words_fifo(0, timestamp=1.0)
+    scheduler.record_num_words_fifo(100, timestamp=1.0)
+    assert scheduler.get_fill_rate() is None
+
+
+def test_FifoPollingScheduler__fill_rate_accounts_for_words_read_between_polls():
+    scheduler = FifoPollingScheduler()
+    scheduler.record_num_words_fifo(500, timestamp=1.0)
+    scheduler.record_read(400, timestamp=1.0)
+    assert scheduler.get_estimated_num_words() == 100
+    scheduler.record_num_words_fifo(300, timestamp=2.0)
+    assert scheduler.get_fill_rate() == 200
+    assert scheduler.get_estimated_num_words() == 300
+
+
+def test_FifoPollingScheduler__fill_rate_is_smoothed_across_readings():
+    scheduler = FifoPollingScheduler(smoothing_factor=0.5)
+    scheduler.record_num_words_fifo(0, timestamp=0.0)
+    scheduler.record_num_words_fifo(100, timestamp=1.0)
+    scheduler.record_num_words_fifo(400, timestamp=2.0)
+    assert scheduler.get_fill_rate() == 200
+
+
+def test_FifoPollingScheduler__fill_rate_is_never_negative():
+    scheduler = FifoPollingScheduler(smoothing_factor=1)
+    scheduler.record_num_words_fifo(300, timestamp=0.0)
+    scheduler.record_num_words_fifo(100, timestamp=1.0)
+    assert scheduler.get_fill_rate() == 0
+
+
+def test_FifoPollingScheduler__record_num_words_fifo__uses_perf_counter_by_default(
+    mocker,
+):
+    mocker.patch.object(polling.time, "perf_counter", side_effect=[10.0, 12.0])
+    scheduler = FifoPollingScheduler()
+    scheduler.record_num_words_fifo(0)
+    scheduler.record_num_words_fifo(100)
+    assert scheduler.get_fill_rate() == 50
+
+
+def test_FifoPollingScheduler__get_predicted_num_words__extrapolates_at_fill_rate(
+    mocker,
+):
+    scheduler = FifoPollingScheduler()
+    assert scheduler.get_predicted_num_words(timestamp=1.0) == 0
+    scheduler.record_num_words_fifo(100, timestamp=0.0)
+    assert scheduler.get_predicted_num_words(timestamp=1.0) == 100
+    scheduler.record_num_words_fifo(300, timestamp=1.0)
+    scheduler.record_read(50, timestamp=1.0)
+    assert scheduler.get_predicted_num_words(timestamp=1.5) == 350
+    # a time before the last poll is not extrapolated backwards
+    assert scheduler.get_predicted_num_words(timestamp=0.5) == 250
+
+    mocker.patch.object(polling.time, "perf_counter", return_value=2.0)
+    assert scheduler.get_predicted_num_words() == 450
+
+
+def test_FifoPollingScheduler__get_seconds_until_next_poll__returns_max_interval_without_fill_rate():
+    scheduler = FifoPollingScheduler(max_poll_interval=0.25)
+    assert scheduler.get_seconds_until_next_poll() == 0.25
+    scheduler.record_num_words_fifo(0, timestamp=0.0)
+    scheduler.record_num_words_fifo(0, timestamp=1.0)
+    assert scheduler.get_seconds_until_next_poll() == 0.25
+
+
+@pytest.mark.parametrize(
+    "test_num_words,expected_delay,test_description",
+    [
+        (0, 0.72, "returns time to fill the entire target"),
+        (360, 0.36, "returns time to fill the remaining words"),
+        (ROUND_ROBIN_SIZE_WORDS * 10, 0.01, "clips delay to min interval"),
+    ],
+)
+def test_FifoPollingScheduler__get_seconds_until_next_poll__returns_time_to_reach_target(
+    test_num_words, expected_delay, test_description
+):
+    scheduler = FifoPollingScheduler(
+        target_num_words=ROUND_ROBIN_SIZE_WORDS * 10,
+        min_poll_interval=0.01,
+        max_poll_interval=1.0,
+        smoothing_factor=1,
+    )
+    scheduler.record_num_words_fifo(0, timestamp=0.0)
+    scheduler.record_num_words_fifo(test_num_words, timestamp=1.0)
+    scheduler.record_num_words_fifo(test_num_words + 1000, timestamp=2.0)
+    scheduler.record_read(1000)
+    assert scheduler.get_seconds_until_next_poll() == pytest.approx(expected_delay)
+
+
+def test_FifoPollingScheduler__get_seconds_until_next_poll__clips_delay_to_max_interval():
+    scheduler = FifoPollingScheduler(max_poll_interval=0.5)
+    scheduler.record_num_words_fifo(0, timestamp=0.0)
+    scheduler.record_num_words_fifo(1, timestamp=1.0)
+    assert scheduler.get_seconds_until_next_poll() == 0.5
+
+
+def test_FifoPollingScheduler__is_read_due__returns_false_below_one_round_robin():
+    scheduler = FifoPollingScheduler()
+    assert scheduler.is_read_due() is False
+    scheduler.record_num_words_fifo(ROUND_ROBIN_SIZE_WORDS - 1, timestamp=0.0)
+    assert scheduler.is_read_due(timestamp=100.0) is False
+
+
+def test_FifoPollingScheduler__is_read_due__returns_true_at_target():
+    scheduler = FifoPollingScheduler(target_num_words=ROUND_ROBIN_SIZE_WORDS * 2)
+    scheduler.record_num_words_fifo(ROUND_ROBIN_SIZE_WORDS * 2, timestamp=0.0)
+    scheduler.record_read(0, timestamp=0.0)
+    assert scheduler.is_read_due(timestamp=0.0) is True
+
+
+def test_FifoPollingScheduler__is_read_due__returns_true_for_first_read_of_at_least_one_round_robin():
+    scheduler = FifoPollingScheduler()
+    scheduler.record_num_words_fifo(ROUND_ROBIN_SIZE_WORDS, timestamp=0.0)
+    assert scheduler.is_read_due(timestamp=0.0) is True
+
+
+def test_FifoPollingScheduler__is_read_due__waits_for_max_interval_below_target(mocker):
+    scheduler = FifoPollingScheduler(max_poll_interval=0.5)
+    scheduler.record_read(0, timestamp=1.0)
+    scheduler.record_num_words_fifo(ROUND_ROBIN_SIZE_WORDS, timestamp=1.2)
+    assert scheduler.is_read_due(timestamp=1.2) is False
+    assert scheduler.is_read_due(timestamp=1.5) is True
+
+    mocker.patch.object(polling.time, "perf_counter", return_value=1.4)
+    assert scheduler.is_read_due() is False
+
+
+def test_FifoPollingScheduler__poll__reads_from_front_panel_when_read_is_due(mocker):
+    fp = FrontPanelBase()
+    fp.initialize_board()
+    expected_data = bytearray(ROUND_ROBIN_SIZE_WORDS * 4 * 2)
+    mocked_get_num_words = mocker.patch.object(
+        fp,
+        "get_num_words_fifo",
+        autospec=True,
+        return_value=ROUND_ROBIN_SIZE_WORDS * 2,
+    )
+    mocked_read = mocker.patch.object(
+        fp,
+        "read_from_fifo_with_status",
+        autospec=True,
+        return_value=(
+            expected_data,
+            FifoRead(
+                ROUND_ROBIN_SIZE_WORDS * 2, len(expected_data), len(expected_data)
+            ),
+        ),
+    )
+    scheduler = FifoPollingScheduler(target_num_words=ROUND_ROBIN_SIZE_WORDS * 2)
+
+    actual_data, actual_delay = scheduler.poll(fp, timestamp=0.0)
+    assert actual_data is expected_data
+    assert actual_delay == FifoPollingScheduler.default_max_poll_interval
+    assert scheduler.get_estimated_num_words() == 0
+    # without a fill rate the level must be read to find out that a read is due
+    mocked_get_num_words.assert_called_once()
+    mocked_read.assert_called_once_with(max_bytes=None)
+
+
+def test_FifoPollingScheduler__poll__reads_without_separate_level_read_when_read_is_predicted(
+    mocker,
+):
+    fp = FrontPanelBase()
+    fp.initialize_board()
+    mocked_get_num_words = mocker.patch.object(fp, "get_num_words_fifo", autospec=True)
+    mocked_read = mocker.patch.object(
+        fp,
+        "read_from_fifo_with_status",
+        autospec=True,
+        return_value=(
+            bytearray(ROUND_ROBIN_SIZE_WORDS * 4 * 4),
+            FifoRead(ROUND_ROBIN_SIZE_WORDS * 5, 0, 0),
+        ),
+    )
+    scheduler = FifoPollingScheduler(target_num_words=ROUND_ROBIN_SIZE_WORDS * 4)
+    scheduler.record_num_words_fifo(0, timestamp=0.0)
+    scheduler.record_num_words_fifo(ROUND_ROBIN_SIZE_WORDS, timestamp=1.0)
+    assert (
+        scheduler.get_predicted_num_words(timestamp=4.0) == ROUND_ROBIN_SIZE_WORDS * 4
+    )
+
+    scheduler.poll(fp, timestamp=4.0)
+    mocked_get_num_words.assert_not_called()
+    mocked_read.assert_called_once_with(max_bytes=None)
+    # the level read to size the transfer updates the fill rate
+    assert scheduler.get_fill_rate() == pytest.approx(
+        ROUND_ROBIN_SIZE_WORDS * (1 + 0.3 * (4 / 3 - 1))
+    )
+    assert scheduler.get_estimated_num_words() == ROUND_ROBIN_SIZE_WORDS
+
+
+def test_FifoPollingScheduler__poll__does_not_read_less_than_read_alignment_of_block_size(
+    mocker,
+):
+    fp = FrontPanelBase()
+    fp.initialize_board()
+    mocker.patch.object(fp, "get_block_size", autospec=True, return_value=16384)
+    mocker.patch.object(
+        fp,
+        "get_num_words_fifo",
+        autospec=True,
+        return_value=ROUND_ROBIN_SIZE_WORDS * 511,
+    )
+    mocked_read = mocker.spy(fp, "read_from_fifo_with_status")
+    scheduler = FifoPollingScheduler(target_num_words=ROUND_ROBIN_SIZE_WORDS)
+
+    actual_data, _ = scheduler.poll(fp, timestamp=0.0)
+    assert actual_data == bytearray(0)
+    mocked_read.assert_not_called()
+
+    fp.get_num_words_fifo.return_value = ROUND_ROBIN_SIZE_WORDS * 512
+    scheduler.poll(fp, timestamp=0.0)
+    mocked_read.assert_called_once_with(max_bytes=None)
+
+
+def test_FifoPollingScheduler__poll__limits_size_of_read(mocker):
+    fp = FrontPanelBase()
+    fp.initialize_board()
+    mocker.patch.object(
+        fp,
+        "get_num_words_fifo",
+        autospec=True,
+        return_value=ROUND_ROBIN_SIZE_WORDS * 4,
+    )
+    mocked_read = mocker.patch.object(
+        fp,
+        "read_from_fifo_with_status",
+        autospec=True,
+        return_value=(
+            bytearray(ROUND_ROBIN_SIZE_WORDS * 4),
+            FifoRead(ROUND_ROBIN_SIZE_WORDS * 4, 0, 0),
+        ),
+    )
+    scheduler = FifoPollingScheduler(target_num_words=ROUND_ROBIN_SIZE_WORDS)
+
+    scheduler.poll(fp, timestamp=0.0, max_bytes=ROUND_ROBIN_SIZE_WORDS * 4)
+    mocked_read.assert_called_once_with(max_bytes=ROUND_ROBIN_SIZE_WORDS * 4)
+    assert scheduler.get_estimated_num_words() == ROUND_ROBIN_SIZE_WORDS * 3
+
+
+def test_FifoPollingScheduler__poll__does_not_read_from_front_panel_when_read_is_not_due(
+    mocker,
+):
+    mocker.patch.object(polling.time, "perf_counter", return_value=0.0)
+    fp = FrontPanelBase()
+    fp.initialize_board()
+    mocked_read = mocker.spy(fp, "read_from_fifo_with_status")
+    scheduler = FifoPollingScheduler()
+
+    actual_data, _ = scheduler.poll(fp)
+    assert actual_data == bytearray(0)
+    mocked_read.assert_not_called()
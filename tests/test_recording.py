@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+import struct
+from typing import Any
+
+import pytest
+from xem_wrapper import FrontPanel
+from xem_wrapper import okCFrontPanel
+from xem_wrapper import OkHardwareDeviceNotOpenError
+from xem_wrapper import OpalKellyRecordingFormatError
+from xem_wrapper import OpalKellyReplayError
+from xem_wrapper import read_recording
+from xem_wrapper import recording
+from xem_wrapper import RECORDING_DATA_FILE_SUFFIX
+from xem_wrapper import RecordingXem
+from xem_wrapper import ReplayXem
+from xem_wrapper import ROUND_ROBIN_SIZE_BYTES
+from xem_wrapper import UnsupportedValue
+from xem_wrapper import WIRE_OUT_NUM_WORDS_FIFO
+
+
+class FakeXem(okCFrontPanel):
+    # pylint: disable=invalid-name,no-self-use,unused-argument # these override the SWIG methods
+    model = 7
+
+    def IsFrontPanelEnabled(self) -> bool:
+        return True
+
+    def UpdateWireOuts(self) -> int:
+        return 0
+
+    def GetWireOutValue(self, ep_addr: int) -> int:
+        if ep_addr == WIRE_OUT_NUM_WORDS_FIFO:
+            return ROUND_ROBIN_SIZE_BYTES // 4
+        return 0x1234
+
+    def SetWireInValue(self, ep_addr: int, value: int, mask: int) -> int:
+        return 0
+
+    def UpdateWireIns(self) -> int:
+        return 0
+
+    def ReadFromBlockPipeOut(self, ep_addr: int, block_size: int, data: Any) -> int:
+        data[:] = bytes(idx % 251 for idx in range(len(data)))
+        return len(data)
+
+    def GetDeviceInfo(self, info: Any) -> int:
+        info.deviceID = "my board"
+        info.serialNumber = "1917000Q70"
+        return 0
+
+    def ReadRegisters(self, entries: Any) -> int:
+        for entry_idx in range(len(entries)):
+            entry = entries[entry_idx]
+            entry.data = entry.address * 2
+            entries[entry_idx] = entry
+        return 0
+
+    def ReadRegister(self, addr: int) -> int:
+        raise RuntimeError("Error -8")
+
+    def SetTimeout(self, timeout: float) -> None:
+        pass
+
+    def CreateLuaScriptEngine(self) -> Any:
+        return object()
+
+    def Close(self) -> int:
+        raise ValueError("not a SWIG error")
+
+
+def _run_session(front_panel):
+    front_panel.initialize_board()
+    results = [
+        front_panel.read_wire_out(0x21),
+        front_panel.get_num_words_fifo(),
+        bytes(front_panel.read_from_fifo()),
+        front_panel.get_serial_number(),
+        front_panel.get_device_id(),
+        front_panel.read_registers([3, 5]),
+    ]
+    front_panel.set_wire_in(0x00, 0x0002, 0x0002)
+    with pytest.raises(OkHardwareDeviceNotOpenError):
+        front_panel.read_register(1)
+    return results
+
+
+@pytest.fixture(scope="function", name="recorded_session")
+def fixture_recorded_session(tmp_path):
+    log_path = str(tmp_path / "session.xemrec")
+    with RecordingXem(FakeXem(), log_path) as recorder:
+        results = _run_session(FrontPanel(recorder))
+    yield log_path, results
+
+
+def test_RecordingXem__passes_calls_and_attributes_through_to_the_board(tmp_path):
+    recorder = RecordingXem(FakeXem(), str(tmp_path / "session.xemrec"))
+    assert recorder.model == 7
+    assert recorder.GetWireOutValue(0x21) == 0x1234
+    assert recorder.get_num_calls() == 1
+    recorder.close()
+
+
+def test_RecordingXem__records_each_call_in_a_log_and_buffers_in_a_data_file(
+    recorded_session,
+):
+    log_path, results = recorded_session
+    calls = read_recording(log_path)
+    assert [call.method_name for call in calls] == [
+        "IsFrontPanelEnabled",
+        "UpdateWireOuts",
+        "GetWireOutValue",
+        "UpdateWireOuts",
+        "GetWireOutValue",
+        "UpdateWireOuts",
+        "GetWireOutValue",
+        "SetWireInValue",
+        "UpdateWireIns",
+        "ReadFromBlockPipeOut",
+        "SetWireInValue",
+        "UpdateWireIns",
+        "GetDeviceInfo",
+        "GetDeviceInfo",
+        "ReadRegisters",
+        "SetWireInValue",
+        "UpdateWireIns",
+        "ReadRegister",
+    ]
+    fifo_read = calls[9]
+    assert fifo_read.arguments[0] == 0xA0
+    assert bytes(fifo_read.arguments[2]) == results[2]
+    assert fifo_read.return_value == ROUND_ROBIN_SIZE_BYTES
+    assert calls[12].arguments[0]["serialNumber"] == "1917000Q70"
+    assert calls[14].arguments[0] == [(3, 6), (5, 10)]
+    assert calls[-1].error_message == "Error -8"
+    assert calls[-1].return_value is None
+    assert calls[0].return_value is True
+    for previous_call, call in zip(calls, calls[1:]):
+        assert previous_call.start_seconds <= call.start_seconds
+        assert call.duration_seconds >= 0
+
+    with open(log_path, "rb") as log_file:
+        assert results[2] not in log_file.read()
+    with open(log_path + RECORDING_DATA_FILE_SUFFIX, "rb") as data_file:
+        assert len(data_file.read()) == ROUND_ROBIN_SIZE_BYTES
+
+
+def test_RecordingXem__records_floats_none_and_values_that_cannot_be_replayed(
+    tmp_path,
+):
+    log_path = str(tmp_path / "session.xemrec")
+    with RecordingXem(FakeXem(), log_path) as recorder:
+        recorder.SetTimeout(2.5)
+        recorder.CreateLuaScriptEngine()
+    calls = read_recording(log_path)
+    assert calls[0].arguments == (2.5,)
+    assert calls[0].return_value is None
+    assert isinstance(calls[1].return_value, UnsupportedValue)
+    assert "object" in calls[1].return_value.description
+
+
+def test_RecordingXem__does_not_record_errors_other_than_runtime_errors(tmp_path):
+    log_path = str(tmp_path / "session.xemrec")
+    with RecordingXem(FakeXem(), log_path) as recorder:
+        with pytest.raises(ValueError, match="not a SWIG error"):
+            recorder.Close()
+        assert recorder.get_num_calls() == 0
+    assert read_recording(log_path) == []
+
+
+def test_ReplayXem__reproduces_the_recorded_session_through_FrontPanel(
+    recorded_session,
+):
+    log_path, results = recorded_session
+    replay = ReplayXem(log_path)
+    assert replay.get_num_calls() == 18
+    assert _run_session(FrontPanel(replay)) == results
+    assert replay.get_num_calls_remaining() == 0
+
+    with pytest.raises(OpalKellyReplayError, match="no more calls"):
+        replay.UpdateWireOuts()
+
+
+@pytest.mark.parametrize(
+    "test_method_name,test_args,expected_match,test_description",
+    [
+        ("UpdateWireIns", (), "IsFrontPanelEnabled", "raises error for other method"),
+        ("IsFrontPanelEnabled", (1,), "had 0 arguments", "raises error for arguments"),
+    ],
+)
+def test_ReplayXem__raises_error_when_calls_diverge_from_recording(
+    test_method_name, test_args, expected_match, test_description, recorded_session
+):
+    replay = ReplayXem(recorded_session[0])
+    with pytest.raises(OpalKellyReplayError, match=expected_match):
+        getattr(replay, test_method_name)(*test_args)
+
+
+def test_ReplayXem__checks_scalar_arguments_only_when_strict(tmp_path):
+    log_path = str(tmp_path / "session.xemrec")
+    with RecordingXem(FakeXem(), log_path) as recorder:
+        recorder.SetWireInValue(0x00, 0x0002, 0x0002)
+    with pytest.raises(OpalKellyReplayError, match="Argument 1 .* 2 in the recording"):
+        ReplayXem(log_path).SetWireInValue(0x00, 0x0004, 0x0002)
+    assert ReplayXem(log_path, strict=False).SetWireInValue(0x00, 0x0004, 0x0002) == 0
+
+
+def test_ReplayXem__raises_error_for_values_that_cannot_be_replayed(tmp_path):
+    log_path = str(tmp_path / "session.xemrec")
+    with RecordingXem(FakeXem(), log_path) as recorder:
+        recorder.CreateLuaScriptEngine()
+    with pytest.raises(OpalKellyReplayError, match="cannot be replayed"):
+        ReplayXem(log_path).CreateLuaScriptEngine()
+
+
+def test_ReplayXem__does_not_answer_private_attributes(recorded_session):
+    replay = ReplayXem(recorded_session[0])
+    with pytest.raises(AttributeError):
+        replay._not_a_method  # pylint: disable=pointless-statement,protected-access # testing the lookup
+
+
+def test_ReplayXem__raises_error_for_invalid_speed(recorded_session):
+    with pytest.raises(ValueError, match="speed"):
+        ReplayXem(recorded_session[0], speed=0)
+
+
+def test_ReplayXem__waits_until_each_call_finished_at_the_scaled_original_pace(
+    tmp_path, mocker
+):
+    log_path = str(tmp_path / "session.xemrec")
+    mocker.patch.object(
+        recording.time,
+        "perf_counter",
+        autospec=True,
+        side_effect=[100.0, 101.0, 101.5, 105.0, 105.5, 50.0, 50.0, 53.0],
+    )
+    mocked_sleep = mocker.patch.object(recording.time, "sleep", autospec=True)
+    with RecordingXem(FakeXem(), log_path) as recorder:
+        recorder.UpdateWireOuts()
+        recorder.UpdateWireIns()
+    replay = ReplayXem(log_path, speed=2)
+    replay.UpdateWireOuts()
+    replay.UpdateWireIns()
+    # the first call finished 0.5 seconds after it started, so 0.25 seconds at double speed. The second call is already late
+    mocked_sleep.assert_called_once_with(0.25)
+
+
+def test_read_recording__reads_recording_with_empty_data_file(tmp_path):
+    log_path = str(tmp_path / "session.xemrec")
+    with RecordingXem(FakeXem(), log_path) as recorder:
+        recorder.UpdateWireIns()
+    assert read_recording(log_path)[0].return_value == 0
+
+
+@pytest.mark.parametrize(
+    "test_log_suffix,expected_match,test_description",
+    [
+        (b"\x01", "ends in the middle", "raises error for truncated record"),
+        (b"\x07", "Unknown record type 7", "raises error for unknown record type"),
+        (
+            struct.pack("<BH", 0, 1) + struct.pack("<I", 10) + b"abc",
+            "ends in the middle",
+            "raises error for truncated string",
+        ),
+        (
+            struct.pack("<BHddB", 1, 0, 0.0, 0.0, 1) + b"\x63",
+            "Unknown value tag 99",
+            "raises error for unknown value tag",
+        ),
+        (
+            struct.pack("<BHddB", 1, 0, 0.0, 0.0, 1)
+            + b"\x06"
+            + struct.pack("<QQ", 0, 10),
+            "missing recorded buffers",
+            "raises error for buffer beyond data file",
+        ),
+    ],
+)
+def test_read_recording__raises_error_for_corrupt_recording(
+    test_log_suffix, expected_match, test_description, tmp_path
+):
+    log_path = str(tmp_path / "session.xemrec")
+    with RecordingXem(FakeXem(), log_path) as recorder:
+        recorder.UpdateWireIns()
+    with open(log_path, "ab") as log_file:
+        log_file.write(test_log_suffix)
+    with pytest.raises(OpalKellyRecordingFormatError, match=expected_match):
+        read_recording(log_path)
+
+
+def test_read_recording__raises_error_for_file_that_is_not_a_recording(tmp_path):
+    log_path = tmp_path / "session.xemrec"
+    log_path.write_bytes(b"not a recording")
+    (tmp_path / f"session.xemrec{RECORDING_DATA_FILE_SUFFIX}").write_bytes(b"")
+    with pytest.raises(OpalKellyRecordingFormatError, match="not a recording"):
+        read_recording(str(log_path))
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+
+import pytest
+from stdlib_utils import SimpleMultiprocessingQueue
+from xem_wrapper import FrontPanelBase
+from xem_wrapper import FrontPanelSimulator
+from xem_wrapper import PIPE_OUT_FIFO
+from xem_wrapper import ROUND_ROBIN_SIZE_WORDS
+from xem_wrapper import SharedMemoryRingBuffer
+from xem_wrapper import SharedMemoryRingBufferReader
+
+from .fixtures import fixture_ring_buffer
+
+__fixtures__ = [fixture_ring_buffer]
+
+ROUND_ROBIN_SIZE_BYTES = ROUND_ROBIN_SIZE_WORDS * 4
+
+
+def _read_all_in_other_process(name, num_slots_to_read, output_queue):
+    reader = SharedMemoryRingBufferReader(name)
+    for _ in range(num_slots_to_read):
+        sequence, view = reader.read()
+        output_queue.put((sequence, bytes(view)))
+        view.release()
+    reader.close()
+
+
+@pytest.mark.parametrize(
+    "test_num_slots,test_slot_size,test_description",
+    [
+        (0, 288, "raises error when there are no slots"),
+        (4, 0, "raises error when slot size is zero"),
+    ],
+)
+def test_SharedMemoryRingBuffer__raises_error_with_invalid_configuration(
+    test_num_slots, test_slot_size, test_description
+):
+    with pytest.raises(ValueError):
+        SharedMemoryRingBuffer(test_num_slots, test_slot_size)
+
+
+def test_SharedMemoryRingBuffer__getters_return_configuration(ring_buffer):
+    assert ring_buffer.get_num_slots() == 4
+    assert ring_buffer.get_slot_size() == ROUND_ROBIN_SIZE_BYTES * 2
+    assert ring_buffer.get_write_sequence() == 0
+    assert isinstance(ring_buffer.get_name(), str) is True
+
+
+def test_SharedMemoryRingBuffer__write__publishes_data_to_reader(ring_buffer):
+    reader = SharedMemoryRingBufferReader(ring_buffer.get_name())
+    assert reader.read() is None
+    assert ring_buffer.write(b"\x01\x02\x03") == 0
+    assert ring_buffer.write(b"\x04") == 1
+    assert ring_buffer.get_write_sequence() == 2
+    assert reader.get_num_available() == 2
+
+    sequence, view = reader.read()
+    assert sequence == 0
+    assert view == b"\x01\x02\x03"
+    assert view.readonly is True
+    assert reader.is_valid(sequence) is True
+    view.release()
+    sequence, view = reader.read()
+    assert sequence == 1
+    assert view == b"\x04"
+    view.release()
+    assert reader.read() is None
+    assert reader.get_next_sequence() == 2
+    reader.close()
+
+
+def test_SharedMemoryRingBuffer__write__raises_error_when_data_does_not_fit_in_slot(
+    ring_buffer,
+):
+    with pytest.raises(ValueError):
+        ring_buffer.write(bytearray(ring_buffer.get_slot_size() + 1))
+    assert ring_buffer.get_write_sequence() == 0
+
+
+def test_SharedMemoryRingBuffer__reserve__returns_writable_view_of_next_slot(
+    ring_buffer,
+):
+    reader = SharedMemoryRingBufferReader(ring_buffer.get_name())
+    slot = ring_buffer.reserve()
+    assert len(slot) == ring_buffer.get_slot_size()
+    slot[:2] = b"\xab\xcd"
+    slot.release()
+    assert reader.read() is None
+    assert ring_buffer.commit(2) == 0
+
+    sequence, view = reader.read()
+    assert sequence == 0
+    assert view == b"\xab\xcd"
+    view.release()
+    reader.close()
+
+
+def test_SharedMemoryRingBuffer__reserve__raises_error_when_slot_already_reserved(
+    ring_buffer,
+):
+    ring_buffer.reserve().release()
+    with pytest.raises(RuntimeError):
+        ring_buffer.reserve()
+    ring_buffer.abort()
+
+
+def test_SharedMemoryRingBuffer__commit__raises_error_without_reserved_slot(
+    ring_buffer,
+):
+    with pytest.raises(RuntimeError):
+        ring_buffer.commit(0)
+
+
+def test_SharedMemoryRingBuffer__commit__raises_error_when_num_bytes_is_larger_than_slot(
+    ring_buffer,
+):
+    ring_buffer.reserve().release()
+    with pytest.raises(ValueError):
+        ring_buffer.commit(ring_buffer.get_slot_size() + 1)
+    ring_buffer.abort()
+
+
+def test_SharedMemoryRingBuffer__abort__raises_error_without_reserved_slot(
+    ring_buffer,
+):
+    with pytest.raises(RuntimeError):
+        ring_buffer.abort()
+
+
+def test_SharedMemoryRingBuffer__abort__restores_previous_slot_for_readers(
+    ring_buffer,
+):
+    for i in range(4):
+        ring_buffer.write(bytes([i]))
+    reader = SharedMemoryRingBufferReader(ring_buffer.get_name())
+    ring_buffer.reserve().release()
+    assert reader.is_valid(0) is False
+    ring_buffer.abort()
+    assert reader.is_valid(0) is True
+    assert ring_buffer.get_write_sequence() == 4
+
+    sequence, view = reader.read()
+    assert sequence == 0
+    assert view == b"\x00"
+    view.release()
+    reader.close()
+
+
+def test_SharedMemoryRingBuffer__write_from_fifo__reads_fifo_directly_into_slot(
+    ring_buffer,
+):
+    test_data = bytearray([i % 256 for i in range(ROUND_ROBIN_SIZE_BYTES * 3)])
+    fifo = SimpleMultiprocessingQueue()
+    fifo.put(test_data)
+    fp = FrontPanelSimulator({"pipe_outs": {PIPE_OUT_FIFO: fifo}})
+    fp.initialize_board()
+    reader = SharedMemoryRingBufferReader(ring_buffer.get_name())
+
+    assert ring_buffer.write_from_fifo(fp) == 0
+    assert ring_buffer.write_from_fifo(fp) == 1
+    assert ring_buffer.write_from_fifo(fp) is None
+    assert ring_buffer.get_write_sequence() == 2
+
+    _, view = reader.read()
+    assert view == test_data[: ROUND_ROBIN_SIZE_BYTES * 2]
+    view.release()
+    _, view = reader.read()
+    assert view == test_data[ROUND_ROBIN_SIZE_BYTES * 2 :]
+    view.release()
+    reader.close()
+
+
+def test_SharedMemoryRingBuffer__write_from_fifo__releases_slot_when_read_fails(
+    ring_buffer,
+):
+    fp = FrontPanelBase()
+    with pytest.raises(Exception):
+        ring_buffer.write_from_fifo(fp)
+    assert ring_buffer.get_write_sequence() == 0
+    ring_buffer.reserve().release()
+    ring_buffer.abort()
+
+
+def test_SharedMemoryRingBufferReader__start_from_latest__skips_existing_data(
+    ring_buffer,
+):
+    ring_buffer.write(b"\x00")
+    reader = SharedMemoryRingBufferReader(
+        ring_buffer.get_name(), start_from_latest=True
+    )
+    assert reader.get_next_sequence() == 1
+    assert reader.read() is None
+    ring_buffer.write(b"\x01")
+    sequence, view = reader.read()
+    assert sequence == 1
+    view.release()
+    reader.close()
+
+
+def test_SharedMemoryRingBufferReader__read__skips_to_oldest_available_slot_after_overrun(
+    ring_buffer,
+):
+    reader = SharedMemoryRingBufferReader(ring_buffer.get_name())
+    for i in range(7):
+        ring_buffer.write(bytes([i]))
+
+    sequence, view = reader.read()
+    assert sequence == 3
+    assert view == b"\x03"
+    view.release()
+    assert reader.get_num_overruns() == 1
+    assert reader.get_num_dropped() == 3
+
+
+def test_SharedMemoryRingBufferReader__read__skips_slot_being_overwritten(ring_buffer):
+    for i in range(4):
+        ring_buffer.write(bytes([i]))
+    reader = SharedMemoryRingBufferReader(ring_buffer.get_name())
+    ring_buffer.reserve().release()
+
+    sequence, view = reader.read()
+    assert sequence == 1
+    assert view == b"\x01"
+    view.release()
+    assert reader.get_num_overruns() == 1
+    assert reader.get_num_dropped() == 1
+    ring_buffer.abort()
+    reader.close()
+
+
+def test_SharedMemoryRingBufferReader__is_valid__returns_false_after_slot_is_overwritten(
+    ring_buffer,
+):
+    reader = SharedMemoryRingBufferReader(ring_buffer.get_name())
+    ring_buffer.write(b"\x00")
+    sequence, view = reader.read()
+    view.release()
+    for i in range(4):
+        ring_buffer.write(bytes([i]))
+    assert reader.is_valid(sequence) is False
+    reader.close()
+
+
+def test_SharedMemoryRingBuffer__data_can_be_read_by_multiple_consumer_processes(
+    ring_buffer,
+):
+    test_reads = [bytes([i]) * (i + 1) for i in range(3)]
+    for test_read in test_reads:
+        ring_buffer.write(test_read)
+    output_queues = [multiprocessing.Queue() for _ in range(2)]
+    consumers = [
+        multiprocessing.Process(
+            target=_read_all_in_other_process,
+            args=(ring_buffer.get_name(), len(test_reads), output_queue),
+        )
+        for output_queue in output_queues
+    ]
+    for consumer in consumers:
+        consumer.start()
+    for output_queue in output_queues:
+        actual = [output_queue.get(timeout=5) for _ in range(len(test_reads))]
+        assert actual == list(enumerate(test_reads))
+    for consumer in consumers:
+        consumer.join()
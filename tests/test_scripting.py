@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+import pytest
+from xem_wrapper import build_start_acquisition_sequence
+from xem_wrapper import ControlSequence
+from xem_wrapper import convert_to_script_argument
+from xem_wrapper import OpalKellyScriptValueOutOfRangeError
+from xem_wrapper import SEQUENCE_STEP_ACTIVATE_TRIGGER_IN
+from xem_wrapper import SEQUENCE_STEP_SET_WIRE_IN
+from xem_wrapper import SEQUENCE_STEP_WRITE_REGISTER
+from xem_wrapper import SequenceStep
+from xem_wrapper import TRIGGER_IN_SPI
+from xem_wrapper import UINT32_MODULUS
+from xem_wrapper import WIRE_IN_NUM_SAMPLES
+from xem_wrapper import WIRE_IN_RESET_MODE
+
+
+@pytest.mark.parametrize(
+    "test_name,test_argument_names,test_description",
+    [
+        ("1st_sequence", (), "raises error for name starting with a digit"),
+        ("my-sequence", (), "raises error for name with a dash"),
+        ("end", (), "raises error for Lua keyword as name"),
+        ("okFP", (), "raises error for name of the device global"),
+        ("my_sequence", ("value", "local"), "raises error for Lua keyword argument"),
+        ("my_sequence", ("value", "value"), "raises error for duplicate arguments"),
+    ],
+)
+def test_ControlSequence__raises_error_for_invalid_names(
+    test_name, test_argument_names, test_description
+):
+    with pytest.raises(ValueError):
+        ControlSequence(test_name, test_argument_names)
+
+
+def test_ControlSequence__adds_chained_steps_in_order():
+    sequence = (
+        ControlSequence("my_sequence", ["value"])
+        .set_wire_in(0x00, "value", 0x0F)
+        .activate_trigger_in(0x40, 3)
+        .write_register(0x10, "value")
+    )
+    assert sequence.get_name() == "my_sequence"
+    assert sequence.get_argument_names() == ("value",)
+    assert sequence.get_steps() == [
+        SequenceStep(SEQUENCE_STEP_SET_WIRE_IN, (0x00, "value", 0x0F)),
+        SequenceStep(SEQUENCE_STEP_ACTIVATE_TRIGGER_IN, (0x40, 3)),
+        SequenceStep(SEQUENCE_STEP_WRITE_REGISTER, (0x10, "value")),
+    ]
+
+
+def test_ControlSequence__raises_error_for_operand_that_is_not_an_argument():
+    sequence = ControlSequence("my_sequence", ("value",))
+    with pytest.raises(ValueError, match="'other'"):
+        sequence.write_register(0x10, "other")
+    assert sequence.get_steps() == []
+
+
+@pytest.mark.parametrize(
+    "test_operand,test_description",
+    [
+        (-1, "raises error for negative operand"),
+        (UINT32_MODULUS, "raises error for operand wider than 32 bits"),
+    ],
+)
+def test_ControlSequence__raises_error_for_fixed_operand_that_is_not_unsigned_32_bit(
+    test_operand, test_description
+):
+    sequence = ControlSequence("my_sequence")
+    with pytest.raises(
+        OpalKellyScriptValueOutOfRangeError, match="must be unsigned 32-bit integers"
+    ):
+        sequence.write_register(0x10, test_operand)
+    assert sequence.get_steps() == []
+
+
+def test_ControlSequence_resolve_steps__substitutes_argument_values():
+    sequence = (
+        ControlSequence("my_sequence", ("addr", "value"))
+        .write_register("addr", "value")
+        .activate_trigger_in(0x40, 0)
+    )
+    assert sequence.resolve_steps((0x20, 5)) == [
+        (SEQUENCE_STEP_WRITE_REGISTER, (0x20, 5)),
+        (SEQUENCE_STEP_ACTIVATE_TRIGGER_IN, (0x40, 0)),
+    ]
+
+
+def test_ControlSequence_resolve_steps__raises_error_for_wrong_number_of_arguments():
+    sequence = ControlSequence("my_sequence", ("addr", "value"))
+    with pytest.raises(ValueError, match="takes 2 arguments, got 1"):
+        sequence.resolve_steps((0x20,))
+
+
+def test_ControlSequence_to_lua__returns_function_that_stops_at_first_error():
+    sequence = (
+        ControlSequence("my_sequence", ("value", "bit"))
+        .set_wire_in(0x00, "value", 0xFF)
+        .activate_trigger_in(0x40, "bit")
+        .write_register(0x10, 7)
+    )
+    assert sequence.to_lua() == (
+        "function my_sequence(value, bit)\n"
+        "    if value < 0 then value = value + 0x100000000 end\n"
+        "    if bit < 0 then bit = bit + 0x100000000 end\n"
+        "    local code\n"
+        "    code = okFP:SetWireInValue(0x0, value, 0xff)\n"
+        "    if code < 0 then return code end\n"
+        "    code = okFP:UpdateWireIns()\n"
+        "    if code < 0 then return code end\n"
+        "    code = okFP:ActivateTriggerIn(0x40, bit)\n"
+        "    if code < 0 then return code end\n"
+        "    code = okFP:WriteRegister(0x10, 0x7)\n"
+        "    if code < 0 then return code end\n"
+        "    return 0\n"
+        "end\n"
+    )
+
+
+@pytest.mark.parametrize(
+    "test_argument,test_description",
+    [
+        (-1, "raises error for negative argument"),
+        (UINT32_MODULUS, "raises error for argument wider than 32 bits"),
+    ],
+)
+def test_ControlSequence_resolve_steps__raises_error_for_argument_that_is_not_unsigned_32_bit(
+    test_argument, test_description
+):
+    sequence = ControlSequence("my_sequence", ("value",)).write_register(0x10, "value")
+    with pytest.raises(
+        OpalKellyScriptValueOutOfRangeError,
+        match="'value' must be an unsigned 32-bit integer",
+    ):
+        sequence.resolve_steps((test_argument,))
+
+
+@pytest.mark.parametrize(
+    "test_value,expected,test_description",
+    [
+        (0, 0, "keeps zero"),
+        (0x7FFFFFFF, 0x7FFFFFFF, "keeps largest signed value"),
+        (0x80000000, -(2 ** 31), "wraps smallest value with the top bit set"),
+        (0xFFFFFFFF, -1, "wraps largest unsigned value"),
+    ],
+)
+def test_convert_to_script_argument__reinterprets_unsigned_value_as_signed(
+    test_value, expected, test_description
+):
+    assert convert_to_script_argument(test_value) == expected
+
+
+def test_ControlSequence_to_lua__returns_function_with_no_steps():
+    assert ControlSequence("empty").to_lua() == (
+        "function empty()\n    local code\n    return 0\nend\n"
+    )
+
+
+@pytest.mark.parametrize(
+    "test_continuous,expected_run_mode_value,test_description",
+    [
+        (True, 0x00000002, "sets continuous run mode"),
+        (False, 0x00000000, "sets single run mode"),
+    ],
+)
+def test_build_start_acquisition_sequence__returns_steps_of_the_individual_calls(
+    test_continuous, expected_run_mode_value, test_description
+):
+    sequence = build_start_acquisition_sequence(continuous=test_continuous)
+    assert sequence.get_name() == "start_acquisition_sequence"
+    assert sequence.resolve_steps((1000,)) == [
+        (SEQUENCE_STEP_SET_WIRE_IN, (WIRE_IN_RESET_MODE, 0x0004, 0x0004)),
+        (SEQUENCE_STEP_SET_WIRE_IN, (WIRE_IN_RESET_MODE, 0x0000, 0x0004)),
+        (
+            SEQUENCE_STEP_SET_WIRE_IN,
+            (WIRE_IN_RESET_MODE, expected_run_mode_value, 0x00000002),
+        ),
+        (SEQUENCE_STEP_SET_WIRE_IN, (WIRE_IN_NUM_SAMPLES, 1000, 0xFFFFFFFF)),
+        (SEQUENCE_STEP_ACTIVATE_TRIGGER_IN, (TRIGGER_IN_SPI, 0)),
+    ]
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import pytest
+from xem_wrapper import MemoryMappedSpillFile
+from xem_wrapper import spill
+
+
+def _chunk(value, num_bytes):
+    return bytearray([value]) * num_bytes
+
+
+def test_MemoryMappedSpillFile__uses_defaults():
+    spill_file = MemoryMappedSpillFile()
+    assert spill_file.get_capacity() == MemoryMappedSpillFile.default_initial_capacity
+    assert spill_file.get_num_chunks() == 0
+    assert spill_file.get_num_bytes() == 0
+    assert spill_file.get_peak_num_bytes() == 0
+    spill_file.close()
+
+
+def test_MemoryMappedSpillFile__raises_error_for_capacity_smaller_than_chunk_header():
+    with pytest.raises(ValueError):
+        MemoryMappedSpillFile(initial_capacity=7)
+
+
+def test_MemoryMappedSpillFile__creates_file_in_directory(mocker, tmp_path):
+    spied_temporary_file = mocker.spy(spill.tempfile, "TemporaryFile")
+    MemoryMappedSpillFile(directory=str(tmp_path), initial_capacity=64).close()
+    spied_temporary_file.assert_called_once_with(dir=str(tmp_path))
+
+
+def test_MemoryMappedSpillFile__pops_chunks_in_order_of_appending():
+    spill_file = MemoryMappedSpillFile(initial_capacity=1024)
+    chunks = [_chunk(1, 10), memoryview(_chunk(2, 0)), bytes(_chunk(3, 100))]
+    for chunk in chunks:
+        spill_file.append(chunk)
+    assert spill_file.get_num_chunks() == 3
+    assert spill_file.get_num_bytes() == 110
+    actual = [spill_file.pop() for _ in range(3)]
+    assert actual == [bytearray(chunk) for chunk in chunks]
+    assert all(isinstance(chunk, bytearray) for chunk in actual)
+    assert spill_file.get_num_chunks() == 0
+    assert spill_file.get_num_bytes() == 0
+    spill_file.close()
+
+
+def test_MemoryMappedSpillFile__appends_while_chunks_are_popped():
+    spill_file = MemoryMappedSpillFile(initial_capacity=64)
+    spill_file.append(_chunk(0, 20))
+    spill_file.append(_chunk(1, 20))
+    assert spill_file.pop() == _chunk(0, 20)
+    spill_file.append(_chunk(2, 20))
+    assert spill_file.pop() == _chunk(1, 20)
+    assert spill_file.pop() == _chunk(2, 20)
+    spill_file.close()
+
+
+def test_MemoryMappedSpillFile__grows_to_fit_chunks_and_shrinks_once_emptied():
+    spill_file = MemoryMappedSpillFile(initial_capacity=64)
+    spill_file.append(_chunk(0, 40))
+    assert spill_file.get_capacity() == 64
+    spill_file.append(_chunk(1, 200))
+    assert spill_file.get_capacity() == 256
+    assert spill_file.pop() == _chunk(0, 40)
+    assert spill_file.get_capacity() == 256
+    assert spill_file.pop() == _chunk(1, 200)
+    assert spill_file.get_capacity() == 64
+    # the emptied file starts again from the beginning
+    spill_file.append(_chunk(2, 40))
+    assert spill_file.get_capacity() == 64
+    assert spill_file.pop() == _chunk(2, 40)
+    spill_file.close()
+
+
+def test_MemoryMappedSpillFile__reuses_space_of_popped_chunks_before_growing():
+    spill_file = MemoryMappedSpillFile(initial_capacity=128)
+    spill_file.append(_chunk(0, 50))
+    spill_file.append(_chunk(1, 10))
+    assert spill_file.pop() == _chunk(0, 50)
+    spill_file.append(_chunk(2, 60))
+    assert spill_file.get_capacity() == 128
+    assert spill_file.pop() == _chunk(1, 10)
+    assert spill_file.pop() == _chunk(2, 60)
+    spill_file.close()
+
+
+def test_MemoryMappedSpillFile__moves_waiting_chunks_to_beginning_once_most_of_file_is_popped():
+    spill_file = MemoryMappedSpillFile(initial_capacity=64)
+    spill_file.append(_chunk(0, 30))
+    spill_file.append(_chunk(1, 5))
+    assert spill_file.pop() == _chunk(0, 30)
+    # the waiting chunk was moved, so the next fits without growing
+    spill_file.append(_chunk(2, 40))
+    assert spill_file.get_capacity() == 64
+    assert spill_file.pop() == _chunk(1, 5)
+    assert spill_file.pop() == _chunk(2, 40)
+    spill_file.close()
+
+
+def test_MemoryMappedSpillFile__stays_bounded_while_consumers_lag_behind():
+    spill_file = MemoryMappedSpillFile(initial_capacity=64)
+    num_chunks_behind = 2
+    for value in range(num_chunks_behind):
+        spill_file.append(_chunk(value, 10))
+    for value in range(num_chunks_behind, 1000):
+        spill_file.append(_chunk(value % 256, 10))
+        assert spill_file.pop() == _chunk((value - num_chunks_behind) % 256, 10)
+        assert spill_file.get_capacity() == 64
+    assert spill_file.get_num_chunks() == num_chunks_behind
+    spill_file.close()
+
+
+def test_MemoryMappedSpillFile__shrinks_after_a_burst_while_consumers_lag_behind():
+    spill_file = MemoryMappedSpillFile(initial_capacity=64)
+    spill_file.append(_chunk(0, 200))
+    spill_file.append(_chunk(1, 10))
+    assert spill_file.get_capacity() == 256
+    assert spill_file.pop() == _chunk(0, 200)
+    assert spill_file.get_capacity() == 64
+    assert spill_file.get_num_chunks() == 1
+    spill_file.append(_chunk(2, 20))
+    assert spill_file.pop() == _chunk(1, 10)
+    assert spill_file.pop() == _chunk(2, 20)
+    spill_file.close()
+
+
+def test_MemoryMappedSpillFile__reports_high_water_mark():
+    spill_file = MemoryMappedSpillFile(initial_capacity=64)
+    spill_file.append(_chunk(0, 30))
+    spill_file.append(_chunk(1, 50))
+    spill_file.pop()
+    spill_file.append(_chunk(2, 10))
+    assert spill_file.get_num_bytes() == 60
+    assert spill_file.get_peak_num_bytes() == 80
+    spill_file.pop()
+    spill_file.pop()
+    assert spill_file.get_peak_num_bytes() == 80
+    spill_file.close()
+
+
+def test_MemoryMappedSpillFile_pop__raises_error_when_empty():
+    spill_file = MemoryMappedSpillFile(initial_capacity=64)
+    with pytest.raises(IndexError):
+        spill_file.pop()
+    spill_file.close()
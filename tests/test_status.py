@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+from stdlib_utils import SimpleMultiprocessingQueue
+from xem_wrapper import BoardStatus
+from xem_wrapper import FrontPanelSimulator
+from xem_wrapper import OkHardwareDeviceNotOpenError
+from xem_wrapper import status
+from xem_wrapper import StatusPoller
+from xem_wrapper import WIRE_OUT_IS_PLL_LOCKED
+from xem_wrapper import WIRE_OUT_IS_SPI_RUNNING
+from xem_wrapper import WIRE_OUT_NUM_WORDS_FIFO
+
+
+class _WireOutReader:
+    def __init__(self, values=None):
+        self.values = values or {
+            WIRE_OUT_IS_SPI_RUNNING: 1,
+            WIRE_OUT_IS_PLL_LOCKED: 0,
+            WIRE_OUT_NUM_WORDS_FIFO: 72,
+        }
+        self.num_calls = 0
+        self.is_called = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, ep_addrs):
+        self.num_calls += 1
+        self.is_called.set()
+        self.release.wait()
+        return {ep_addr: self.values[ep_addr] for ep_addr in ep_addrs}
+
+
+def test_StatusPoller__uses_defaults():
+    status_poller = StatusPoller(_WireOutReader())
+    assert status_poller.get_poll_interval() == StatusPoller.default_poll_interval
+    assert status_poller.get_status_ep_addrs() == StatusPoller.default_status_ep_addrs
+    assert status_poller.get_num_refreshes() == 0
+    assert status_poller.is_running() is False
+
+
+@pytest.mark.parametrize(
+    "test_kwargs,test_description",
+    [
+        ({"poll_interval": 0}, "raises error for zero poll interval"),
+        ({"status_ep_addrs": []}, "raises error for no wire-outs"),
+    ],
+)
+def test_StatusPoller__raises_error_for_invalid_settings(test_kwargs, test_description):
+    with pytest.raises(ValueError):
+        StatusPoller(_WireOutReader(), **test_kwargs)
+
+
+def test_StatusPoller__reads_every_status_with_one_transfer_and_caches_it():
+    reader = _WireOutReader()
+    status_poller = StatusPoller(reader)
+    assert status_poller.is_spi_running() is True
+    assert status_poller.is_pll_locked() is False
+    assert status_poller.get_num_words_fifo() == 72
+    assert reader.num_calls == 1
+    assert status_poller.get_num_refreshes() == 1
+
+    reader.values[WIRE_OUT_NUM_WORDS_FIFO] = 144
+    assert status_poller.refresh().get_num_words_fifo() == 144
+    assert reader.num_calls == 2
+
+
+def test_StatusPoller_get_status__refreshes_only_when_cached_status_is_too_stale(
+    mocker,
+):
+    mocker.patch.object(
+        status.time,
+        "perf_counter",
+        autospec=True,
+        side_effect=[10.0, 10.05, 10.5, 10.5],
+    )
+    reader = _WireOutReader()
+    status_poller = StatusPoller(reader)
+    first_status = status_poller.get_status()
+    assert status_poller.get_status(max_staleness=0.1) is first_status
+    second_status = status_poller.get_status(max_staleness=0.1)
+    assert second_status.timestamp == 10.5
+    assert reader.num_calls == 2
+
+
+def test_StatusPoller__concurrent_readers_share_a_refresh_in_progress():
+    reader = _WireOutReader()
+    reader.release.clear()
+    status_poller = StatusPoller(reader)
+    statuses = []
+
+    def read_status():
+        statuses.append(status_poller.get_status(max_staleness=0))
+
+    threads = [threading.Thread(target=read_status) for _ in range(5)]
+    threads[0].start()
+    assert reader.is_called.wait(timeout=5)
+    for thread in threads[1:]:
+        thread.start()
+    # give the other readers time to start waiting for the refresh in progress
+    time.sleep(0.05)
+    reader.release.set()
+    for thread in threads:
+        thread.join()
+    assert reader.num_calls == 1
+    assert len(statuses) == 5
+    assert all(a_status is statuses[0] for a_status in statuses)
+
+
+def test_StatusPoller__reader_refreshes_again_when_refresh_in_progress_fails():
+    reader = _WireOutReader()
+    reader.release.clear()
+    failures = []
+
+    def read_wire_outs(ep_addrs):
+        if reader.num_calls == 0:
+            reader(ep_addrs)
+            raise OkHardwareDeviceNotOpenError()
+        return reader(ep_addrs)
+
+    status_poller = StatusPoller(read_wire_outs)
+
+    def read_status():
+        try:
+            status_poller.refresh()
+        except OkHardwareDeviceNotOpenError as e:
+            failures.append(e)
+
+    failing_thread = threading.Thread(target=read_status)
+    failing_thread.start()
+    assert reader.is_called.wait(timeout=5)
+    waiting_thread = threading.Thread(target=read_status)
+    waiting_thread.start()
+    time.sleep(0.05)
+    reader.release.set()
+    failing_thread.join()
+    waiting_thread.join()
+    assert len(failures) == 1
+    assert status_poller.get_num_refreshes() == 1
+    assert status_poller.get_status().get_num_words_fifo() == 72
+
+
+def test_StatusPoller_start__refreshes_in_background_until_stopped():
+    reader = _WireOutReader()
+    status_poller = StatusPoller(reader, poll_interval=0.01)
+    status_poller.start()
+    status_poller.start()
+    assert status_poller.is_running() is True
+    time.sleep(0.1)
+    status_poller.stop()
+    status_poller.stop()
+    assert status_poller.is_running() is False
+    num_refreshes = status_poller.get_num_refreshes()
+    assert 2 <= num_refreshes <= 11
+    assert status_poller.get_status(max_staleness=1).get_age() < 1
+    time.sleep(0.03)
+    assert status_poller.get_num_refreshes() == num_refreshes
+
+
+def test_StatusPoller_stop__raises_error_of_background_refresh():
+    def read_wire_outs(ep_addrs):
+        raise OkHardwareDeviceNotOpenError()
+
+    status_poller = StatusPoller(read_wire_outs, poll_interval=0.01)
+    status_poller.start()
+    time.sleep(0.05)
+    with pytest.raises(OkHardwareDeviceNotOpenError):
+        status_poller.stop()
+    assert status_poller.is_running() is False
+
+
+def test_StatusPoller__reads_status_of_FrontPanelSimulator():
+    wire_out_queues = {
+        ep_addr: SimpleMultiprocessingQueue()
+        for ep_addr in StatusPoller.default_status_ep_addrs
+    }
+    wire_out_queues[WIRE_OUT_IS_SPI_RUNNING].put(0)
+    wire_out_queues[WIRE_OUT_IS_PLL_LOCKED].put(1)
+    wire_out_queues[WIRE_OUT_NUM_WORDS_FIFO].put(288)
+    fp = FrontPanelSimulator({"wire_outs": wire_out_queues})
+    fp.initialize_board()
+    assert fp.get_status_poller().get_status() == BoardStatus(
+        fp.get_status_poller().get_status().timestamp,
+        {
+            WIRE_OUT_IS_SPI_RUNNING: 0,
+            WIRE_OUT_IS_PLL_LOCKED: 1,
+            WIRE_OUT_NUM_WORDS_FIFO: 288,
+        },
+    )
+    assert fp.get_status_poller().is_pll_locked() is True
+
+
+def test_StatusPoller_start__counts_refresh_made_by_reader_as_background_refresh():
+    reader = _WireOutReader()
+    status_poller = StatusPoller(reader, poll_interval=10)
+    status_poller.refresh()
+    status_poller.start()
+    time.sleep(0.05)
+    status_poller.stop()
+    assert reader.num_calls == 1
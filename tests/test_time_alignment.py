@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from xem_wrapper import build_round_robins
+from xem_wrapper import NUM_CHANNELS
+from xem_wrapper import OpalKellyNotEnoughTimingPointsError
+from xem_wrapper import SAMPLE_IDX_MODULUS
+from xem_wrapper import SampleClockAligner
+from xem_wrapper import time_alignment
+
+
+def _record_points(aligner, sample_rate, offset, sample_indices, jitter=None):
+    for i, sample_idx in enumerate(sample_indices):
+        host_time = offset + sample_idx / sample_rate
+        if jitter is not None:
+            host_time += jitter[i]
+        aligner.record(int(sample_idx) % SAMPLE_IDX_MODULUS, host_time=host_time)
+
+
+def test_SampleClockAligner__class_attributes():
+    assert SampleClockAligner.default_max_num_points == 256
+
+
+def test_SampleClockAligner__raises_error_with_invalid_configuration():
+    with pytest.raises(ValueError):
+        SampleClockAligner(max_num_points=2)
+
+
+def test_SampleClockAligner__raises_error_until_enough_distinct_points_recorded():
+    aligner = SampleClockAligner()
+    with pytest.raises(OpalKellyNotEnoughTimingPointsError):
+        aligner.unwrap_sample_indices([0])
+    aligner.record(100, host_time=1.0)
+    aligner.record(100, host_time=1.1)
+    aligner.record(100, host_time=1.2)
+    with pytest.raises(OpalKellyNotEnoughTimingPointsError):
+        aligner.get_sample_rate()
+    aligner.reset()
+    assert aligner.get_num_points() == 0
+    with pytest.raises(OpalKellyNotEnoughTimingPointsError):
+        aligner.sample_idx_to_host_time([0])
+
+
+def test_SampleClockAligner__fits_exact_points():
+    aligner = SampleClockAligner()
+    _record_points(aligner, 1000.5, 20.0, np.arange(0, 50000, 1000))
+    assert aligner.get_sample_rate() == pytest.approx(1000.5)
+    assert aligner.get_residual_std() == pytest.approx(0, abs=1e-9)
+
+    actual_times, actual_errors = aligner.sample_idx_to_host_time([0, 2001])
+    np.testing.assert_allclose(actual_times, [20.0, 22.0], atol=1e-9)
+    np.testing.assert_allclose(actual_errors, 0, atol=1e-9)
+    actual_indices, actual_errors = aligner.host_time_to_sample_idx(
+        np.array([20.0, 22.0])
+    )
+    np.testing.assert_allclose(actual_indices, [0, 2001], atol=1e-6)
+    np.testing.assert_allclose(actual_errors, 0, atol=1e-6)
+
+
+def test_SampleClockAligner__fits_only_most_recent_points_and_reports_error():
+    rng = np.random.default_rng(0)
+    aligner = SampleClockAligner(max_num_points=100)
+    _record_points(aligner, 500.0, 0.0, np.arange(0, 100000, 1000))
+    sample_indices = np.arange(100000, 300000, 1000)
+    _record_points(
+        aligner, 2000.0, -150.0, sample_indices, jitter=rng.normal(0, 0.001, 200)
+    )
+    assert aligner.get_num_points() == 100
+    assert aligner.get_sample_rate() == pytest.approx(2000.0, rel=1e-3)
+    assert aligner.get_residual_std() == pytest.approx(0.001, rel=0.3)
+
+    _, actual_errors = aligner.sample_idx_to_host_time([250000, 400000])
+    assert 0 < actual_errors[0] < actual_errors[1] < 0.001
+
+    _, actual_sample_errors = aligner.host_time_to_sample_idx([-25.0, 50.0])
+    # the same uncertainty in time, expressed in samples
+    np.testing.assert_allclose(actual_sample_errors, actual_errors * 2000.0, rtol=1e-3)
+
+
+def test_SampleClockAligner__recomputes_fit_exactly_each_time_window_is_replaced(
+    mocker,
+):
+    rng = np.random.default_rng(0)
+    aligner = SampleClockAligner(max_num_points=10)
+    spied_recompute = mocker.spy(aligner, "_recompute_fit")
+    sample_indices = np.arange(2 ** 40, 2 ** 40 + 1005 * 30000, 30000)
+    _record_points(
+        aligner, 30000.0, 1.0e6, sample_indices, jitter=rng.normal(0, 0.001, 1005)
+    )
+    assert spied_recompute.call_count == 100
+
+    # pylint: disable=protected-access # checking the running sums against the points they summarize
+    points = np.array(aligner._points)
+    deltas_idx = points[:, 0] - points[:, 0].mean()
+    deltas_time = points[:, 1] - points[:, 1].mean()
+    assert aligner._sum_squares_idx == pytest.approx(np.dot(deltas_idx, deltas_idx))
+    assert aligner._sum_products == pytest.approx(np.dot(deltas_idx, deltas_time))
+    assert aligner.get_sample_rate() == pytest.approx(30000.0, rel=1e-3)
+
+
+def test_SampleClockAligner__handles_sample_index_wraparound():
+    aligner = SampleClockAligner()
+    start_idx = SAMPLE_IDX_MODULUS - 3000
+    _record_points(aligner, 1000.0, 5.0, np.arange(start_idx, start_idx + 6000, 1000))
+    assert aligner.get_sample_rate() == pytest.approx(1000.0)
+    np.testing.assert_array_equal(
+        aligner.unwrap_sample_indices([SAMPLE_IDX_MODULUS - 1, 0, 2999]),
+        [SAMPLE_IDX_MODULUS - 1, SAMPLE_IDX_MODULUS, SAMPLE_IDX_MODULUS + 2999],
+    )
+    actual_times, _ = aligner.sample_idx_to_host_time([SAMPLE_IDX_MODULUS - 1000, 1000])
+    np.testing.assert_allclose(
+        actual_times,
+        [
+            5.0 + (SAMPLE_IDX_MODULUS - 1000) / 1000,
+            5.0 + (SAMPLE_IDX_MODULUS + 1000) / 1000,
+        ],
+    )
+
+
+def test_SampleClockAligner__record__uses_perf_counter_by_default(mocker):
+    mocker.patch.object(
+        time_alignment.time, "perf_counter", side_effect=[1.0, 2.0, 3.0]
+    )
+    aligner = SampleClockAligner()
+    for sample_idx in (0, 10, 20):
+        aligner.record(sample_idx)
+    assert aligner.get_sample_rate() == pytest.approx(10)
+
+
+def test_SampleClockAligner__record_fifo_data__records_newest_sample_index():
+    aligner = SampleClockAligner()
+    channel_data = np.zeros((NUM_CHANNELS, 2), dtype=np.uint16)
+    aligner.record_fifo_data(bytearray(0), host_time=0.0)
+    assert aligner.get_num_points() == 0
+    for i in range(3):
+        aligner.record_fifo_data(
+            build_round_robins(channel_data, [i * 100, i * 100 + 50]), host_time=i * 1.0
+        )
+    assert aligner.get_num_points() == 3
+    actual_times, _ = aligner.sample_idx_to_host_time([50])
+    assert actual_times[0] == pytest.approx(0.0)
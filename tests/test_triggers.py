@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+from stdlib_utils import SimpleMultiprocessingQueue
+from xem_wrapper import FrontPanelSimulator
+from xem_wrapper import OkHardwareDeviceNotOpenError
+from xem_wrapper import TriggerOutWaiter
+
+
+def _create_simulator(*ep_addrs):
+    trigger_out_queues = {ep_addr: SimpleMultiprocessingQueue() for ep_addr in ep_addrs}
+    fp = FrontPanelSimulator({"trigger_outs": trigger_out_queues})
+    fp.initialize_board()
+    return fp, trigger_out_queues
+
+
+def test_TriggerOutWaiter__uses_default_poll_settings():
+    fp, _ = _create_simulator()
+    waiter = TriggerOutWaiter(fp)
+    assert waiter.get_front_panel() is fp
+    assert waiter.get_poll_interval() == TriggerOutWaiter.default_min_poll_interval
+    assert waiter.get_num_updates() == 0
+    assert waiter.get_num_waiters() == 0
+
+
+@pytest.mark.parametrize(
+    "test_kwargs,test_description",
+    [
+        ({"min_poll_interval": -0.1}, "raises error with negative min interval"),
+        (
+            {"min_poll_interval": 0.2, "max_poll_interval": 0.1},
+            "raises error with max interval below min interval",
+        ),
+        ({"backoff_factor": 0.5}, "raises error with backoff factor below 1"),
+    ],
+)
+def test_TriggerOutWaiter__raises_error_for_invalid_settings(
+    test_kwargs, test_description
+):
+    fp, _ = _create_simulator()
+    with pytest.raises(ValueError):
+        TriggerOutWaiter(fp, **test_kwargs)
+
+
+def test_TriggerOutWaiter_wait_for_trigger__raises_error_for_empty_mask():
+    fp, _ = _create_simulator()
+    waiter = TriggerOutWaiter(fp)
+    with pytest.raises(ValueError, match="mask"):
+        waiter.wait_for_trigger(0x60, 0)
+
+
+def test_TriggerOutWaiter_wait_for_trigger__returns_true_when_any_bit_of_mask_fires():
+    fp, trigger_out_queues = _create_simulator(0x60)
+    trigger_out_queues[0x60].put(0b0100)
+    waiter = TriggerOutWaiter(fp, min_poll_interval=0)
+    assert waiter.wait_for_trigger(0x60, 0b0110) is True
+    assert waiter.get_num_updates() == 1
+    assert waiter.get_num_waiters() == 0
+
+
+def test_TriggerOutWaiter_wait_for_trigger__returns_false_after_timeout_and_backs_off_to_max_interval():
+    fp, trigger_out_queues = _create_simulator(0x60)
+    trigger_out_queues[0x60].put(0b0001)
+    waiter = TriggerOutWaiter(
+        fp, min_poll_interval=0.001, max_poll_interval=0.004, backoff_factor=2
+    )
+    start = time.perf_counter()
+    assert waiter.wait_for_trigger(0x60, 0b0010, timeout=0.05) is False
+    assert time.perf_counter() - start >= 0.05
+    assert waiter.get_poll_interval() == 0.004
+    assert waiter.get_num_waiters() == 0
+
+
+def test_TriggerOutWaiter_wait_for_trigger__resets_poll_interval_after_trigger_fires():
+    fp, trigger_out_queues = _create_simulator(0x60)
+    waiter = TriggerOutWaiter(
+        fp, min_poll_interval=0.001, max_poll_interval=0.004, backoff_factor=2
+    )
+    waiter.wait_for_trigger(0x60, 0b0001, timeout=0.03)
+    assert waiter.get_poll_interval() == 0.004
+
+    trigger_out_queues[0x60].put(0b0001)
+    assert waiter.wait_for_trigger(0x60, 0b0001, timeout=1) is True
+    assert waiter.get_poll_interval() == 0.001
+
+
+def test_TriggerOutWaiter_wait_for_trigger__one_update_serves_waiters_on_different_endpoints_and_bits(
+    mocker,
+):
+    fp, trigger_out_queues = _create_simulator(0x60, 0x61)
+    spied_update = mocker.spy(fp, "update_trigger_outs")
+    waiter = TriggerOutWaiter(fp, min_poll_interval=0.5, max_poll_interval=0.5)
+    waits = [(0x60, 0b0001), (0x60, 0b0010), (0x61, 0b1000)]
+    results = [None] * len(waits)
+
+    def wait(wait_idx):
+        results[wait_idx] = waiter.wait_for_trigger(*waits[wait_idx], timeout=5)
+
+    threads = [threading.Thread(target=wait, args=(i,)) for i in range(len(waits))]
+    for thread in threads:
+        thread.start()
+    while waiter.get_num_waiters() < len(waits):
+        time.sleep(0.001)
+    trigger_out_queues[0x60].put(0b0011)
+    trigger_out_queues[0x61].put(0b1000)
+    for thread in threads:
+        thread.join()
+
+    assert results == [True, True, True]
+    assert spied_update.call_count == 1
+    assert waiter.get_num_updates() == 1
+
+
+def test_TriggerOutWaiter_wait_for_trigger__other_waiters_time_out_while_one_is_polling():
+    fp, trigger_out_queues = _create_simulator(0x60)
+    waiter = TriggerOutWaiter(fp, min_poll_interval=0.2, max_poll_interval=0.2)
+    results = []
+    polling_thread = threading.Thread(
+        target=lambda: results.append(waiter.wait_for_trigger(0x60, 0b0001, timeout=5))
+    )
+    polling_thread.start()
+    while waiter.get_num_waiters() < 1:
+        time.sleep(0.001)
+
+    assert waiter.wait_for_trigger(0x60, 0b0010, timeout=0.01) is False
+
+    trigger_out_queues[0x60].put(0b0001)
+    polling_thread.join()
+    assert results == [True]
+
+
+def test_TriggerOutWaiter_wait_for_trigger__raises_error_from_update_and_recovers(
+    mocker,
+):
+    fp, trigger_out_queues = _create_simulator(0x60)
+    waiter = TriggerOutWaiter(fp, min_poll_interval=0)
+    mocker.patch.object(
+        fp,
+        "update_trigger_outs",
+        autospec=True,
+        side_effect=[OkHardwareDeviceNotOpenError(), None],
+    )
+    mocker.patch.object(fp, "is_triggered", autospec=True, return_value=True)
+    with pytest.raises(OkHardwareDeviceNotOpenError):
+        waiter.wait_for_trigger(0x60, 0b0001)
+    assert waiter.get_num_waiters() == 0
+
+    assert waiter.wait_for_trigger(0x60, 0b0001, timeout=1) is True